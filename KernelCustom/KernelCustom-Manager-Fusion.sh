@@ -14,12 +14,17 @@ LOG_DIR="${BASE_DIR}/logs"
 ARCHIVE_DIR="${BASE_DIR}/archive"
 SRC_BASE="${BASE_DIR}/sources"
 TEMPLATE_DIR="${BASE_DIR}/templates"
+CACHE_DIR="${BASE_DIR}/cache"
+RELEASES_TTL=${RELEASES_TTL:-60}
+
+# Ligne de commande de KernelCustomManager (moteur des templates déclaratifs *.conf)
+KCM_CLI="${KCM_CLI:-$(dirname "$BASE_DIR")/KernelCustomManager/kernelcustom_cli.py}"
 
 # Répertoire des sources du noyau (utilisé par les fonctions build)
 SRC_DIR="${SRC_BASE}/linux"
 
 # Création des répertoires si absents
-mkdir -p "${REPO_DIR}" "${LOG_DIR}" "${ARCHIVE_DIR}" "${SRC_BASE}" "${TEMPLATE_DIR}" "${SRC_DIR}" || {
+mkdir -p "${REPO_DIR}" "${LOG_DIR}" "${ARCHIVE_DIR}" "${SRC_BASE}" "${TEMPLATE_DIR}" "${SRC_DIR}" "${CACHE_DIR}" || {
     echo "Erreur : impossible de créer un ou plusieurs répertoires."
     exit 1
 }
@@ -39,6 +44,40 @@ ok()    { echo -e "${GREEN}${BOLD}[OK]${RESET} $*"| tee -a "${LOG_FILE}"; }
 warn()  { echo -e "${YELLOW}${BOLD}[!]${RESET} $*"| tee -a "${LOG_FILE}"; }
 err()   { echo -e "${RED}${BOLD}[X]${RESET} $*"   | tee -a "${LOG_FILE}" >&2; }
 
+# --- Rétention des journaux ---
+# Anciens journaux compressés (zstd, sinon gzip), supprimés au-delà de
+# LOG_RETENTION_DAYS jours ou des LOG_KEEP plus récents
+LOG_RETENTION_DAYS=${LOG_RETENTION_DAYS:-60}
+LOG_KEEP=${LOG_KEEP:-20}
+
+rotate_logs() {
+  local f
+  for f in "${LOG_DIR}"/kernelcustom-*.log; do
+    [[ -f "$f" && "$f" != "${LOG_FILE}" ]] || continue
+    if command -v zstd >/dev/null 2>&1; then
+      zstd -q --rm -T0 "$f" 2>/dev/null || true
+    else
+      gzip -q "$f" 2>/dev/null || true
+    fi
+  done
+  find "${LOG_DIR}" -maxdepth 1 -name 'kernelcustom-*.log.*' -mtime +"${LOG_RETENTION_DAYS}" -delete 2>/dev/null || true
+  ls -1t "${LOG_DIR}"/kernelcustom-*.log.* 2>/dev/null | tail -n +"$((LOG_KEEP + 1))" | while read -r f; do
+    rm -f -- "$f"
+  done || true
+}
+
+# Première erreur réelle d'un journal, avec quelques lignes de contexte
+show_first_error() {
+  local line
+  line=$(grep -n -m1 -E '(error:|fatal error|undefined reference|^ERROR:)' "${LOG_FILE}" | cut -d: -f1 || true)
+  [[ -n "${line}" ]] || line=$(grep -n -m1 -E '^make(\[[0-9]+\])?: \*\*\*' "${LOG_FILE}" | cut -d: -f1 || true)
+  [[ -n "${line}" ]] || return 0
+  warn "Première erreur (ligne ${line} de ${LOG_FILE}) :"
+  sed -n "$((line > 5 ? line - 5 : 1)),$((line + 10))p" "${LOG_FILE}"
+}
+
+rotate_logs
+
 # --- Gestion des erreurs avec trap personnalisé ---
 error_occurred=0
 error_function=""
@@ -446,19 +485,51 @@ packages_menu() {
 # 3. Compiler & packager
 # =========================
 
+# releases.json en cache : réutilisé pendant RELEASES_TTL minutes, puis revalidé
+# par requête conditionnelle (ETag / If-Modified-Since) ; cache périmé si hors ligne
+fetch_releases_json() {
+  local cache="${CACHE_DIR}/releases.json"
+  local etag="${CACHE_DIR}/releases.etag"
+
+  if [[ -s "$cache" && -n "$(find "$cache" -mmin -"${RELEASES_TTL}" 2>/dev/null)" ]]; then
+    echo "$cache"
+    return 0
+  fi
+
+  local tmp="${cache}.tmp"
+  local args=(-fsS --max-time 10 -o "$tmp" --etag-save "$etag")
+  if [[ -s "$cache" ]]; then
+    args+=(-z "$cache")
+    [[ -s "$etag" ]] && args+=(--etag-compare "$etag")
+  fi
+
+  if curl "${args[@]}" https://www.kernel.org/releases.json 2>/dev/null; then
+    if [[ -s "$tmp" ]]; then
+      mv -f "$tmp" "$cache"
+    else
+      # 304 Not Modified : rafraîchir la date du cache
+      rm -f "$tmp"
+      touch "$cache"
+    fi
+  else
+    rm -f "$tmp"
+  fi
+
+  echo "$cache"
+}
+
 choose_kernel_version() {
   pre_checks || return 1
   box "Téléchargement du kernel stable"
   info "Récupération de la version stable depuis kernel.org..."
 
-  local latest=""
+  local latest="" releases
+  releases=$(fetch_releases_json)
   if command -v jq >/dev/null 2>&1; then
-    latest=$(curl -s https://www.kernel.org/releases.json \
-      | jq -r '.releases[] | select(.moniker=="stable") | .version' \
+    latest=$(jq -r '.releases[] | select(.moniker=="stable") | .version' "$releases" 2>/dev/null \
       | head -n1)
   else
-    latest=$(curl -s https://www.kernel.org/releases.json \
-      | grep -Eo '"version"\s*:\s*"[0-9]+\.[0-9]+(\.[0-9]+)?"' \
+    latest=$(grep -Eo '"version"\s*:\s*"[0-9]+\.[0-9]+(\.[0-9]+)?"' "$releases" 2>/dev/null \
       | head -n1 | cut -d'"' -f4)
   fi
 
@@ -483,7 +554,11 @@ choose_kernel_version() {
     run_cmd curl -fL -o "${SRC_BASE}/${archive}" "${url}"
 
     info "Extraction..."
-    run_cmd tar -xf "${SRC_BASE}/${archive}" -C "${SRC_BASE}"
+    # Threads utiles seulement pour les archives à plusieurs blocs xz ;
+    # celles de kernel.org n'en ont qu'un (décompression sur un seul cœur)
+    local xz_prog="xz -T0"
+    command -v pixz >/dev/null 2>&1 && xz_prog="pixz"
+    run_cmd tar -I "$xz_prog" -xf "${SRC_BASE}/${archive}" -C "${SRC_BASE}"
 
     info "Nettoyage..."
     run_cmd rm -f "${SRC_BASE}/${archive}"
@@ -549,9 +624,24 @@ choose_kernel_version() {
         fi
 
         local template_path="${templates[$((idx-1))]}"
-        info "Copie du template sélectionné : $(basename "$template_path")"
-        run_cmd cp "$template_path" "${BASE_DIR}/linux/.config"
-        (cd "${BASE_DIR}/linux" && run_cmd make olddefconfig)
+        if [[ "$template_path" == *.conf ]]; then
+          # Template déclaratif : pile résolue et appliquée en une passe par KernelCustomManager
+          if [[ ! -f "$KCM_CLI" ]]; then
+            err "Moteur de templates introuvable : $KCM_CLI (variable KCM_CLI)"
+            read -rp "Entrée pour revenir..." _
+            continue
+          fi
+          if [[ ! -f "${BASE_DIR}/linux/.config" ]]; then
+            info "Pas de .config : départ de la configuration système actuelle ($(uname -r))"
+            run_cmd cp "/boot/config-$(uname -r)" "${BASE_DIR}/linux/.config"
+          fi
+          info "Application du template : $(basename "$template_path")"
+          run_cmd python3 "$KCM_CLI" --base-dir "$BASE_DIR" configure --template "$template_path"
+        else
+          info "Copie du template sélectionné : $(basename "$template_path")"
+          run_cmd cp "$template_path" "${BASE_DIR}/linux/.config"
+          (cd "${BASE_DIR}/linux" && run_cmd make olddefconfig)
+        fi
         if [[ "${DRYRUN:-0}" -eq 0 ]]; then
           (cd "${BASE_DIR}/linux" && make menuconfig)
         else
@@ -739,6 +829,7 @@ fi
 
     if ! ${fakeroot_cmd} make -j"${JOBS}" bindeb-pkg LOCALVERSION="${make_suffix}" 2>&1 | tee -a "${LOG_FILE}"; then
       err "Compilation échouée"
+      show_first_error
       popd >/dev/null
       read -rp "Entrée pour revenir..." _
       return 1
@@ -0,0 +1,176 @@
+"""
+Module des répertoires de compilation hors arbre (make O=...)
+Un répertoire d'objets persistant par couple (version des sources, profil),
+avec nettoyage des répertoires inutilisés par âge et par taille totale ;
+un répertoire en cours de compilation est verrouillé et jamais supprimé
+"""
+
+import fcntl
+import glob
+import json
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+
+
+class BuildDirManager:
+    """Gestion des répertoires d'objets persistants"""
+
+    META_FILE = ".kcm-build.json"
+    LOCK_FILE = ".kcm-build.lock"
+    # .config des sources mis de côté pendant une compilation hors arbre
+    SOURCE_CONFIG = ".config.source"
+
+    def __init__(self, builds_dir, max_age_days=30, max_total_size=60 * 1024 ** 3):
+        self.builds_dir = Path(builds_dir)
+        self.max_age_days = max_age_days
+        self.max_total_size = max_total_size
+
+        self.builds_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(version, label):
+        """
+        Nom de répertoire pour (version, profil)
+        Volontairement sans empreinte de la config : quand la config d'un profil
+        change, kbuild (auto.conf, fixdep) ne recompile que les objets concernés ;
+        un répertoire par empreinte reconstruirait tout à chaque retouche
+        """
+        label = re.sub(r'[^A-Za-z0-9._-]+', '_', label or "default").strip('_') or "default"
+        return f"{version}--{label}"
+
+    def get_build_dir(self, version, label):
+        """
+        Retourne le répertoire d'objets pour (version, profil), créé si besoin,
+        et met à jour sa date de dernière utilisation
+        """
+        build_dir = self.builds_dir / self.make_key(version, label)
+        build_dir.mkdir(parents=True, exist_ok=True)
+
+        meta = self._load_meta(build_dir)
+        meta.update({
+            'version': version,
+            'label': label or "default",
+            'last_used': time.time()
+        })
+        meta.setdefault('created', meta['last_used'])
+        with open(build_dir / self.META_FILE, 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        return build_dir
+
+    def lock(self, build_dir):
+        """
+        Marque un répertoire comme utilisé (flock partagé) : garbage_collect, y compris
+        depuis un autre processus, ne le supprime pas avant release
+        Retourne: descripteur à passer à release
+        """
+        build_dir = Path(build_dir)
+        while True:
+            build_dir.mkdir(parents=True, exist_ok=True)
+            path = build_dir / self.LOCK_FILE
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            try:
+                # Supprimé par un nettoyage pendant l'attente : recommencer avec un nouveau fichier
+                if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                    return fd
+            except OSError:
+                pass
+            os.close(fd)
+
+    @staticmethod
+    def release(fd):
+        os.close(fd)
+
+    def stashed_source_configs(self, version):
+        """
+        .config des sources laissés dans les répertoires d'objets de version par des
+        compilations hors arbre interrompues (arrêt brutal), le plus récent d'abord
+        """
+        stashes = self.builds_dir.glob(f"{glob.escape(version)}--*/{self.SOURCE_CONFIG}")
+        return sorted(stashes, key=lambda path: path.stat().st_mtime, reverse=True)
+
+    def _remove_unused(self, build_dir):
+        """
+        Supprime un répertoire sauf s'il est verrouillé par une compilation ou
+        garde encore le .config des sources ; retourne True si supprimé
+        """
+        if (build_dir / self.SOURCE_CONFIG).exists():
+            return False
+        try:
+            fd = os.open(build_dir / self.LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        try:
+            shutil.rmtree(build_dir, ignore_errors=True)
+        finally:
+            os.close(fd)
+        return True
+
+    def _load_meta(self, build_dir):
+        try:
+            with open(build_dir / self.META_FILE, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _dir_size(path):
+        total = 0
+        for root, _dirs, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.lstat(os.path.join(root, name)).st_size
+                except OSError:
+                    continue
+        return total
+
+    def list_build_dirs(self):
+        """Liste les répertoires d'objets avec version, profil, dernière utilisation et taille"""
+        result = []
+        for build_dir in self.builds_dir.iterdir():
+            if not build_dir.is_dir():
+                continue
+            meta = self._load_meta(build_dir)
+            result.append({
+                'path': build_dir,
+                'version': meta.get('version', '?'),
+                'label': meta.get('label', '?'),
+                'last_used': meta.get('last_used', build_dir.stat().st_mtime),
+                'size': self._dir_size(build_dir)
+            })
+        return sorted(result, key=lambda d: d['last_used'], reverse=True)
+
+    def garbage_collect(self, keep=None):
+        """
+        Supprime les répertoires plus vieux que max_age_days, puis les moins
+        récemment utilisés tant que la taille totale dépasse max_total_size
+        keep: répertoire à ne jamais supprimer (compilation en cours) ; les répertoires
+            verrouillés (lock) par d'autres compilations sont également ignorés
+        Retourne: liste des répertoires supprimés
+        """
+        keep = Path(keep) if keep else None
+        removed = []
+        now = time.time()
+
+        build_dirs = self.list_build_dirs()
+        total = sum(d['size'] for d in build_dirs)
+
+        # Du moins récemment utilisé au plus récent
+        for entry in reversed(build_dirs):
+            if keep and entry['path'] == keep:
+                continue
+            too_old = now - entry['last_used'] > self.max_age_days * 86400
+            if (too_old or total > self.max_total_size) and self._remove_unused(entry['path']):
+                total -= entry['size']
+                removed.append(entry['path'])
+
+        return removed
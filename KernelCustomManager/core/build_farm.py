@@ -0,0 +1,274 @@
+"""
+Module de compilation distribuée (distcc)
+Liste des hôtes d'aide avec leur nombre de slots, contrôle de santé par une
+vraie compilation via le protocole distcc, variables make/environnement avec
+repli automatique sur la compilation locale, et hôtes d'aide locaux (distccd
+sur la boucle locale) pour essayer la ferme sur une seule machine
+"""
+
+import json
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+DEFAULT_PORT = 3632
+
+# Source prétraité compilé par le contrôle de santé
+PROBE_SOURCE = b"int kcm_probe(void) { return 42; }\n"
+
+
+def parse_host(spec):
+    """'hôte[:port][/slots]' -> dict host, port, slots"""
+    spec, _, slots = spec.partition('/')
+    host, _, port = spec.rpartition(':') if spec.count(':') == 1 else (spec, '', '')
+    return {
+        'host': host,
+        'port': int(port) if port else DEFAULT_PORT,
+        'slots': int(slots) if slots else 4
+    }
+
+
+def _send_token(sock, name, value):
+    sock.sendall(f"{name}{value:08x}".encode())
+
+
+def _send_string(sock, name, data):
+    _send_token(sock, name, len(data))
+    sock.sendall(data)
+
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connexion fermée")
+        data += chunk
+    return data
+
+
+def _recv_token(sock, expected):
+    token = _recv_exact(sock, 12).decode('ascii', errors='replace')
+    if token[:4] != expected:
+        raise ConnectionError(f"réponse inattendue : {token[:4]}")
+    return int(token[4:], 16)
+
+
+class BuildFarm:
+    """Hôtes d'aide distcc configurés et plan de distribution d'une compilation"""
+
+    # Délai (secondes) de connexion et de compilation du contrôle de santé
+    PROBE_TIMEOUT = 5
+
+    def __init__(self, config_file):
+        self.config_file = Path(config_file)
+        self.hosts = self._load()
+
+    # --- Configuration ---
+
+    def _load(self):
+        try:
+            with open(self.config_file, 'r') as f:
+                return json.load(f).get('hosts', [])
+        except (OSError, ValueError):
+            return []
+
+    def _save(self):
+        with open(self.config_file, 'w') as f:
+            json.dump({'hosts': self.hosts}, f, indent=2)
+
+    def get_hosts(self):
+        return [dict(host) for host in self.hosts]
+
+    def add_host(self, host, port=DEFAULT_PORT, slots=4):
+        """Ajoute (ou met à jour) un hôte d'aide ; slots = jobs de compilation confiés à l'hôte"""
+        self.remove_host(host, port, save=False)
+        self.hosts.append({'host': host, 'port': port, 'slots': max(1, slots), 'enabled': True})
+        self._save()
+
+    def remove_host(self, host, port=DEFAULT_PORT, save=True):
+        self.hosts = [h for h in self.hosts if (h['host'], h['port']) != (host, port)]
+        if save:
+            self._save()
+
+    def set_enabled(self, host, port, enabled):
+        for entry in self.hosts:
+            if (entry['host'], entry['port']) == (host, port):
+                entry['enabled'] = enabled
+        self._save()
+
+    @staticmethod
+    def is_available():
+        """Vérifie que distcc est installé"""
+        return shutil.which("distcc") is not None
+
+    # --- Contrôle de santé ---
+
+    @classmethod
+    def probe(cls, host, port=DEFAULT_PORT, timeout=None, compiler="gcc"):
+        """
+        Compile un petit source prétraité sur l'hôte (protocole distcc)
+        Retourne: dict ok, latency_ms (connexion), seconds (compilation), error
+        """
+        timeout = timeout or cls.PROBE_TIMEOUT
+        start = time.monotonic()
+        try:
+            with socket.create_connection((host, port), timeout=timeout) as sock:
+                latency_ms = int((time.monotonic() - start) * 1000)
+                sock.settimeout(timeout)
+                args = [compiler, "-c", "kcm_probe.i", "-o", "kcm_probe.o"]
+                _send_token(sock, "DIST", 1)
+                _send_token(sock, "ARGC", len(args))
+                for arg in args:
+                    _send_string(sock, "ARGV", arg.encode())
+                _send_string(sock, "DOTI", PROBE_SOURCE)
+
+                _recv_token(sock, "DONE")
+                status = _recv_token(sock, "STAT")
+                stderr = _recv_exact(sock, _recv_token(sock, "SERR"))
+                _recv_exact(sock, _recv_token(sock, "SOUT"))
+                obj_size = _recv_token(sock, "DOTO")
+                _recv_exact(sock, obj_size)
+        except (OSError, ConnectionError, ValueError) as e:
+            return {'ok': False, 'error': str(e)}
+
+        if status != 0 or not obj_size:
+            message = stderr.decode(errors='replace').strip() or f"statut {status}"
+            return {'ok': False, 'latency_ms': latency_ms, 'error': message}
+        return {'ok': True, 'latency_ms': latency_ms, 'seconds': round(time.monotonic() - start, 2)}
+
+    def check_hosts(self, hosts=None):
+        """Contrôle de santé en parallèle : [(hôte, résultat de probe)]"""
+        hosts = self.hosts if hosts is None else hosts
+        results = [None] * len(hosts)
+
+        def check(index, entry):
+            results[index] = self.probe(entry['host'], entry['port'])
+
+        threads = [threading.Thread(target=check, args=(i, entry), daemon=True) for i, entry in enumerate(hosts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return list(zip(hosts, results))
+
+    # --- Plan de distribution ---
+
+    def prepare(self, local_slots, extra_hosts=None):
+        """
+        Sélectionne les hôtes activés qui répondent au contrôle de santé
+        extra_hosts: hôtes supplémentaires (hôtes d'aide locaux)
+        Retourne: dict hosts (DISTCC_HOSTS), jobs, healthy, unhealthy ;
+            None si aucun hôte n'est utilisable (compilation locale)
+        """
+        candidates = [h for h in self.hosts if h.get('enabled', True)] + list(extra_hosts or [])
+        healthy, unhealthy = [], []
+        for entry, result in self.check_hosts(candidates):
+            if result['ok']:
+                healthy.append(dict(entry, latency_ms=result['latency_ms']))
+            else:
+                unhealthy.append({'host': entry['host'], 'port': entry['port'], 'error': result['error']})
+
+        if not healthy:
+            return None
+
+        # distcc remplit les hôtes dans l'ordre : les plus proches d'abord,
+        # la machine locale (qui prétraite aussi tous les sources) en dernier
+        healthy.sort(key=lambda h: h['latency_ms'])
+        specs = [f"{h['host']}:{h['port']}/{h['slots']}" for h in healthy]
+        specs.append(f"localhost/{max(1, local_slots)}")
+        return {
+            'hosts': " ".join(specs),
+            'jobs': sum(h['slots'] for h in healthy) + max(1, local_slots),
+            'healthy': [f"{h['host']}:{h['port']}/{h['slots']}" for h in healthy],
+            'unhealthy': unhealthy
+        }
+
+    @staticmethod
+    def apply(plan, env, make_vars):
+        """
+        Configure l'environnement et les variables make pour distcc
+        Avec ccache, distcc est appelé par ccache (CCACHE_PREFIX) en cas de miss ;
+        CCACHE_PREFIX vaut pour tout make, HOSTCC n'appelle donc plus ccache
+        Retourne: nouvelles variables make
+        """
+        env['DISTCC_HOSTS'] = plan['hosts']
+        # Hôte en échec pendant la compilation : l'objet est recompilé localement
+        env['DISTCC_FALLBACK'] = "1"
+        env.setdefault('DISTCC_DIR', str(Path(tempfile.gettempdir()) / f"kernelcustom-distcc-{os.getuid()}"))
+
+        compiler = next((var[3:] for var in make_vars if var.startswith("CC=")), "gcc")
+        # HOSTCC reste local : les outils de kbuild s'exécutent sur cette machine
+        if compiler.split()[0] == "ccache":
+            env['CCACHE_PREFIX'] = "distcc"
+            return [f"HOSTCC={var[len('HOSTCC=ccache '):]}" if var.startswith("HOSTCC=ccache ") else var
+                    for var in make_vars]
+        return [var for var in make_vars if not var.startswith("CC=")] + [f"CC=distcc {compiler}"]
+
+
+class LocalHelpers:
+    """
+    Hôtes d'aide distccd lancés sur la boucle locale (127.0.0.1), pour
+    vérifier la compilation distribuée sur une seule machine
+    """
+
+    def __init__(self, count=2, base_port=3700, slots=2):
+        self.count = count
+        self.base_port = base_port
+        self.slots = slots
+        self.processes = []
+
+    @staticmethod
+    def is_available():
+        return shutil.which("distccd") is not None
+
+    def start(self, timeout=10):
+        """Démarre les distccd et attend qu'ils acceptent les connexions ; retourne les hôtes"""
+        hosts = []
+        for i in range(self.count):
+            port = self.base_port + i
+            self.processes.append(subprocess.Popen(
+                ["distccd", "--daemon", "--no-detach", "--listen", "127.0.0.1",
+                 "--allow", "127.0.0.1", "--port", str(port), "--jobs", str(self.slots)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            ))
+            hosts.append({'host': "127.0.0.1", 'port': port, 'slots': self.slots})
+
+        deadline = time.monotonic() + timeout
+        for entry in hosts:
+            while True:
+                try:
+                    socket.create_connection((entry['host'], entry['port']), timeout=1).close()
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        self.stop()
+                        raise RuntimeError(f"distccd ne répond pas sur le port {entry['port']}")
+                    time.sleep(0.1)
+        return hosts
+
+    def stop(self):
+        for process in self.processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.processes = []
+
+    def __enter__(self):
+        self.hosts = self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
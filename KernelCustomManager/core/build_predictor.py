@@ -0,0 +1,136 @@
+"""
+Module de prédiction de la durée de compilation
+Modèle linéaire appris sur l'historique : durée = surcoût fixe + coût par objet
+compilé, corrigé par le parallélisme et le taux de hits ccache
+"""
+
+import hashlib
+import os
+
+from core.build_progress import read_config_symbols
+
+
+# Objets compilés par option activée, quand le nombre d'objets est inconnu
+OBJECTS_PER_OPTION = 3.0
+
+# Coût relatif d'un hit ccache par rapport à une vraie compilation
+CCACHE_HIT_COST = 0.1
+
+# Secondes CPU par objet sans historique (gcc -O2, machine moyenne)
+DEFAULT_SECONDS_PER_OBJECT = 0.6
+
+
+def config_features(config_file):
+    """
+    Caractéristiques d'un .config pour le modèle
+    Retourne: dict config_options (y + m), config_modules (m), config_hash
+    """
+    symbols = read_config_symbols(config_file)
+    digest = hashlib.sha1()
+    for name in sorted(symbols):
+        digest.update(f"{name}={symbols[name]}\n".encode())
+    return {
+        'config_options': len(symbols),
+        'config_modules': sum(1 for value in symbols.values() if value == 'm'),
+        'config_hash': digest.hexdigest()[:12]
+    }
+
+
+class BuildPredictor:
+    """Prédiction de durée et détection de régressions à partir de l'historique"""
+
+    # Au-delà de ce rapport durée réelle / prédite, la compilation est signalée
+    REGRESSION_RATIO = 1.5
+    # ... et seulement si l'écart dépasse ce nombre de secondes
+    REGRESSION_MIN_SECONDS = 120
+
+    def __init__(self, history, cpu_count=None):
+        self.cpu_count = cpu_count or os.cpu_count() or 1
+        self.samples = []
+        for entry in history:
+            sample = self._sample(entry)
+            if sample:
+                self.samples.append(sample)
+        self.overhead, self.slope = self._fit()
+
+    def _work(self, objects, jobs, hit_rate):
+        """Travail effectif : objets pondérés par le cache, divisés par le parallélisme réel"""
+        parallel = max(1, min(jobs or self.cpu_count, self.cpu_count))
+        effective = objects * (1 - hit_rate * (1 - CCACHE_HIT_COST))
+        return effective / parallel
+
+    def _sample(self, entry):
+        """(travail, durée, config) d'une compilation réussie de l'historique, ou None"""
+        details = entry.get('details') or {}
+        if not entry.get('success') or details.get('cancelled') or not entry.get('duration_seconds'):
+            return None
+        objects = details.get('objects') or details.get('objects_expected')
+        if not objects and details.get('config_options'):
+            objects = details['config_options'] * OBJECTS_PER_OPTION
+        if not objects:
+            return None
+        hit_rate = (details.get('ccache') or {}).get('hit_rate', 0.0)
+        return (self._work(objects, details.get('jobs'), hit_rate), entry['duration_seconds'], details.get('config_hash'))
+
+    def _fit(self):
+        """Moindres carrés sur (travail, durée) ; pente seule si les points sont trop proches"""
+        if not self.samples:
+            return 0.0, DEFAULT_SECONDS_PER_OBJECT
+
+        points = [(x, y) for x, y, _ in self.samples]
+        n = len(points)
+        mean_x = sum(x for x, _ in points) / n
+        mean_y = sum(y for _, y in points) / n
+        var_x = sum((x - mean_x) ** 2 for x, _ in points)
+
+        if n >= 3 and var_x > 0:
+            slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+            overhead = mean_y - slope * mean_x
+            if slope > 0 and overhead >= 0:
+                return overhead, slope
+
+        # Proportionnel : durée = pente x travail
+        total_x = sum(x for x, _ in points)
+        if total_x <= 0:
+            return 0.0, DEFAULT_SECONDS_PER_OBJECT
+        return 0.0, sum(y for _, y in points) / total_x
+
+    def sample_count(self):
+        return len(self.samples)
+
+    def seconds_per_object(self, jobs):
+        """Durée murale d'une vraie compilation d'objet avec jobs en parallèle (None sans historique)"""
+        if not self.samples:
+            return None
+        return self.slope / max(1, min(jobs or self.cpu_count, self.cpu_count))
+
+    def predict(self, objects, jobs, hit_rate=0.0):
+        """Durée prédite (secondes) pour un nombre d'objets, de jobs et un taux de hits"""
+        return int(self.overhead + self.slope * self._work(objects, jobs, hit_rate))
+
+    def check_regression(self, objects, jobs, hit_rate, duration, config_hash):
+        """
+        Compare la durée réelle d'une compilation à la prédiction, si la même
+        config a déjà été compilée avec succès
+        Retourne: dict predicted/ratio si la compilation est anormalement lente, sinon None
+        """
+        if self.sample_count() < 2 or not objects:
+            return None
+        if not any(sample_hash == config_hash for _, _, sample_hash in self.samples):
+            return None
+        predicted = self.predict(objects, jobs, hit_rate)
+        if predicted <= 0:
+            return None
+        ratio = duration / predicted
+        if ratio >= self.REGRESSION_RATIO and duration - predicted >= self.REGRESSION_MIN_SECONDS:
+            return {'predicted': predicted, 'ratio': round(ratio, 2)}
+        return None
+
+    @staticmethod
+    def last_hit_rate(history, config_hash):
+        """Taux de hits ccache de la dernière compilation de la même config (0 si inconnu)"""
+        for entry in history:
+            details = entry.get('details') or {}
+            if details.get('config_hash') == config_hash and details.get('ccache'):
+                return details['ccache'].get('hit_rate', 0.0)
+        return 0.0
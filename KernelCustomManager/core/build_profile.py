@@ -0,0 +1,124 @@
+"""
+Module de profilage de la compilation
+Mesures par objet (durée, RSS maximal) produites par core/compile_timer.py,
+stockées compressées par compilation, avec rapports et comparaison
+"""
+
+import gzip
+import os
+import sys
+from pathlib import Path
+
+
+# Enveloppe lancée par kbuild pour chaque compilation / édition de liens
+TIMER_SCRIPT = Path(__file__).resolve().parent / "compile_timer.py"
+
+
+def wrapper_command():
+    """Préfixe de commande à placer devant le compilateur (python3 -S compile_timer.py)"""
+    return f"{sys.executable} -S {TIMER_SCRIPT}"
+
+
+def profile_make_vars(make_vars):
+    """
+    Ajoute l'enveloppe de mesure devant CC et LD dans une liste de variables make
+    (en conservant un éventuel CC="ccache gcc")
+    """
+    wrapper = wrapper_command()
+    result = []
+    compiler = "gcc"
+    for var in make_vars:
+        if var.startswith("CC="):
+            compiler = var[3:]
+        else:
+            result.append(var)
+    return result + [f"CC={wrapper} {compiler}", f"LD={wrapper} ld"]
+
+
+class BuildProfile:
+    """Mesures d'une compilation : liste de (objet, durée ms, RSS Ko, outil)"""
+
+    def __init__(self, records):
+        self.records = records
+
+    @classmethod
+    def compact(cls, raw_file, profile_file):
+        """
+        Convertit le fichier brut de compile_timer en fichier .tsv.gz trié
+        (durée décroissante) et supprime le fichier brut
+        Retourne: chemin du profil, ou None si aucune mesure
+        """
+        profile = cls.load(raw_file, compressed=False)
+        try:
+            os.remove(raw_file)
+        except OSError:
+            pass
+        if not profile.records:
+            return None
+
+        with gzip.open(profile_file, 'wt') as f:
+            for target, elapsed_ms, rss_kb, tool in sorted(profile.records, key=lambda r: r[1], reverse=True):
+                f.write(f"{elapsed_ms}\t{rss_kb}\t{tool}\t{target}\n")
+        return profile_file
+
+    @classmethod
+    def load(cls, profile_file, compressed=True):
+        """Charge un profil (.tsv.gz, ou brut si compressed=False)"""
+        records = []
+        opener = gzip.open if compressed else open
+        try:
+            with opener(profile_file, 'rt', errors='replace') as f:
+                for line in f:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) == 4 and parts[0].isdigit() and parts[1].isdigit():
+                        records.append((parts[3], int(parts[0]), int(parts[1]), parts[2]))
+        except (OSError, EOFError):
+            pass
+        return cls(records)
+
+    def total_ms(self):
+        return sum(r[1] for r in self.records)
+
+    def peak_rss(self):
+        return max((r[2] for r in self.records), default=0)
+
+    def slowest(self, count=20):
+        """Objets les plus longs : [(objet, ms, RSS Ko, outil)]"""
+        return sorted(self.records, key=lambda r: r[1], reverse=True)[:count]
+
+    @staticmethod
+    def _directory(target, depth):
+        parts = [part for part in Path(target).parts[:-1] if part not in ('/', '..', '.')]
+        return "/".join(parts[:depth]) or "."
+
+    def by_directory(self, depth=2):
+        """Temps cumulé par sous-système : [(répertoire, ms, nombre d'objets)] décroissant"""
+        totals = {}
+        for target, elapsed_ms, _rss, _tool in self.records:
+            directory = self._directory(target, depth)
+            total, count = totals.get(directory, (0, 0))
+            totals[directory] = (total + elapsed_ms, count + 1)
+        return sorted(((d, t, c) for d, (t, c) in totals.items()), key=lambda r: r[1], reverse=True)
+
+    def diff(self, other, count=20):
+        """
+        Compare ce profil à un profil de référence (other)
+        Retourne: dict objects [(objet, ms réf, ms, écart)] et directories
+        [(répertoire, ms réf, ms, écart)], triés par écart décroissant
+        """
+        def delta_rows(current, reference):
+            rows = [(key, reference.get(key, 0), value, value - reference.get(key, 0))
+                    for key, value in current.items()]
+            rows += [(key, value, 0, -value) for key, value in reference.items() if key not in current]
+            return sorted(rows, key=lambda r: abs(r[3]), reverse=True)[:count]
+
+        mine = {r[0]: r[1] for r in self.records}
+        theirs = {r[0]: r[1] for r in other.records}
+        my_dirs = {d: t for d, t, _ in self.by_directory()}
+        their_dirs = {d: t for d, t, _ in other.by_directory()}
+
+        return {
+            'objects': delta_rows(mine, theirs),
+            'directories': delta_rows(my_dirs, their_dirs),
+            'total_delta_ms': self.total_ms() - other.total_ms()
+        }
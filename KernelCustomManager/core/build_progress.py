@@ -0,0 +1,190 @@
+"""
+Module de suivi de la compilation
+Analyse de la sortie de make (lignes kbuild CC/LD/AR...), estimation du nombre
+d'objets à compiler à partir du .config et calcul de l'avancement et de l'ETA
+"""
+
+import platform
+import re
+import time
+from collections import deque
+from pathlib import Path
+
+from core.kernel_config import read_symbols
+
+
+# Ligne kbuild en mode silencieux : "  CC [M]  drivers/foo/bar.o"
+KBUILD_LINE = re.compile(r'^\s{2}([A-Z][A-Z0-9_]*)\s+(\[M\]\s+)?(\S+)')
+
+# Commandes kbuild produisant un objet compilé
+OBJECT_COMMANDS = {'CC', 'AS', 'RUSTC'}
+
+# Affectations Kbuild : obj-y, obj-$(CONFIG_FOO), ext4-objs, lib-y...
+ASSIGNMENT = re.compile(r'^([A-Za-z0-9_.-]+?)-(y|m|objs|\$\((CONFIG_[A-Za-z0-9_]+)\))\s*[:+]?=\s*(.*)$')
+
+# Répertoires de premier niveau construits par le Makefile principal
+TOP_DIRS = ["init", "usr", "kernel", "certs", "mm", "fs", "ipc", "security", "crypto",
+            "block", "io_uring", "drivers", "sound", "net", "lib", "virt", "rust"]
+
+# Architecture machine -> répertoire arch/
+ARCH_DIRS = {'x86_64': 'x86', 'i686': 'x86', 'i386': 'x86', 'aarch64': 'arm64',
+             'armv7l': 'arm', 'riscv64': 'riscv', 'ppc64le': 'powerpc', 's390x': 's390',
+             'loongarch64': 'loongarch'}
+
+
+def read_config_symbols(config_file):
+    """Options activées d'un .config : {'CONFIG_FOO': 'y' ou 'm', ...}"""
+    return read_symbols(config_file)
+
+
+def _read_kbuild_file(directory):
+    """Lit Kbuild (prioritaire) ou Makefile d'un répertoire, lignes continuées jointes"""
+    for name in ("Kbuild", "Makefile"):
+        path = directory / name
+        if path.is_file():
+            try:
+                text = path.read_text(errors='replace')
+            except OSError:
+                return []
+            return text.replace('\\\n', ' ').splitlines()
+    return []
+
+
+def estimate_object_count(source_dir, config_file, arch=None):
+    """
+    Estime le nombre d'objets compilés pour une config en parcourant les
+    Makefiles kbuild des répertoires activés (les ifeq/ifdef sont ignorés)
+    Retourne: nombre d'objets (0 si les sources sont illisibles)
+    """
+    source_dir = Path(source_dir)
+    symbols = read_config_symbols(config_file)
+    arch = arch or ARCH_DIRS.get(platform.machine(), platform.machine())
+
+    def enabled(condition, symbol):
+        return condition in ('y', 'm', 'objs') or symbols.get(symbol) in ('y', 'm')
+
+    def count_dir(directory, seen):
+        if directory in seen or not directory.is_dir():
+            return 0
+        seen.add(directory)
+
+        lists = {}
+        for line in _read_kbuild_file(directory):
+            match = ASSIGNMENT.match(line.strip())
+            if match and enabled(match.group(2), match.group(3)):
+                tokens = [t for t in match.group(4).split() if '$' not in t and not t.startswith('#')]
+                lists.setdefault(match.group(1), []).extend(tokens)
+
+        total = 0
+        for token in lists.get('obj', []) + lists.get('lib', []):
+            if token.endswith('/'):
+                total += count_dir(directory / token.rstrip('/'), seen)
+            elif token.endswith('.o'):
+                # Objet composite (ext4.o := balloc.o ...) : compter ses constituants
+                parts = [t for t in lists.get(token[:-2], []) if t.endswith('.o')]
+                total += len(parts) or 1
+        return total
+
+    seen = set()
+    total = 0
+    for name in TOP_DIRS + [f"arch/{arch}"]:
+        total += count_dir(source_dir / name, seen)
+    return total
+
+
+class BuildProgress:
+    """Avancement d'une compilation à partir des lignes de sortie de make"""
+
+    # Fenêtre glissante (secondes) pour le débit d'objets utilisé par l'ETA
+    RATE_WINDOW = 60
+
+    def __init__(self, expected_objects=0):
+        self.expected_objects = expected_objects
+        self.objects_done = 0
+        self.stage = 'prepare'
+        self.current = None
+        self.start_time = time.time()
+        # Durée totale prédite par l'historique (BuildPredictor), 0 si inconnue
+        self.predicted_duration = 0
+        self._recent = deque()
+
+    def set_stage(self, stage):
+        """Étape imposée par le superviseur (signature, empaquetage...)"""
+        self.stage = stage
+
+    def feed(self, line):
+        """
+        Analyse une ligne de sortie de make
+        Retourne: True si l'avancement a changé
+        """
+        match = KBUILD_LINE.match(line)
+        if not match:
+            return False
+
+        command, module, target = match.groups()
+        if command in OBJECT_COMMANDS and target.endswith('.o') and not target.endswith('.mod.o'):
+            if self.stage == 'prepare':
+                self.stage = 'compile'
+            self.objects_done += 1
+            self.current = target
+            now = time.time()
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > self.RATE_WINDOW:
+                self._recent.popleft()
+            return True
+
+        if command == 'LD' and 'vmlinux' in target and not module:
+            self.stage = 'link'
+        elif command == 'MODPOST' or (command == 'LD' and module):
+            self.stage = 'modules'
+        else:
+            return False
+        self.current = target
+        return True
+
+    def percent(self):
+        """Pourcentage d'objets compilés (plafonné à 99 avant la fin)"""
+        if self.stage in ('sign', 'package', 'collect', 'done'):
+            return 100
+        if not self.expected_objects:
+            return 0
+        return min(99, int(self.objects_done * 100 / self.expected_objects))
+
+    def rate(self):
+        """Objets par seconde sur la fenêtre glissante"""
+        if len(self._recent) < 2:
+            return 0.0
+        span = self._recent[-1] - self._recent[0]
+        return (len(self._recent) - 1) / span if span > 0 else 0.0
+
+    def eta_seconds(self):
+        """
+        Temps restant estimé, ou None
+        Au début la prédiction de l'historique domine, puis le débit d'objets
+        mesuré prend le relais à mesure que la compilation avance
+        """
+        elapsed = time.time() - self.start_time
+        predicted = max(0, self.predicted_duration - elapsed) if self.predicted_duration else None
+
+        rate = self.rate()
+        if not rate or not self.expected_objects or self.stage not in ('prepare', 'compile'):
+            return int(predicted) if predicted is not None and self.stage != 'done' else None
+
+        measured = max(0, self.expected_objects - self.objects_done) / rate
+        if predicted is None:
+            return int(measured)
+        weight = min(1.0, self.objects_done / self.expected_objects)
+        return int((1 - weight) * predicted + weight * measured)
+
+    def snapshot(self):
+        """État courant (dict sérialisable)"""
+        return {
+            'stage': self.stage,
+            'percent': self.percent(),
+            'objects_done': self.objects_done,
+            'objects_expected': self.expected_objects,
+            'current': self.current,
+            'elapsed': int(time.time() - self.start_time),
+            'eta': self.eta_seconds(),
+            'predicted': self.predicted_duration or None
+        }
@@ -0,0 +1,487 @@
+"""
+Module de la file de compilation
+Plusieurs variantes (sources, config/profil, suffixe) compilées à la suite ou
+en parallèle dans un budget global de jobs partagé via un jobserver GNU make.
+La file est enregistrée sur disque et reprise au redémarrage de l'application.
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import uuid
+from datetime import datetime
+
+from core.builder import KernelBuilder
+from core.tree_lock import SourceTreeBusy
+
+
+class JobServer:
+    """
+    Jobserver GNU make partagé entre plusieurs make indépendants
+    Chaque make client possède un jeton implicite : le tube contient
+    slots - clients jetons pour ne jamais dépasser slots jobs au total
+    """
+
+    def __init__(self, slots, clients=1):
+        self.slots = slots
+        self.read_fd, self.write_fd = os.pipe()
+        os.write(self.write_fd, b'+' * max(0, slots - clients))
+
+    @property
+    def fds(self):
+        return (self.read_fd, self.write_fd)
+
+    def makeflags(self):
+        """MAKEFLAGS rattachant make au jobserver"""
+        return f" -j --jobserver-auth={self.read_fd},{self.write_fd}"
+
+    def close(self):
+        for fd in self.fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    @staticmethod
+    def is_supported():
+        """--jobserver-auth est disponible depuis GNU make 4.2"""
+        try:
+            output = subprocess.run(["make", "--version"], capture_output=True, text=True).stdout
+        except OSError:
+            return False
+        match = re.search(r'GNU Make (\d+)\.(\d+)', output)
+        return bool(match) and (int(match.group(1)), int(match.group(2))) >= (4, 2)
+
+
+class BuildQueue:
+    """File de compilation persistante avec ordonnancement dans un budget de jobs"""
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCESS = "success"
+    STATUS_FAILED = "failed"
+    STATUS_CANCELLED = "cancelled"
+
+    # Config des sources mise de côté pendant les compilations hors arbre de la file
+    STASH_NAME = ".config.kcm-queue"
+
+    def __init__(self, kernel_manager, cpu_budget=None, max_parallel=None):
+        self.kernel_manager = kernel_manager
+        self.queue_dir = kernel_manager.base_dir / "queue"
+        self.queue_file = self.queue_dir / "queue.json"
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._builders = {}
+        self._tree_users = {}
+        self._tree_locks = {}
+        self._waiting_for_tree = False
+        self._jobserver = None
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._shutting_down = False
+        self.callback = None
+
+        self._load()
+        # Budget par défaut : CPU, limité par la mémoire disponible
+        self.cpu_budget = (cpu_budget or self._state.get('cpu_budget')
+                           or kernel_manager.resource_policy.recommended_jobs()['jobs'])
+        self.max_parallel = max_parallel or self._state.get('max_parallel') or 2
+        self._recover()
+
+    # --- Persistance ---
+
+    def _load(self):
+        try:
+            with open(self.queue_file, 'r') as f:
+                self._state = json.load(f)
+        except (OSError, ValueError):
+            self._state = {}
+        self._state.setdefault('jobs', [])
+        self._state.setdefault('active', False)
+
+    def _save(self):
+        with self._lock:
+            self._state['cpu_budget'] = self.cpu_budget
+            self._state['max_parallel'] = self.max_parallel
+            tmp = self.queue_file.with_suffix('.tmp')
+            with open(tmp, 'w') as f:
+                json.dump(self._state, f, indent=2)
+            os.replace(tmp, self.queue_file)
+
+    def _recover(self):
+        """Après un arrêt brutal : jobs interrompus remis en attente, configs restaurées"""
+        for job in self._state['jobs']:
+            if job['status'] == self.STATUS_RUNNING:
+                job['status'] = self.STATUS_PENDING
+                job['stage'] = None
+        for stash in self.kernel_manager.sources_dir.glob(f"linux-*/{self.STASH_NAME}"):
+            if not (stash.parent / ".config").exists():
+                shutil.move(str(stash), str(stash.parent / ".config"))
+        self._save()
+
+    # --- Gestion des jobs ---
+
+    def add_job(self, version, profile=None, config_file=None, suffix="",
+                use_ccache=False, use_fakeroot=True, disable_module_compression=False):
+        """
+        Ajoute une variante à la file
+        La config (profil, fichier, ou .config actuel par défaut) est copiée
+        dans la file : la modifier ensuite n'affecte pas le job
+        Retourne: identifiant du job
+        """
+        km = self.kernel_manager
+        source_dir = km.sources_dir / f"linux-{version}"
+        if not source_dir.is_dir():
+            raise FileNotFoundError(str(source_dir))
+
+        if profile:
+            if not km.profile_store.exists(profile):
+                raise FileNotFoundError(str(km.profiles_dir / f"{profile}.delta"))
+        elif not config_file:
+            config_file = km.base_dir / "linux" / ".config"
+            profile = km.get_active_profile()
+        if config_file and not os.path.exists(config_file):
+            raise FileNotFoundError(str(config_file))
+
+        job_id = uuid.uuid4().hex[:8]
+        snapshot = self.queue_dir / f"{job_id}.config"
+        if config_file:
+            shutil.copy(config_file, snapshot)
+        else:
+            # Profil stocké en delta : .config complet reconstruit
+            km.profile_store.write(profile, snapshot)
+
+        job = {
+            'id': job_id,
+            'version': version,
+            'profile': profile,
+            'suffix': suffix,
+            'label': f"{profile or 'custom'}{suffix}",
+            'config_file': str(snapshot),
+            'use_ccache': use_ccache,
+            'use_fakeroot': use_fakeroot,
+            'disable_module_compression': disable_module_compression,
+            'status': self.STATUS_PENDING,
+            'stage': None,
+            'created': datetime.now().isoformat(),
+            'started': None,
+            'finished': None,
+            'log': None,
+            'packages': [],
+            'error': None
+        }
+        with self._lock:
+            self._state['jobs'].append(job)
+            self._save()
+        self._notify(job)
+        self._wakeup.set()
+        return job_id
+
+    def get_jobs(self):
+        """Copie de la liste des jobs, dans l'ordre de la file"""
+        with self._lock:
+            return [dict(job) for job in self._state['jobs']]
+
+    def _find(self, job_id):
+        for job in self._state['jobs']:
+            if job['id'] == job_id:
+                return job
+        return None
+
+    def remove_job(self, job_id):
+        """Retire un job qui n'est pas en cours (signalé avec removed=True)"""
+        with self._lock:
+            job = self._find(job_id)
+            if not job or job['status'] == self.STATUS_RUNNING:
+                return False
+            self._state['jobs'].remove(job)
+            self._save()
+        try:
+            os.remove(job['config_file'])
+        except OSError:
+            pass
+        self._notify(dict(job, removed=True))
+        return True
+
+    def cancel_job(self, job_id):
+        """Annule un job en attente ou interrompt un job en cours"""
+        with self._lock:
+            job = self._find(job_id)
+            if not job:
+                return False
+            if job['status'] == self.STATUS_PENDING:
+                job['status'] = self.STATUS_CANCELLED
+                self._save()
+                self._notify(job)
+                return True
+            builder = self._builders.get(job_id)
+        if builder:
+            builder.cancel()
+            return True
+        return False
+
+    def retry_job(self, job_id):
+        """Remet en attente un job terminé"""
+        with self._lock:
+            job = self._find(job_id)
+            if not job or job['status'] in (self.STATUS_PENDING, self.STATUS_RUNNING):
+                return False
+            job.update({'status': self.STATUS_PENDING, 'stage': None, 'error': None})
+            self._save()
+        self._notify(job)
+        self._wakeup.set()
+        return True
+
+    def clear_finished(self):
+        """Retire les jobs terminés (succès, échec, annulés)"""
+        with self._lock:
+            finished = [job['id'] for job in self._state['jobs']
+                        if job['status'] not in (self.STATUS_PENDING, self.STATUS_RUNNING)]
+        for job_id in finished:
+            self.remove_job(job_id)
+        return len(finished)
+
+    # --- Ordonnancement ---
+
+    def is_active(self):
+        """La file démarre-t-elle les jobs en attente ?"""
+        return self._state['active']
+
+    def start(self, callback=None):
+        """
+        Démarre l'ordonnanceur (thread d'arrière-plan)
+        callback(job) est appelé depuis ce thread à chaque changement d'état
+        """
+        if callback:
+            self.callback = callback
+        with self._lock:
+            self._state['active'] = True
+            self._save()
+            if self._thread and self._thread.is_alive():
+                self._wakeup.set()
+                return
+            self._thread = threading.Thread(target=self._scheduler_loop, daemon=True)
+            self._thread.start()
+
+    def pause(self):
+        """N'ouvre plus de nouveaux jobs ; les jobs en cours se terminent"""
+        with self._lock:
+            self._state['active'] = False
+            self._save()
+        self._wakeup.set()
+
+    def wait(self):
+        """Bloque jusqu'à ce que la file soit vide ou en pause (ligne de commande)"""
+        thread = self._thread
+        if thread:
+            thread.join()
+
+    def set_limits(self, cpu_budget, max_parallel):
+        """
+        Budget global de jobs make et nombre de variantes compilées en même temps
+        Appliqué au prochain démarrage de la file (le jobserver est recréé)
+        """
+        with self._lock:
+            self.cpu_budget = max(1, int(cpu_budget))
+            self.max_parallel = max(1, int(max_parallel))
+            self._save()
+
+    def shutdown(self):
+        """
+        Fermeture de l'application : interrompt les compilations en cours,
+        qui seront reprises depuis le début au prochain démarrage
+        """
+        with self._lock:
+            self._shutting_down = True
+            builders = list(self._builders.values())
+            for job in self._state['jobs']:
+                if job['status'] == self.STATUS_RUNNING:
+                    job['status'] = self.STATUS_PENDING
+                    job['stage'] = None
+            self._save()
+        for builder in builders:
+            builder.cancel()
+
+    def _notify(self, job):
+        if self.callback:
+            self.callback(dict(job))
+
+    def _running_count(self):
+        return sum(1 for job in self._state['jobs'] if job['status'] == self.STATUS_RUNNING)
+
+    def _next_job(self):
+        """
+        Premier job en attente dont le répertoire d'objets n'est pas déjà utilisé
+        et dont les sources ne sont pas compilées ou modifiées ailleurs (interface,
+        ligne de commande) ; ces jobs-là attendent que l'arbre se libère
+        """
+        busy = {(job['version'], job['label']) for job in self._state['jobs']
+                if job['status'] == self.STATUS_RUNNING}
+        self._waiting_for_tree = False
+        for job in self._state['jobs']:
+            if job['status'] != self.STATUS_PENDING or (job['version'], job['label']) in busy:
+                continue
+            source_dir = self.kernel_manager.sources_dir / f"linux-{job['version']}"
+            if source_dir not in self._tree_users and self.kernel_manager.source_tree_lock(source_dir).is_busy():
+                self._waiting_for_tree = True
+                continue
+            return job
+        return None
+
+    def _scheduler_loop(self):
+        while True:
+            with self._lock:
+                running = self._running_count()
+                if not self._state['active'] and running == 0:
+                    self._thread = None
+                    return
+                job = None
+                if self._state['active'] and running < self.max_parallel:
+                    job = self._next_job()
+                if job is None and running == 0 and not self._waiting_for_tree:
+                    # Plus rien à faire : la file s'arrête, les jetons perdus sont oubliés
+                    self._close_jobserver()
+                    self._thread = None
+                    return
+                if job:
+                    job.update({
+                        'status': self.STATUS_RUNNING,
+                        'stage': 'prepare',
+                        'started': datetime.now().isoformat(),
+                        'finished': None,
+                        'error': None
+                    })
+                    self._save()
+                    threading.Thread(target=self._run_job, args=(job,), daemon=True).start()
+            if job:
+                self._notify(job)
+                continue
+            self._wakeup.wait(5)
+            self._wakeup.clear()
+
+    def _get_jobserver(self):
+        """Jobserver partagé, ou None si make est trop ancien (-j réparti à la place)"""
+        if self._jobserver is None and JobServer.is_supported():
+            self._jobserver = JobServer(self.cpu_budget, self.max_parallel)
+        return self._jobserver
+
+    def _close_jobserver(self):
+        if self._jobserver:
+            self._jobserver.close()
+            self._jobserver = None
+
+    def _acquire_tree(self, source_dir):
+        """
+        Prépare un arbre de sources pour des compilations O= concurrentes :
+        kbuild refuse O= si les sources contiennent un .config ou des fichiers générés.
+        Le verrou partagé de l'arbre est pris d'abord : si une compilation dans l'arbre
+        ou une modification du .config est en cours, rien n'est touché (SourceTreeBusy)
+        """
+        with self._lock:
+            users = self._tree_users.get(source_dir, 0)
+            if not users:
+                tree_lock = self.kernel_manager.source_tree_lock(source_dir)
+                tree_lock.acquire()
+                self._tree_locks[source_dir] = tree_lock
+            self._tree_users[source_dir] = users + 1
+            if users:
+                return
+            config = source_dir / ".config"
+            if config.exists():
+                shutil.move(str(config), str(source_dir / self.STASH_NAME))
+            if (source_dir / "include" / "config").exists() or list(source_dir.glob("arch/*/include/generated")):
+                subprocess.run(["make", "-s", "mrproper"], cwd=str(source_dir), capture_output=True)
+
+    def _release_tree(self, source_dir):
+        with self._lock:
+            self._tree_users[source_dir] -= 1
+            if self._tree_users[source_dir]:
+                return
+            del self._tree_users[source_dir]
+            stash = source_dir / self.STASH_NAME
+            if stash.exists() and not (source_dir / ".config").exists():
+                shutil.move(str(stash), str(source_dir / ".config"))
+            self._tree_locks.pop(source_dir).release()
+
+    def _run_job(self, job):
+        km = self.kernel_manager
+        source_dir = km.sources_dir / f"linux-{job['version']}"
+
+        def on_event(event):
+            name = event.get('event')
+            if name == 'progress':
+                # Avancement en mémoire seulement : pas d'écriture disque à chaque objet
+                job['percent'] = event['percent']
+                job['eta'] = event['eta']
+                self._notify(job)
+                return
+            with self._lock:
+                if name == 'stage':
+                    job['stage'] = event['stage']
+                    job['log'] = event.get('log', job['log'])
+                elif name == 'error':
+                    job['error'] = event.get('message')
+                else:
+                    return
+                self._save()
+            self._notify(job)
+
+        builder = KernelBuilder(km, event_callback=on_event)
+        with self._lock:
+            self._builders[job['id']] = builder
+            jobserver = self._get_jobserver()
+
+        result = {'success': False}
+        try:
+            try:
+                self._acquire_tree(source_dir)
+            except SourceTreeBusy as e:
+                # Pris entre-temps par l'interface ou la ligne de commande : le job attend
+                with self._lock:
+                    del self._builders[job['id']]
+                    job.update({'status': self.STATUS_PENDING, 'stage': None, 'error': str(e)})
+                    self._save()
+                self._notify(job)
+                self._wakeup.set()
+                return
+            try:
+                result = builder.build(
+                    jobs=max(1, self.cpu_budget // self.max_parallel),
+                    suffix=job['suffix'],
+                    use_fakeroot=job['use_fakeroot'],
+                    use_ccache=job['use_ccache'],
+                    disable_module_compression=job['disable_module_compression'],
+                    source_dir=source_dir,
+                    config_file=job['config_file'],
+                    label=job['label'],
+                    jobserver=jobserver,
+                    # Compilations en arrière-plan : toujours confinées
+                    limit_resources=True
+                )
+            finally:
+                self._release_tree(source_dir)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+
+        with self._lock:
+            del self._builders[job['id']]
+            if self._shutting_down:
+                return
+            if result.get('cancelled'):
+                job['status'] = self.STATUS_CANCELLED
+            else:
+                job['status'] = self.STATUS_SUCCESS if result['success'] else self.STATUS_FAILED
+            job.update({
+                'stage': result.get('stage'),
+                'finished': datetime.now().isoformat(),
+                'log': result.get('log'),
+                'packages': result.get('packages', []),
+                'error': job['error'] or result.get('error')
+            })
+            self._save()
+        self._notify(job)
+        self._wakeup.set()
@@ -0,0 +1,212 @@
+"""
+Module de compilation en mémoire (tmpfs)
+Place le répertoire d'objets hors arbre sur un tmpfs quand la mémoire libre
+le permet, et le recopie sur disque si la pression mémoire augmente.
+Le tmpfs part des objets du répertoire persistant (compilation incrémentale)
+et ceux-ci sont remis à jour à la fin d'une compilation réussie
+"""
+
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from core.build_dirs import BuildDirManager
+from core.build_progress import read_config_symbols
+from core.resource_policy import ResourcePolicy, read_meminfo
+
+
+# Taille moyenne (Mo) du répertoire d'objets par objet compilé
+MB_PER_OBJECT = 0.15
+# ... avec les informations de débogage (CONFIG_DEBUG_INFO)
+MB_PER_OBJECT_DEBUG = 0.7
+
+
+def _tree_size_mb(path):
+    """Taille (Mo) d'une arborescence (rapide sur tmpfs)"""
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total // (1024 * 1024)
+
+
+def _sync_tree(src, dst, ignore=()):
+    """
+    Recopie src dans dst (dates conservées), en remplaçant fichiers et liens
+    symboliques existants (copytree échoue sur un lien déjà présent, comme
+    le lien source créé par kbuild dans le répertoire d'objets)
+    """
+    src, dst = Path(src), Path(dst)
+    for root, dirs, files in os.walk(src):
+        target_root = dst / Path(root).relative_to(src)
+        target_root.mkdir(parents=True, exist_ok=True)
+        for name in list(dirs):
+            if name in ignore:
+                dirs.remove(name)
+            elif (Path(root) / name).is_symlink():
+                # os.walk ne descend pas dans les liens : recréé comme lien
+                files.append(name)
+        for name in files:
+            if name in ignore:
+                continue
+            path, target = Path(root) / name, target_root / name
+            if target.is_symlink() or target.is_file():
+                target.unlink()
+            elif target.is_dir():
+                shutil.rmtree(target)
+            if path.is_symlink():
+                os.symlink(os.readlink(path), target)
+            else:
+                shutil.copy2(path, target)
+
+
+class TmpfsStaging:
+    """Répertoire d'objets temporaire en mémoire, adossé au répertoire persistant sur disque"""
+
+    ROOT = Path("/dev/shm")
+    # Intervalle (secondes) de surveillance de la mémoire
+    POLL_INTERVAL = 1.0
+    # Espace libre minimal (Mo) sur le tmpfs avant de basculer sur disque
+    MIN_TMPFS_FREE_MB = 512
+
+    def __init__(self, disk_dir, jobs_memory_mb=0, on_pressure=None):
+        self.disk_dir = Path(disk_dir)
+        # Mémoire à laisser disponible au démarrage : jobs de compilation et système
+        self.reserve_mb = jobs_memory_mb + ResourcePolicy.MEMORY_RESERVE_MB
+        # on_pressure() : appelé depuis le thread de surveillance pour interrompre make
+        self.on_pressure = on_pressure
+        self.tmp_dir = self.ROOT / f"kernelcustom-{os.getuid()}" / self.disk_dir.name
+        self.current_dir = self.disk_dir
+        self.spill_requested = False
+        self.spilled = False
+        self.synced = False
+        self.used_mb = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def is_available(cls):
+        """Le point de montage est-il un tmpfs accessible en écriture ?"""
+        try:
+            with open('/proc/mounts', 'r') as f:
+                mounts = {parts[1]: parts[2] for parts in (line.split() for line in f) if len(parts) > 2}
+        except OSError:
+            return False
+        return mounts.get(str(cls.ROOT)) == 'tmpfs' and os.access(cls.ROOT, os.W_OK)
+
+    @staticmethod
+    def estimate_size_mb(objects, config_file, history=None, config_hash=None):
+        """
+        Place nécessaire (Mo) pour les objets : mesure d'une compilation en
+        mémoire précédente de la même config, sinon estimation par objet
+        """
+        for entry in history or []:
+            details = entry.get('details') or {}
+            used = (details.get('staging') or {}).get('used_mb')
+            if used and config_hash and details.get('config_hash') == config_hash:
+                return int(used * 1.1)
+        debug = read_config_symbols(config_file).get('CONFIG_DEBUG_INFO') == 'y' if config_file else False
+        return int(max(objects, 1000) * (MB_PER_OBJECT_DEBUG if debug else MB_PER_OBJECT) * 1.2)
+
+    @classmethod
+    def tmpfs_free_mb(cls):
+        try:
+            stat = os.statvfs(cls.ROOT)
+        except OSError:
+            return 0
+        return stat.f_bavail * stat.f_frsize // (1024 * 1024)
+
+    def fits(self, required_mb):
+        """
+        Les objets tiennent-ils en mémoire ?
+        Retourne: (bool, raison si non)
+        """
+        if not self.is_available():
+            return False, f"{self.ROOT} n'est pas un tmpfs accessible"
+        available = read_meminfo()['available_mb'] - self.reserve_mb
+        if required_mb > available:
+            return False, f"mémoire insuffisante ({required_mb} Mo requis, {max(0, available)} Mo disponibles)"
+        if required_mb > self.tmpfs_free_mb() - self.MIN_TMPFS_FREE_MB:
+            return False, f"{self.ROOT} trop petit ({self.tmpfs_free_mb()} Mo libres)"
+        return True, None
+
+    def start(self):
+        """
+        Crée le répertoire en mémoire à partir du répertoire disque (objets et
+        config, dates conservées : make ne recompile que ce qui a changé)
+        et surveille la mémoire
+        """
+        self.tmp_dir.parent.mkdir(parents=True, exist_ok=True)
+        os.chmod(self.tmp_dir.parent, 0o700)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        # Verrou, métadonnées et .config des sources restent propres au répertoire disque
+        _sync_tree(self.disk_dir, self.tmp_dir,
+                   ignore=(BuildDirManager.LOCK_FILE, BuildDirManager.META_FILE, BuildDirManager.SOURCE_CONFIG))
+        self.current_dir = self.tmp_dir
+        self._thread = threading.Thread(target=self._monitor, daemon=True)
+        self._thread.start()
+        return self.tmp_dir
+
+    def _under_pressure(self):
+        return (read_meminfo()['available_mb'] < ResourcePolicy.MEMORY_RESERVE_MB // 2
+                or self.tmpfs_free_mb() < self.MIN_TMPFS_FREE_MB)
+
+    def _monitor(self):
+        while not self._stop.wait(self.POLL_INTERVAL):
+            if self._under_pressure():
+                self.spill_requested = True
+                if self.on_pressure:
+                    self.on_pressure()
+                return
+
+    def _stop_monitor(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def spill(self):
+        """
+        Recopie les objets sur disque (dates conservées : make reprend où il
+        s'était arrêté) et libère la mémoire
+        Retourne: répertoire disque
+        """
+        self._stop_monitor()
+        self.used_mb = _tree_size_mb(self.tmp_dir)
+        _sync_tree(self.tmp_dir, self.disk_dir)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        self.current_dir = self.disk_dir
+        self.spill_requested = False
+        self.spilled = True
+        return self.disk_dir
+
+    def finish(self, keep=False):
+        """
+        Fin de compilation : arrête la surveillance et libère la mémoire
+        keep: compilation réussie, les objets sont d'abord recopiés sur disque
+            pour la prochaine compilation incrémentale
+        """
+        self._stop_monitor()
+        if self.tmp_dir.exists():
+            self.used_mb = max(self.used_mb, _tree_size_mb(self.tmp_dir))
+            if keep:
+                _sync_tree(self.tmp_dir, self.disk_dir)
+                self.synced = True
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        try:
+            self.tmp_dir.parent.rmdir()
+        except OSError:
+            pass
+
+    def summary(self):
+        """Informations enregistrées dans l'historique"""
+        return {
+            'mode': 'disk' if self.spilled else 'tmpfs',
+            'path': str(self.tmp_dir),
+            'used_mb': self.used_mb,
+            'spilled': self.spilled,
+            'synced': self.synced
+        }
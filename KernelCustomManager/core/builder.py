@@ -0,0 +1,481 @@
+"""
+Module de compilation non interactive
+Enchaîne make, signature des modules, bindeb-pkg et rangement des paquets
+sans terminal ni GTK (utilisé par la ligne de commande)
+"""
+
+import os
+import re
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from core.build_predictor import BuildPredictor, config_features
+from core.build_profile import BuildProfile, profile_make_vars
+from core.build_progress import BuildProgress, estimate_object_count
+from core.build_staging import TmpfsStaging
+from core.log_store import BuildLog
+from core.packaging import is_debug_package
+from core.tree_lock import SourceTreeBusy
+
+
+class KernelBuilder:
+    """Compilation du kernel dans le processus courant avec rapport d'événements"""
+
+    # Intervalle minimal (secondes) entre deux événements 'progress'
+    PROGRESS_INTERVAL = 1.0
+
+    def __init__(self, kernel_manager, secureboot_manager=None, event_callback=None, output_callback=None):
+        self.kernel_manager = kernel_manager
+        self.secureboot_manager = secureboot_manager
+        self.event_callback = event_callback
+        # output_callback(line) : chaque ligne de sortie de make (appelé depuis le thread de compilation)
+        self.output_callback = output_callback
+        self.progress = BuildProgress()
+        self._last_progress = 0
+        self._process = None
+        self._cancelled = False
+        # Limites de ressources de la compilation en cours (ResourcePolicy.limits)
+        self._limits = None
+        # Journal de la compilation en cours (LogWriter)
+        self._log = None
+        # Répertoire d'objets en mémoire de la compilation en cours (TmpfsStaging)
+        self._staging = None
+
+    def _emit(self, event, **data):
+        """Transmet un événement (dict) au callback"""
+        if self.event_callback:
+            data['event'] = event
+            self.event_callback(data)
+
+    def _run(self, args, cwd, log, env=None, stage=None, pass_fds=()):
+        """Exécute une commande en ajoutant sa sortie au journal (LogWriter), retourne le code retour"""
+        if self._cancelled:
+            return -signal.SIGTERM
+        self._emit('command', stage=stage, command=' '.join(args))
+        if self._limits:
+            args = self.kernel_manager.resource_policy.wrap(args, self._limits)
+        log.write(f"$ {' '.join(args)}")
+        # Nouvelle session : cancel() arrête make et tous ses sous-processus
+        process = subprocess.Popen(
+            args,
+            cwd=str(cwd),
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors='replace',
+            pass_fds=pass_fds,
+            start_new_session=True
+        )
+        self._process = process
+        for line in process.stdout:
+            log.write(line)
+            if self.output_callback:
+                self.output_callback(line)
+            if self.progress.feed(line):
+                self._emit_progress()
+        returncode = process.wait()
+        self._process = None
+        return returncode
+
+    def _set_stage(self, stage, **data):
+        """Change d'étape et le signale"""
+        self.progress.set_stage(stage)
+        if self._log:
+            self._log.mark_stage(stage)
+        self._emit('stage', stage=stage, **data)
+        self._emit_progress(force=True)
+
+    def _emit_progress(self, force=False):
+        """Événement 'progress' limité à un par PROGRESS_INTERVAL"""
+        now = time.time()
+        if force or now - self._last_progress >= self.PROGRESS_INTERVAL:
+            self._last_progress = now
+            self._emit('progress', **self.progress.snapshot())
+
+    def _interrupt(self):
+        """Arrête la commande en cours (make et ses sous-processus)"""
+        process = self._process
+        if process and process.poll() is None:
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    def cancel(self):
+        """Interrompt la compilation en cours"""
+        self._cancelled = True
+        self._interrupt()
+
+    def _run_make(self, args, make_vars, cwd, log, env, stage, pass_fds=()):
+        """
+        Exécute une commande make ; si la mémoire vient à manquer pendant une
+        compilation en mémoire, les objets sont recopiés sur disque et la
+        commande reprend avec le répertoire disque (make O=...)
+        """
+        staging = self._staging
+        while True:
+            if staging and staging.spill_requested and not self._cancelled:
+                self._emit('spill', stage=stage, source=str(staging.tmp_dir), destination=str(staging.disk_dir))
+                disk_dir = staging.spill()
+                make_vars[:] = [f"O={disk_dir}" if var.startswith("O=") else var for var in make_vars]
+            returncode = self._run(args + make_vars, cwd, log, env, stage, pass_fds)
+            # Commande interrompue par la surveillance mémoire : reprise sur disque
+            if returncode == 0 or not staging or not staging.spill_requested or self._cancelled:
+                return returncode
+
+    @staticmethod
+    def _is_own_package(deb_name, kernel_release):
+        """Vérifie qu'un .deb provient de ce kernel (version Debian '<release>-<révision>')"""
+        if not kernel_release:
+            return True
+        return re.search(rf"_{re.escape(kernel_release)}-\d+_", deb_name) is not None
+
+    def build(self, jobs=None, suffix="", use_fakeroot=True, use_ccache=False,
+              out_of_tree=False, signing_key=None, disable_module_compression=False,
+              source_dir=None, config_file=None, label=None, jobserver=None, profile=False,
+              limit_resources=False, tmpfs=False, packaging=None, distributed=False,
+              extra_hosts=None):
+        """
+        Compile et empaquette le kernel de base_dir/linux
+        signing_key: (clé privée, certificat) pour signer les modules avant bindeb-pkg
+        source_dir/config_file/label: compilation d'une variante (file de compilation) ;
+            les sources doivent être propres, la config est copiée dans le répertoire
+            d'objets du label et la compilation se fait toujours hors arbre
+        jobserver: JobServer partagé remplaçant -j (budget global de jobs)
+        profile: mesure durée et RSS de chaque compilation (enveloppe de CC et LD)
+        jobs: None = nombre recommandé d'après les CPU et la mémoire disponible
+        limit_resources: exécute les commandes dans un scope systemd (CPUWeight,
+            IOWeight, MemoryHigh) ou sous nice/ionice
+        tmpfs: répertoire d'objets en mémoire si elle suffit (compilation hors arbre),
+            recopié sur disque si la pression mémoire augmente
+        packaging: PackagingOptions (compresseur, threads, paquet -dbg) de bindeb-pkg
+        distributed: compile via distcc sur les hôtes d'aide en bonne santé (jobs = slots
+            locaux + distants) ; sans hôte disponible, la compilation reste locale
+        extra_hosts: hôtes d'aide en plus de ceux configurés (LocalHelpers)
+        Les sources sont verrouillées (SourceTreeLock) : en exclusif pour une compilation
+        dans l'arbre, en partagé pour une variante ; un arbre occupé fait échouer l'étape prepare
+        Le .config laissé dans un répertoire d'objets par une compilation hors arbre
+        interrompue est remis dans les sources (KernelManager.restore_source_config)
+        Retourne: dict success, stage, returncode, duration, packages, log
+        """
+        km = self.kernel_manager
+        linux_dir = Path(source_dir) if source_dir else km.base_dir / "linux"
+        variant = config_file is not None
+        tree_lock = km.source_tree_lock(linux_dir)
+        try:
+            tree_lock.acquire(exclusive=not variant)
+        except SourceTreeBusy as e:
+            self._emit('error', stage='prepare', message=str(e))
+            return {'success': False, 'stage': 'prepare', 'returncode': 1, 'error': str(e)}
+        try:
+            if not variant:
+                km.restore_source_config(linux_dir)
+            return self._build(linux_dir, variant, jobs, suffix, use_fakeroot, use_ccache, out_of_tree,
+                               signing_key, disable_module_compression, config_file, label, jobserver,
+                               profile, limit_resources, tmpfs, packaging, distributed, extra_hosts)
+        finally:
+            tree_lock.release()
+
+    def _build(self, linux_dir, variant, jobs, suffix, use_fakeroot, use_ccache, out_of_tree,
+               signing_key, disable_module_compression, config_file, label, jobserver,
+               profile, limit_resources, tmpfs, packaging, distributed, extra_hosts):
+        km = self.kernel_manager
+        recommended = None
+        if not jobs:
+            recommended = km.resource_policy.recommended_jobs(
+                config_file or linux_dir / ".config", km.get_compilation_history())
+            jobs = recommended['jobs']
+
+        if variant and (linux_dir / ".config").exists():
+            self._emit('error', stage='prepare', message=f"Sources non propres (.config présent) : {linux_dir}")
+            return {'success': False, 'stage': 'prepare', 'returncode': 1}
+        if not variant and not (linux_dir / ".config").exists():
+            self._emit('error', stage='prepare', message="Aucune configuration (.config) dans les sources")
+            return {'success': False, 'stage': 'prepare', 'returncode': 1}
+
+        try:
+            kernel_version = linux_dir.resolve().name.replace("linux-", "")
+        except OSError:
+            kernel_version = "unknown"
+
+        if not variant:
+            km.backup_config(kernel_version, suffix)
+            if disable_module_compression:
+                km.disable_module_compression()
+
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        # Journal compressé et indexé ; anciens journaux convertis et purgés en arrière-plan
+        log = km.log_store.create(f"compile-{kernel_version}{suffix}-{timestamp}")
+        self._log = log
+        threading.Thread(target=km.log_store.maintain, daemon=True).start()
+        start = time.time()
+
+        make_vars = [f"LOCALVERSION={suffix}"] if suffix else []
+        env = os.environ.copy()
+        details = {'jobs': jobs}
+        if recommended:
+            details['jobs_recommended'] = recommended
+
+        # Confinement : limites calculées une fois, appliquées à chaque commande
+        self._limits = km.resource_policy.limits() if limit_resources else None
+        if self._limits:
+            details['resources'] = self._limits
+
+        # ccache : mêmes CC/HOSTCC pour make et bindeb-pkg, sinon kbuild recompile tout
+        compiler_cache = km.compiler_cache
+        use_ccache = use_ccache and compiler_cache.is_available()
+        stats_log = None
+        if use_ccache:
+            # Résultats de cette compilation seule : le cache est partagé avec la file
+            fd, stats_log = tempfile.mkstemp(prefix="kcm-ccache-", suffix=".log")
+            os.close(fd)
+            env = compiler_cache.get_env(stats_log)
+            compiler_cache.cache_dir.mkdir(parents=True, exist_ok=True)
+            subprocess.run(["ccache", "-M", compiler_cache.max_size], env=env, capture_output=True)
+            make_vars += compiler_cache.make_vars()
+
+        # Compilation distribuée : contrôle de santé des hôtes avant de lancer make
+        if distributed:
+            farm = km.build_farm
+            plan = farm.prepare(jobs, extra_hosts) if farm.is_available() else None
+            if plan:
+                make_vars = farm.apply(plan, env, make_vars)
+                jobs = plan['jobs']
+                details['jobs'] = jobs
+                details['distcc'] = plan
+                self._emit('distributed', hosts=plan['healthy'], unhealthy=plan['unhealthy'], jobs=jobs)
+            else:
+                details['distcc'] = {'fallback': 'local'}
+                self._emit('distributed', hosts=[], jobs=jobs)
+
+        # Profilage : chaque appel à CC/LD passe par compile_timer.py
+        raw_profile = None
+        if profile:
+            raw_profile = km.log_dir / f"profile-{kernel_version}{suffix}-{timestamp}.raw"
+            env['KCM_PROFILE_FILE'] = str(raw_profile)
+            make_vars = profile_make_vars(make_vars)
+            details['profiled'] = True
+
+        # Empaquetage : options transmises à dpkg-deb par l'environnement
+        drop_debug = False
+        if packaging:
+            packaging.apply(env)
+            details['packaging'] = packaging.to_dict()
+            # Scripts antérieurs à Linux 6.5 : le paquet -dbg est construit puis écarté
+            drop_debug = packaging.skip_debug and not packaging.supports_debug_skip(linux_dir)
+            if drop_debug:
+                details['packaging']['skip_debug'] = 'discarded'
+
+        # Durée de chaque étape (compilation et empaquetage rapportés séparément)
+        stage_seconds = {}
+        details['stage_seconds'] = stage_seconds
+
+        # Jobserver partagé : make devient client et ne reçoit pas de -j
+        pass_fds = ()
+        jobs_arg = [f"-j{jobs}"]
+        if jobserver:
+            env['MAKEFLAGS'] = jobserver.makeflags()
+            pass_fds = jobserver.fds
+            jobs_arg = []
+            details['jobs'] = jobserver.slots
+            details['jobserver'] = True
+
+        obj_dir = linux_dir
+        obj_lock = None
+        stashed_config = None
+        result = {'success': False, 'log': str(log), 'returncode': 0}
+        details['log'] = str(log)
+        stage = 'compile'
+        try:
+            if variant:
+                obj_dir = km.build_dirs.get_build_dir(kernel_version, label or f"custom{suffix}")
+                obj_lock = km.build_dirs.lock(obj_dir)
+                obj_config = obj_dir / ".config"
+                if not obj_config.exists() or obj_config.read_bytes() != Path(config_file).read_bytes():
+                    shutil.copy(config_file, obj_config)
+                if disable_module_compression:
+                    km.disable_module_compression(obj_config)
+                make_vars.append(f"O={obj_dir}")
+                details['build_dir'] = str(obj_dir)
+                details['label'] = label
+                self._set_stage('prepare', build_dir=str(obj_dir))
+                if self._run(["make", "olddefconfig"] + make_vars, linux_dir, log, env, 'prepare', pass_fds) != 0:
+                    raise RuntimeError(f"make olddefconfig a échoué (voir {log})")
+
+            # Compilation hors arbre : la config des sources est mise de côté pendant la compilation
+            elif out_of_tree:
+                obj_dir = km.get_build_dir(kernel_version, suffix)
+                obj_lock = km.build_dirs.lock(obj_dir)
+                src_config = linux_dir / ".config"
+                obj_config = obj_dir / ".config"
+                if not obj_config.exists() or obj_config.read_bytes() != src_config.read_bytes():
+                    shutil.copy(src_config, obj_config)
+                stashed_config = obj_dir / km.build_dirs.SOURCE_CONFIG
+                shutil.move(str(src_config), str(stashed_config))
+                if (linux_dir / "include" / "config").exists() or list(linux_dir.glob("arch/*/include/generated")):
+                    self._run(["make", "-s", "mrproper"], linux_dir, log, env, stage='prepare')
+                make_vars.append(f"O={obj_dir}")
+                details['build_dir'] = str(obj_dir)
+
+            if obj_dir != linux_dir:
+                # Nettoyage des anciens répertoires d'objets en arrière-plan
+                threading.Thread(
+                    target=km.build_dirs.garbage_collect,
+                    kwargs={'keep': obj_dir},
+                    daemon=True
+                ).start()
+
+            # Nombre d'objets attendus pour le pourcentage d'avancement
+            config_for_count = obj_dir / ".config" if (obj_dir / ".config").exists() else stashed_config
+            self.progress.expected_objects = estimate_object_count(linux_dir, config_for_count)
+            details['objects_expected'] = self.progress.expected_objects
+
+            # Durée prédite d'après l'historique (ETA dès le départ, détection des régressions)
+            details.update(config_features(config_for_count))
+            history = km.get_compilation_history()
+            predictor = BuildPredictor(history)
+            expected_hit_rate = BuildPredictor.last_hit_rate(history, details['config_hash']) if use_ccache else 0.0
+            self.progress.predicted_duration = predictor.predict(self.progress.expected_objects, details['jobs'], expected_hit_rate)
+            details['predicted_duration'] = self.progress.predicted_duration
+
+            # Objets en mémoire : uniquement si la place estimée tient dans la mémoire libre
+            if tmpfs and obj_dir != linux_dir:
+                per_job = km.resource_policy.memory_per_job(config_for_count, history)
+                staging = TmpfsStaging(obj_dir, details['jobs'] * per_job, on_pressure=self._interrupt)
+                required = TmpfsStaging.estimate_size_mb(self.progress.expected_objects, config_for_count,
+                                                         history, details['config_hash'])
+                fits, reason = staging.fits(required)
+                if fits:
+                    self._staging = staging
+                    staging_dir = staging.start()
+                    make_vars = [f"O={staging_dir}" if var.startswith("O=") else var for var in make_vars]
+                    self._emit('staging', mode='tmpfs', path=str(staging_dir), required_mb=required)
+                else:
+                    details['staging'] = {'mode': 'disk', 'reason': reason}
+                    self._emit('staging', mode='disk', reason=reason)
+
+            self._set_stage(stage, version=kernel_version, jobs=details['jobs'], log=str(log))
+            stage_start = time.time()
+            returncode = self._run_make(["make"] + jobs_arg, make_vars, linux_dir, log, env, 'compile', pass_fds)
+            stage_seconds['compile'] = int(time.time() - stage_start)
+            details['objects'] = self.progress.objects_done
+
+            if use_ccache:
+                stats = compiler_cache.parse_stats_log(stats_log)
+                if stats:
+                    stats['saved_seconds'] = compiler_cache.estimate_saved_seconds(
+                        stats, stage_seconds['compile'], predictor.seconds_per_object(details['jobs']))
+                    details['ccache'] = stats
+
+            if self._staging:
+                obj_dir = self._staging.current_dir
+
+            if returncode == 0 and signing_key and self.secureboot_manager:
+                stage = 'sign'
+                self._set_stage(stage)
+                priv_key, cert = signing_key
+                stage_start = time.time()
+                sign_result = self.secureboot_manager.auto_sign_kernel_modules(obj_dir, priv_key, cert)
+                self._emit('signed', **{k: v for k, v in sign_result.items() if k != 'failed_modules'})
+                if not sign_result.get('success'):
+                    returncode = 1
+                stage_seconds['sign'] = int(time.time() - stage_start)
+
+            if returncode == 0:
+                stage = 'package'
+                self._set_stage(stage)
+                package_cmd = ["make", "bindeb-pkg"]
+                if use_fakeroot:
+                    package_cmd = ["fakeroot"] + package_cmd
+                stage_start = time.time()
+                returncode = self._run_make(package_cmd, make_vars, linux_dir, log, env, 'package', pass_fds)
+                stage_seconds['package'] = int(time.time() - stage_start)
+
+            packages = []
+            if self._staging:
+                obj_dir = self._staging.current_dir
+            if returncode == 0:
+                self._set_stage('collect')
+                # Plusieurs variantes peuvent empaqueter dans le même répertoire parent
+                try:
+                    kernel_release = (obj_dir / "include" / "config" / "kernel.release").read_text().strip()
+                except OSError:
+                    kernel_release = None
+                for deb in obj_dir.resolve().parent.glob("*.deb"):
+                    if not self._is_own_package(deb.name, kernel_release):
+                        continue
+                    if drop_debug and is_debug_package(deb.name):
+                        deb.unlink()
+                    else:
+                        shutil.move(str(deb), str(km.repo_dir / deb.name))
+                        packages.append(deb.name)
+
+            result.update({
+                'success': returncode == 0,
+                'stage': 'done' if returncode == 0 else stage,
+                'returncode': returncode,
+                'packages': packages
+            })
+        except (OSError, RuntimeError) as e:
+            self._emit('error', stage=stage, message=str(e))
+            result.update({'stage': stage, 'returncode': 1, 'error': str(e)})
+        finally:
+            if self._staging:
+                # Paquets déjà rangés : objets remis sur disque si tout a réussi, mémoire libérée
+                self._staging.finish(keep=result['success'])
+                details['staging'] = self._staging.summary()
+                self._staging = None
+            if obj_lock is not None:
+                km.build_dirs.release(obj_lock)
+            if stashed_config and stashed_config.exists():
+                shutil.move(str(stashed_config), str(linux_dir / ".config"))
+            if stats_log:
+                Path(stats_log).unlink(missing_ok=True)
+
+        if self._cancelled:
+            result['cancelled'] = True
+            details['cancelled'] = True
+
+        log.close()
+        self._log = None
+        if not result['success']:
+            first_error = BuildLog(log.path).first_error()
+            if first_error:
+                result['first_error'] = {'line': first_error[0], 'text': first_error[1]}
+
+        duration = int(time.time() - start)
+        result['duration'] = duration
+        result['stage_seconds'] = stage_seconds
+
+        if raw_profile:
+            profile_file = BuildProfile.compact(raw_profile, raw_profile.with_suffix(".tsv.gz"))
+            if profile_file:
+                details['profile'] = str(profile_file)
+                result['profile'] = str(profile_file)
+
+        if result['success'] and 'config_hash' in details:
+            regression = predictor.check_regression(
+                details.get('objects') or details['objects_expected'],
+                details['jobs'],
+                details.get('ccache', {}).get('hit_rate', 0.0),
+                duration,
+                details['config_hash']
+            )
+            if regression:
+                details['regression'] = regression
+                result['regression'] = regression
+                self._emit('regression', **regression)
+        km.add_compilation_to_history(kernel_version, suffix, result['success'], duration,
+                                      result.get('packages', []), details)
+        if result['success']:
+            self.progress.set_stage('done')
+        result['progress'] = self.progress.snapshot()
+        self._emit('finished', **result)
+        return result
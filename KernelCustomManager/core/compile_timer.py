@@ -0,0 +1,60 @@
+"""
+Enveloppe du compilateur et de l'éditeur de liens pour le profilage de la compilation
+Usage (kbuild) : make CC="python3 -S compile_timer.py gcc" LD="python3 -S compile_timer.py ld"
+Exécute la commande puis ajoute une ligne au fichier $KCM_PROFILE_FILE :
+durée (ms), RSS maximal (Ko), outil, fichier produit
+N'utilise que os/sys/time : lancé pour chaque objet, le démarrage doit rester rapide
+"""
+
+import os
+import sys
+import time
+
+
+def main(args):
+    if not args:
+        sys.stderr.write("compile_timer: commande manquante\n")
+        return 2
+
+    start = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.execvp(args[0], args)
+        except OSError as e:
+            sys.stderr.write(f"{args[0]}: {e}\n")
+        os._exit(127)
+
+    while True:
+        try:
+            _pid, status, usage = os.wait4(pid, 0)
+            break
+        except InterruptedError:
+            continue
+
+    elapsed_ms = int((time.monotonic() - start) * 1000)
+    returncode = os.waitstatus_to_exitcode(status)
+
+    profile_file = os.environ.get('KCM_PROFILE_FILE')
+    target = args[args.index('-o') + 1] if '-o' in args[:-1] else None
+    # Les tests de kbuild (cc-option...) écrivent dans /dev/null : non mesurés
+    if profile_file and returncode == 0 and target and not target.startswith('/dev/'):
+        # kbuild compile depuis la racine des objets : chemins relatifs (kernel/fork.o)
+        cwd = os.getcwd() + os.sep
+        if target.startswith(cwd):
+            target = target[len(cwd):]
+        # ccache gcc / distcc gcc ... : l'outil mesuré est le compilateur
+        tool = args[1] if os.path.basename(args[0]) in ('ccache', 'distcc') and len(args) > 1 else args[0]
+        line = f"{elapsed_ms}\t{usage.ru_maxrss}\t{os.path.basename(tool)}\t{target}\n"
+        # Une seule écriture en O_APPEND : les lignes des jobs parallèles ne se mélangent pas
+        fd = os.open(profile_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode(errors='replace'))
+        finally:
+            os.close(fd)
+
+    return returncode if returncode >= 0 else 128 - returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,122 @@
+"""
+Module du cache de compilation
+Intégration de ccache dans les scripts de compilation du kernel
+"""
+
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+from core.build_predictor import CCACHE_HIT_COST
+
+
+class CompilerCache:
+    """Gestion d'un cache ccache local (emplacement, taille, statistiques)"""
+
+    def __init__(self, cache_dir, base_dir=None, max_size="20G"):
+        self.cache_dir = Path(cache_dir)
+        # Racine des arbres de sources : les chemins sous cette racine sont
+        # réécrits en relatif pour que les hits survivent aux changements de version
+        self.base_dir = Path(base_dir) if base_dir else self.cache_dir
+        self.max_size = max_size
+
+    def is_available(self):
+        """Vérifie que ccache est installé"""
+        return shutil.which("ccache") is not None
+
+    def get_env(self, stats_log=None):
+        """
+        Variables d'environnement pour utiliser ce cache
+        stats_log: journal des résultats de cette compilation seule (CCACHE_STATSLOG) ;
+            les compteurs globaux du cache partagé ne sont jamais remis à zéro
+        """
+        env = os.environ.copy()
+        env['CCACHE_DIR'] = str(self.cache_dir)
+        env['CCACHE_BASEDIR'] = str(self.base_dir)
+        if stats_log:
+            env['CCACHE_STATSLOG'] = str(stats_log)
+        return env
+
+    def make_args(self):
+        """Arguments make pour compiler via ccache (ligne de commande bash)"""
+        return 'CC="ccache gcc" HOSTCC="ccache gcc"'
+
+    def make_vars(self):
+        """Arguments make pour compiler via ccache (liste pour subprocess)"""
+        return ["CC=ccache gcc", "HOSTCC=ccache gcc"]
+
+    @staticmethod
+    def parse_stats_log(stats_log):
+        """
+        Lit un journal CCACHE_STATSLOG ('# fichier' puis un résultat par ligne)
+        Retourne: dict hits/misses/hit_rate, ou None
+        """
+        raw = {}
+        try:
+            with open(stats_log, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        raw[line] = raw.get(line, 0) + 1
+        except OSError:
+            return None
+        return CompilerCache._summarize(raw)
+
+    @staticmethod
+    def parse_stats_text(text):
+        """Analyse la sortie de 'ccache --print-stats' (lignes clé<TAB>valeur)"""
+        raw = {}
+        for line in text.splitlines():
+            parts = line.strip().split('\t')
+            if len(parts) == 2 and parts[1].isdigit():
+                raw[parts[0]] = int(parts[1])
+        return CompilerCache._summarize(raw)
+
+    @staticmethod
+    def _summarize(raw):
+        if not raw:
+            return None
+
+        hits = raw.get('direct_cache_hit', 0) + raw.get('preprocessed_cache_hit', 0)
+        misses = raw.get('cache_miss', 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 3) if total else 0.0
+        }
+
+    @staticmethod
+    def estimate_saved_seconds(stats, duration, seconds_per_object=None):
+        """
+        Estime le temps économisé : chaque hit évite une compilation complète
+        seconds_per_object: coût d'une compilation d'après l'historique ; à défaut,
+            déduit de la durée en comptant tous les objets (un hit coûte CCACHE_HIT_COST)
+        """
+        if not stats or not stats.get('hits'):
+            return 0
+        if seconds_per_object is None:
+            work = stats.get('misses', 0) + stats['hits'] * CCACHE_HIT_COST
+            seconds_per_object = duration / work
+        return int(stats['hits'] * seconds_per_object * (1 - CCACHE_HIT_COST))
+
+    def get_usage(self):
+        """Retourne la taille actuelle du cache en octets"""
+        if not self.cache_dir.exists():
+            return 0
+        total = 0
+        for root, _dirs, files in os.walk(self.cache_dir):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    continue
+        return total
+
+    def clear(self):
+        """Vide le cache"""
+        if self.is_available():
+            subprocess.run(["ccache", "-C"], env=self.get_env(), capture_output=True)
+        elif self.cache_dir.exists():
+            shutil.rmtree(self.cache_dir)
@@ -0,0 +1,147 @@
+"""
+Module de comparaison des .config
+Diff sémantique entre deux configurations (une option absente vaut 'n'),
+delta exact par rapport à une configuration de base et reconstruction,
+et defconfig minimal via make savedefconfig
+"""
+
+import os
+import re
+import subprocess
+import tempfile
+from pathlib import Path
+
+from core.kernel_config import KernelConfig, PREFIX, SET_LINE, UNSET_LINE
+
+
+# Ligne d'un delta pour une option présente dans la base et absente de la config
+ABSENT_LINE = re.compile(r'^# CONFIG_([A-Za-z0-9_]+) is absent$')
+
+
+def _normalize(value):
+    """Option absente ou 'is not set' : 'n'"""
+    return 'n' if value is None else value
+
+
+def diff(old, new):
+    """
+    Diff sémantique de deux configurations ({nom: valeur brute}, cf. read_values)
+    Une option absente et une option 'is not set' sont équivalentes
+    Retourne: dict enabled, disabled, changed : [(nom, ancienne, nouvelle)] triées par nom
+    """
+    result = {'enabled': [], 'disabled': [], 'changed': []}
+    for name in sorted(old.keys() | new.keys()):
+        before, after = _normalize(old.get(name)), _normalize(new.get(name))
+        if before == after:
+            continue
+        if before == 'n' and after in ('y', 'm'):
+            result['enabled'].append((name, before, after))
+        elif after == 'n' and before in ('y', 'm'):
+            result['disabled'].append((name, before, after))
+        else:
+            result['changed'].append((name, before, after))
+    return result
+
+
+def diff_size(result):
+    return sum(len(entries) for entries in result.values())
+
+
+def delta(values, base):
+    """
+    Delta exact de values par rapport à base : contrairement au diff, 'is not set'
+    et absente ne sont pas confondues (olddefconfig donne sa valeur par défaut
+    à une option absente)
+    Retourne: {nom: valeur brute, ou None si l'option de la base est absente de values}
+    """
+    changes = {name: value for name, value in values.items() if base.get(name) != value}
+    for name in base.keys() - values.keys():
+        changes[name] = None
+    return changes
+
+
+def apply_delta(base, changes):
+    """Valeurs de base + delta (dictionnaires, sans reconstruire de fichier)"""
+    values = dict(base)
+    for name, value in changes.items():
+        if value is None:
+            values.pop(name, None)
+        else:
+            values[name] = value
+    return values
+
+
+def rehydrate(base_text, changes):
+    """KernelConfig complet : texte de la base sur lequel le delta est appliqué"""
+    config = KernelConfig(text=base_text)
+    for name, value in changes.items():
+        if value is None:
+            config.remove(name)
+        elif value == 'n':
+            config.unset(name)
+        else:
+            config.set_raw(name, value)
+    return config
+
+
+def format_delta(changes, header=()):
+    """Delta au format .config (lisible et réutilisable comme fragment)"""
+    lines = [f"# {line}" for line in header]
+    for name in sorted(changes):
+        value = changes[name]
+        if value is None:
+            lines.append(f"# {PREFIX}{name} is absent")
+        elif value == 'n':
+            lines.append(f"# {PREFIX}{name} is not set")
+        else:
+            lines.append(f"{PREFIX}{name}={value}")
+    return "\n".join(lines) + "\n"
+
+
+def parse_delta(text):
+    """
+    Texte produit par format_delta
+    Retourne: (delta, en-tête [lignes de commentaire sans '# '])
+    """
+    changes, header = {}, []
+    for line in text.splitlines():
+        match = SET_LINE.match(line)
+        if match:
+            changes[match.group(1)] = match.group(2)
+            continue
+        match = UNSET_LINE.match(line)
+        if match:
+            changes[match.group(1)] = 'n'
+            continue
+        match = ABSENT_LINE.match(line)
+        if match:
+            changes[match.group(1)] = None
+        elif line.startswith("# "):
+            header.append(line[2:])
+    return changes, header
+
+
+def savedefconfig(source_dir, config_file):
+    """
+    defconfig minimal (make savedefconfig) : seules les options qui diffèrent des
+    valeurs par défaut de Kconfig, sans toucher au .config des sources
+    Retourne: texte du defconfig (lève CalledProcessError en cas d'échec)
+    """
+    source_dir = Path(source_dir)
+    output = source_dir / "defconfig"
+    previous = output.read_bytes() if output.exists() else None
+    with tempfile.TemporaryDirectory(prefix="kcm-defconfig-") as tmp:
+        config = Path(tmp) / "config"
+        config.write_bytes(Path(config_file).read_bytes())
+        env = os.environ.copy()
+        env['KCONFIG_CONFIG'] = str(config)
+        try:
+            # savedefconfig écrit toujours <sources>/defconfig : remis en état ensuite
+            subprocess.run(["make", "savedefconfig"], cwd=str(source_dir), env=env,
+                           capture_output=True, text=True, check=True)
+            return output.read_text()
+        finally:
+            if previous is not None:
+                output.write_bytes(previous)
+            else:
+                output.unlink(missing_ok=True)
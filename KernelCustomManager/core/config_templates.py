@@ -0,0 +1,228 @@
+"""
+Module des templates de configuration
+Templates déclaratifs (*.conf) : une directive par ligne, avec inclusion
+d'autres templates et surcharge (la dernière valeur gagne). Toute la pile est
+résolue en mémoire puis appliquée au .config en une seule écriture, suivie
+d'un seul make olddefconfig
+
+    # Poste de travail
+    description Poste de travail : GPU, audio, signature des modules
+    include base-minimal
+    enable DRM
+    module E1000E
+    disable SND
+    set-str MODULE_SIG_KEY "certs/signing_key.pem"
+    set-val VGACON_SOFT_SCROLLBACK_SIZE 64
+
+Un template peut partir d'une config complète (base kernel-gaming.config) ;
+un fichier *.config seul s'applique comme base, sans directive
+"""
+
+import shlex
+import subprocess
+import time
+from pathlib import Path
+
+from core.kernel_config import KernelConfig, quote
+
+
+# Templates fournis avec l'application
+BUNDLED_TEMPLATES_DIR = Path(__file__).resolve().parents[2] / "KernelCustom" / "templates"
+
+class TemplateError(ValueError):
+    """Template introuvable, directive invalide ou inclusion circulaire"""
+
+
+class ConfigTemplates:
+    """Lecture, résolution et application des templates"""
+
+    def __init__(self, template_dirs, kconfig_cache=None):
+        """
+        template_dirs: répertoires de recherche, le premier est prioritaire
+        kconfig_cache: OlddefconfigCache (olddefconfig mémorisé), ou None
+        """
+        self.template_dirs = [Path(d) for d in template_dirs]
+        self.kconfig_cache = kconfig_cache
+        # {chemin: (date de modification, template analysé)}
+        self._parsed = {}
+
+    # --- Lecture ---
+
+    def list_templates(self):
+        """Templates disponibles : [dict name, path, kind ('template' ou 'config'), description]"""
+        templates = {}
+        for directory in self.template_dirs:
+            if not directory.is_dir():
+                continue
+            for path in sorted(directory.iterdir()):
+                if path.suffix not in ('.conf', '.config') or path.name in templates:
+                    continue
+                entry = {'name': path.name, 'path': str(path), 'description': ""}
+                if path.suffix == '.conf':
+                    entry['kind'] = 'template'
+                    try:
+                        entry['description'] = self.load(path)['description']
+                    except TemplateError as e:
+                        entry['description'] = str(e)
+                else:
+                    entry['kind'] = 'config'
+                templates[path.name] = entry
+        return sorted(templates.values(), key=lambda entry: entry['name'])
+
+    def find(self, name):
+        """Chemin d'un template : nom avec ou sans .conf, ou chemin"""
+        path = Path(name)
+        if path.is_file():
+            return path.resolve()
+        candidates = [name] if path.suffix in ('.conf', '.config') else [f"{name}.conf", f"{name}.config"]
+        for directory in self.template_dirs:
+            for candidate in candidates:
+                if (directory / candidate).is_file():
+                    return (directory / candidate).resolve()
+        raise TemplateError(f"template introuvable : {name}")
+
+    def load(self, path):
+        """
+        Analyse un template (mis en cache tant que le fichier ne change pas)
+        Retourne: dict description, base, steps [('include', nom) ou (nom d'option, valeur brute)]
+        """
+        path = Path(path)
+        mtime = path.stat().st_mtime_ns
+        cached = self._parsed.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        template = {'description': "", 'base': None, 'steps': []}
+        if path.suffix == '.config':
+            template['base'] = str(path)
+            self._parsed[path] = (mtime, template)
+            return template
+
+        for number, line in enumerate(path.read_text(errors='replace').splitlines(), start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            verb, _, rest = line.partition(' ')
+            rest = rest.strip()
+            if verb == 'description':
+                template['description'] = rest
+                continue
+            try:
+                args = shlex.split(rest)
+            except ValueError as e:
+                raise TemplateError(f"{path.name}:{number}: {e}")
+
+            if verb in ('include', 'base') and len(args) == 1:
+                if verb == 'include':
+                    template['steps'].append(('include', args[0]))
+                else:
+                    template['base'] = args[0]
+            # Mêmes verbes que scripts/config
+            elif verb in ('enable', 'module', 'disable') and len(args) == 1:
+                template['steps'].append((_symbol(args[0]), {'enable': 'y', 'module': 'm', 'disable': 'n'}[verb]))
+            elif verb == 'set-str' and len(args) == 2:
+                template['steps'].append((_symbol(args[0]), quote(args[1])))
+            elif verb == 'set-val' and len(args) == 2:
+                template['steps'].append((_symbol(args[0]), args[1]))
+            else:
+                raise TemplateError(f"{path.name}:{number}: directive invalide : {line}")
+
+        self._parsed[path] = (mtime, template)
+        return template
+
+    # --- Résolution ---
+
+    def resolve(self, name):
+        """
+        Résout la pile d'un template : inclusions développées à leur place,
+        chaque template inclus une seule fois, dernière valeur gagnante
+        Retourne: dict stack (ordre d'application), base (chemin ou None),
+            options {NOM: valeur brute}, origins {NOM: template}, overrides [dict symbol, value, template, replaced, by]
+        """
+        resolved = {'stack': [], 'base': None, 'options': {}, 'origins': {}, 'overrides': []}
+        self._expand(self.find(name), resolved, [])
+        return resolved
+
+    def _expand(self, path, resolved, chain):
+        if path in chain:
+            names = " -> ".join(p.name for p in chain + [path])
+            raise TemplateError(f"inclusion circulaire : {names}")
+        if path.name in resolved['stack']:
+            return
+        template = self.load(path)
+        resolved['stack'].append(path.name)
+        if template['base']:
+            base = Path(template['base'])
+            resolved['base'] = str(base if base.is_absolute() else self.find(template['base']))
+
+        options, origins = resolved['options'], resolved['origins']
+        for symbol, value in template['steps']:
+            if symbol == 'include':
+                self._expand(self.find(value), resolved, chain + [path])
+                continue
+            if symbol in options and options[symbol] != value and origins[symbol] != path.name:
+                resolved['overrides'].append({
+                    'symbol': symbol, 'value': value, 'replaced': options[symbol],
+                    'template': origins[symbol], 'by': path.name
+                })
+            # Réinsertion : l'ordre du dictionnaire suit la dernière affectation
+            options.pop(symbol, None)
+            options[symbol] = value
+            origins[symbol] = path.name
+
+    # --- Application ---
+
+    def apply(self, name, source_dir, config_file=None, olddefconfig=True):
+        """
+        Applique un template au .config en une passe puis lance olddefconfig
+        config_file: .config à modifier (défaut: source_dir/.config)
+        Retourne: dict stack, base, options (nombre demandé), changed (lignes modifiées),
+            unmet [(NOM, demandé, obtenu)] (valeurs refusées par olddefconfig), seconds, olddefconfig_seconds
+        """
+        start = time.monotonic()
+        source_dir = Path(source_dir)
+        config_file = Path(config_file) if config_file else source_dir / ".config"
+        resolved = self.resolve(name)
+
+        config = KernelConfig(resolved['base'] or config_file)
+        changed = 0
+        for symbol, value in resolved['options'].items():
+            if value == 'n':
+                changed += config.unset(symbol)
+            else:
+                changed += config.set_raw(symbol, value)
+        config.save(config_file)
+        elapsed = time.monotonic() - start
+
+        report = {
+            'stack': resolved['stack'],
+            'base': resolved['base'],
+            'options': len(resolved['options']),
+            'changed': changed,
+            'overrides': resolved['overrides'],
+            'unmet': [],
+            'seconds': round(elapsed, 3),
+            'olddefconfig_seconds': None
+        }
+        if not olddefconfig:
+            return report
+
+        start = time.monotonic()
+        if self.kconfig_cache:
+            report['olddefconfig_cached'] = self.kconfig_cache.olddefconfig(source_dir, config_file, check=True)['cached']
+        else:
+            subprocess.run(["make", "olddefconfig"], cwd=str(source_dir), capture_output=True, check=True)
+        report['olddefconfig_seconds'] = round(time.monotonic() - start, 2)
+
+        # Options demandées mais retirées par Kconfig (dépendance non satisfaite, symbole inconnu)
+        final = KernelConfig(config_file)
+        for symbol, value in resolved['options'].items():
+            got = final.get(symbol, 'n')
+            if got != value:
+                report['unmet'].append((symbol, value, got))
+        return report
+
+
+def _symbol(name):
+    """'CONFIG_FOO' ou 'FOO' -> 'FOO'"""
+    return name[len("CONFIG_"):] if name.startswith("CONFIG_") else name
@@ -0,0 +1,201 @@
+"""
+Module de téléchargement
+Moteur partagé de téléchargement HTTP par plages (Range), parallèle et reprenable
+"""
+
+import json
+import os
+import threading
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+class RangedDownloader:
+    """Télécharge un fichier en morceaux HTTP Range récupérés en parallèle
+
+    Les morceaux sont écrits directement à leur position dans un fichier
+    partiel préalloué (``<dest>.part``) : aucune recopie n'est nécessaire pour
+    réassembler le résultat, un simple renommage suffit. Un petit journal JSON
+    (``<dest>.part.json``) mémorise les morceaux terminés pour qu'une reprise
+    après coupure ne récupère que les plages manquantes.
+    """
+
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, chunk_size=8 * 1024 * 1024, max_workers=4, timeout=30, retries=3):
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+
+    @staticmethod
+    def has_partial(dest):
+        """Un téléchargement par plages de dest a été interrompu (journal de reprise présent)"""
+        dest = Path(dest)
+        return dest.with_name(dest.name + ".part.json").exists()
+
+    def download(self, url, dest, progress_callback=None, prefix=None):
+        """
+        Télécharge url vers dest
+        progress_callback: fonction appelée avec (octets_reçus, taille_totale)
+        prefix: fichier contenant le début déjà reçu de url (flux interrompu) ;
+            les morceaux qu'il couvre entièrement ne sont pas redemandés
+        Retourne: Path du fichier téléchargé (lève une exception en cas d'échec)
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        part_path = dest.with_name(dest.name + ".part")
+        journal_path = dest.with_name(dest.name + ".part.json")
+        prefix = Path(prefix) if prefix else None
+
+        size, etag = self._probe(url)
+        if size is None:
+            # Serveur sans support des plages : flux unique classique
+            self._download_single(url, part_path, progress_callback)
+            os.replace(part_path, dest)
+            journal_path.unlink(missing_ok=True)
+            if prefix:
+                prefix.unlink(missing_ok=True)
+            return dest
+
+        chunks = [(start, min(start + self.chunk_size, size) - 1)
+                  for start in range(0, size, self.chunk_size)]
+
+        journal = self._load_journal(journal_path)
+        if (not part_path.exists()
+                or part_path.stat().st_size != size
+                or journal.get('url') != url
+                or journal.get('size') != size
+                or journal.get('etag') != etag
+                or journal.get('chunk_size') != self.chunk_size):
+            journal = {
+                'url': url,
+                'size': size,
+                'etag': etag,
+                'chunk_size': self.chunk_size,
+                'done': []
+            }
+            received = prefix.stat().st_size if prefix and prefix.exists() else 0
+            mode = 'wb'
+            if 0 < received <= size:
+                # Reprendre les octets du flux : le fichier devient le fichier partiel
+                os.replace(prefix, part_path)
+                journal['done'] = [i for i, (_, end) in enumerate(chunks) if end < received]
+                mode = 'r+b'
+            with open(part_path, mode) as f:
+                f.truncate(size)
+            self._save_journal(journal_path, journal)
+        if prefix:
+            prefix.unlink(missing_ok=True)
+
+        done = set(journal['done'])
+        missing = [i for i in range(len(chunks)) if i not in done]
+
+        lock = threading.Lock()
+        received = [sum(chunks[i][1] - chunks[i][0] + 1 for i in done)]
+
+        def on_bytes(count):
+            with lock:
+                received[0] += count
+                current = received[0]
+            if progress_callback:
+                progress_callback(current, size)
+
+        def on_chunk_done(index):
+            with lock:
+                journal['done'].append(index)
+                self._save_journal(journal_path, journal)
+
+        if progress_callback:
+            progress_callback(received[0], size)
+
+        fd = os.open(part_path, os.O_WRONLY)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(self._fetch_chunk, url, fd, index, chunks[index], on_bytes, on_chunk_done)
+                    for index in missing
+                ]
+                for future in futures:
+                    future.result()
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        os.replace(part_path, dest)
+        journal_path.unlink(missing_ok=True)
+        return dest
+
+    def _probe(self, url):
+        """Retourne (taille, etag) si le serveur accepte les plages, sinon (None, None)"""
+        request = urllib.request.Request(url, headers={'Range': 'bytes=0-0'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            content_range = response.headers.get('Content-Range', '')
+            if response.status != 206 or '/' not in content_range:
+                return None, None
+            total = content_range.rsplit('/', 1)[1]
+            if not total.isdigit():
+                return None, None
+            return int(total), response.headers.get('ETag')
+
+    def _fetch_chunk(self, url, fd, index, chunk, on_bytes, on_chunk_done):
+        """Récupère une plage et l'écrit à sa position dans le fichier partiel"""
+        start, end = chunk
+        last_error = None
+
+        for _ in range(self.retries):
+            offset = start
+            try:
+                request = urllib.request.Request(url, headers={'Range': f'bytes={start}-{end}'})
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    if response.status != 206:
+                        raise urllib.error.URLError(f"Réponse inattendue {response.status} pour la plage {start}-{end}")
+                    while offset <= end:
+                        data = response.read(min(self.BLOCK_SIZE, end - offset + 1))
+                        if not data:
+                            break
+                        os.pwrite(fd, data, offset)
+                        offset += len(data)
+                        on_bytes(len(data))
+                if offset != end + 1:
+                    raise urllib.error.URLError(f"Plage {start}-{end} incomplète")
+                on_chunk_done(index)
+                return
+            except (urllib.error.URLError, OSError) as e:
+                last_error = e
+                # Les octets reçus seront réécrits à la prochaine tentative
+                on_bytes(start - offset)
+
+        raise last_error
+
+    def _download_single(self, url, part_path, progress_callback=None):
+        """Téléchargement en flux unique (sans reprise possible)"""
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            total = int(response.headers.get('Content-Length') or 0)
+            received = 0
+            with open(part_path, 'wb') as f:
+                while True:
+                    data = response.read(self.BLOCK_SIZE)
+                    if not data:
+                        break
+                    f.write(data)
+                    received += len(data)
+                    if progress_callback:
+                        progress_callback(received, total)
+
+    def _load_journal(self, journal_path):
+        """Charge le journal de reprise"""
+        try:
+            with open(journal_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_journal(self, journal_path, journal):
+        """Sauvegarde atomique du journal de reprise"""
+        tmp_path = journal_path.with_name(journal_path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(journal, f)
+        os.replace(tmp_path, journal_path)
@@ -15,6 +15,9 @@ import urllib.parse
 import shutil
 import os
 
+from core.downloader import RangedDownloader
+from core.hardware_inventory import detect_gpus, parse_gpu_line
+
 
 class DriverManager:
     """Classe principale pour gérer les drivers GPU avec fonctionnalités avancées"""
@@ -53,59 +56,12 @@ class DriverManager:
         Détecte le GPU installé sur le système
         Retourne: dict avec vendor, model, pci_id, ou None si pas trouvé
         """
-        try:
-            result = subprocess.run(
-                ["lspci", "-nn"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-
-            # Rechercher VGA ou 3D controller
-            for line in result.stdout.split('\n'):
-                if 'VGA compatible controller' in line or '3D controller' in line:
-                    gpu_info = self._parse_gpu_line(line)
-                    if gpu_info:
-                        return gpu_info
-
-            return None
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return None
+        gpus = detect_gpus()
+        return gpus[0] if gpus else None
 
     def _parse_gpu_line(self, line):
         """Parse une ligne lspci pour extraire les infos GPU"""
-        # Format: 01:00.0 VGA compatible controller [0300]: NVIDIA Corporation ... [10de:2786]
-
-        # Extraire le PCI ID [vendor:device]
-        pci_match = re.search(r'\[([0-9a-f]{4}):([0-9a-f]{4})\]', line)
-        if not pci_match:
-            return None
-
-        vendor_id = pci_match.group(1)
-        device_id = pci_match.group(2)
-
-        # Déterminer le fabricant
-        vendor = None
-        if 'NVIDIA' in line or vendor_id == '10de':
-            vendor = 'NVIDIA'
-        elif 'AMD' in line or 'ATI' in line or vendor_id == '1002':
-            vendor = 'AMD'
-        elif 'Intel' in line or vendor_id == '8086':
-            vendor = 'Intel'
-        else:
-            vendor = 'Unknown'
-
-        # Extraire le nom du modèle
-        model_match = re.search(r':\s+(.+?)\s+\[', line)
-        model = model_match.group(1) if model_match else "Unknown Model"
-
-        return {
-            'vendor': vendor,
-            'model': model,
-            'pci_id': f"{vendor_id}:{device_id}",
-            'vendor_id': vendor_id,
-            'device_id': device_id
-        }
+        return parse_gpu_line(line)
 
     def detect_distribution(self):
         """
@@ -669,16 +625,16 @@ class DriverManager:
             if progress_callback:
                 progress_callback(f"Téléchargement de {filename}...", 0.1)
 
-            def reporthook(block_num, block_size, total_size):
+            def reporthook(downloaded, total_size):
                 if progress_callback and total_size > 0:
-                    downloaded = block_num * block_size
                     percent = min(downloaded / total_size, 1.0)
                     progress_callback(
                         f"Téléchargement: {int(percent*100)}%",
                         0.1 + (percent * 0.8)  # 10% à 90%
                     )
 
-            urllib.request.urlretrieve(url, download_path, reporthook)
+            # Téléchargement par plages : une coupure ne fait reprendre que les morceaux manquants
+            RangedDownloader().download(url, download_path, reporthook)
 
             if progress_callback:
                 progress_callback("Téléchargement terminé", 0.95)
@@ -686,8 +642,7 @@ class DriverManager:
             return (True, download_path, "Téléchargement réussi")
 
         except (urllib.error.URLError, Exception) as e:
-            if download_path.exists():
-                download_path.unlink()
+            # Le fichier .part et son journal sont conservés pour la reprise
             return (False, None, f"Erreur de téléchargement: {str(e)}")
 
     def install_nvidia_run_file(self, run_file_path, progress_callback=None):
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Collecteur d'inventaire matériel
+Modalias sysfs, modules chargés, processeur (fabricant, drapeaux) et GPU dans
+un fichier JSON, lu ensuite par trim / fleet. Uniquement la bibliothèque
+standard : ce fichier peut être copié seul sur chaque machine de la flotte
+    python3 hardware_inventory.py -o $(hostname).json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+from datetime import datetime
+
+
+# Format des inventaires (champs ajoutés sans changer de format : lecture tolérante)
+INVENTORY_FORMAT = 1
+
+# Classes PCI des contrôleurs d'affichage (VGA, 3D, autre) pour la lecture sysfs sans lspci
+DISPLAY_CLASSES = ("0x0300", "0x0302", "0x0380")
+
+
+def parse_gpu_line(line):
+    """Parse une ligne lspci -nn pour extraire les infos GPU"""
+    # Format: 01:00.0 VGA compatible controller [0300]: NVIDIA Corporation ... [10de:2786]
+
+    # Extraire le PCI ID [vendor:device]
+    pci_match = re.search(r'\[([0-9a-f]{4}):([0-9a-f]{4})\]', line)
+    if not pci_match:
+        return None
+
+    vendor_id = pci_match.group(1)
+    device_id = pci_match.group(2)
+
+    # Déterminer le fabricant
+    if 'NVIDIA' in line or vendor_id == '10de':
+        vendor = 'NVIDIA'
+    elif 'AMD' in line or 'ATI' in line or vendor_id == '1002':
+        vendor = 'AMD'
+    elif 'Intel' in line or vendor_id == '8086':
+        vendor = 'Intel'
+    else:
+        vendor = 'Unknown'
+
+    # Extraire le nom du modèle
+    model_match = re.search(r':\s+(.+?)\s+\[', line)
+    model = model_match.group(1) if model_match else "Unknown Model"
+
+    return {
+        'vendor': vendor,
+        'model': model,
+        'pci_id': f"{vendor_id}:{device_id}",
+        'vendor_id': vendor_id,
+        'device_id': device_id
+    }
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read().strip()
+
+
+def detect_gpus(sysfs="/sys"):
+    """
+    GPU de la machine (lspci -nn, ou sysfs si lspci est absent)
+    Retourne: [dict vendor, model, pci_id, vendor_id, device_id]
+    """
+    try:
+        output = subprocess.run(["lspci", "-nn"], capture_output=True, text=True, check=True).stdout
+        return [gpu for gpu in (parse_gpu_line(line) for line in output.split('\n')
+                                if 'VGA compatible controller' in line or '3D controller' in line) if gpu]
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        pass
+
+    gpus = []
+    devices = os.path.join(sysfs, "bus", "pci", "devices")
+    for device in sorted(os.listdir(devices)) if os.path.isdir(devices) else []:
+        path = os.path.join(devices, device)
+        try:
+            if not _read(os.path.join(path, "class")).startswith(DISPLAY_CLASSES):
+                continue
+            ids = f"{_read(os.path.join(path, 'vendor'))[2:]}:{_read(os.path.join(path, 'device'))[2:]}"
+            line = f"{device} Display controller: [{ids}]"
+        except OSError:
+            continue
+        gpu = parse_gpu_line(line)
+        if gpu:
+            gpu['model'] = "Unknown Model"
+            gpus.append(gpu)
+    return gpus
+
+
+def read_cpu(proc="/proc"):
+    """Processeur : dict vendor, model, flags (drapeaux communs à tous les cœurs)"""
+    cpu = {'vendor': None, 'model': None, 'flags': []}
+    flags = None
+    try:
+        with open(os.path.join(proc, "cpuinfo")) as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                key, value = key.strip(), value.strip()
+                if key == "vendor_id" and not cpu['vendor']:
+                    cpu['vendor'] = value
+                elif key in ("model name", "Model") and not cpu['model']:
+                    cpu['model'] = value
+                elif key in ("flags", "Features"):
+                    flags = set(value.split()) if flags is None else flags & set(value.split())
+    except OSError:
+        pass
+    cpu['flags'] = sorted(flags or [])
+    return cpu
+
+
+def collect_inventory(sysfs="/sys", proc="/proc"):
+    """
+    Inventaire du matériel de la machine locale
+    Retourne: dict format, hostname, kernel, arch, collected, modules [chargés],
+        modaliases, cpu, gpus
+    """
+    modules = []
+    try:
+        with open(os.path.join(proc, "modules")) as f:
+            modules = sorted(line.split()[0].replace('-', '_') for line in f if line.strip())
+    except OSError:
+        pass
+
+    modaliases = set()
+    for root, dirs, files in os.walk(os.path.join(sysfs, "devices")):
+        if "modalias" in files:
+            try:
+                with open(os.path.join(root, "modalias")) as f:
+                    alias = f.read().strip()
+            except OSError:
+                continue
+            if alias:
+                modaliases.add(alias)
+
+    return {
+        'format': INVENTORY_FORMAT,
+        'hostname': socket.gethostname(),
+        'kernel': platform.release(),
+        'arch': platform.machine(),
+        'collected': datetime.now().isoformat(),
+        'modules': modules,
+        'modaliases': sorted(modaliases),
+        'cpu': read_cpu(proc),
+        'gpus': detect_gpus(sysfs)
+    }
+
+
+def save_inventory(inventory, path):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(inventory, f, indent=2)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventaire matériel pour KernelCustom Manager (trim, fleet)")
+    parser.add_argument("-o", "--output", help="Fichier JSON (défaut: sortie standard)")
+    args = parser.parse_args()
+
+    inventory = collect_inventory()
+    if args.output:
+        save_inventory(inventory, args.output)
+        print(f"{inventory['hostname']}: {len(inventory['modules'])} modules, "
+              f"{len(inventory['modaliases'])} modalias -> {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(inventory, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
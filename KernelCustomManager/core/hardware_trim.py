@@ -0,0 +1,319 @@
+"""
+Module de réduction du .config au matériel (à la manière de localmodconfig)
+Inventaires (hardware_inventory) de la machine locale ou d'une flotte,
+résolution modalias -> module (modules.alias), module -> option Kconfig
+(Makefiles kbuild), puis désactivation des options en module qu'aucune
+machine n'utilise, hors liste de sécurité. Processeurs et GPU de la flotte
+gardent ou retirent les options propres à un fabricant
+"""
+
+import fnmatch
+import gzip
+import json
+import os
+import platform
+import threading
+import time
+from pathlib import Path
+
+from core.build_progress import ARCH_DIRS, ASSIGNMENT, TOP_DIRS, _read_kbuild_file
+from core.hardware_inventory import INVENTORY_FORMAT
+from core.kconfig_index import expression_symbols
+
+
+# Format du cache module -> option
+MODULE_MAP_FORMAT = 1
+
+# Options toujours gardées : définies dans ces répertoires (Kconfig)...
+TRIM_ALLOWLIST_DIRS = ("fs/", "block/", "drivers/ata/", "drivers/scsi/", "drivers/nvme/",
+                       "drivers/md/", "drivers/block/", "drivers/usb/storage/")
+# ... ou fixées par ces templates (affichage de secours, USB de base)
+TRIM_ALLOWLIST_TEMPLATES = ("vga-fallback", "usb-basic")
+
+# Options propres à un fabricant de processeur (vendor_id de /proc/cpuinfo)
+CPU_VENDOR_OPTIONS = {
+    'GenuineIntel': ('CPU_SUP_INTEL',),
+    'AuthenticAMD': ('CPU_SUP_AMD',),
+    'HygonGenuine': ('CPU_SUP_HYGON',),
+    'CentaurHauls': ('CPU_SUP_CENTAUR',),
+    'Shanghai': ('CPU_SUP_ZHAOXIN',),
+}
+# Options utiles seulement si un processeur a le drapeau
+CPU_FLAG_OPTIONS = {
+    'vmx': ('KVM_INTEL',),
+    'svm': ('KVM_AMD',),
+    'sgx': ('X86_SGX',),
+}
+# Pilotes DRM gardés pour les GPU de la flotte, même non chargés lors de l'inventaire
+GPU_VENDOR_OPTIONS = {
+    'NVIDIA': ('DRM_NOUVEAU',),
+    'AMD': ('DRM_AMDGPU', 'DRM_RADEON'),
+    'Intel': ('DRM_I915', 'DRM_XE'),
+}
+
+# Longueur maximale des préfixes littéraux indexés (pci:v00008086d : 14 caractères)
+ALIAS_PREFIX_LENGTH = 14
+
+
+def module_name(name):
+    """Les modules s'écrivent indifféremment avec - ou _ : forme normalisée"""
+    return name.replace('-', '_')
+
+
+# --- Inventaire ---
+
+def load_inventory(path):
+    """Inventaire enregistré (lève ValueError si le fichier n'en est pas un)"""
+    with open(path) as f:
+        inventory = json.load(f)
+    if not isinstance(inventory, dict) or inventory.get('format') != INVENTORY_FORMAT:
+        raise ValueError(f"inventaire invalide : {path}")
+    inventory.setdefault('hostname', Path(path).stem)
+    inventory.setdefault('modules', [])
+    inventory.setdefault('modaliases', [])
+    inventory.setdefault('cpu', None)
+    inventory.setdefault('gpus', [])
+    return inventory
+
+
+def default_alias_files(kernel_release=None):
+    """modules.alias (et modules.builtin.alias) du kernel installé"""
+    directory = Path("/lib/modules") / (kernel_release or platform.release())
+    return [path for path in (directory / "modules.alias", directory / "modules.builtin.alias") if path.exists()]
+
+
+class ModaliasResolver:
+    """modalias -> modules, d'après les motifs de modules.alias"""
+
+    def __init__(self, alias_files):
+        # Motifs regroupés par préfixe littéral : seuls les candidats sont comparés
+        self._patterns = {}
+        self.count = 0
+        for path in alias_files:
+            try:
+                with open(path, errors='replace') as f:
+                    for line in f:
+                        fields = line.split()
+                        if len(fields) == 3 and fields[0] == "alias":
+                            self._add(fields[1], module_name(fields[2]))
+            except OSError:
+                continue
+
+    def _add(self, pattern, module):
+        literal = len(pattern)
+        for position, char in enumerate(pattern):
+            if char in "*?[":
+                literal = position
+                break
+        key = pattern[:min(literal, ALIAS_PREFIX_LENGTH)]
+        self._patterns.setdefault(key, []).append((pattern, module))
+        self.count += 1
+
+    def resolve(self, modalias):
+        """Modules dont un motif correspond au modalias"""
+        modules = set()
+        for length in range(min(len(modalias), ALIAS_PREFIX_LENGTH) + 1):
+            for pattern, module in self._patterns.get(modalias[:length], ()):
+                if fnmatch.fnmatchcase(modalias, pattern):
+                    modules.add(module)
+        return modules
+
+
+# --- Module -> option Kconfig ---
+
+def parse_kbuild(lines):
+    """
+    Modules et sous-répertoires d'un Makefile kbuild
+    Retourne: dict modules {module: option ou None (obj-m)}, dirs {sous-répertoire: option ou None}
+    """
+    modules, dirs = {}, {}
+    for line in lines:
+        match = ASSIGNMENT.match(line.strip())
+        if not match or match.group(1) != 'obj':
+            continue
+        symbol = match.group(3)[len("CONFIG_"):] if match.group(3) else None
+        for token in match.group(4).split():
+            if token.startswith('#'):
+                break
+            if '$' in token:
+                continue
+            if token.endswith('/'):
+                dirs.setdefault(token.rstrip('/'), symbol)
+            elif token.endswith('.o'):
+                modules.setdefault(module_name(token[:-2]), symbol)
+    return {'modules': modules, 'dirs': dirs}
+
+
+class ModuleMap:
+    """Option Kconfig de chaque module d'un arbre de sources (Makefiles kbuild, en cache)"""
+
+    def __init__(self, source_dir, cache_file, arch=None):
+        self.source_dir = Path(source_dir)
+        self.cache_file = Path(cache_file)
+        self.arch = arch or ARCH_DIRS.get(platform.machine(), platform.machine())
+        # {répertoire relatif: [mtime_ns, taille, analyse]}
+        self.dirs = {}
+        self.modules = {}
+        self._lock = threading.Lock()
+        try:
+            with gzip.open(self.cache_file, 'rt') as f:
+                data = json.load(f)
+            if data.get('format') == MODULE_MAP_FORMAT and data.get('arch') == self.arch:
+                self.dirs = data.get('dirs', {})
+        except (OSError, ValueError, EOFError):
+            pass
+
+    def _parse_dir(self, rel):
+        directory = self.source_dir / rel
+        for name in ("Kbuild", "Makefile"):
+            path = directory / name
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            cached = self.dirs.get(rel)
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                return cached, False
+            return [stat.st_mtime_ns, stat.st_size, parse_kbuild(_read_kbuild_file(directory))], True
+        return None, False
+
+    def update(self):
+        """
+        Parcourt les répertoires construits depuis les répertoires principaux ; un
+        module sans option (obj-m) hérite de celle qui active son répertoire
+        Retourne: dict directories, parsed, modules, seconds
+        """
+        start = time.monotonic()
+        with self._lock:
+            dirs, modules, parsed = {}, {}, 0
+            queue = [(name, None) for name in TOP_DIRS + [f"arch/{self.arch}"]]
+            while queue:
+                rel, inherited = queue.pop(0)
+                if rel in dirs:
+                    continue
+                entry, reparsed = self._parse_dir(rel)
+                if entry is None:
+                    continue
+                parsed += reparsed
+                dirs[rel] = entry
+                for module, symbol in entry[2]['modules'].items():
+                    modules.setdefault(module, symbol or inherited)
+                for subdir, symbol in entry[2]['dirs'].items():
+                    queue.append((os.path.normpath(f"{rel}/{subdir}"), symbol or inherited))
+
+            changed = parsed or set(dirs) != set(self.dirs)
+            self.dirs = dirs
+            self.modules = {module: symbol for module, symbol in modules.items() if symbol}
+            if changed:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.cache_file.with_suffix(".tmp")
+                with gzip.open(tmp, 'wt', compresslevel=6) as f:
+                    json.dump({'format': MODULE_MAP_FORMAT, 'arch': self.arch, 'dirs': dirs}, f,
+                              separators=(',', ':'))
+                os.replace(tmp, self.cache_file)
+        return {'directories': len(dirs), 'parsed': parsed, 'modules': len(self.modules),
+                'seconds': round(time.monotonic() - start, 3)}
+
+    def symbol(self, module):
+        return self.modules.get(module_name(module))
+
+
+# --- Réduction ---
+
+def needed_modules(inventories, resolver):
+    """
+    Modules utilisés par l'ensemble des inventaires : chargés ou réclamés par un modalias
+    Retourne: {module: [machines]}
+    """
+    needed = {}
+    for inventory in inventories:
+        host = inventory.get('hostname', "?")
+        modules = {module_name(module) for module in inventory.get('modules', [])}
+        for alias in inventory.get('modaliases', []):
+            modules |= resolver.resolve(alias)
+        for module in modules:
+            needed.setdefault(module, []).append(host)
+    return needed
+
+
+def fleet_options(inventories):
+    """
+    Options décidées par les processeurs et GPU des inventaires ; une option n'est
+    retirée que si toutes les machines ont été inventoriées avec leur processeur
+    Retourne: (options à garder, options à désactiver)
+    """
+    keep, disable = set(), set()
+    cpus = [inventory.get('cpu') for inventory in inventories]
+    if cpus and all(cpu and cpu.get('vendor') for cpu in cpus):
+        vendors = {cpu['vendor'] for cpu in cpus}
+        for vendor, options in CPU_VENDOR_OPTIONS.items():
+            (keep if vendor in vendors else disable).update(options)
+        flags = set().union(*(cpu.get('flags', []) for cpu in cpus))
+        for flag, options in CPU_FLAG_OPTIONS.items():
+            (keep if flag in flags else disable).update(options)
+    for inventory in inventories:
+        for gpu in inventory.get('gpus', []):
+            keep.update(GPU_VENDOR_OPTIONS.get(gpu.get('vendor'), ()))
+    return keep, disable - keep
+
+
+def dependency_closure(symbols, index):
+    """Options plus tout ce dont elles dépendent ou qu'elles sélectionnent (transitivement)"""
+    closure, queue = set(symbols), list(symbols)
+    while queue:
+        entry = index.symbols.get(queue.pop())
+        if entry is None:
+            continue
+        referenced = [name for expr in entry['depends'] for name in expression_symbols(expr)]
+        referenced += [target for target, _ in entry['selects']]
+        for name in referenced:
+            if name not in closure:
+                closure.add(name)
+                queue.append(name)
+    return closure
+
+
+def plan_trim(config, needed, module_map, index, allowlist=(), disable=()):
+    """
+    Désactive dans config (KernelConfig, modifié en place) les options en module
+    qui ne servent à aucun module nécessaire, à leurs dépendances ni à la liste de sécurité
+    needed: {module: [machines]} (needed_modules)
+    allowlist: options gardées en plus des répertoires TRIM_ALLOWLIST_DIRS
+    disable: options désactivées même intégrées (fleet_options), sauf si une option gardée en dépend
+    Retourne: dict modules_before, modules_after, removed [options], hardware {option: [modules]},
+        allowlisted, dependencies (nombres d'options gardées), unresolved [modules sans option],
+        disabled [options de disable effectivement retirées]
+    """
+    hardware, unresolved = {}, []
+    for module in sorted(needed):
+        symbol = module_map.symbol(module)
+        if symbol:
+            hardware.setdefault(symbol, []).append(module)
+        else:
+            unresolved.append(module)
+
+    allowed = set(allowlist)
+    for name, entry in index.symbols.items():
+        if any(path.startswith(TRIM_ALLOWLIST_DIRS) for path in entry['files']):
+            allowed.add(name)
+
+    keep = dependency_closure(set(hardware) | allowed, index)
+    as_modules = [name for name, value in config.items() if value == 'm']
+    removed = [name for name in as_modules if name not in keep]
+    for name in removed:
+        config.unset(name)
+    disabled = [name for name in sorted(disable) if config.is_enabled(name) and name not in keep]
+    for name in disabled:
+        config.unset(name)
+
+    return {
+        'modules_before': len(as_modules),
+        'modules_after': len(as_modules) - len(removed),
+        'removed': removed,
+        'hardware': hardware,
+        'allowlisted': len([name for name in as_modules if name in allowed]),
+        'dependencies': len([name for name in as_modules if name in keep
+                             and name not in allowed and name not in hardware]),
+        'unresolved': unresolved,
+        'disabled': disabled
+    }
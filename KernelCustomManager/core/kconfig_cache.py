@@ -0,0 +1,248 @@
+"""
+Module du cache de make olddefconfig
+Le résultat de olddefconfig ne dépend que des Kconfig des sources, du .config
+d'entrée et du compilateur : il est mémorisé sous cette clé et une demande
+identique devient une simple copie de fichier. Les outils kconfig
+(scripts/kconfig/conf) sont préconstruits en arrière-plan après un téléchargement
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+# Variables d'environnement qui changent le résultat de Kconfig
+KCONFIG_ENV = ('ARCH', 'SRCARCH', 'CROSS_COMPILE', 'LLVM', 'CC', 'LD')
+
+# Format de l'empreinte mémorisée d'un arbre
+TREE_FORMAT = 1
+
+
+class OlddefconfigCache:
+    """Résultats de olddefconfig indexés par (arbre Kconfig, .config, compilateur)"""
+
+    # Nombre de résultats gardés (~60 Ko compressés chacun)
+    MAX_ENTRIES = 200
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._compilers = {}
+        self._trees = {}     # arbre -> empreinte et (mtime_ns, taille) des fichiers
+        self._lock = threading.Lock()
+
+    # --- Clé ---
+
+    def tree_hash(self, source_dir):
+        """
+        Empreinte des Kconfig* et du Makefile principal (contenu, indépendant des dates)
+        Mémorisée par arbre avec (mtime_ns, taille) de chaque fichier et la date de
+        chaque répertoire : si rien n'a changé, ni parcours ni relecture ; sinon seuls
+        les fichiers modifiés sont relus
+        """
+        source_dir = Path(source_dir).resolve()
+        with self._lock:
+            memo = self._trees.get(source_dir)
+        if memo is None:
+            memo = self._load_tree(source_dir)
+        if memo is None or not self._tree_unchanged(source_dir, memo):
+            memo = self._scan_tree(source_dir, memo)
+            self._save_tree(source_dir, memo)
+        with self._lock:
+            self._trees[source_dir] = memo
+        return memo['hash']
+
+    @staticmethod
+    def _tree_unchanged(source_dir, memo):
+        """Aucun répertoire n'a gagné ou perdu d'entrée et aucun fichier n'a changé"""
+        try:
+            for rel, mtime in memo['dirs'].items():
+                if os.stat(os.path.join(source_dir, rel)).st_mtime_ns != mtime:
+                    return False
+            for rel, (mtime, size, _) in memo['files'].items():
+                stat = os.stat(os.path.join(source_dir, rel))
+                if stat.st_mtime_ns != mtime or stat.st_size != size:
+                    return False
+        except OSError:
+            return False
+        return True
+
+    @staticmethod
+    def _scan_tree(source_dir, previous=None):
+        """Parcours complet ; l'empreinte d'un fichier inchangé est reprise de previous"""
+        known = previous['files'] if previous else {}
+        dirs, paths = {}, [os.path.join(source_dir, "Makefile")]
+        stack = [str(source_dir)]
+        while stack:
+            directory = stack.pop()
+            try:
+                dirs[os.path.relpath(directory, source_dir)] = os.stat(directory).st_mtime_ns
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith('.'):
+                        stack.append(entry.path)
+                elif entry.name.startswith("Kconfig"):
+                    paths.append(entry.path)
+
+        files = {}
+        digest = hashlib.sha1()
+        for path in sorted(paths):
+            rel = os.path.relpath(path, source_dir)
+            try:
+                stat = os.stat(path)
+                cached = known.get(rel)
+                if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                    content = cached[2]
+                else:
+                    with open(path, 'rb') as f:
+                        content = hashlib.sha1(f.read()).hexdigest()
+            except OSError:
+                continue
+            files[rel] = [stat.st_mtime_ns, stat.st_size, content]
+            digest.update(f"{rel}\0{content}\n".encode())
+        return {'hash': digest.hexdigest(), 'dirs': dirs, 'files': files}
+
+    def _tree_file(self, source_dir):
+        return self.cache_dir / f"tree-{hashlib.sha1(str(source_dir).encode()).hexdigest()[:16]}.json.gz"
+
+    def _load_tree(self, source_dir):
+        try:
+            with gzip.open(self._tree_file(source_dir), 'rt') as f:
+                memo = json.load(f)
+        except (OSError, ValueError, EOFError):
+            return None
+        return memo if memo.get('format') == TREE_FORMAT else None
+
+    def _save_tree(self, source_dir, memo):
+        path = self._tree_file(source_dir)
+        tmp = path.with_suffix(".tmp")
+        try:
+            with gzip.open(tmp, 'wt', compresslevel=6) as f:
+                json.dump({'format': TREE_FORMAT, **memo}, f, separators=(',', ':'))
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def compiler_id(self, make_vars=None):
+        """Première ligne de '<CC> --version' (mise en mémoire)"""
+        compiler = next((var[3:] for var in make_vars or [] if var.startswith("CC=")),
+                        os.environ.get('CC', 'gcc'))
+        if compiler not in self._compilers:
+            try:
+                output = subprocess.run(compiler.split() + ["--version"], capture_output=True, text=True).stdout
+                self._compilers[compiler] = output.splitlines()[0] if output else compiler
+            except OSError:
+                self._compilers[compiler] = compiler
+        return self._compilers[compiler]
+
+    def key(self, source_dir, config_file, make_vars=None):
+        """Clé du résultat : arbre Kconfig, .config d'entrée, compilateur, ARCH/LLVM..."""
+        digest = hashlib.sha1()
+        digest.update(self.tree_hash(source_dir).encode())
+        digest.update(Path(config_file).read_bytes())
+        digest.update(self.compiler_id(make_vars).encode())
+        for name in KCONFIG_ENV:
+            digest.update(f"{name}={os.environ.get(name, '')}\n".encode())
+        # O= ne change pas le résultat ; les autres variables (LLVM=1, ARCH=...) si
+        for var in sorted(make_vars or []):
+            if not var.startswith(("O=", "CC=")):
+                digest.update(var.encode() + b"\n")
+        return digest.hexdigest()
+
+    # --- Cache ---
+
+    def _entry(self, key):
+        return self.cache_dir / f"{key}.config.gz"
+
+    def lookup(self, key):
+        """Chemin du résultat mémorisé, ou None"""
+        path = self._entry(key)
+        return path if path.exists() else None
+
+    def store(self, key, config_file):
+        path = self._entry(key)
+        tmp = path.with_suffix(".tmp")
+        with open(config_file, 'rb') as src, gzip.open(tmp, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp, path)
+        self.prune()
+
+    def restore(self, key, config_file):
+        """Écrit le résultat mémorisé dans config_file (remplacement atomique)"""
+        config_file = Path(config_file)
+        fd, tmp = tempfile.mkstemp(prefix=".config.", dir=str(config_file.parent))
+        try:
+            with gzip.open(self._entry(key), 'rb') as src, os.fdopen(fd, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, config_file)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        # Date d'accès : ordre d'éviction
+        os.utime(self._entry(key))
+
+    def prune(self):
+        """Supprime les résultats les moins récemment utilisés au-delà de MAX_ENTRIES"""
+        with self._lock:
+            entries = sorted(self.cache_dir.glob("*.config.gz"), key=lambda p: p.stat().st_mtime, reverse=True)
+            for path in entries[self.MAX_ENTRIES:]:
+                path.unlink(missing_ok=True)
+
+    def clear(self):
+        for path in self.cache_dir.glob("*.config.gz"):
+            path.unlink(missing_ok=True)
+
+    # --- olddefconfig ---
+
+    def olddefconfig(self, source_dir, config_file=None, make_vars=None, check=False):
+        """
+        make olddefconfig, ou copie du résultat mémorisé pour la même entrée
+        config_file: .config à résoudre (défaut: source_dir/.config, via KCONFIG_CONFIG sinon)
+        Retourne: dict cached, seconds, returncode (lève CalledProcessError si check et échec)
+        """
+        start = time.monotonic()
+        source_dir = Path(source_dir)
+        config_file = Path(config_file) if config_file else source_dir / ".config"
+
+        key = self.key(source_dir, config_file, make_vars)
+        if self.lookup(key):
+            self.restore(key, config_file)
+            return {'cached': True, 'seconds': round(time.monotonic() - start, 3), 'returncode': 0}
+
+        env = os.environ.copy()
+        if config_file.resolve() != (source_dir / ".config").resolve():
+            env['KCONFIG_CONFIG'] = str(config_file.resolve())
+        result = subprocess.run(["make", "olddefconfig"] + list(make_vars or []), cwd=str(source_dir),
+                                env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            if check:
+                raise subprocess.CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+        else:
+            self.store(key, config_file)
+        return {'cached': False, 'seconds': round(time.monotonic() - start, 3), 'returncode': result.returncode}
+
+    def prebuild(self, source_dir, seed=None):
+        """
+        Construit les outils kconfig d'un arbre sans toucher à son .config, en
+        résolvant seed (KernelConfig de départ probable) dans un fichier temporaire :
+        la même demande ensuite sera servie par le cache
+        Retourne: résultat de olddefconfig
+        """
+        with tempfile.TemporaryDirectory(prefix="kcm-kconfig-") as tmp:
+            config = Path(tmp) / "config"
+            if seed is not None:
+                seed.save(config)
+            else:
+                config.write_text("")
+            return self.olddefconfig(source_dir, config)
@@ -0,0 +1,489 @@
+"""
+Module d'index des options Kconfig
+Les fichiers Kconfig atteints depuis le Kconfig principal (source, rsource...)
+sont analysés une fois par version et l'index est gardé sur disque ; une mise à
+jour ne relit que les fichiers modifiés. Le graphe (depends on, select, imply)
+répond à la recherche approximative d'options, à « que fait activer cette
+option ? » et à « pourquoi cette option est-elle forcée ? »
+"""
+
+import gzip
+import json
+import os
+import platform
+import re
+import threading
+import time
+from pathlib import Path
+
+from core.build_progress import ARCH_DIRS
+from core.kernel_config import unquote
+
+
+# Format de l'index sur disque (relecture complète s'il change)
+INDEX_FORMAT = 1
+
+TYPE_KEYWORDS = ('bool', 'tristate', 'string', 'int', 'hex')
+
+IDENTIFIER = re.compile(r'\b[A-Za-z_][A-Za-z0-9_]*\b')
+MACRO = re.compile(r'\$\([^)]*\)')
+QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+# Profondeur et nombre maximal des chaînes de select remontées par why()
+MAX_CHAIN_DEPTH = 6
+MAX_CHAINS = 20
+
+
+def expression_symbols(expr):
+    """Symboles cités par une expression Kconfig (sans y/m/n ni macros)"""
+    expr = QUOTED.sub('', MACRO.sub('', expr))
+    return [name for name in IDENTIFIER.findall(expr) if name not in ('y', 'm', 'n', 'if')]
+
+
+EXPR_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|&&|\|\||!=|<=|>=|[()!=<>]|[^\s()!=<>&|"]+')
+TRISTATE = {'n': 0, 'm': 1, 'y': 2}
+
+
+def evaluate(expr, value_of):
+    """
+    Valeur tristate (0 = n, 1 = m, 2 = y) d'une expression Kconfig
+    value_of: nom -> valeur brute du .config ('y', 'm', 'n', texte) ou None
+    Une expression illisible est considérée satisfaite
+    """
+    tokens = EXPR_TOKEN.findall(MACRO.sub('y', expr))
+    position = [0]
+
+    def peek():
+        return tokens[position[0]] if position[0] < len(tokens) else None
+
+    def take():
+        position[0] += 1
+        return tokens[position[0] - 1]
+
+    def atom():
+        token = take()
+        if token.startswith('"'):
+            return token[1:-1]
+        if token in TRISTATE:
+            return token
+        # Symbole non défini : constante (nombre, texte)
+        value = value_of(token)
+        return unquote(value) if value is not None else token
+
+    def comparison():
+        if peek() == '(':
+            take()
+            value = disjunction()
+            if take() != ')':
+                raise ValueError(expr)
+            return value
+        left = atom()
+        if peek() in ('=', '!=', '<', '>', '<=', '>='):
+            operator, right = take(), atom()
+            try:
+                left, right = int(left, 0), int(right, 0)
+            except ValueError:
+                pass
+            result = {'=': left == right, '!=': left != right}.get(operator)
+            if result is None:
+                try:
+                    result = {'<': left < right, '>': left > right, '<=': left <= right, '>=': left >= right}[operator]
+                except TypeError:
+                    result = False
+            return 2 if result else 0
+        return TRISTATE.get(left, 0)
+
+    def negation():
+        if peek() == '!':
+            take()
+            return 2 - negation()
+        return comparison()
+
+    def conjunction():
+        value = negation()
+        while peek() == '&&':
+            take()
+            value = min(value, negation())
+        return value
+
+    def disjunction():
+        value = conjunction()
+        while peek() == '||':
+            take()
+            value = max(value, conjunction())
+        return value
+
+    try:
+        value = disjunction()
+        return value if peek() is None else 2
+    except (IndexError, ValueError):
+        return 2
+
+
+def _strip_comment(line):
+    """Retire un commentaire # hors chaînes"""
+    quoted = False
+    for i, char in enumerate(line):
+        if char == '"' and (i == 0 or line[i - 1] != '\\'):
+            quoted = not quoted
+        elif char == '#' and not quoted:
+            return line[:i]
+    return line
+
+
+def _indent(line):
+    return len(line.expandtabs(8)) - len(line.expandtabs(8).lstrip())
+
+
+def parse_kconfig(text):
+    """
+    Analyse un fichier Kconfig sans suivre les source
+    Retourne: dict symbols [dict name, type, prompt, context, depends, selects, implies, help],
+        sources [[mot-clé, chemin, contexte]] ; contexte = dépendances des if/menu/choice englobants
+    """
+    lines = text.replace('\\\n', ' ').splitlines()
+    symbols, sources = [], []
+    frames = []           # [(mot-clé, [expressions])] des if / menu / choice ouverts
+    current = None        # option (ou menu / choice) dont on lit les attributs
+    help_for = None       # option dont on lit l'aide
+    help_indent = None
+    help_lines = []
+
+    def context():
+        return [expr for _, exprs in frames for expr in exprs]
+
+    def close_help():
+        if help_for is not None and help_lines:
+            help_for['help'] = " ".join(help_lines)[:300]
+
+    i = 0
+    while i < len(lines):
+        raw = lines[i]
+        i += 1
+
+        # Aide : toutes les lignes plus indentées que la première ligne de texte
+        if help_for is not None:
+            if not raw.strip():
+                continue
+            if help_indent is None:
+                help_indent = _indent(raw)
+            if _indent(raw) >= help_indent:
+                if len(help_lines) < 8:
+                    help_lines.append(raw.strip())
+                continue
+            close_help()
+            help_for, help_indent, help_lines = None, None, []
+
+        line = _strip_comment(raw).strip()
+        if not line:
+            continue
+        keyword, _, rest = line.partition(' ')
+        rest = rest.strip()
+
+        if keyword in ('config', 'menuconfig'):
+            current = {'name': rest, 'type': None, 'prompt': None, 'context': context(),
+                       'depends': [], 'selects': [], 'implies': [], 'help': ""}
+            symbols.append(current)
+        elif keyword == 'choice':
+            current = {'deps': []}
+            frames.append(('choice', current['deps']))
+        elif keyword == 'menu':
+            current = {'deps': []}
+            frames.append(('menu', current['deps']))
+        elif keyword == 'if':
+            current = None
+            frames.append(('if', [rest]))
+        elif keyword in ('endchoice', 'endmenu', 'endif'):
+            current = None
+            expected = keyword[3:]
+            while frames:
+                if frames.pop()[0] == expected:
+                    break
+        elif keyword in ('source', 'rsource', 'osource', 'orsource'):
+            current = None
+            match = QUOTED.search(rest)
+            sources.append([keyword, match.group(1) if match else rest, context()])
+        elif keyword in ('comment', 'mainmenu'):
+            current = {'deps': []}
+        elif current is None:
+            continue
+        elif keyword in TYPE_KEYWORDS or keyword in ('def_bool', 'def_tristate'):
+            if 'name' in current:
+                current['type'] = keyword.replace('def_', '')
+                match = QUOTED.match(rest)
+                if match and keyword in TYPE_KEYWORDS:
+                    current['prompt'] = match.group(1)
+        elif keyword == 'prompt':
+            match = QUOTED.match(rest)
+            if match and 'name' in current:
+                current['prompt'] = match.group(1)
+        elif keyword == 'depends' and rest.startswith('on '):
+            expr = rest[3:].strip()
+            if 'name' in current:
+                current['depends'].append(expr)
+            else:
+                current['deps'].append(expr)
+        elif keyword in ('select', 'imply') and 'name' in current:
+            target, _, condition = rest.partition(' if ')
+            current['selects' if keyword == 'select' else 'implies'].append([target.strip(), condition.strip()])
+        elif keyword in ('help', '---help---') and 'name' in current:
+            help_for, help_indent, help_lines = current, None, []
+
+    close_help()
+    return {'symbols': symbols, 'sources': sources}
+
+
+def _join(exprs):
+    """Conjonction d'expressions"""
+    if len(exprs) == 1:
+        return exprs[0]
+    return " && ".join(f"({expr})" if '||' in expr else expr for expr in exprs)
+
+
+def _subsequence_gaps(query, name):
+    """Nombre de caractères sautés si query est une sous-séquence de name, sinon None"""
+    position, gaps = 0, 0
+    for char in query:
+        found = name.find(char, position)
+        if found < 0:
+            return None
+        gaps += found - position
+        position = found + 1
+    return gaps
+
+
+class KconfigIndex:
+    """Graphe des options Kconfig d'un arbre de sources"""
+
+    def __init__(self, source_dir, index_file, arch=None):
+        self.source_dir = Path(source_dir)
+        self.index_file = Path(index_file)
+        self.arch = arch or ARCH_DIRS.get(platform.machine(), platform.machine())
+        # {chemin relatif: [mtime_ns, taille, analyse]}
+        self.files = {}
+        self.symbols = {}
+        self.selected_by = {}
+        self.implied_by = {}
+        self.dependents = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    # --- Persistance ---
+
+    def _load(self):
+        try:
+            with gzip.open(self.index_file, 'rt') as f:
+                data = json.load(f)
+        except (OSError, ValueError, EOFError):
+            return
+        if data.get('format') == INDEX_FORMAT and data.get('arch') == self.arch:
+            self.files = data.get('files', {})
+
+    def _save(self):
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_suffix(".tmp")
+        with gzip.open(tmp, 'wt', compresslevel=6) as f:
+            json.dump({'format': INDEX_FORMAT, 'arch': self.arch, 'files': self.files},
+                      f, separators=(',', ':'))
+        os.replace(tmp, self.index_file)
+
+    # --- Indexation ---
+
+    def _resolve_source(self, keyword, target, current):
+        """Fichiers désignés par un source (macros $(SRCARCH), motifs *)"""
+        target = target.replace("$(SRCARCH)", self.arch).replace("$(ARCH)", self.arch)
+        if "$(" in target:
+            return []
+        base = current.parent if keyword in ('rsource', 'orsource') else self.source_dir
+        if any(char in target for char in "*?["):
+            return sorted(path for path in base.glob(target) if path.is_file())
+        path = base / target
+        return [path] if path.is_file() else []
+
+    def update(self):
+        """
+        Parcourt les Kconfig depuis le Kconfig principal, réanalyse les fichiers
+        modifiés et reconstruit le graphe
+        Retourne: dict files, parsed (fichiers relus), symbols, seconds
+        """
+        start = time.monotonic()
+        with self._lock:
+            files = {}
+            order = []
+            parsed = 0
+            queue = [(self.source_dir / "Kconfig", [])]
+            while queue:
+                path, inherited = queue.pop(0)
+                rel = os.path.relpath(path, self.source_dir)
+                if rel in files:
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                cached = self.files.get(rel)
+                if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                    result = cached[2]
+                else:
+                    result = parse_kconfig(path.read_text(errors='replace'))
+                    parsed += 1
+                files[rel] = [stat.st_mtime_ns, stat.st_size, result]
+                order.append((rel, inherited))
+                for keyword, target, context in result['sources']:
+                    for sourced in self._resolve_source(keyword, target, path):
+                        queue.append((sourced, inherited + context))
+
+            changed = parsed or set(files) != set(self.files)
+            self.files = files
+            self._build(order)
+            if changed:
+                self._save()
+        return {'files': len(files), 'parsed': parsed, 'symbols': len(self.symbols),
+                'seconds': round(time.monotonic() - start, 3)}
+
+    def _build(self, order):
+        """Fusionne les définitions (une option peut être définie à plusieurs endroits)"""
+        symbols, selected_by, implied_by, dependents = {}, {}, {}, {}
+        for rel, inherited in order:
+            for definition in self.files[rel][2]['symbols']:
+                name = definition['name']
+                entry = symbols.setdefault(name, {
+                    'name': name, 'type': None, 'prompt': None, 'files': [],
+                    'depends': [], 'selects': [], 'implies': [], 'help': ""
+                })
+                entry['type'] = entry['type'] or definition['type']
+                entry['prompt'] = entry['prompt'] or definition['prompt']
+                entry['help'] = entry['help'] or definition['help']
+                if rel not in entry['files']:
+                    entry['files'].append(rel)
+                exprs = inherited + definition['context'] + definition['depends']
+                if exprs and _join(exprs) not in entry['depends']:
+                    entry['depends'].append(_join(exprs))
+                for kind, reverse in (('selects', selected_by), ('implies', implied_by)):
+                    for target, condition in definition[kind]:
+                        entry[kind].append([target, condition])
+                        reverse.setdefault(target, []).append([name, condition])
+                for expr in exprs:
+                    for dependency in expression_symbols(expr):
+                        dependents.setdefault(dependency, set()).add(name)
+
+        self.symbols = symbols
+        self.selected_by = selected_by
+        self.implied_by = implied_by
+        self.dependents = {name: sorted(users) for name, users in dependents.items()}
+
+    # --- Requêtes ---
+
+    def symbol(self, name):
+        """Option (nom avec ou sans CONFIG_, casse indifférente), ou None"""
+        name = name[len("CONFIG_"):] if name.upper().startswith("CONFIG_") else name
+        return self.symbols.get(name) or self.symbols.get(name.upper())
+
+    def search(self, query, limit=50):
+        """
+        Recherche approximative : nom exact, préfixe, sous-chaîne, puis texte du
+        prompt et sous-séquence du nom (USBSTR -> USB_STORAGE)
+        Retourne: [option] triées par pertinence
+        """
+        words = query.strip().split()
+        if not words:
+            return []
+        words = [word[len("CONFIG_"):] if word.upper().startswith("CONFIG_") else word for word in words]
+        scored = []
+        for name, entry in self.symbols.items():
+            prompt = (entry['prompt'] or "").lower()
+            score = 0
+            for word in words:
+                upper = word.upper()
+                if name == upper:
+                    score += 0
+                elif name.startswith(upper):
+                    score += 1
+                elif upper in name:
+                    score += 2
+                elif word.lower() in prompt:
+                    score += 3
+                else:
+                    gaps = _subsequence_gaps(upper, name) if len(words) == 1 else None
+                    if gaps is None or gaps > 2 * len(name):
+                        break
+                    score += 4 + gaps / 100
+            else:
+                scored.append((score, len(name), name))
+        scored.sort()
+        return [self.symbols[name] for _, _, name in scored[:limit]]
+
+    def impact(self, name, config=None):
+        """
+        Ce qu'entraîne l'activation d'une option
+        config: KernelConfig pour signaler les dépendances non satisfaites
+        Retourne: dict selects [(option, par)] (fermeture transitive), implies [(option, par)],
+            depends [expressions], unmet [dict symbol, expr : dépendances non satisfaites par config],
+            enables [options qui deviennent disponibles]
+        """
+        entry = self.symbol(name)
+        if entry is None:
+            return None
+        root = entry['name']
+        selects, implies, seen, implied = [], [], {root}, set()
+        queue = [root]
+        while queue:
+            current = queue.pop(0)
+            source = self.symbols.get(current) or {}
+            for target, _ in source.get('selects', []):
+                if target not in seen:
+                    seen.add(target)
+                    selects.append((target, current))
+                    queue.append(target)
+            for target, _ in source.get('implies', []):
+                if target not in seen and target not in implied:
+                    implied.add(target)
+                    implies.append((target, current))
+        # Une option à la fois impliquée et sélectionnée (plus loin) n'est que sélectionnée
+        implies = [(target, via) for target, via in implies if target not in seen]
+
+        unmet = []
+        if config is not None:
+            # select ignore les dépendances de la cible : source d'avertissements Kconfig
+            for current in [root] + [target for target, _ in selects]:
+                for expr in (self.symbols.get(current) or {}).get('depends', []):
+                    if evaluate(expr, config.get) == 0:
+                        unmet.append({'symbol': current, 'expr': expr})
+        return {
+            'symbol': root,
+            'selects': selects,
+            'implies': implies,
+            'depends': entry['depends'],
+            'unmet': unmet,
+            'enables': self.dependents.get(root, [])
+        }
+
+    def why(self, name, config):
+        """
+        Pourquoi une option est activée : chaînes de select depuis des options actives
+        Retourne: dict value, selected_by [[chaîne d'options]], implied_by [options actives]
+        """
+        entry = self.symbol(name)
+        if entry is None:
+            return None
+        root = entry['name']
+        chains = []
+
+        def walk(current, chain):
+            if len(chains) >= MAX_CHAINS:
+                return
+            selectors = [s for s, _ in self.selected_by.get(current, []) if config.is_enabled(s) and s not in chain]
+            if not selectors or len(chain) >= MAX_CHAIN_DEPTH:
+                if len(chain) > 1:
+                    chains.append(list(reversed(chain)))
+                return
+            for selector in selectors:
+                walk(selector, chain + [selector])
+
+        walk(root, [root])
+        return {
+            'symbol': root,
+            'value': config.get(root, 'n'),
+            'selected_by': chains,
+            'implied_by': [s for s, _ in self.implied_by.get(root, []) if config.is_enabled(s)]
+        }
@@ -0,0 +1,240 @@
+"""
+Module de lecture / écriture des .config
+Le fichier est analysé une seule fois : lignes d'origine conservées dans une
+liste, index nom -> ligne et valeurs dans un dictionnaire. Les modifications
+ne touchent que les lignes concernées et l'écriture est atomique
+"""
+
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+
+
+PREFIX = "CONFIG_"
+
+# CONFIG_FOO=valeur
+SET_LINE = re.compile(r'^CONFIG_([A-Za-z0-9_]+)=(.*)$')
+# # CONFIG_FOO is not set
+UNSET_LINE = re.compile(r'^# CONFIG_([A-Za-z0-9_]+) is not set$')
+
+# Nombre de fichiers gardés par le cache de read_values
+SYMBOLS_CACHE_SIZE = 8
+
+
+def _name(symbol):
+    """'CONFIG_FOO' ou 'FOO' -> 'FOO'"""
+    return symbol[len(PREFIX):] if symbol.startswith(PREFIX) else symbol
+
+
+def quote(text):
+    """Texte -> valeur .config entre guillemets"""
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def unquote(value):
+    """Valeur .config entre guillemets -> texte"""
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    return value
+
+
+class KernelConfig:
+    """Options d'un .config : lecture typée, modification et écriture en diff minimal"""
+
+    def __init__(self, path=None, text=None):
+        """
+        path: fichier .config à lire (absent : configuration vide)
+        text: contenu déjà lu (prioritaire sur path)
+        """
+        self.path = Path(path) if path else None
+        if text is None and self.path and self.path.exists():
+            text = self.path.read_text(errors='replace')
+        self.lines = (text or "").splitlines()
+        self._index = {}
+        self._values = {}
+        self._dirty = False
+        for number, line in enumerate(self.lines):
+            match = SET_LINE.match(line)
+            if match:
+                self._index[match.group(1)] = number
+                self._values[match.group(1)] = match.group(2)
+                continue
+            match = UNSET_LINE.match(line)
+            if match:
+                self._index[match.group(1)] = number
+                self._values[match.group(1)] = 'n'
+
+    # --- Lecture ---
+
+    def __contains__(self, symbol):
+        return _name(symbol) in self._values
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, symbol, default=None):
+        """Valeur brute ('y', 'm', 'n', '0x1000', '"texte"'), default si absente"""
+        return self._values.get(_name(symbol), default)
+
+    def get_tristate(self, symbol):
+        """'y', 'm' ou 'n' (absente ou non booléenne : 'n')"""
+        value = self.get(symbol)
+        return value if value in ('y', 'm') else 'n'
+
+    def is_enabled(self, symbol):
+        """Option à y ou m"""
+        return self.get_tristate(symbol) != 'n'
+
+    def get_int(self, symbol, default=None):
+        """Valeur entière (décimale ou hexadécimale 0x...), default si absente ou invalide"""
+        value = self.get(symbol)
+        try:
+            return int(unquote(value), 0) if value is not None else default
+        except ValueError:
+            return default
+
+    def get_str(self, symbol, default=None):
+        """Valeur texte sans guillemets, default si absente"""
+        value = self.get(symbol)
+        return unquote(value) if value is not None else default
+
+    def symbols(self):
+        """Options activées : {'CONFIG_FOO': 'y' ou 'm', ...}"""
+        return {PREFIX + name: value for name, value in self._values.items() if value in ('y', 'm')}
+
+    def items(self):
+        """[(nom sans préfixe, valeur brute)] dans l'ordre du fichier"""
+        return sorted(self._values.items(), key=lambda item: self._index[item[0]])
+
+    # --- Modification ---
+
+    def set(self, symbol, value):
+        """
+        Fixe une option : True/False, 'y'/'m'/'n', entier ou texte (mis entre guillemets)
+        Retourne: True si la valeur a changé
+        """
+        if value is False or value == 'n':
+            return self.unset(symbol)
+        if value is True:
+            raw = 'y'
+        elif isinstance(value, int):
+            raw = str(value)
+        elif value in ('y', 'm'):
+            raw = value
+        else:
+            raw = quote(str(value))
+        return self._write(_name(symbol), raw, f"{PREFIX}{_name(symbol)}={raw}")
+
+    def set_str(self, symbol, text):
+        """Option texte, même si la valeur ressemble à un booléen ou un nombre"""
+        raw = quote(text)
+        return self._write(_name(symbol), raw, f"{PREFIX}{_name(symbol)}={raw}")
+
+    def set_raw(self, symbol, raw):
+        """Valeur déjà au format .config (0x1000, "texte"...)"""
+        return self._write(_name(symbol), raw, f"{PREFIX}{_name(symbol)}={raw}")
+
+    def unset(self, symbol):
+        """'# CONFIG_FOO is not set' ; retourne True si la valeur a changé"""
+        name = _name(symbol)
+        return self._write(name, 'n', f"# {PREFIX}{name} is not set")
+
+    def remove(self, symbol):
+        """Retire la ligne de l'option (ni valeur ni 'is not set') ; True si elle existait"""
+        name = _name(symbol)
+        if name not in self._index:
+            return False
+        number = self._index.pop(name)
+        del self._values[name]
+        del self.lines[number]
+        for other, position in self._index.items():
+            if position > number:
+                self._index[other] = position - 1
+        self._dirty = True
+        return True
+
+    def _write(self, name, raw, line):
+        if self._values.get(name) == raw and name in self._index:
+            return False
+        if name in self._index:
+            self.lines[self._index[name]] = line
+        else:
+            # Nouvelle option en fin de fichier : olddefconfig la replacera
+            self._index[name] = len(self.lines)
+            self.lines.append(line)
+        self._values[name] = raw
+        self._dirty = True
+        return True
+
+    @property
+    def modified(self):
+        return self._dirty
+
+    # --- Écriture ---
+
+    def text(self):
+        return "\n".join(self.lines) + "\n" if self.lines else ""
+
+    def save(self, path=None):
+        """
+        Écrit le fichier de façon atomique (fichier temporaire puis renommage)
+        Sans modification ni changement de destination, rien n'est écrit
+        Retourne: True si le fichier a été écrit
+        """
+        path = Path(path) if path else self.path
+        if path is None:
+            raise ValueError("aucun fichier de destination")
+        if not self._dirty and path == self.path and path.exists():
+            return False
+
+        fd, tmp = tempfile.mkstemp(prefix=".config.", dir=str(path.parent))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.text())
+            if path.exists():
+                os.chmod(tmp, path.stat().st_mode & 0o7777)
+            else:
+                os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.path = path
+        self._dirty = False
+        return True
+
+
+_symbols_cache = {}
+_symbols_lock = threading.Lock()
+
+
+def read_values(config_file):
+    """
+    Toutes les options d'un .config ({'FOO': valeur brute, 'n' pour is not set}),
+    mises en cache tant que le fichier ne change pas (taille et date de modification)
+    """
+    path = Path(config_file)
+    try:
+        stat = path.stat()
+    except OSError:
+        return {}
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    with _symbols_lock:
+        if key in _symbols_cache:
+            return dict(_symbols_cache[key])
+    try:
+        values = dict(KernelConfig(path).items())
+    except OSError:
+        return {}
+    with _symbols_lock:
+        if len(_symbols_cache) >= SYMBOLS_CACHE_SIZE:
+            _symbols_cache.pop(next(iter(_symbols_cache)))
+        _symbols_cache[key] = values
+    return dict(values)
+
+
+def read_symbols(config_file):
+    """Options activées d'un .config ({'CONFIG_FOO': 'y' ou 'm'}), via le cache de read_values"""
+    return {PREFIX + name: value for name, value in read_values(config_file).items() if value in ('y', 'm')}
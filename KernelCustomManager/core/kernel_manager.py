@@ -3,12 +3,40 @@ Module de gestion des kernels
 Logique métier pour télécharger, compiler, installer les kernels
 """
 
-from gi.repository import Notify
 import subprocess
 import shutil
 from pathlib import Path
 from datetime import datetime
 import json
+import hashlib
+import threading
+
+from core.downloader import RangedDownloader
+from core.source_cache import SourceCache, clone_tree
+from core.release_metadata import ReleaseMetadata
+from core.compiler_cache import CompilerCache
+from core.build_dirs import BuildDirManager
+from core.build_farm import BuildFarm
+from core.log_store import LogStore
+from core.resource_policy import ResourcePolicy
+from core.kernel_config import KernelConfig, read_values
+from core.config_templates import ConfigTemplates, BUNDLED_TEMPLATES_DIR
+from core.kconfig_cache import OlddefconfigCache
+from core.kconfig_index import KconfigIndex
+from core.config_diff import diff
+from core.profile_store import ProfileStore
+from core.hardware_inventory import collect_inventory
+from core.tree_lock import SourceTreeLock, SourceTreeBusy
+from core.hardware_trim import (ModuleMap, ModaliasResolver, default_alias_files, fleet_options,
+                                needed_modules, plan_trim, TRIM_ALLOWLIST_TEMPLATES)
+
+
+# Dépôt des archives et patchs kernel.org
+KERNEL_ORG_URL = "https://cdn.kernel.org/pub/linux/kernel"
+
+# Options de compression des modules désactivées par disable_module_compression
+MODULE_COMPRESS_OPTIONS = ('CONFIG_MODULE_COMPRESS', 'CONFIG_MODULE_COMPRESS_ALL', 'CONFIG_MODULE_COMPRESS_XZ',
+                           'CONFIG_MODULE_COMPRESS_GZIP', 'CONFIG_MODULE_COMPRESS_ZSTD')
 
 
 class KernelManager:
@@ -28,17 +56,68 @@ class KernelManager:
         self.templates_dir = self.base_dir / "templates"
         self.configs_dir = self.base_dir / "configs"
         self.profiles_dir = self.base_dir / "profiles"
+        self.cache_dir = self.base_dir / "cache"
+        self.builds_dir = self.base_dir / "builds"
+        self.locks_dir = self.base_dir / "locks"
+        self.active_profile_file = self.base_dir / "active_profile"
         self.history_file = self.base_dir / "compilation_history.json"
         
         # Créer tous les dossiers
         for directory in [self.repo_dir, self.log_dir, self.archive_dir, 
                          self.sources_dir, self.templates_dir, self.configs_dir,
-                         self.profiles_dir]:
+                         self.profiles_dir, self.cache_dir, self.builds_dir, self.locks_dir]:
             directory.mkdir(parents=True, exist_ok=True)
         
+        # Cache des archives adressé par contenu
+        self.source_cache = SourceCache(self.cache_dir / "tarballs")
+        
+        # Métadonnées kernel.org (releases.json) en cache
+        self.release_metadata = ReleaseMetadata(self.cache_dir)
+        
+        # Cache de compilation (ccache)
+        self.compiler_cache = CompilerCache(self.cache_dir / "ccache", self.base_dir)
+        
+        # Répertoires d'objets hors arbre (O=) par version et profil
+        self.build_dirs = BuildDirManager(self.builds_dir)
+        
+        # Journaux de compilation compressés et indexés, avec rétention
+        self.log_store = LogStore(self.log_dir)
+        
+        # Hôtes d'aide pour la compilation distribuée (distcc)
+        self.build_farm = BuildFarm(self.base_dir / "build_farm.json")
+        
+        # Résultats de make olddefconfig mémorisés par (sources, .config, compilateur)
+        self.kconfig_cache = OlddefconfigCache(self.cache_dir / "kconfig")
+        
+        # Index des options Kconfig par arbre de sources (voir get_kconfig_index)
+        self._kconfig_indexes = {}
+        self._module_maps = {}
+        self._kconfig_lock = threading.Lock()
+        
+        # Profils de configuration stockés en delta par rapport à des bases partagées
+        self.profile_store = ProfileStore(self.profiles_dir)
+        
+        # Templates de configuration : ceux de l'utilisateur, puis ceux fournis
+        self.config_templates = ConfigTemplates([self.templates_dir, BUNDLED_TEMPLATES_DIR], self.kconfig_cache)
+        
+        # Limites de ressources des compilations (jobs, cgroup, priorités)
+        self.resource_policy = ResourcePolicy()
+        
+        # File de compilation des variantes (voir get_build_queue)
+        self._build_queue = None
+        
         # Initialiser l'historique
+        self._history_lock = threading.Lock()
         if not self.history_file.exists():
             self._save_history([])
+        
+        # .config des sources laissé de côté par une compilation interrompue
+        if (self.base_dir / "linux").exists():
+            try:
+                with self.source_tree_lock().hold(exclusive=True):
+                    self.restore_source_config()
+            except SourceTreeBusy:
+                pass
     
     def _save_history(self, history):
         """Sauvegarde l'historique"""
@@ -53,22 +132,27 @@ class KernelManager:
         except:
             return []
     
-    def add_compilation_to_history(self, kernel_version, suffix, success, duration, packages):
-        """Ajoute une compilation à l'historique"""
-        history = self._load_history()
-        
+    def add_compilation_to_history(self, kernel_version, suffix, success, duration, packages, details=None):
+        """
+        Ajoute une compilation à l'historique
+        details: informations complémentaires (statistiques ccache, options...)
+        """
         entry = {
             'timestamp': datetime.now().isoformat(),
             'kernel_version': kernel_version,
             'suffix': suffix,
             'success': success,
             'duration_seconds': duration,
-            'packages': packages
+            'packages': packages,
+            'details': details or {}
         }
         
-        history.insert(0, entry)
-        history = history[:50]
-        self._save_history(history)
+        # Plusieurs compilations (file de compilation) peuvent se terminer en même temps
+        with self._history_lock:
+            history = self._load_history()
+            history.insert(0, entry)
+            history = history[:50]
+            self._save_history(history)
         return entry
     
     def get_compilation_history(self):
@@ -90,60 +174,175 @@ class KernelManager:
         shutil.copy(config_file, backup_path)
         return backup_path
     
+    def source_tree_lock(self, source_dir=None):
+        """Verrou d'un arbre de sources (base_dir/linux par défaut), voir SourceTreeLock"""
+        return SourceTreeLock(self.locks_dir, source_dir or self.base_dir / "linux")
+    
+    def restore_source_config(self, source_dir=None):
+        """
+        Compilation hors arbre interrompue (arrêt brutal) : remet dans les sources
+        le .config mis de côté dans le répertoire d'objets ; les copies plus
+        anciennes sont supprimées. À appeler sous le verrou exclusif de l'arbre
+        Retourne: True si le .config a été restauré
+        """
+        linux_dir = Path(source_dir) if source_dir else self.base_dir / "linux"
+        if not linux_dir.exists():
+            return False
+        stashes = self.build_dirs.stashed_source_configs(linux_dir.resolve().name.replace("linux-", ""))
+        restored = False
+        if stashes and not (linux_dir / ".config").exists():
+            shutil.move(str(stashes.pop(0)), str(linux_dir / ".config"))
+            restored = True
+        for stale in stashes:
+            stale.unlink(missing_ok=True)
+        return restored
+    
+    def source_tree_busy(self):
+        """Les sources actuelles sont en cours de compilation (file ou compilation dans l'arbre)"""
+        linux_dir = self.base_dir / "linux"
+        return linux_dir.exists() and self.source_tree_lock(linux_dir).is_busy(exclusive=True)
+    
     def save_profile(self, profile_name, description=""):
-        """Sauvegarde un profil"""
+        """Sauvegarde un profil (delta par rapport à la base la plus proche)"""
         linux_dir = self.base_dir / "linux"
         config_file = linux_dir / ".config"
         
         if not config_file.exists():
             return False
         
-        profile_data = {
-            'name': profile_name,
-            'description': description,
-            'created': datetime.now().isoformat()
-        }
-        
-        config_path = self.profiles_dir / f"{profile_name}.config"
-        shutil.copy(config_file, config_path)
-        
-        meta_path = self.profiles_dir / f"{profile_name}.json"
-        with open(meta_path, 'w') as f:
-            json.dump(profile_data, f, indent=2)
-        
+        self.profile_store.save(profile_name, config_file, description)
         return True
     
     def load_profile(self, profile_name):
         """Charge un profil"""
-        config_path = self.profiles_dir / f"{profile_name}.config"
         linux_dir = self.base_dir / "linux"
         
-        if not config_path.exists():
+        if not self.profile_store.exists(profile_name):
             return False
         
-        shutil.copy(config_path, linux_dir / ".config")
-        
-        subprocess.run(
-            ["make", "olddefconfig"],
-            cwd=str(linux_dir),
-            capture_output=True
-        )
+        with self.source_tree_lock().hold(exclusive=True):
+            self.profile_store.write(profile_name, linux_dir / ".config")
+            self.kconfig_cache.olddefconfig(linux_dir)
         
+        self.set_active_profile(profile_name)
         return True
     
+    def delete_profile(self, profile_name):
+        """Supprime un profil (et sa base si plus aucun profil ne l'utilise)"""
+        self.profile_store.delete(profile_name)
+        if self.get_active_profile() == profile_name:
+            self.set_active_profile(None)
+    
+    def config_values(self, ref):
+        """
+        Options d'une configuration désignée par :
+        'current' (.config des sources), 'system' (kernel en cours), un profil,
+        un template (.config complet ou .conf déclaratif) ou un chemin de fichier
+        Retourne: {NOM: valeur brute} (lève FileNotFoundError)
+        """
+        if ref in (None, "", "current"):
+            config_file = self.base_dir / "linux" / ".config"
+            if not config_file.exists():
+                raise FileNotFoundError(str(config_file))
+            return read_values(config_file)
+        if ref == "system":
+            return dict(self.system_config()[1].items())
+        if self.profile_store.exists(ref):
+            return self.profile_store.values(ref)
+        if Path(ref).is_file() and not ref.endswith(".conf"):
+            return read_values(ref)
+        try:
+            path = self.config_templates.find(ref)
+        except ValueError:
+            raise FileNotFoundError(f"configuration introuvable : {ref}")
+        if path.suffix != ".conf":
+            return read_values(path)
+        # Template déclaratif : sa base éventuelle et les options qu'il fixe
+        resolved = self.config_templates.resolve(str(path))
+        values = read_values(resolved['base']) if resolved['base'] else {}
+        values.update(resolved['options'])
+        return values
+    
+    def diff_configs(self, old, new):
+        """Diff sémantique entre deux configurations (références de config_values)"""
+        return diff(self.config_values(old), self.config_values(new))
+    
+    def get_active_profile(self):
+        """Retourne le profil dont provient la config actuelle, ou None"""
+        try:
+            return self.active_profile_file.read_text().strip() or None
+        except OSError:
+            return None
+    
+    def set_active_profile(self, profile_name):
+        """Mémorise le profil de la config actuelle (None : config personnalisée)"""
+        if profile_name:
+            self.active_profile_file.write_text(profile_name)
+        else:
+            self.active_profile_file.unlink(missing_ok=True)
+    
+    def get_build_dir(self, version, suffix=""):
+        """Répertoire d'objets persistant pour la version et le profil actif"""
+        label = f"{self.get_active_profile() or 'custom'}{suffix}"
+        return self.build_dirs.get_build_dir(version, label)
+    
+    def predict_build_duration(self, jobs, use_ccache=False, config_file=None, source_dir=None):
+        """
+        Durée de compilation prédite d'après l'historique
+        Retourne: dict duration (secondes), samples (compilations utilisées), objects
+        """
+        from core.build_predictor import BuildPredictor, OBJECTS_PER_OPTION, config_features
+        from core.build_progress import estimate_object_count
+
+        source_dir = Path(source_dir) if source_dir else self.base_dir / "linux"
+        config_file = config_file or source_dir / ".config"
+
+        history = self.get_compilation_history()
+        predictor = BuildPredictor(history)
+        objects = estimate_object_count(source_dir, config_file)
+        if not objects:
+            objects = int(config_features(config_file)['config_options'] * OBJECTS_PER_OPTION)
+        hit_rate = 0.0
+        if use_ccache:
+            hit_rate = BuildPredictor.last_hit_rate(history, config_features(config_file)['config_hash'])
+
+        return {
+            'duration': predictor.predict(objects, jobs, hit_rate),
+            'samples': predictor.sample_count(),
+            'objects': objects
+        }
+    
+    def get_build_queue(self):
+        """File de compilation des variantes (chargée à la première utilisation)"""
+        if self._build_queue is None:
+            from core.build_queue import BuildQueue
+            self._build_queue = BuildQueue(self)
+        return self._build_queue
+    
+    def disable_module_compression(self, config_file=None):
+        """
+        Désactive la compression des modules dans le .config
+        Debian active CONFIG_MODULE_COMPRESS_XZ, ce qui empêche la signature des .ko
+        """
+        if config_file is None:
+            config_file = self.base_dir / "linux" / ".config"
+        config_file = Path(config_file)
+        
+        if config_file.exists():
+            config = KernelConfig(config_file)
+
+            # Désactiver toutes les options de compression des modules
+            for symbol in MODULE_COMPRESS_OPTIONS:
+                if config.get(symbol) == 'y':
+                    config.unset(symbol)
+            config.set('CONFIG_MODULE_COMPRESS_NONE', 'y')
+
+            # Seules les lignes modifiées changent, rien n'est écrit si tout est déjà en place
+            config.save()
+    
     def get_profiles(self):
         """Liste tous les profils"""
-        profiles = []
-        
-        for meta_file in self.profiles_dir.glob("*.json"):
-            try:
-                with open(meta_file, 'r') as f:
-                    profile_data = json.load(f)
-                    profiles.append(profile_data)
-            except:
-                continue
-        
-        return sorted(profiles, key=lambda x: x['created'], reverse=True)
+        return self.profile_store.list()
     
     def export_config(self, destination):
         """Exporte la config actuelle"""
@@ -156,26 +355,192 @@ class KernelManager:
         shutil.copy(config_file, destination)
         return True
     
-    def import_config(self, source):
-        """Importe une configuration"""
+    def import_config(self, source, check=False):
+        """
+        Importe une configuration (copie puis make olddefconfig)
+        check: lève CalledProcessError si olddefconfig échoue
+        """
         linux_dir = self.base_dir / "linux"
         
         if not Path(source).exists():
             return False
         
-        shutil.copy(source, linux_dir / ".config")
-        
-        subprocess.run(
-            ["make", "olddefconfig"],
-            cwd=str(linux_dir),
-            capture_output=True
-        )
+        with self.source_tree_lock().hold(exclusive=True):
+            shutil.copy(source, linux_dir / ".config")
+            self.kconfig_cache.olddefconfig(linux_dir, check=check)
         
+        self.set_active_profile(None)
         return True
     
+    def apply_template(self, name, run_olddefconfig=True):
+        """
+        Applique un template de configuration au .config des sources
+        Retourne: rapport de ConfigTemplates.apply (lève TemplateError / CalledProcessError /
+            SourceTreeBusy si les sources sont en cours de compilation)
+        """
+        with self.source_tree_lock().hold(exclusive=True):
+            report = self.config_templates.apply(name, self.base_dir / "linux", olddefconfig=run_olddefconfig)
+        self.set_active_profile(None)
+        return report
+    
+    def system_config(self, kernel_release=None):
+        """
+        Config du kernel en cours (/boot/config-*) adaptée à une compilation locale
+        Retourne: (chemin, KernelConfig) (lève FileNotFoundError)
+        """
+        import platform
+        
+        config_file = Path(f"/boot/config-{kernel_release or platform.release()}")
+        if not config_file.exists():
+            raise FileNotFoundError(str(config_file))
+        
+        config = KernelConfig(config_file)
+        
+        # Adaptation pour Ubuntu/Debian : les clés de confiance de la distribution
+        # ne sont pas disponibles pour une compilation locale
+        for symbol in ('CONFIG_SYSTEM_TRUSTED_KEYS', 'CONFIG_SYSTEM_REVOCATION_KEYS'):
+            if config.get(symbol, 'n') != 'n':
+                config.set_str(symbol, "")
+        return config_file, config
+    
+    def configure_from_system(self, kernel_release=None):
+        """
+        Utilise la config du kernel en cours (/boot/config-*) comme base
+        Retourne: chemin de la config source (lève FileNotFoundError / CalledProcessError / SourceTreeBusy)
+        """
+        config_file, config = self.system_config(kernel_release)
+        
+        linux_dir = self.base_dir / "linux"
+        with self.source_tree_lock().hold(exclusive=True):
+            config.save(linux_dir / ".config")
+            self.kconfig_cache.olddefconfig(linux_dir, check=True)
+        
+        self.set_active_profile(None)
+        return config_file
+    
+    def prebuild_kconfig(self, source_dir=None):
+        """
+        Construit les outils kconfig des sources et met en cache la résolution
+        de la config système (configure_from_system devient une copie)
+        Arbre déjà utilisé (configuration, compilation) : rien n'est fait,
+        make y construit déjà les mêmes outils
+        """
+        source_dir = Path(source_dir) if source_dir else self.base_dir / "linux"
+        try:
+            seed = self.system_config()[1]
+        except FileNotFoundError:
+            seed = None
+        try:
+            with self.source_tree_lock(source_dir).hold(exclusive=True):
+                return self.kconfig_cache.prebuild(source_dir, seed)
+        except SourceTreeBusy:
+            return None
+        except OSError as e:
+            print(f"Préparation kconfig impossible: {e}")
+            return None
+    
+    def get_kconfig_index(self, source_dir=None):
+        """
+        Index des options Kconfig des sources : relu depuis le cache de la
+        version, seuls les Kconfig modifiés depuis sont réanalysés
+        """
+        source_dir = Path(source_dir or self.base_dir / "linux").resolve()
+        version = source_dir.name.replace("linux-", "")
+        with self._kconfig_lock:
+            index = self._kconfig_indexes.get(source_dir)
+            if index is None:
+                index = KconfigIndex(source_dir, self.cache_dir / "kconfig-index" / f"{version}.json.gz")
+                self._kconfig_indexes[source_dir] = index
+        index.update()
+        return index
+    
+    def get_module_map(self, source_dir=None):
+        """Option Kconfig de chaque module des sources (Makefiles kbuild, cache par version)"""
+        source_dir = Path(source_dir or self.base_dir / "linux").resolve()
+        version = source_dir.name.replace("linux-", "")
+        with self._kconfig_lock:
+            module_map = self._module_maps.get(source_dir)
+            if module_map is None:
+                module_map = ModuleMap(source_dir, self.cache_dir / "kconfig-index" / f"{version}-modules.json.gz")
+                self._module_maps[source_dir] = module_map
+        module_map.update()
+        return module_map
+    
+    def trim_allowlist(self, templates=TRIM_ALLOWLIST_TEMPLATES):
+        """Options activées par les templates de sécurité (affichage de secours, USB de base)"""
+        allowlist = set()
+        for name in templates:
+            try:
+                options = self.config_templates.resolve(name)['options']
+            except (OSError, ValueError):
+                continue
+            allowlist.update(symbol for symbol, value in options.items() if value != 'n')
+        return allowlist
+    
+    def plan_hardware_trim(self, inventories=None, alias_files=None, keep=(), config_file=None):
+        """
+        Réduction du .config au matériel, sans rien écrire ; avec plusieurs
+        inventaires, une seule config couvre toute la flotte
+        inventories: inventaires (défaut: machine locale)
+        alias_files: modules.alias utilisés pour les modalias (défaut: kernel en cours)
+        keep: options gardées en plus de la liste de sécurité
+        Retourne: (KernelConfig réduit, rapport de plan_trim avec inventories, hosts
+            {machine: modules utilisés}, modules_needed, objects_before/after, duration_before/after)
+        """
+        import os
+        import tempfile
+        
+        source_dir = (self.base_dir / "linux").resolve()
+        config_file = Path(config_file or source_dir / ".config")
+        if not config_file.exists():
+            raise FileNotFoundError(str(config_file))
+        
+        inventories = inventories or [collect_inventory()]
+        resolver = ModaliasResolver(alias_files or default_alias_files())
+        needed = needed_modules(inventories, resolver)
+        
+        # Processeurs et GPU : options de fabricant gardées ou retirées
+        fleet_keep, fleet_disable = fleet_options(inventories)
+        allowlist = self.trim_allowlist() | fleet_keep
+        allowlist |= {name[len("CONFIG_"):] if name.startswith("CONFIG_") else name for name in keep}
+        
+        config = KernelConfig(config_file)
+        report = plan_trim(config, needed, self.get_module_map(source_dir), self.get_kconfig_index(source_dir),
+                           allowlist, fleet_disable)
+        report['inventories'] = [inventory.get('hostname', "?") for inventory in inventories]
+        report['hosts'] = {host: sum(1 for hosts in needed.values() if host in hosts) for host in report['inventories']}
+        report['modules_needed'] = len(needed)
+        report['aliases'] = resolver.count
+        
+        # Gain attendu : objets à compiler et durée prédite avant / après
+        jobs = os.cpu_count() or 1
+        before = self.predict_build_duration(jobs, config_file=config_file, source_dir=source_dir)
+        with tempfile.NamedTemporaryFile('w', suffix=".config") as f:
+            f.write(config.text())
+            f.flush()
+            after = self.predict_build_duration(jobs, config_file=f.name, source_dir=source_dir)
+        report.update(objects_before=before['objects'], objects_after=after['objects'],
+                      duration_before=before['duration'], duration_after=after['duration'])
+        return config, report
+    
+    def apply_hardware_trim(self, config):
+        """
+        Écrit le .config réduit (après sauvegarde de l'actuel) puis make olddefconfig
+        Retourne: nombre d'options en module restantes (lève SourceTreeBusy)
+        """
+        linux_dir = self.base_dir / "linux"
+        with self.source_tree_lock().hold(exclusive=True):
+            self.backup_config(linux_dir.resolve().name.replace("linux-", ""), "-pretrim")
+            config.save(linux_dir / ".config")
+            self.kconfig_cache.olddefconfig(linux_dir)
+        self.set_active_profile(None)
+        return sum(1 for _, value in KernelConfig(linux_dir / ".config").items() if value == 'm')
+    
     def send_notification(self, title, message, urgency="normal"):
         """Envoie une notification système"""
         try:
+            # Import tardif : le mode ligne de commande ne doit pas charger gi
+            from gi.repository import Notify
             notification = Notify.Notification.new(title, message, "dialog-information")
             
             if urgency == "critical":
@@ -223,40 +588,361 @@ class KernelManager:
             })
         return packages
     
-    def download_kernel(self, version, progress_callback=None):
-        """Télécharge les sources d'un kernel"""
+    def download_kernel(self, version, progress_callback=None, streaming=True, incremental=True):
+        """Télécharge les sources d'un kernel
+
+        Les archives sont conservées dans un cache adressé par sha256 : une
+        version déjà téléchargée (retour arrière, recompilation) est extraite
+        sans accès réseau, et un arbre déjà extrait est simplement réutilisé.
+        En mode streaming, le corps HTTP est décompressé (xz) et extrait au fil
+        de l'eau tout en alimentant le cache : le réseau et la décompression se
+        chevauchent. Sinon, ou si le flux est interrompu, l'archive est récupérée
+        par plages parallèles et reprenables (voir RangedDownloader) en gardant
+        les octets déjà reçus ; un téléchargement par plages inachevé est repris
+        au lancement suivant plutôt que de relancer le flux depuis zéro.
+        En mode incrémental, si une version précédente de la même branche
+        stable est déjà extraite, seuls les patchs kernel.org sont téléchargés
+        et appliqués à un clone de cet arbre ; l'archive complète ne sert que
+        de solution de repli.
+        """
         major = version.split('.')[0]
         archive = f"linux-{version}.tar.xz"
-        url = f"https://cdn.kernel.org/pub/linux/kernel/v{major}.x/{archive}"
-        dest = self.sources_dir / archive
+        url = f"{KERNEL_ORG_URL}/v{major}.x/{archive}"
+        tree = self.sources_dir / f"linux-{version}"
+        # Extraction dans un dossier temporaire : l'arbre final n'apparaît que complet
+        staging = self.sources_dir / f".extract-linux-{version}"
         
         try:
-            import urllib.request
+            if not tree.exists():
+                if staging.exists():
+                    shutil.rmtree(staging)
+                staging.mkdir()
+                
+                cached = self.source_cache.lookup(archive)
+                if cached:
+                    if progress_callback:
+                        progress_callback(0, "Archive trouvée dans le cache")
+                    with open(cached, 'rb') as f:
+                        self._extract_stream(f, cached.stat().st_size, staging, progress_callback)
+                elif incremental and self._upgrade_from_patches(version, staging, progress_callback):
+                    # Arbre obtenu par patchs incrémentaux, archive complète inutile
+                    pass
+                else:
+                    dest = self.cache_dir / "downloads" / archive
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    # Copie du flux : nom distinct du fichier partiel de RangedDownloader
+                    sink = dest.with_name(f"{archive}.stream")
+                    if streaming and not RangedDownloader.has_partial(dest):
+                        try:
+                            _, digest = self._stream_extract(url, staging, progress_callback, sink)
+                            self.source_cache.store(sink, archive, digest)
+                        except Exception as e:
+                            # Flux interrompu : reprise par plages depuis les octets déjà reçus
+                            print(f"Flux interrompu ({e}), reprise par plages")
+                            shutil.rmtree(staging)
+                            staging.mkdir()
+                            self._ranged_download(url, dest, archive, staging, progress_callback, prefix=sink)
+                    else:
+                        self._ranged_download(url, dest, archive, staging, progress_callback)
+                
+                (staging / f"linux-{version}").rename(tree)
+                staging.rmdir()
+                
+                # Dédupliquer en arrière-plan avec l'arbre le plus proche
+                reference = self._closest_source_tree(version)
+                if reference:
+                    threading.Thread(
+                        target=SourceCache.dedup_tree,
+                        args=(tree, reference),
+                        daemon=True
+                    ).start()
+            elif progress_callback:
+                progress_callback(100, "Sources déjà présentes")
             
-            def report_progress(block_num, block_size, total_size):
-                if progress_callback and total_size > 0:
-                    percent = min(int((block_num * block_size * 100) / total_size), 100)
-                    progress_callback(percent)
+            linux_link = self.base_dir / "linux"
+            if linux_link.exists() or linux_link.is_symlink():
+                linux_link.unlink()
+            linux_link.symlink_to(tree)
             
-            urllib.request.urlretrieve(url, dest, reporthook=report_progress)
+            # Outils kconfig construits et options indexées en arrière-plan
+            threading.Thread(target=self.prebuild_kconfig, args=(tree,), daemon=True).start()
+            threading.Thread(target=self.get_kconfig_index, args=(tree,), daemon=True).start()
             
-            if progress_callback:
-                progress_callback(90, "Extraction...")
+            return True
             
-            subprocess.run(
-                ["tar", "-xf", str(dest), "-C", str(self.sources_dir)],
-                check=True
-            )
+        except Exception as e:
+            print(f"Erreur téléchargement: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return False
+    
+    def _ranged_download(self, url, dest, archive, staging, progress_callback=None, prefix=None):
+        """Téléchargement par plages reprenable (RangedDownloader), extraction puis mise en cache"""
+        def report_progress(downloaded, total_size):
+            if progress_callback and total_size > 0:
+                percent = min(int(downloaded * 90 / total_size), 90)
+                progress_callback(percent)
+        
+        RangedDownloader().download(url, dest, report_progress, prefix=prefix)
+        
+        if progress_callback:
+            progress_callback(90, "Extraction...")
+        
+        with open(dest, 'rb') as f:
+            self._extract_stream(f, dest.stat().st_size, staging)
+        
+        self.source_cache.store(dest, archive)
+    
+    def _patch_chain(self, version):
+        """
+        Calcule la chaîne de patchs kernel.org menant à version depuis un arbre existant
+        Retourne: (arbre de base, [urls des patchs]) ou (None, [])
+        """
+        parts = version.split('.')
+        if len(parts) != 3 or not all(p.isdigit() for p in parts):
+            return None, []
+        
+        major, minor, target = parts[0], parts[1], int(parts[2])
+        branch = f"{major}.{minor}"
+        base_url = f"{KERNEL_ORG_URL}/v{major}.x"
+        
+        # Version la plus proche déjà extraite dans la même branche
+        for sublevel in range(target - 1, -1, -1):
+            name = f"linux-{branch}.{sublevel}" if sublevel else f"linux-{branch}"
+            tree = self.sources_dir / name
+            if tree.is_dir():
+                break
+        else:
+            return None, []
+        
+        urls = []
+        current = sublevel
+        if current == 0:
+            # linux-X.Y -> X.Y.1 : patch complet de la première version stable
+            urls.append(f"{base_url}/patch-{branch}.1.xz")
+            current = 1
+        for level in range(current, target):
+            urls.append(f"{base_url}/incr/patch-{branch}.{level}-{level + 1}.xz")
+        
+        return tree, urls
+    
+    def _upgrade_from_patches(self, version, staging, progress_callback=None):
+        """
+        Construit linux-<version> dans staging en appliquant les patchs
+        incrémentaux à un clone copie-sur-écriture de l'arbre précédent
+        Retourne: True si l'arbre a été produit, False pour revenir à l'archive complète
+        """
+        import urllib.request
+        import lzma
+        
+        base_tree, urls = self._patch_chain(version)
+        if not base_tree:
+            return False
+        
+        target = staging / f"linux-{version}"
+        try:
+            if progress_callback:
+                progress_callback(0, f"Clonage de {base_tree.name}...")
+            clone_tree(base_tree, target)
             
-            dest.unlink()
+            # Repartir d'un arbre propre (objets d'une compilation in-tree, .config...)
+            if (target / "Makefile").exists():
+                subprocess.run(["make", "-s", "mrproper"], cwd=str(target),
+                               capture_output=True, check=True)
             
-            linux_link = self.base_dir / "linux"
-            if linux_link.exists():
-                linux_link.unlink()
-            linux_link.symlink_to(self.sources_dir / f"linux-{version}")
+            for i, url in enumerate(urls):
+                if progress_callback:
+                    progress_callback(
+                        int((i + 1) * 100 / (len(urls) + 1)),
+                        f"Application de {url.rsplit('/', 1)[1]}..."
+                    )
+                
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    patch_data = lzma.decompress(response.read())
+                
+                subprocess.run(
+                    ["patch", "-p1", "-s", "-f", "-N"],
+                    cwd=str(target),
+                    input=patch_data,
+                    capture_output=True,
+                    check=True
+                )
             
+            if progress_callback:
+                progress_callback(100, f"Sources {version} obtenues par patchs incrémentaux")
             return True
             
         except Exception as e:
-            print(f"Erreur téléchargement: {e}")
-            return False
\ No newline at end of file
+            print(f"Mise à jour incrémentale impossible ({e}), téléchargement complet")
+            if target.exists():
+                shutil.rmtree(target)
+            return False
+    
+    def _closest_source_tree(self, version):
+        """Retourne l'arbre extrait le plus récent d'une autre version, ou None"""
+        def version_key(path):
+            return [int(p) if p.isdigit() else 0 for p in path.name.replace("linux-", "").split('.')]
+        
+        trees = [
+            d for d in self.sources_dir.glob("linux-*")
+            if d.is_dir() and not d.is_symlink() and d.name != f"linux-{version}"
+        ]
+        return max(trees, key=version_key) if trees else None
+    
+    def _stream_extract(self, url, destination, progress_callback=None, sink_path=None):
+        """
+        Télécharge et extrait une archive .tar.xz en un seul passage
+        sink_path: fichier recevant une copie des octets bruts (pour le cache)
+        Retourne: (nombre de fichiers extraits, sha256 de l'archive)
+        """
+        import urllib.request
+        
+        with urllib.request.urlopen(url, timeout=30) as response:
+            total_size = int(response.headers.get('Content-Length') or 0)
+            sink = open(sink_path, 'wb') if sink_path else None
+            try:
+                reader = _CountingReader(response, sink)
+                files_extracted = self._extract_stream(reader, total_size, destination, progress_callback)
+                # Vider la fin du flux (padding tar) pour que le hash couvre toute l'archive
+                while reader.read(1024 * 1024):
+                    pass
+            finally:
+                if sink:
+                    sink.close()
+        
+        return files_extracted, reader.hexdigest()
+    
+    @staticmethod
+    def _find_external_decompressor():
+        """
+        Cherche un décompresseur xz externe : dans son propre processus, la
+        décompression avance pendant que Python écrit les fichiers extraits
+        Les threads (pixz, xz -T0 à partir de xz 5.4) ne servent qu'aux archives
+        à plusieurs blocs xz ; celles de kernel.org n'en ont qu'un et se
+        décompressent sur un seul cœur
+        Retourne: commande (lit stdin, écrit stdout) ou None pour le repli Python (lzma)
+        """
+        if shutil.which("pixz"):
+            return ["pixz", "-d"]
+        
+        if shutil.which("xz"):
+            try:
+                output = subprocess.run(["xz", "--version"], capture_output=True, text=True).stdout
+                version = output.split()[3] if len(output.split()) > 3 else ""
+                major, minor = (int(x) for x in version.split('.')[:2])
+                if (major, minor) >= (5, 4):
+                    return ["xz", "-d", "-c", "-T0"]
+            except (ValueError, OSError):
+                pass
+            return ["xz", "-d", "-c"]
+        
+        return None
+    
+    def _extract_stream(self, stream, total_size, destination, progress_callback=None):
+        """
+        Extrait un flux .tar.xz séquentiellement en rapportant la progression
+        La décompression est confiée à un processus xz (ou pixz) qui travaille en
+        même temps que l'extraction, sinon au module lzma de Python
+        """
+        import tarfile
+        import time
+        
+        reader = stream if isinstance(stream, _CountingReader) else _CountingReader(stream)
+        files_extracted = 0
+        last_report = [0]
+        start = time.monotonic()
+        
+        def report(force=False):
+            if not progress_callback:
+                return
+            # Limiter la fréquence des rappels (un par Mo environ)
+            if not force and reader.bytes_read - last_report[0] < 1024 * 1024:
+                return
+            last_report[0] = reader.bytes_read
+            elapsed = max(time.monotonic() - start, 0.001)
+            percent = min(int(reader.bytes_read * 100 / total_size), 100) if total_size > 0 else 0
+            progress_callback(
+                percent,
+                f"{reader.bytes_read / (1024 * 1024):.1f} Mo lus, "
+                f"{files_extracted} fichiers extraits "
+                f"({reader.bytes_read / (1024 * 1024) / elapsed:.1f} Mo/s, "
+                f"{int(files_extracted / elapsed)} fichiers/s)"
+            )
+        
+        decompressor = self._find_external_decompressor()
+        process = None
+        feeder = None
+        feed_error = []
+        
+        if decompressor:
+            process = subprocess.Popen(
+                decompressor,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+            
+            def feed():
+                try:
+                    for block in iter(lambda: reader.read(1024 * 1024), b''):
+                        process.stdin.write(block)
+                except Exception as e:
+                    feed_error.append(e)
+                finally:
+                    try:
+                        process.stdin.close()
+                    except OSError:
+                        pass
+            
+            feeder = threading.Thread(target=feed, daemon=True)
+            feeder.start()
+            # Flux tar déjà décompressé
+            tar = tarfile.open(fileobj=process.stdout, mode='r|')
+        else:
+            # Mode 'r|xz' : lecture séquentielle, sans retour arrière dans le flux
+            tar = tarfile.open(fileobj=reader, mode='r|xz')
+        
+        try:
+            with tar:
+                for member in tar:
+                    if hasattr(tarfile, 'data_filter'):
+                        tar.extract(member, path=str(destination), filter='data')
+                    else:
+                        tar.extract(member, path=str(destination))
+                    if member.isfile():
+                        files_extracted += 1
+                    report()
+        finally:
+            if process:
+                process.stdout.close()
+                feeder.join()
+                process.wait()
+        
+        if process:
+            if feed_error:
+                raise feed_error[0]
+            if process.returncode != 0:
+                raise RuntimeError(f"{decompressor[0]} a échoué (code {process.returncode})")
+        
+        report(force=True)
+        return files_extracted
+
+
+class _CountingReader:
+    """Enveloppe un flux en comptant (et hachant) les octets lus"""
+    
+    def __init__(self, stream, sink=None):
+        self.stream = stream
+        self.sink = sink
+        self.bytes_read = 0
+        self._hash = hashlib.sha256()
+    
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.bytes_read += len(data)
+        self._hash.update(data)
+        if self.sink:
+            self.sink.write(data)
+        return data
+    
+    def hexdigest(self):
+        return self._hash.hexdigest()
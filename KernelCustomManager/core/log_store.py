@@ -0,0 +1,291 @@
+"""
+Module des journaux de compilation
+Journaux compressés par trames indépendantes (zstd, sinon gzip) avec un index
+écrit au fil de la compilation (erreurs, avertissements, changements d'étape) :
+une ligne se relit en ne décompressant que sa trame. Rétention par âge et taille
+"""
+
+import gzip
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Taille (octets non compressés) d'une trame : une relecture décompresse au plus ceci
+FRAME_SIZE = 1024 * 1024
+
+# Lignes signalées dans l'index
+ERROR_LINE = re.compile(
+    r'(\berror:|\bfatal error\b|^make(\[\d+\])?: \*\*\*|\bundefined reference\b|^ERROR:|\bError \d+\b)'
+)
+WARNING_LINE = re.compile(r'(\bwarning:|^WARNING:)')
+
+# Nombre maximal d'erreurs / avertissements gardés dans l'index
+MAX_EVENTS = 1000
+
+INDEX_SUFFIX = ".idx.json"
+
+
+def _codec():
+    """Compresseur des trames : 'zstd' (module zstandard ou commande zstd) ou 'gzip'"""
+    if zstandard is not None or shutil.which("zstd"):
+        return 'zstd'
+    return 'gzip'
+
+
+def compress_frame(data, codec):
+    if codec == 'gzip':
+        return gzip.compress(data, compresslevel=6)
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return subprocess.run(["zstd", "-q", "-c", "-3"], input=data, capture_output=True, check=True).stdout
+
+
+def decompress_frame(data, codec):
+    if codec == 'gzip':
+        return gzip.decompress(data)
+    if zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return subprocess.run(["zstd", "-q", "-d", "-c"], input=data, capture_output=True, check=True).stdout
+
+
+class LogWriter:
+    """Écriture d'un journal compressé et de son index"""
+
+    def __init__(self, base_path):
+        """base_path: chemin sans extension (logs/compile-6.12.1-20250101-120000)"""
+        self.codec = _codec()
+        self.path = Path(f"{base_path}.log.{'zst' if self.codec == 'zstd' else 'gz'}")
+        self.index_path = Path(f"{base_path}{INDEX_SUFFIX}")
+        self._file = open(self.path, 'wb')
+        self._buffer = []
+        self._buffer_size = 0
+        self._frame_first_line = 0
+        self.line_count = 0
+        self.index = {
+            'codec': self.codec,
+            'frames': [],
+            'errors': [],
+            'warnings': [],
+            'stages': [],
+            'error_count': 0,
+            'warning_count': 0,
+            'created': time.time(),
+            'complete': False
+        }
+
+    def write(self, line):
+        """Ajoute une ligne (terminée par \\n) et l'indexe si c'est une erreur ou un avertissement"""
+        if not line.endswith('\n'):
+            line += '\n'
+        text = line.rstrip('\n')
+        if ERROR_LINE.search(text):
+            self.index['error_count'] += 1
+            if len(self.index['errors']) < MAX_EVENTS:
+                self.index['errors'].append([self.line_count, text[:300]])
+        elif WARNING_LINE.search(text):
+            self.index['warning_count'] += 1
+            if len(self.index['warnings']) < MAX_EVENTS:
+                self.index['warnings'].append([self.line_count, text[:300]])
+
+        data = line.encode(errors='replace')
+        self._buffer.append(data)
+        self._buffer_size += len(data)
+        self.line_count += 1
+        if self._buffer_size >= FRAME_SIZE:
+            self._flush_frame()
+
+    def mark_stage(self, stage):
+        """Début d'une étape (compile, package...) à la ligne courante"""
+        self.index['stages'].append([self.line_count, stage])
+
+    def _flush_frame(self):
+        if not self._buffer:
+            return
+        compressed = compress_frame(b"".join(self._buffer), self.codec)
+        offset = self._file.tell()
+        self._file.write(compressed)
+        self._file.flush()
+        # [position, taille compressée, première ligne, nombre de lignes]
+        self.index['frames'].append([offset, len(compressed), self._frame_first_line,
+                                     self.line_count - self._frame_first_line])
+        self._frame_first_line = self.line_count
+        self._buffer = []
+        self._buffer_size = 0
+        # Index à jour après chaque trame : lisible pendant la compilation
+        self._write_index()
+
+    def _write_index(self):
+        self.index['lines'] = self.line_count
+        tmp = self.index_path.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
+
+    def close(self):
+        self._flush_frame()
+        self._file.close()
+        self.index['complete'] = True
+        self._write_index()
+
+    def __str__(self):
+        return str(self.path)
+
+
+class BuildLog:
+    """Lecture d'un journal indexé (ou d'un ancien journal texte)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.index = None
+        base = str(self.path)
+        for suffix in ('.log.zst', '.log.gz', '.log'):
+            if base.endswith(suffix):
+                base = base[:-len(suffix)]
+                break
+        try:
+            with open(base + INDEX_SUFFIX, 'r') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def errors(self):
+        """[(ligne, texte)] des erreurs indexées"""
+        return [tuple(event) for event in (self.index or {}).get('errors', [])]
+
+    def warnings(self):
+        return [tuple(event) for event in (self.index or {}).get('warnings', [])]
+
+    def stages(self):
+        return [tuple(event) for event in (self.index or {}).get('stages', [])]
+
+    def first_error(self):
+        """Première erreur réelle : (ligne, texte) ou None"""
+        errors = self.errors()
+        # "make: *** [...] Error 2" ne fait que propager une erreur antérieure
+        real = [event for event in errors if not re.match(r'^make(\[\d+\])?: \*\*\*', event[1])]
+        return (real or errors or [None])[0]
+
+    def _read_frame(self, frame):
+        offset, size = frame[0], frame[1]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(size)
+        # Chaque trame se termine par \n : découpage identique au comptage de LogWriter
+        return decompress_frame(data, self.index['codec']).decode(errors='replace').split('\n')[:-1]
+
+    def lines(self, start, count):
+        """Lignes [start, start + count) en ne décompressant que les trames concernées"""
+        start = max(0, start)
+        end = start + count
+        if self.index is None:
+            with open(self.path, 'r', errors='replace') as f:
+                return [line.rstrip('\n') for i, line in enumerate(f) if start <= i < end]
+
+        result = []
+        for frame in self.index['frames']:
+            first, frame_lines = frame[2], frame[3]
+            if first + frame_lines <= start or first >= end:
+                continue
+            frame_text = self._read_frame(frame)
+            result.extend(frame_text[max(0, start - first):end - first])
+        return result
+
+    def context(self, line, before=5, after=10):
+        """Contexte d'une ligne : (numéro de la première ligne, lignes)"""
+        start = max(0, line - before)
+        return start, self.lines(start, before + after + 1)
+
+
+class LogStore:
+    """Journaux d'un répertoire : création et rétention"""
+
+    def __init__(self, log_dir, max_age_days=60, max_total_mb=512, keep_min=10):
+        self.log_dir = Path(log_dir)
+        self.max_age_days = max_age_days
+        self.max_total_mb = max_total_mb
+        # Les keep_min journaux les plus récents ne sont jamais supprimés
+        self.keep_min = keep_min
+
+    def create(self, name):
+        """Nouveau journal compressé : LogWriter"""
+        return LogWriter(self.log_dir / name)
+
+    def compress_plain_logs(self):
+        """
+        Convertit les anciens journaux texte (compile-*.log) au format compressé indexé
+        Retourne: nombre de journaux convertis
+        """
+        converted = 0
+        for path in self.log_dir.glob("compile-*.log"):
+            try:
+                stat = path.stat()
+                writer = self.create(path.name[:-len(".log")])
+                with open(path, 'r', errors='replace') as f:
+                    for line in f:
+                        writer.write(line)
+                writer.close()
+                # Date d'origine conservée pour la rétention
+                os.utime(writer.path, (stat.st_atime, stat.st_mtime))
+                os.utime(writer.index_path, (stat.st_atime, stat.st_mtime))
+                path.unlink()
+                converted += 1
+            except OSError:
+                continue
+        return converted
+
+    def _entries(self):
+        """[(date, [fichiers])] des journaux, du plus récent au plus ancien"""
+        groups = {}
+        for path in self.log_dir.glob("compile-*"):
+            name = path.name
+            for suffix in ('.log.zst', '.log.gz', INDEX_SUFFIX, '.log'):
+                if name.endswith(suffix):
+                    groups.setdefault(name[:-len(suffix)], []).append(path)
+                    break
+        entries = []
+        for files in groups.values():
+            try:
+                mtime = max(path.stat().st_mtime for path in files)
+            except OSError:
+                continue
+            entries.append((mtime, files))
+        return sorted(entries, key=lambda entry: entry[0], reverse=True)
+
+    def maintain(self):
+        """Conversion des anciens journaux puis rétention (lancé en arrière-plan)"""
+        self.compress_plain_logs()
+        return self.apply_retention()
+
+    def apply_retention(self):
+        """
+        Supprime les journaux trop anciens puis les plus anciens au-delà de la taille totale
+        Retourne: nombre de journaux supprimés
+        """
+        now = time.time()
+        total = 0
+        removed = 0
+        for position, (mtime, files) in enumerate(self._entries()):
+            size = sum(path.stat().st_size for path in files if path.exists())
+            total += size
+            if position < self.keep_min:
+                continue
+            too_old = now - mtime > self.max_age_days * 86400
+            if too_old or total > self.max_total_mb * 1024 * 1024:
+                for path in files:
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                total -= size
+                removed += 1
+        return removed
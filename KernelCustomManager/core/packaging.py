@@ -0,0 +1,82 @@
+"""
+Module des options d'empaquetage (make bindeb-pkg)
+Compresseur et niveau de dpkg-deb, threads de compression et paquet de
+débogage (linux-image-*-dbg) optionnel
+"""
+
+import os
+import re
+import subprocess
+from pathlib import Path
+
+
+# Compresseurs proposés, du plus rapide à décompresser au plus compact
+COMPRESSORS = ('zstd', 'xz', 'gzip', 'none')
+
+# Profil de construction Debian des scripts kbuild (Linux 6.5+) : pas de paquet -dbg
+NO_DEBUG_PROFILE = "pkg.linux-upstream.nokerneldbg"
+
+
+def supported_compressors():
+    """Compresseurs acceptés par le dpkg-deb installé (-Z<type>)"""
+    try:
+        output = subprocess.run(["dpkg-deb", "--help"], capture_output=True, text=True).stdout
+    except OSError:
+        return []
+    match = re.search(r'Allowed types:\s*([a-z0-9, ]+)\.', output)
+    if not match:
+        return ['gzip', 'xz']
+    allowed = [name.strip() for name in match.group(1).split(',')]
+    return [name for name in COMPRESSORS if name in allowed]
+
+
+def is_debug_package(deb_name):
+    """Paquet de symboles de débogage (linux-image-<release>-dbg_...)"""
+    return deb_name.split('_')[0].endswith('-dbg')
+
+
+class PackagingOptions:
+    """Réglages de make bindeb-pkg transmis par l'environnement"""
+
+    def __init__(self, compressor=None, level=None, threads=None, skip_debug=False):
+        # compressor: None = défaut de kbuild/dpkg-deb ; level: None = défaut du compresseur
+        self.compressor = compressor
+        self.level = level
+        self.threads = threads or os.cpu_count() or 1
+        self.skip_debug = skip_debug
+
+    @staticmethod
+    def supports_debug_skip(source_dir):
+        """Les scripts de paquets des sources connaissent-ils le profil nokerneldbg ?"""
+        package_dir = Path(source_dir) / "scripts" / "package"
+        for name in ("mkdebian", "builddeb", "debian/rules"):
+            try:
+                if NO_DEBUG_PROFILE.split('.')[-1] in (package_dir / name).read_text(errors='replace'):
+                    return True
+            except OSError:
+                continue
+        return False
+
+    def apply(self, env):
+        """Ajoute les variables d'empaquetage à un environnement (dict)"""
+        if self.compressor:
+            # KDEB_COMPRESS : option -Z de dpkg-deb dans les scripts kbuild
+            env['KDEB_COMPRESS'] = self.compressor
+            env['DPKG_DEB_COMPRESSOR_TYPE'] = self.compressor
+        if self.level is not None:
+            env['DPKG_DEB_COMPRESSOR_LEVEL'] = str(self.level)
+        # Compression multi-thread (xz, zstd) de chaque paquet
+        env['DPKG_DEB_THREADS_MAX'] = str(self.threads)
+        if self.skip_debug:
+            profiles = env.get('DEB_BUILD_PROFILES', '').split()
+            if NO_DEBUG_PROFILE not in profiles:
+                env['DEB_BUILD_PROFILES'] = ' '.join(profiles + [NO_DEBUG_PROFILE])
+        return env
+
+    def to_dict(self):
+        return {
+            'compressor': self.compressor or 'default',
+            'level': self.level,
+            'threads': self.threads,
+            'skip_debug': self.skip_debug
+        }
@@ -0,0 +1,203 @@
+"""
+Module de stockage des profils de configuration
+Un profil est un delta (<nom>.delta, format .config) par rapport à une base
+complète partagée, stockée compressée une seule fois sous son empreinte
+(bases/<sha1>.config.gz). Les anciens profils <nom>.config restent lisibles
+et compact() les convertit
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from core.config_diff import delta, apply_delta, rehydrate, format_delta, parse_delta
+from core.kernel_config import KernelConfig, read_values
+
+
+class ProfileStore:
+    """Profils = base partagée + delta ; valeurs reconstruites en mémoire (mises en cache)"""
+
+    # Au-delà de cette part d'options modifiées, la config devient une nouvelle base
+    MAX_DELTA_RATIO = 0.2
+
+    def __init__(self, profiles_dir):
+        self.profiles_dir = Path(profiles_dir)
+        self.bases_dir = self.profiles_dir / "bases"
+        self.bases_dir.mkdir(parents=True, exist_ok=True)
+        self._bases = {}     # empreinte -> (texte, valeurs)
+        self._deltas = {}    # nom -> ((mtime_ns, size), base, delta)
+        self._lock = threading.Lock()
+
+    # --- Chemins ---
+
+    def _meta(self, name):
+        return self.profiles_dir / f"{name}.json"
+
+    def _delta_file(self, name):
+        return self.profiles_dir / f"{name}.delta"
+
+    def _legacy_file(self, name):
+        return self.profiles_dir / f"{name}.config"
+
+    def _base_file(self, digest):
+        return self.bases_dir / f"{digest}.config.gz"
+
+    # --- Bases ---
+
+    def _base(self, digest):
+        """(texte, valeurs) d'une base, décompressée une seule fois"""
+        with self._lock:
+            if digest not in self._bases:
+                with gzip.open(self._base_file(digest), 'rt') as f:
+                    text = f.read()
+                self._bases[digest] = (text, dict(KernelConfig(text=text).items()))
+            return self._bases[digest]
+
+    def _store_base(self, text):
+        digest = hashlib.sha1(text.encode()).hexdigest()
+        path = self._base_file(digest)
+        if not path.exists():
+            tmp = path.with_suffix(".tmp")
+            with gzip.open(tmp, 'wt', compresslevel=9) as f:
+                f.write(text)
+            os.replace(tmp, path)
+        return digest
+
+    def _closest_base(self, values):
+        """Base existante donnant le plus petit delta : (empreinte, delta) ou (None, None)"""
+        best = (None, None)
+        for path in self.bases_dir.glob("*.config.gz"):
+            digest = path.name.split(".")[0]
+            changes = delta(values, self._base(digest)[1])
+            if best[1] is None or len(changes) < len(best[1]):
+                best = (digest, changes)
+        return best
+
+    def _read_delta(self, name):
+        """(base, delta) d'un profil au format delta, relu seulement s'il a changé"""
+        path = self._delta_file(name)
+        stat = path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._deltas.get(name)
+        if cached and cached[0] == key:
+            return cached[1], cached[2]
+        changes, header = parse_delta(path.read_text())
+        base = next((line.split()[1] for line in header if line.startswith("base ")), None)
+        self._deltas[name] = (key, base, changes)
+        return base, changes
+
+    # --- Profils ---
+
+    def exists(self, name):
+        return self._delta_file(name).exists() or self._legacy_file(name).exists()
+
+    def save(self, name, config_file, description=""):
+        """Enregistre config_file sous forme de delta par rapport à la base la plus proche"""
+        config = KernelConfig(config_file)
+        values = dict(config.items())
+        digest, changes = self._closest_base(values)
+        if digest is None or len(changes) > self.MAX_DELTA_RATIO * max(len(values), 1):
+            digest, changes = self._store_base(config.text()), {}
+
+        tmp = self._delta_file(name).with_suffix(".tmp")
+        tmp.write_text(format_delta(changes, header=[f"KernelCustom profile {name}", f"base {digest}"]))
+        os.replace(tmp, self._delta_file(name))
+        self._legacy_file(name).unlink(missing_ok=True)
+
+        meta = {
+            'name': name,
+            'description': description,
+            'created': datetime.now().isoformat(),
+            'base': digest,
+            'delta': len(changes),
+            'options': len(values)
+        }
+        with open(self._meta(name), 'w') as f:
+            json.dump(meta, f, indent=2)
+        self.prune_bases()
+        return meta
+
+    def values(self, name):
+        """Options du profil ({nom: valeur brute}) sans écrire de fichier"""
+        if self._delta_file(name).exists():
+            base, changes = self._read_delta(name)
+            return apply_delta(self._base(base)[1], changes)
+        if self._legacy_file(name).exists():
+            return read_values(self._legacy_file(name))
+        raise FileNotFoundError(str(self._delta_file(name)))
+
+    def config(self, name):
+        """KernelConfig complet du profil"""
+        if self._delta_file(name).exists():
+            base, changes = self._read_delta(name)
+            return rehydrate(self._base(base)[0], changes)
+        if self._legacy_file(name).exists():
+            return KernelConfig(self._legacy_file(name))
+        raise FileNotFoundError(str(self._delta_file(name)))
+
+    def write(self, name, destination):
+        """Écrit le .config complet du profil dans destination"""
+        self.config(name).save(destination)
+
+    def delta_text(self, name):
+        """Delta du profil au format .config"""
+        if self._delta_file(name).exists():
+            return self._delta_file(name).read_text()
+        return self._legacy_file(name).read_text()
+
+    def list(self):
+        profiles = []
+        for meta_file in self.profiles_dir.glob("*.json"):
+            try:
+                with open(meta_file, 'r') as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(profiles, key=lambda x: x['created'], reverse=True)
+
+    def delete(self, name):
+        for path in (self._meta(name), self._delta_file(name), self._legacy_file(name)):
+            path.unlink(missing_ok=True)
+        self._deltas.pop(name, None)
+        self.prune_bases()
+
+    def prune_bases(self):
+        """Supprime les bases qui ne sont plus référencées par aucun profil"""
+        used = set()
+        for path in self.profiles_dir.glob("*.delta"):
+            try:
+                used.add(self._read_delta(path.stem)[0])
+            except OSError:
+                continue
+        for path in self.bases_dir.glob("*.config.gz"):
+            digest = path.name.split(".")[0]
+            if digest not in used:
+                path.unlink(missing_ok=True)
+                with self._lock:
+                    self._bases.pop(digest, None)
+
+    def compact(self):
+        """
+        Convertit les profils complets (<nom>.config) en deltas
+        Retourne: [(nom, octets avant, octets après)]
+        """
+        converted = []
+        for legacy in sorted(self.profiles_dir.glob("*.config")):
+            name = legacy.stem
+            before = legacy.stat().st_size
+            try:
+                with open(self._meta(name)) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {'description': "", 'created': datetime.now().isoformat()}
+            self.save(name, legacy, meta.get('description', ""))
+            # Conserver la date d'origine du profil
+            saved = json.loads(self._meta(name).read_text())
+            saved['created'] = meta.get('created', saved['created'])
+            self._meta(name).write_text(json.dumps(saved, indent=2))
+            converted.append((name, before, self._delta_file(name).stat().st_size))
+        return converted
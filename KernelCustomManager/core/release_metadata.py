@@ -0,0 +1,126 @@
+"""
+Module des métadonnées de versions kernel.org
+Cache disque de releases.json avec TTL, revalidation ETag/If-Modified-Since
+et rafraîchissement asynchrone
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.request
+import urllib.error
+from pathlib import Path
+
+
+class ReleaseMetadata:
+    """Service de métadonnées des versions publiées sur kernel.org"""
+
+    RELEASES_URL = "https://www.kernel.org/releases.json"
+
+    def __init__(self, cache_dir, ttl=3600, timeout=5):
+        self.cache_dir = Path(cache_dir)
+        self.cache_file = self.cache_dir / "releases.json"
+        self.meta_file = self.cache_dir / "releases.meta.json"
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # ==================== Cache ====================
+
+    def _load_meta(self):
+        """Charge les métadonnées HTTP du cache (etag, last_modified, fetched)"""
+        try:
+            with open(self.meta_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_atomic(self, path, content):
+        """Écriture atomique d'un fichier JSON"""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(content, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def get_cached(self):
+        """Retourne les données en cache sans accès réseau (éventuellement périmées), ou None"""
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self):
+        """Indique si le cache a moins de ttl secondes"""
+        meta = self._load_meta()
+        return self.cache_file.exists() and time.time() - meta.get('fetched', 0) < self.ttl
+
+    # ==================== Réseau ====================
+
+    def refresh(self, force=False):
+        """
+        Met à jour le cache si nécessaire (requête conditionnelle)
+        Retourne: données releases.json (cache périmé si le réseau est indisponible), ou None
+        """
+        with self._lock:
+            if not force and self.is_fresh():
+                return self.get_cached()
+
+            meta = self._load_meta()
+            cached = self.get_cached()
+            headers = {}
+            if cached is not None:
+                if meta.get('etag'):
+                    headers['If-None-Match'] = meta['etag']
+                if meta.get('last_modified'):
+                    headers['If-Modified-Since'] = meta['last_modified']
+
+            try:
+                request = urllib.request.Request(self.RELEASES_URL, headers=headers)
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    data = json.loads(response.read().decode())
+                    meta = {
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified')
+                    }
+                self._write_atomic(self.cache_file, data)
+            except urllib.error.HTTPError as e:
+                if e.code != 304:
+                    return cached
+                # 304 Not Modified : le cache reste valable
+                data = cached
+            except (urllib.error.URLError, OSError, ValueError):
+                return cached
+
+            meta['fetched'] = time.time()
+            self._write_atomic(self.meta_file, meta)
+            return data
+
+    def refresh_async(self, callback, force=False):
+        """Rafraîchit en arrière-plan puis appelle callback(données) depuis le thread"""
+        def worker():
+            callback(self.refresh(force))
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
+
+    # ==================== Requêtes ====================
+
+    @staticmethod
+    def stable_version(data):
+        """Extrait la dernière version stable de données releases.json"""
+        if not data:
+            return None
+        for release in data.get('releases', []):
+            if release.get('moniker') == 'stable':
+                return release.get('version')
+        return None
+
+    def get_stable_version(self, allow_network=True):
+        """Retourne la dernière version stable (cache si frais, réseau sinon)"""
+        data = self.refresh() if allow_network else self.get_cached()
+        return self.stable_version(data)
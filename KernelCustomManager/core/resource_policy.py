@@ -0,0 +1,177 @@
+"""
+Module de gouvernance des ressources de compilation
+Choix du nombre de jobs make selon la mémoire disponible et exécution de la
+compilation dans un scope systemd transitoire (cgroup v2 : CPUWeight, IOWeight,
+MemoryHigh), ou à défaut sous nice/ionice
+"""
+
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+from core.build_progress import read_config_symbols
+
+
+# Mémoire maximale (Mo) d'un job de compilation, sans mesure dans l'historique
+MB_PER_JOB = 700
+# ... et avec LTO (l'édition de liens finale et les unités de compilation grossissent)
+MB_PER_JOB_LTO = 2500
+
+# Options .config activant LTO
+LTO_OPTIONS = ('CONFIG_LTO_CLANG_FULL', 'CONFIG_LTO_CLANG_THIN', 'CONFIG_LTO_GCC')
+
+
+def read_meminfo():
+    """Mémoire totale et disponible (Mo) d'après /proc/meminfo"""
+    values = {}
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                name, _, rest = line.partition(':')
+                parts = rest.split()
+                if parts and parts[0].isdigit():
+                    values[name] = int(parts[0]) // 1024
+    except OSError:
+        pass
+    return {
+        'total_mb': values.get('MemTotal', 0),
+        'available_mb': values.get('MemAvailable', values.get('MemFree', 0))
+    }
+
+
+class ResourcePolicy:
+    """Limites appliquées aux commandes de compilation (jobs, cgroup, priorités)"""
+
+    # Mémoire laissée au bureau et au reste du système
+    MEMORY_RESERVE_MB = 1024
+    # memory.high du scope : au-delà, le noyau récupère la mémoire de la compilation
+    # (ralentissement) au lieu de déclencher l'OOM killer sur le bureau
+    MEMORY_HIGH_RATIO = 0.8
+
+    def __init__(self, cpu_weight=20, io_weight=20, nice=10, ionice_level=7):
+        # Poids cgroup v2 (défaut systemd : 100) : la compilation cède la place
+        # aux applications interactives sans être bridée quand la machine est libre
+        self.cpu_weight = cpu_weight
+        self.io_weight = io_weight
+        self.nice = nice
+        self.ionice_level = ionice_level
+        self._scope_support = None
+
+    # --- Nombre de jobs ---
+
+    @staticmethod
+    def _measured_job_memory(history, config_hash):
+        """RSS maximal (Mo) mesuré lors d'une compilation profilée de la même config, ou None"""
+        from core.build_profile import BuildProfile
+
+        for entry in history or []:
+            details = entry.get('details') or {}
+            if details.get('config_hash') == config_hash and details.get('profile'):
+                peak_kb = BuildProfile.load(details['profile']).peak_rss()
+                if peak_kb:
+                    return peak_kb // 1024
+        return None
+
+    def memory_per_job(self, config_file=None, history=None):
+        """
+        Mémoire (Mo) à prévoir par job make
+        Mesure d'une compilation profilée de la même config si elle existe,
+        sinon estimation selon que LTO est activé ou non
+        """
+        base = MB_PER_JOB
+        if config_file and Path(config_file).exists():
+            symbols = read_config_symbols(config_file)
+            if any(symbols.get(option) == 'y' for option in LTO_OPTIONS):
+                base = MB_PER_JOB_LTO
+            if history:
+                from core.build_predictor import config_features
+                measured = self._measured_job_memory(history, config_features(config_file)['config_hash'])
+                if measured:
+                    # Marge pour les processus make/as qui accompagnent le compilateur
+                    return max(int(measured * 1.2), MB_PER_JOB // 2)
+        return base
+
+    def recommended_jobs(self, config_file=None, history=None):
+        """
+        Nombre de jobs make recommandé : un par CPU, limité par la mémoire disponible
+        Retourne: dict jobs, cpu_count, memory_available_mb, memory_per_job_mb
+        """
+        cpu_count = os.cpu_count() or 1
+        memory = read_meminfo()
+        per_job = self.memory_per_job(config_file, history)
+        jobs = cpu_count
+        if memory['available_mb']:
+            jobs = min(cpu_count, (memory['available_mb'] - self.MEMORY_RESERVE_MB) // per_job)
+        return {
+            'jobs': max(1, jobs),
+            'cpu_count': cpu_count,
+            'memory_available_mb': memory['available_mb'],
+            'memory_per_job_mb': per_job
+        }
+
+    # --- Confinement des commandes ---
+
+    def memory_high_mb(self):
+        """Valeur de MemoryHigh (Mo) pour le scope de compilation"""
+        total = read_meminfo()['total_mb']
+        if not total:
+            return None
+        return max(self.MEMORY_RESERVE_MB, int(min(total * self.MEMORY_HIGH_RATIO, total - self.MEMORY_RESERVE_MB)))
+
+    @staticmethod
+    def _systemd_run_base():
+        """systemd-run pour le gestionnaire de l'utilisateur (ou du système en root)"""
+        base = ["systemd-run", "--scope", "--quiet", "--collect"]
+        if os.geteuid() != 0:
+            base.insert(1, "--user")
+        return base
+
+    def scope_available(self):
+        """systemd-run --scope est-il utilisable (systemd actif, session utilisateur joignable) ?"""
+        if self._scope_support is None:
+            self._scope_support = False
+            if shutil.which("systemd-run") and Path("/run/systemd/system").is_dir():
+                try:
+                    result = subprocess.run(self._systemd_run_base() + ["true"],
+                                            capture_output=True, timeout=10)
+                    self._scope_support = result.returncode == 0
+                except (OSError, subprocess.TimeoutExpired):
+                    pass
+        return self._scope_support
+
+    def limits(self):
+        """
+        Limites effectives appliquées par wrap() (enregistrées dans l'historique)
+        Retourne: dict mode ('systemd-scope', 'nice' ou 'none') et valeurs appliquées
+        """
+        limits = {'mode': 'none'}
+        if shutil.which("nice"):
+            limits.update({'mode': 'nice', 'nice': self.nice})
+        if shutil.which("ionice"):
+            limits.update({'mode': 'nice', 'ionice': f"best-effort/{self.ionice_level}"})
+        if self.scope_available():
+            limits.update({
+                'mode': 'systemd-scope',
+                'cpu_weight': self.cpu_weight,
+                'io_weight': self.io_weight,
+                'memory_high_mb': self.memory_high_mb()
+            })
+        return limits
+
+    def wrap(self, args, limits):
+        """Préfixe une commande selon les limites retournées par limits()"""
+        prefix = []
+        if limits['mode'] == 'systemd-scope':
+            prefix = self._systemd_run_base() + [
+                "-p", f"CPUWeight={limits['cpu_weight']}",
+                "-p", f"IOWeight={limits['io_weight']}"
+            ]
+            if limits.get('memory_high_mb'):
+                prefix += ["-p", f"MemoryHigh={limits['memory_high_mb']}M"]
+            prefix.append("--")
+        if 'nice' in limits:
+            prefix += ["nice", "-n", str(limits['nice'])]
+        if 'ionice' in limits:
+            prefix += ["ionice", "-c", "2", "-n", str(self.ionice_level)]
+        return prefix + list(args)
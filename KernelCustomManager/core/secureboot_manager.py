@@ -1955,6 +1955,30 @@ echo "SUCCESS"
 
         return modules
 
+    def get_signing_key(self):
+        """
+        Retourne la clé de signature à utiliser pour les modules : MOK si elle
+        existe, sinon la première clé disponible
+        Returns: (clé privée, certificat .der) ou None
+        """
+        available_keys = list(self.keys_dir.glob("*.priv"))
+        if not available_keys:
+            return None
+
+        key_file = None
+        for k in available_keys:
+            if k.stem == "MOK":
+                key_file = k
+                break
+        if not key_file:
+            key_file = available_keys[0]
+
+        cert = key_file.with_suffix('.der')
+        if not cert.exists():
+            return None
+
+        return key_file, cert
+
     def auto_sign_kernel_modules(self, kernel_dir, priv_key_path, cert_path):
         """
         Signe automatiquement tous les modules d'un kernel compilé
@@ -0,0 +1,245 @@
+"""
+Module de cache des sources
+Cache local adressé par contenu (sha256) pour les archives du kernel,
+et déduplication des arbres de sources extraits
+"""
+
+import errno
+import fcntl
+import filecmp
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+
+# ioctl Linux de clonage de fichier (reflink, btrfs/xfs)
+FICLONE = 0x40049409
+
+
+def clone_file(src, dst, fallback='copy'):
+    """
+    Crée dst comme clone de src : reflink si le système de fichiers le permet,
+    sinon copie (fallback='copy') ; fallback=None relève l'erreur du reflink.
+    Jamais de lien physique : inode et date partagés entre deux arbres
+    Retourne: 'reflink' ou 'copy'
+    """
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+        return 'reflink'
+    except OSError:
+        try:
+            os.unlink(dst)
+        except FileNotFoundError:
+            pass
+        if fallback != 'copy':
+            raise
+        shutil.copy2(src, dst)
+        return 'copy'
+
+
+def clone_tree(src, dst):
+    """
+    Clone un arbre de sources en copie sur écriture (reflink), ou par copie
+    classique si le système de fichiers ne le permet pas.
+    Les liens physiques sont évités : le compilateur réécrit ses fichiers
+    de sortie sur place, ce qui modifierait aussi l'arbre d'origine.
+    """
+    src = Path(src)
+    dst = Path(dst)
+
+    for root, dirs, files in os.walk(src):
+        rel_root = Path(root).relative_to(src)
+        target_root = dst / rel_root
+        target_root.mkdir(parents=True, exist_ok=True)
+
+        for name in dirs + files:
+            path = Path(root) / name
+            if path.is_symlink():
+                os.symlink(os.readlink(path), target_root / name)
+
+        for name in files:
+            path = Path(root) / name
+            if not path.is_symlink():
+                clone_file(path, target_root / name, fallback='copy')
+
+        dirs[:] = [d for d in dirs if not (Path(root) / d).is_symlink()]
+
+
+class SourceCache:
+    """Cache des archives adressé par sha256 avec éviction LRU plafonnée en taille"""
+
+    def __init__(self, cache_dir, max_size=4 * 1024 ** 3):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.index_file = self.cache_dir / "index.json"
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+    # ==================== Index ====================
+
+    def _load_index(self):
+        """Charge l'index (objets + noms)"""
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault('objects', {})
+        index.setdefault('names', {})
+        return index
+
+    def _save_index(self, index):
+        """Sauvegarde atomique de l'index"""
+        tmp_path = self.index_file.with_name(self.index_file.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_file)
+
+    def _object_path(self, digest):
+        return self.objects_dir / digest[:2] / digest
+
+    # ==================== Accès ====================
+
+    @staticmethod
+    def hash_file(path):
+        """Calcule le sha256 d'un fichier"""
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(block)
+        return h.hexdigest()
+
+    def lookup(self, name):
+        """Retourne le chemin de l'objet en cache pour ce nom d'archive, ou None"""
+        with self._lock:
+            index = self._load_index()
+            digest = index['names'].get(name)
+            if not digest or digest not in index['objects']:
+                return None
+
+            path = self._object_path(digest)
+            if not path.exists():
+                del index['objects'][digest]
+                del index['names'][name]
+                self._save_index(index)
+                return None
+
+            index['objects'][digest]['last_used'] = time.time()
+            self._save_index(index)
+            return path
+
+    def store(self, path, name, digest=None):
+        """
+        Déplace un fichier dans le cache (même système de fichiers : simple renommage)
+        digest: sha256 déjà calculé pendant le téléchargement, sinon recalculé
+        Retourne: chemin de l'objet en cache
+        """
+        path = Path(path)
+        if digest is None:
+            digest = self.hash_file(path)
+
+        obj_path = self._object_path(digest)
+        obj_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            if obj_path.exists():
+                path.unlink()
+            else:
+                os.replace(path, obj_path)
+
+            index = self._load_index()
+            index['objects'][digest] = {
+                'size': obj_path.stat().st_size,
+                'last_used': time.time()
+            }
+            index['names'][name] = digest
+            self._evict(index, keep=digest)
+            self._save_index(index)
+
+        return obj_path
+
+    def _evict(self, index, keep=None):
+        """Supprime les objets les moins récemment utilisés au-delà de max_size"""
+        total = sum(obj['size'] for obj in index['objects'].values())
+        by_age = sorted(index['objects'].items(), key=lambda item: item[1]['last_used'])
+
+        for digest, obj in by_age:
+            if total <= self.max_size:
+                break
+            if digest == keep:
+                continue
+            self._object_path(digest).unlink(missing_ok=True)
+            del index['objects'][digest]
+            total -= obj['size']
+
+        index['names'] = {
+            name: digest for name, digest in index['names'].items()
+            if digest in index['objects']
+        }
+
+    def get_usage(self):
+        """Retourne (nombre d'objets, taille totale en octets)"""
+        index = self._load_index()
+        return len(index['objects']), sum(obj['size'] for obj in index['objects'].values())
+
+    # ==================== Déduplication ====================
+
+    @staticmethod
+    def dedup_tree(tree, reference):
+        """
+        Remplace les fichiers de tree identiques (même chemin relatif, même contenu)
+        à ceux de reference par des clones reflink (blocs partagés, inode et dates
+        propres à chaque arbre). Sans reflink, rien n'est fait : un lien physique
+        ferait qu'un patch ou un touch dans un arbre modifie aussi l'autre
+        Retourne: (nombre de fichiers dédupliqués, octets économisés)
+        """
+        tree = Path(tree)
+        reference = Path(reference)
+        count = 0
+        saved = 0
+
+        for root, _dirs, files in os.walk(tree):
+            rel_root = Path(root).relative_to(tree)
+            for name in files:
+                path = Path(root) / name
+                ref_path = reference / rel_root / name
+                try:
+                    st = path.lstat()
+                    ref_st = ref_path.lstat()
+                except OSError:
+                    continue
+
+                if (not os.path.isfile(path) or path.is_symlink() or ref_path.is_symlink()
+                        or st.st_size != ref_st.st_size
+                        or (st.st_dev, st.st_ino) == (ref_st.st_dev, ref_st.st_ino)
+                        or st.st_dev != ref_st.st_dev
+                        or st.st_size == 0):
+                    continue
+                if not filecmp.cmp(path, ref_path, shallow=False):
+                    continue
+
+                tmp_path = path.with_name(f".{name}.dedup")
+                try:
+                    clone_file(ref_path, tmp_path, fallback=None)
+                    # Dates et droits du fichier remplacé : make voit le même arbre
+                    shutil.copystat(path, tmp_path)
+                    os.replace(tmp_path, path)
+                except OSError as e:
+                    tmp_path.unlink(missing_ok=True)
+                    if e.errno in (errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY):
+                        # Système de fichiers sans reflink : inutile d'essayer les autres fichiers
+                        return count, saved
+                    continue
+
+                count += 1
+                saved += st.st_size
+
+        return count, saved
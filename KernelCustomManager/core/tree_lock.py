@@ -0,0 +1,59 @@
+"""
+Module de verrouillage des arbres de sources
+Verrou flock par arbre, respecté par l'interface, la ligne de commande et la
+file de compilation (y compris entre processus) : partagé pour les
+compilations hors arbre de la file, exclusif pour une compilation dans
+l'arbre ou une modification du .config
+"""
+
+import fcntl
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class SourceTreeBusy(RuntimeError):
+    """Arbre de sources utilisé par une autre compilation ou modification"""
+
+
+class SourceTreeLock:
+    """Verrou d'un arbre de sources (fichier <locks>/<arbre>.lock)"""
+
+    def __init__(self, locks_dir, source_dir):
+        self.source_dir = Path(source_dir)
+        locks_dir = Path(locks_dir)
+        locks_dir.mkdir(parents=True, exist_ok=True)
+        # Même verrou pour base_dir/linux et l'arbre vers lequel il pointe
+        self.path = locks_dir / f"{self.source_dir.resolve().name}.lock"
+        self._fd = None
+
+    def acquire(self, exclusive=False):
+        """Prend le verrou sans attendre (lève SourceTreeBusy si l'arbre est occupé)"""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            raise SourceTreeBusy(f"Sources utilisées par une autre compilation : {self.source_dir.resolve().name}")
+        self._fd = fd
+
+    def release(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    @contextmanager
+    def hold(self, exclusive=False):
+        self.acquire(exclusive)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def is_busy(self, exclusive=False):
+        """Le verrou ne pourrait pas être pris maintenant"""
+        try:
+            with self.hold(exclusive):
+                return False
+        except SourceTreeBusy:
+            return True
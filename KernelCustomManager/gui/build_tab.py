@@ -28,10 +28,25 @@ def create_build_tab(main_window):
     download_box.pack_start(Gtk.Label(label=i18n._("build.version_label")), False, False, 0)
 
     main_window.version_entry = Gtk.Entry()
-    stable_version = get_stable_kernel_version()
-    main_window.version_entry.set_text(stable_version or "6.11.6")
+    # Valeur du cache disque immédiatement, mise à jour réseau en arrière-plan
+    metadata = main_window.kernel_manager.release_metadata
+    initial_version = metadata.get_stable_version(allow_network=False) or "6.11.6"
+    main_window.version_entry.set_text(initial_version)
     download_box.pack_start(main_window.version_entry, True, True, 0)
 
+    def on_releases(data):
+        stable = metadata.stable_version(data)
+
+        def apply():
+            # Ne pas écraser une version saisie entre-temps par l'utilisateur
+            if stable and main_window.version_entry.get_text() == initial_version:
+                main_window.version_entry.set_text(stable)
+            return False
+
+        GLib.idle_add(apply)
+
+    metadata.refresh_async(on_releases)
+
     download_btn = Gtk.Button(label=i18n._("button.download"))
     download_btn.connect("clicked", lambda w: download_kernel(main_window))
     download_box.pack_start(download_btn, False, False, 0)
@@ -58,6 +73,16 @@ def create_build_tab(main_window):
     export_btn.connect("clicked", lambda w: export_config_dialog(main_window))
     config_box.pack_start(export_btn, True, True, 0)
 
+    trim_btn = Gtk.Button(label=i18n._("button.trim"))
+    trim_btn.set_tooltip_text(i18n._("tooltip.trim"))
+    trim_btn.connect("clicked", lambda w: trim_config_dialog(main_window))
+    config_box.pack_start(trim_btn, True, True, 0)
+
+    search_btn = Gtk.Button(label=i18n._("button.kconfig_search"))
+    search_btn.set_tooltip_text(i18n._("tooltip.kconfig_search"))
+    search_btn.connect("clicked", lambda w: kconfig_search_dialog(main_window))
+    config_box.pack_start(search_btn, True, True, 0)
+
     box.pack_start(config_box, False, False, 0)
 
     # === COMPILATION ===
@@ -68,24 +93,6 @@ def create_build_tab(main_window):
     return box
 
 
-def get_stable_kernel_version():
-    """Récupère la version stable depuis kernel.org"""
-    try:
-        import urllib.request
-        import json
-        
-        url = "https://www.kernel.org/releases.json"
-        with urllib.request.urlopen(url, timeout=5) as response:
-            data = json.loads(response.read().decode())
-            
-            for release in data.get('releases', []):
-                if release.get('moniker') == 'stable':
-                    return release.get('version')
-        return None
-    except:
-        return None
-
-
 def download_kernel(main_window):
     """Télécharge les sources du kernel"""
     i18n = get_i18n()
@@ -160,10 +167,19 @@ def download_kernel(main_window):
 
 
 def auto_update_kernel(main_window):
-    """Mise à jour auto vers version stable"""
-    i18n = get_i18n()
-    stable = get_stable_kernel_version()
+    """Mise à jour auto vers version stable (métadonnées rafraîchies en arrière-plan)"""
+    metadata = main_window.kernel_manager.release_metadata
+
+    def on_releases(data):
+        # Réseau indisponible : refresh renvoie le cache, même périmé
+        GLib.idle_add(_offer_update, main_window, metadata.stable_version(data))
 
+    metadata.refresh_async(on_releases)
+
+
+def _offer_update(main_window, stable):
+    """Suite de auto_update_kernel dans le thread GTK : propose le téléchargement de stable"""
+    i18n = get_i18n()
     if not stable:
         main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.stable_version_failed"))
         return
@@ -199,6 +215,18 @@ def configure_kernel(main_window):
     show_config_dialog(main_window)
 
 
+def trim_config_dialog(main_window):
+    """Réduction du .config au matériel"""
+    from gui.build_tab_config import show_trim_dialog
+    show_trim_dialog(main_window)
+
+
+def kconfig_search_dialog(main_window):
+    """Recherche d'options Kconfig"""
+    from gui.kconfig_search import show_kconfig_search
+    show_kconfig_search(main_window)
+
+
 def compile_kernel_dialog(main_window):
     """Dialogue de compilation"""
     from gui.build_tab_compile import show_compile_dialog
@@ -207,33 +235,23 @@ def compile_kernel_dialog(main_window):
 
 def import_config_dialog(main_window):
     """Importe une configuration"""
+    from gui.build_tab_config import choose_config_file, configure_from_template
     i18n = get_i18n()
-    dialog = Gtk.FileChooserDialog(
-        title=i18n._("dialog.import_config.title"),
-        parent=main_window,
-        action=Gtk.FileChooserAction.OPEN
-    )
-    dialog.add_buttons(
-        Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
-        Gtk.STOCK_OPEN, Gtk.ResponseType.OK
-    )
-
-    filter_config = Gtk.FileFilter()
-    filter_config.set_name(i18n._("dialog.import_config.filter_name"))
-    filter_config.add_pattern("*.config")
-    filter_config.add_pattern("*.conf")
-    dialog.add_filter(filter_config)
-
-    response = dialog.run()
+    if main_window.kernel_manager.source_tree_busy():
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.tree_busy"))
+        return
 
-    if response == Gtk.ResponseType.OK:
-        source = dialog.get_filename()
-        if main_window.kernel_manager.import_config(source):
-            main_window.dialogs.show_info(i18n._("message.success.title"), i18n._("message.success.config_imported"))
-        else:
-            main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.import_failed"))
+    source = choose_config_file(main_window, i18n._("dialog.import_config.title"))
+    if not source:
+        return
 
-    dialog.destroy()
+    if source.endswith(".conf"):
+        # Template déclaratif : appliqué, pas copié
+        configure_from_template(main_window, source, run_menuconfig=False)
+    elif main_window.kernel_manager.import_config(source):
+        main_window.dialogs.show_info(i18n._("message.success.title"), i18n._("message.success.config_imported"))
+    else:
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.import_failed"))
 
 
 def export_config_dialog(main_window):
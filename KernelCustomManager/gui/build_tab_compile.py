@@ -4,13 +4,15 @@ Module de compilation du kernel
 
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk, GLib
-import subprocess
+from gi.repository import Gtk, GLib, Pango
 import threading
 import os
-from datetime import datetime
 from utils.i18n import get_i18n
-from core.secureboot_manager import SecureBootManager
+from core.builder import KernelBuilder
+from core.build_staging import TmpfsStaging
+from core.packaging import PackagingOptions, supported_compressors
+from gui.build_tab_farm import show_farm_dialog
+from gui.log_viewer import show_log_viewer
 
 
 def show_compile_dialog(main_window):
@@ -26,6 +28,10 @@ def show_compile_dialog(main_window):
         main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.no_config"))
         return
 
+    if main_window.kernel_manager.source_tree_busy():
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.tree_busy"))
+        return
+
     dialog = Gtk.Dialog(
         title=i18n._("dialog.compile.title"),
         transient_for=main_window,
@@ -44,14 +50,29 @@ def show_compile_dialog(main_window):
     threads_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
     threads_box.pack_start(Gtk.Label(label=i18n._("dialog.compile.threads")), False, False, 0)
 
+    # Valeur par défaut : un job par CPU, limité par la mémoire disponible
+    kernel_manager = main_window.kernel_manager
+    recommended = kernel_manager.resource_policy.recommended_jobs(
+        linux_dir / ".config", kernel_manager.get_compilation_history())
+
     threads_spin = Gtk.SpinButton()
     threads_spin.set_range(1, os.cpu_count() * 2)
-    threads_spin.set_value(os.cpu_count())
+    threads_spin.set_value(recommended['jobs'])
     threads_spin.set_increments(1, 4)
     threads_box.pack_start(threads_spin, True, True, 0)
 
     content.pack_start(threads_box, False, False, 0)
 
+    jobs_label = Gtk.Label()
+    jobs_label.set_markup("<small><i>" + i18n._(
+        "dialog.compile.jobs_recommended",
+        jobs=recommended['jobs'],
+        available=f"{recommended['memory_available_mb'] / 1024:.1f}",
+        per_job=recommended['memory_per_job_mb']
+    ) + "</i></small>")
+    jobs_label.set_halign(Gtk.Align.START)
+    content.pack_start(jobs_label, False, False, 0)
+
     # Suffixe
     suffix_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
     suffix_box.pack_start(Gtk.Label(label=i18n._("dialog.compile.suffix")), False, False, 0)
@@ -67,6 +88,99 @@ def show_compile_dialog(main_window):
     fakeroot_check.set_active(True)
     content.pack_start(fakeroot_check, False, False, 0)
 
+    # Cache de compilation (ccache)
+    compiler_cache = main_window.kernel_manager.compiler_cache
+    ccache_check = Gtk.CheckButton(label=i18n._("dialog.compile.use_ccache"))
+    if compiler_cache.is_available():
+        ccache_check.set_active(True)
+        usage_mb = compiler_cache.get_usage() / (1024 * 1024)
+        ccache_check.set_tooltip_text(i18n._("dialog.compile.ccache_info", size=f"{usage_mb:.0f}", max=compiler_cache.max_size, path=str(compiler_cache.cache_dir)))
+    else:
+        ccache_check.set_sensitive(False)
+        ccache_check.set_tooltip_text(i18n._("dialog.compile.ccache_unavailable"))
+    content.pack_start(ccache_check, False, False, 0)
+
+    # Compilation distribuée (distcc) sur les hôtes d'aide
+    farm = main_window.kernel_manager.build_farm
+    distcc_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+    distcc_check = Gtk.CheckButton()
+    distcc_check.set_tooltip_text(i18n._("dialog.compile.distcc_info"))
+    distcc_box.pack_start(distcc_check, True, True, 0)
+
+    def update_distcc():
+        hosts = [host for host in farm.get_hosts() if host.get('enabled', True)]
+        distcc_check.set_label(i18n._("dialog.compile.distcc", count=len(hosts), slots=sum(host['slots'] for host in hosts)))
+        distcc_check.set_sensitive(farm.is_available() and bool(hosts))
+        if not distcc_check.get_sensitive():
+            distcc_check.set_active(False)
+
+    def on_farm_clicked(widget):
+        show_farm_dialog(main_window)
+        update_distcc()
+
+    farm_btn = Gtk.Button(label=i18n._("dialog.compile.distcc_hosts"))
+    farm_btn.connect("clicked", on_farm_clicked)
+    distcc_box.pack_start(farm_btn, False, False, 0)
+    update_distcc()
+    content.pack_start(distcc_box, False, False, 0)
+
+    # Répertoire d'objets hors arbre
+    out_of_tree_check = Gtk.CheckButton(label=i18n._("dialog.compile.out_of_tree"))
+    out_of_tree_check.set_active(True)
+    out_of_tree_check.set_tooltip_text(i18n._("dialog.compile.out_of_tree_info"))
+    content.pack_start(out_of_tree_check, False, False, 0)
+
+    # Répertoire d'objets en mémoire (tmpfs), recopié sur disque si la mémoire manque
+    tmpfs_check = Gtk.CheckButton(label=i18n._("dialog.compile.tmpfs"))
+    tmpfs_check.set_tooltip_text(i18n._("dialog.compile.tmpfs_info"))
+    tmpfs_check.set_sensitive(TmpfsStaging.is_available())
+    out_of_tree_check.connect("toggled", lambda w: tmpfs_check.set_sensitive(w.get_active() and TmpfsStaging.is_available()))
+    content.pack_start(tmpfs_check, False, False, 0)
+
+    # Empaquetage : compresseur de dpkg-deb, niveau et paquet de débogage
+    packaging_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+    packaging_box.pack_start(Gtk.Label(label=i18n._("dialog.compile.compressor")), False, False, 0)
+    compressor_combo = Gtk.ComboBoxText()
+    compressor_combo.append("", i18n._("dialog.compile.compressor_default"))
+    for name in supported_compressors():
+        compressor_combo.append(name, name)
+    compressor_combo.set_active(0)
+    compressor_combo.set_tooltip_text(i18n._("dialog.compile.compressor_info"))
+    packaging_box.pack_start(compressor_combo, False, False, 0)
+
+    packaging_box.pack_start(Gtk.Label(label=i18n._("dialog.compile.compression_level")), False, False, 0)
+    level_spin = Gtk.SpinButton.new_with_range(0, 19, 1)
+    level_spin.set_tooltip_text(i18n._("dialog.compile.compression_level_info"))
+    packaging_box.pack_start(level_spin, False, False, 0)
+
+    # Niveaux valides selon le compresseur (0 = niveau par défaut)
+    max_levels = {'zstd': 19, 'xz': 9, 'gzip': 9}
+
+    def on_compressor_changed(combo):
+        name = combo.get_active_id()
+        level_spin.set_sensitive(name in max_levels)
+        level_spin.set_range(0, max_levels.get(name, 19))
+
+    compressor_combo.connect("changed", on_compressor_changed)
+    on_compressor_changed(compressor_combo)
+    content.pack_start(packaging_box, False, False, 0)
+
+    skip_debug_check = Gtk.CheckButton(label=i18n._("dialog.compile.skip_debug"))
+    skip_debug_check.set_active(True)
+    skip_debug_check.set_tooltip_text(i18n._("dialog.compile.skip_debug_info"))
+    content.pack_start(skip_debug_check, False, False, 0)
+
+    # Profilage des temps de compilation par objet
+    profile_check = Gtk.CheckButton(label=i18n._("dialog.compile.profile"))
+    profile_check.set_tooltip_text(i18n._("dialog.compile.profile_info"))
+    content.pack_start(profile_check, False, False, 0)
+
+    # Confinement (scope systemd ou nice/ionice) : le bureau reste réactif
+    limit_check = Gtk.CheckButton(label=i18n._("dialog.compile.limit_resources"))
+    limit_check.set_active(True)
+    limit_check.set_tooltip_text(i18n._("dialog.compile.limit_resources_info"))
+    content.pack_start(limit_check, False, False, 0)
+
     # SecureBoot signing option (Temporairement désactivé dans le GUI - À réactiver dans une prochaine version)
     sb_manager = main_window.secureboot_manager
     secureboot_check = None
@@ -81,322 +195,353 @@ def show_compile_dialog(main_window):
     #     sb_info_label.set_line_wrap(True)
     #     content.pack_start(sb_info_label, False, False, 0)
 
-    # Info
+    # Durée estimée d'après l'historique (calcul en arrière-plan : parcours des Makefiles)
     info_label = Gtk.Label()
     info_label.set_markup(f"<i>{i18n._('dialog.compile.estimated_time')}</i>")
     content.pack_start(info_label, False, False, 0)
 
+    dialog_open = [True]
+
+    def show_estimate(prediction):
+        if dialog_open[0]:
+            time = format_duration(prediction['duration'])
+            if prediction['samples']:
+                text = i18n._("dialog.compile.predicted_time", time=time, count=prediction['samples'])
+            else:
+                text = i18n._("dialog.compile.predicted_time_default", time=time)
+            info_label.set_markup(f"<i>{text}</i>")
+        return False
+
+    def update_estimate(*args):
+        jobs = int(threads_spin.get_value())
+        use_ccache = ccache_check.get_active()
+
+        def worker():
+            try:
+                prediction = main_window.kernel_manager.predict_build_duration(jobs, use_ccache)
+            except Exception as e:
+                print(f"Erreur lors de l'estimation de la durée: {e}")
+                return
+            GLib.idle_add(show_estimate, prediction)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    threads_spin.connect("value-changed", update_estimate)
+    ccache_check.connect("toggled", update_estimate)
+    update_estimate()
+
     dialog.add_button(i18n._("button.cancel"), Gtk.ResponseType.CANCEL)
     dialog.add_button(i18n._("dialog.compile.button_compile"), Gtk.ResponseType.OK)
     
     dialog.show_all()
     response = dialog.run()
+    dialog_open[0] = False
     
     if response == Gtk.ResponseType.OK:
         jobs = int(threads_spin.get_value())
         suffix = suffix_entry.get_text().strip()
         use_fakeroot = fakeroot_check.get_active()
         sign_for_secureboot = secureboot_check and secureboot_check.get_active()
+        use_ccache = ccache_check.get_active()
+        out_of_tree = out_of_tree_check.get_active()
+        profile = profile_check.get_active()
+        limit_resources = limit_check.get_active()
+        tmpfs = out_of_tree and tmpfs_check.get_active()
+        packaging = PackagingOptions(
+            compressor=compressor_combo.get_active_id() or None,
+            level=level_spin.get_value_as_int() or None,
+            skip_debug=skip_debug_check.get_active()
+        )
+        distributed = distcc_check.get_active()
 
         dialog.destroy()
-        compile_kernel(main_window, jobs, suffix, use_fakeroot, sign_for_secureboot)
+        compile_kernel(main_window, jobs, suffix, use_fakeroot, sign_for_secureboot, use_ccache, out_of_tree, profile, limit_resources, tmpfs, packaging, distributed)
     else:
         dialog.destroy()
 
 
-def compile_kernel(main_window, jobs, suffix, use_fakeroot, sign_for_secureboot=False):
-    """Lance la compilation dans un terminal"""
+def compile_kernel(main_window, jobs, suffix, use_fakeroot, sign_for_secureboot=False, use_ccache=False, out_of_tree=False, profile=False, limit_resources=False, tmpfs=False, packaging=None, distributed=False):
+    """Lance la compilation supervisée et affiche son avancement"""
     i18n = get_i18n()
-    linux_dir = main_window.kernel_manager.base_dir / "linux"
-
-    try:
-        kernel_version = linux_dir.resolve().name.replace("linux-", "")
-    except:
-        kernel_version = "unknown"
-
-    # Sauvegarder la config
-    main_window.kernel_manager.backup_config(kernel_version, suffix)
-
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    log_file = main_window.kernel_manager.log_dir / f"compile-{timestamp}.log"
+    kernel_manager = main_window.kernel_manager
 
-    fakeroot_cmd = "fakeroot " if use_fakeroot else ""
-    suffix_cmd = f"LOCALVERSION={suffix}" if suffix else ""
+    # Sur Debian, désactiver la compression des modules dans le .config
+    # Ubuntu ne compresse pas par défaut, Debian active CONFIG_MODULE_COMPRESS_XZ
+    sb_manager = main_window.secureboot_manager
+    is_debian = sb_manager.get_distribution_info()['is_debian']
 
-    start_time = datetime.now()
+    # Signature des modules AVANT bindeb-pkg (clé MOK de préférence)
+    signing_key = sb_manager.get_signing_key() if sign_for_secureboot else None
 
-    # Détecter la distribution pour adapter la configuration
-    sb_manager = main_window.secureboot_manager
-    distro_info = sb_manager.get_distribution_info()
-    is_debian = distro_info['is_debian']
+    window = CompileProgressWindow(main_window)
+    builder = KernelBuilder(
+        kernel_manager,
+        sb_manager,
+        event_callback=window.on_event,
+        output_callback=window.on_output
+    )
+    window.builder = builder
+    window.show_all()
 
-    # Sur Debian, désactiver la compression des modules dans le .config
-    # Ubuntu ne compresse pas par défaut, Debian active CONFIG_MODULE_COMPRESS_XZ
-    if is_debian:
-        config_file = linux_dir / ".config"
-        if config_file.exists():
-            # Lire le fichier .config
-            with open(config_file, 'r') as f:
-                config_content = f.read()
-
-            # Désactiver toutes les options de compression des modules
-            config_modified = False
-
-            # Désactiver CONFIG_MODULE_COMPRESS (option principale)
-            if 'CONFIG_MODULE_COMPRESS=y' in config_content:
-                config_content = config_content.replace('CONFIG_MODULE_COMPRESS=y', '# CONFIG_MODULE_COMPRESS is not set')
-                config_modified = True
-
-            # Désactiver CONFIG_MODULE_COMPRESS_ALL
-            if 'CONFIG_MODULE_COMPRESS_ALL=y' in config_content:
-                config_content = config_content.replace('CONFIG_MODULE_COMPRESS_ALL=y', '# CONFIG_MODULE_COMPRESS_ALL is not set')
-                config_modified = True
-
-            # Désactiver les algorithmes de compression spécifiques
-            if 'CONFIG_MODULE_COMPRESS_XZ=y' in config_content:
-                config_content = config_content.replace('CONFIG_MODULE_COMPRESS_XZ=y', '# CONFIG_MODULE_COMPRESS_XZ is not set')
-                config_modified = True
-            if 'CONFIG_MODULE_COMPRESS_GZIP=y' in config_content:
-                config_content = config_content.replace('CONFIG_MODULE_COMPRESS_GZIP=y', '# CONFIG_MODULE_COMPRESS_GZIP is not set')
-                config_modified = True
-            if 'CONFIG_MODULE_COMPRESS_ZSTD=y' in config_content:
-                config_content = config_content.replace('CONFIG_MODULE_COMPRESS_ZSTD=y', '# CONFIG_MODULE_COMPRESS_ZSTD is not set')
-                config_modified = True
-
-            # Ajouter CONFIG_MODULE_COMPRESS_NONE=y si pas présent
-            if 'CONFIG_MODULE_COMPRESS_NONE' not in config_content:
-                config_content += '\nCONFIG_MODULE_COMPRESS_NONE=y\n'
-                config_modified = True
-            elif 'CONFIG_MODULE_COMPRESS_NONE is not set' in config_content:
-                config_content = config_content.replace('# CONFIG_MODULE_COMPRESS_NONE is not set', 'CONFIG_MODULE_COMPRESS_NONE=y')
-                config_modified = True
-
-            # Sauvegarder le .config modifié
-            if config_modified:
-                with open(config_file, 'w') as f:
-                    f.write(config_content)
-
-    # Préparer la signature SecureBoot (TOUJOURS avant bindeb-pkg, simple et fiable)
-    signing_before_bindeb = ""
-
-    if sign_for_secureboot:
-        keys_dir = sb_manager.keys_dir
-        available_keys = list(keys_dir.glob("*.priv"))
-
-        if available_keys:
-            # Utiliser la première clé disponible (ou MOK si elle existe)
-            key_file = None
-            for k in available_keys:
-                if k.stem == "MOK":
-                    key_file = k
-                    break
-            if not key_file:
-                key_file = available_keys[0]
-
-            priv_key = key_file
-            cert = key_file.with_suffix('.der')
-
-            if cert.exists():
-                # Script de signature des modules AVANT bindeb-pkg
-                # Simple et fiable : signe tous les modules .ko dans le répertoire de build
-                # Sur Debian, CONFIG_MODULE_COMPRESS_NONE=y garantit que les modules restent en .ko
-                signing_before_bindeb = f"""
-echo ''
-echo '================================='
-echo '{i18n._("secureboot.signing_modules_before_packaging")}'
-echo '================================='
-
-# Trouver l'outil sign-file
-SIGN_FILE=""
-for location in "/usr/src/linux-headers-$(uname -r)/scripts/sign-file" \\
-                "/lib/modules/$(uname -r)/build/scripts/sign-file" \\
-                "scripts/sign-file"; do
-    if [ -f "$location" ]; then
-        SIGN_FILE="$location"
-        break
-    fi
-done
-
-if [ -z "$SIGN_FILE" ]; then
-    echo "❌ Error: sign-file tool not found"
-    exit 1
-fi
-
-echo ""
-echo "🔍 {i18n._("secureboot.counting_modules")}..."
-
-# Compter les modules .ko (non compressés grâce à CONFIG_MODULE_COMPRESS_NONE)
-MODULES=($(find . -name "*.ko"))
-TOTAL_MODULES=${{#MODULES[@]}}
-
-echo "📦 {i18n._("secureboot.found_modules")}: $TOTAL_MODULES"
-echo ""
-
-if [ "$TOTAL_MODULES" -eq 0 ]; then
-    echo "⚠️  {i18n._("secureboot.no_modules_found")}"
-else
-    echo "🔐 {i18n._("secureboot.starting_signature")}..."
-    echo ""
-
-    # Signer tous les modules avec affichage de progression
-    SIGNED_COUNT=0
-    FAILED_COUNT=0
-    CURRENT=0
-
-    for module in "${{MODULES[@]}}"; do
-        CURRENT=$((CURRENT + 1))
-        MODULE_NAME=$(basename "$module")
-
-        # Afficher la progression
-        if [ "$TOTAL_MODULES" -le 50 ] || [ $((CURRENT % 10)) -eq 0 ] || [ "$CURRENT" -eq "$TOTAL_MODULES" ]; then
-            printf "\\r🔏 [{i18n._("secureboot.progress")}: %3d/%3d] {i18n._("secureboot.signing")}: %-50s" "$CURRENT" "$TOTAL_MODULES" "$MODULE_NAME"
-        fi
-
-        # Signer le module
-        if "$SIGN_FILE" sha256 '{priv_key}' '{cert}' "$module" >/dev/null 2>&1; then
-            SIGNED_COUNT=$((SIGNED_COUNT + 1))
-        else
-            FAILED_COUNT=$((FAILED_COUNT + 1))
-            echo ""
-            echo "  ⚠️  {i18n._("secureboot.failed_to_sign")}: $MODULE_NAME"
-        fi
-    done
-
-    echo ""
-    echo ""
-
-    if [ "$FAILED_COUNT" -eq 0 ]; then
-        echo "✅ {i18n._("secureboot.all_modules_signed")}: $SIGNED_COUNT"
-    else
-        echo "⚠️  {i18n._("secureboot.modules_signed_with_errors")}: $SIGNED_COUNT/$TOTAL_MODULES ({i18n._("secureboot.signing_failed")}: $FAILED_COUNT)"
-    fi
-fi
-
-echo '================================='
-echo ''
-"""
+    def run():
+        try:
+            result = builder.build(
+                jobs=jobs,
+                suffix=suffix,
+                use_fakeroot=use_fakeroot,
+                use_ccache=use_ccache,
+                out_of_tree=out_of_tree,
+                signing_key=signing_key,
+                disable_module_compression=is_debian,
+                profile=profile,
+                limit_resources=limit_resources,
+                tmpfs=tmpfs,
+                packaging=packaging,
+                distributed=distributed
+            )
+        except Exception as e:
+            result = {'success': False, 'error': str(e), 'duration': 0, 'packages': []}
+            window.on_event({'event': 'finished', **result})
 
-    cmd = f"""
-cd '{linux_dir}' || exit 1
-echo '{i18n._("compilation.header")}'
-echo '{i18n._("compilation.threads", count=jobs)}'
-echo '{i18n._("compilation.suffix", suffix=(suffix or i18n._("compilation.suffix_none")))}'
-echo '{i18n._("compilation.fakeroot", status=(i18n._("compilation.fakeroot_yes") if use_fakeroot else i18n._("compilation.fakeroot_no")))}'
-{"echo 'SecureBoot Signing: " + i18n._("compilation.fakeroot_yes") + " (AVANT bindeb-pkg)'" if sign_for_secureboot else ""}
-{"echo 'Distribution: Debian (CONFIG_MODULE_COMPRESS_NONE activé)'" if is_debian and sign_for_secureboot else ""}
-echo ''
-echo '{i18n._("compilation.starting")}'
-sleep 2
-
-# Étape 1: Compilation des modules
-echo ''
-echo '{i18n._("compilation.compiling_modules")}'
-make -j{jobs} {suffix_cmd} 2>&1 | tee '{log_file}'
-RESULT=${{PIPESTATUS[0]}}
-
-if [ $RESULT -ne 0 ]; then
-    echo ''
-    echo '================================='
-    echo '{i18n._("compilation.failed")}'
-    echo "Return code: $RESULT"
-    echo '================================='
-    echo ''
-    echo '{i18n._("compilation.press_enter")}'
-    read
-    exit $RESULT
-fi
-
-{signing_before_bindeb}
-
-# Étape 2: Création du package .deb
-echo ''
-echo '{i18n._("compilation.creating_package")}'
-{fakeroot_cmd}make bindeb-pkg {suffix_cmd} 2>&1 | tee -a '{log_file}'
-RESULT=${{PIPESTATUS[0]}}
-
-if [ $RESULT -ne 0 ]; then
-    echo ''
-    echo '================================='
-    echo '{i18n._("compilation.failed")}'
-    echo "Return code: $RESULT"
-    echo '================================='
-    echo ''
-    echo '{i18n._("compilation.press_enter")}'
-    read
-    exit $RESULT
-fi
-
-# Étape 3: Déplacement des packages
-echo ''
-echo '================================='
-echo '{i18n._("compilation.success")}'
-echo ''
-
-echo '{i18n._("compilation.moving_packages")}'
-for deb in ../*.deb; do
-    if [ -f "$deb" ]; then
-        mv "$deb" '{main_window.kernel_manager.repo_dir}/'
-        echo "✓ $(basename "$deb") moved"
-    fi
-done
-
-echo '================================='
-echo ''
-echo '{i18n._("compilation.press_enter")}'
-read
-"""
-    
-    terminals = [
-        ["gnome-terminal", "--", "bash", "-c"],
-        ["ptyxis", "--", "bash", "-c"],
-        ["konsole", "-e", "bash", "-c"],
-        ["xterm", "-e", "bash", "-c"]
-    ]
-    
-    launched = False
-    for terminal in terminals:
         try:
-            process = subprocess.Popen(terminal + [cmd])
-            launched = True
-            
-            main_window.dialogs.show_info(
-                i18n._("message.success.title"),
-                i18n._("message.info.compilation_launched", threads=jobs, suffix=(suffix or i18n._("compilation.suffix_none")), log=str(log_file))
+            kernel_version = (kernel_manager.base_dir / "linux").resolve().name.replace("linux-", "")
+        except OSError:
+            kernel_version = "unknown"
+        duration = result.get('duration', 0)
+
+        # Notification
+        if result['success']:
+            kernel_manager.send_notification(
+                i18n._("message.success.compilation_success"),
+                i18n._("message.success.compilation_success_notification", version=kernel_version, suffix=suffix, time=f"{duration//60}m {duration%60}s"),
+                "low"
+            )
+        elif not result.get('cancelled'):
+            kernel_manager.send_notification(
+                i18n._("compilation.failed"),
+                i18n._("compilation.failed_notification", version=kernel_version, suffix=suffix),
+                "critical"
             )
-            
-            # Thread pour surveiller la fin
-            def monitor_compilation():
-                process.wait()
-                end_time = datetime.now()
-                duration = int((end_time - start_time).total_seconds())
-
-                success = process.returncode == 0
-                packages = [p.name for p in main_window.kernel_manager.repo_dir.glob("linux-*.deb")]
-
-                # Ajouter à l'historique
-                main_window.kernel_manager.add_compilation_to_history(
-                    kernel_version, suffix, success, duration, packages
-                )
 
-                # Notification
-                if success:
-                    main_window.kernel_manager.send_notification(
-                        i18n._("message.success.compilation_success"),
-                        i18n._("message.success.compilation_success_notification", version=kernel_version, suffix=suffix, time=f"{duration//60}m {duration%60}s"),
-                        "low"
-                    )
-                else:
-                    main_window.kernel_manager.send_notification(
-                        i18n._("compilation.failed"),
-                        i18n._("compilation.failed_notification", version=kernel_version, suffix=suffix),
-                        "critical"
-                    )
-
-            threading.Thread(target=monitor_compilation, daemon=True).start()
-            break
-            
-        except FileNotFoundError:
-            continue
-    
-    if not launched:
-        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.no_terminal"))
+    threading.Thread(target=run, daemon=True).start()
+
+
+def format_duration(seconds):
+    """Durée lisible (ex: 12m 05s)"""
+    if seconds is None:
+        return "-"
+    return f"{seconds//60}m {seconds%60:02d}s"
+
+
+class CompileProgressWindow(Gtk.Window):
+    """
+    Fenêtre d'avancement de la compilation
+    Les événements arrivent depuis le thread de compilation : ils sont regroupés
+    et appliqués par un seul GLib.idle_add à la fois
+    """
+
+    # Lignes de sortie conservées dans la vue
+    MAX_LINES = 1000
+
+    def __init__(self, main_window):
+        self.i18n = get_i18n()
+        super().__init__(title=self.i18n._("progress.title"), transient_for=main_window)
+        self.set_default_size(700, 450)
+        self.set_border_width(10)
+        self.main_window = main_window
+        self.builder = None
+
+        self._lock = threading.Lock()
+        self._pending = False
+        self._progress = None
+        self._lines = []
+        self._error = None
+        self._result = None
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
+
+        self.stage_label = Gtk.Label(halign=Gtk.Align.START)
+        self.stage_label.set_markup(f"<b>{self.i18n._('progress.stage_prepare')}</b>")
+        box.pack_start(self.stage_label, False, False, 0)
+
+        self.progress_bar = Gtk.ProgressBar()
+        self.progress_bar.set_show_text(True)
+        box.pack_start(self.progress_bar, False, False, 0)
+
+        self.info_label = Gtk.Label(halign=Gtk.Align.START)
+        box.pack_start(self.info_label, False, False, 0)
+
+        self.current_label = Gtk.Label(halign=Gtk.Align.START)
+        self.current_label.set_ellipsize(Pango.EllipsizeMode.END)
+        box.pack_start(self.current_label, False, False, 0)
+
+        # Sortie de make
+        expander = Gtk.Expander(label=self.i18n._("progress.output"))
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        self.output_view = Gtk.TextView()
+        self.output_view.set_editable(False)
+        self.output_view.set_monospace(True)
+        scrolled.add(self.output_view)
+        expander.add(scrolled)
+        expander.set_vexpand(True)
+        box.pack_start(expander, True, True, 0)
+
+        btn_box = Gtk.Box(spacing=5)
+        # Journal indexé : affiché sur la première erreur (visible en cas d'échec)
+        self.log_btn = Gtk.Button(label=self.i18n._("progress.show_error"))
+        self.log_btn.set_no_show_all(True)
+        self.log_btn.connect("clicked", lambda w: show_log_viewer(self, self._log_path))
+        btn_box.pack_start(self.log_btn, False, False, 0)
+        self._log_path = None
+
+        self.close_btn = Gtk.Button(label=self.i18n._("button.cancel"))
+        self.close_btn.connect("clicked", self.on_close_clicked)
+        btn_box.pack_end(self.close_btn, False, False, 0)
+        box.pack_start(btn_box, False, False, 0)
+
+        self.connect("delete-event", self.on_delete)
+        self.add(box)
+
+    # --- Thread de compilation ---
+
+    def on_event(self, event):
+        """Événement de KernelBuilder"""
+        name = event.get('event')
+        with self._lock:
+            if name == 'progress':
+                self._progress = event
+            elif name == 'error':
+                self._error = event.get('message')
+            elif name == 'finished':
+                self._result = event
+            elif name == 'staging' and event.get('mode') == 'tmpfs':
+                self._lines.append(self.i18n._("progress.staging_tmpfs", path=event['path'], size=event['required_mb']) + "\n")
+            elif name == 'staging':
+                self._lines.append(self.i18n._("progress.staging_disk", reason=event.get('reason')) + "\n")
+            elif name == 'distributed' and event.get('hosts'):
+                self._lines.append(self.i18n._("progress.distributed", hosts=", ".join(event['hosts']), jobs=event['jobs']) + "\n")
+                for host in event.get('unhealthy', []):
+                    self._lines.append(self.i18n._("progress.host_unhealthy", host=host['host'], error=host['error']) + "\n")
+            elif name == 'distributed':
+                self._lines.append(self.i18n._("progress.distributed_fallback") + "\n")
+            elif name == 'spill':
+                self._lines.append(self.i18n._("progress.spill", path=event['destination']) + "\n")
+            else:
+                return
+        self._schedule()
+
+    def on_output(self, line):
+        """Ligne de sortie de make"""
+        with self._lock:
+            self._lines.append(line)
+            if len(self._lines) > self.MAX_LINES:
+                del self._lines[:-self.MAX_LINES]
+        self._schedule()
+
+    def _schedule(self):
+        with self._lock:
+            if self._pending:
+                return
+            self._pending = True
+        GLib.idle_add(self._apply)
+
+    # --- Thread GTK ---
+
+    def _apply(self):
+        with self._lock:
+            self._pending = False
+            progress, self._progress = self._progress, None
+            lines, self._lines = self._lines, []
+            error = self._error
+            result, self._result = self._result, None
+
+        if progress:
+            self._show_progress(progress)
+        if lines:
+            self._append_output(lines)
+        if result:
+            self._show_result(result, error)
+        return False
+
+    def _show_progress(self, progress):
+        i18n = self.i18n
+        stage = progress['stage']
+        self.stage_label.set_markup(f"<b>{i18n._('progress.stage_' + stage)}</b>")
+        self.progress_bar.set_fraction(progress['percent'] / 100)
+        self.progress_bar.set_text(f"{progress['percent']}%")
+
+        info = [i18n._("progress.elapsed", time=format_duration(progress['elapsed']))]
+        if progress.get('predicted'):
+            info.append(i18n._("progress.predicted", time=format_duration(progress['predicted'])))
+        if progress['objects_expected']:
+            info.append(i18n._("progress.objects", done=progress['objects_done'], expected=progress['objects_expected']))
+        if progress['eta'] is not None:
+            info.append(i18n._("progress.eta", time=format_duration(progress['eta'])))
+        self.info_label.set_text("  •  ".join(info))
+        self.current_label.set_text(progress.get('current') or "")
+
+    def _append_output(self, lines):
+        buffer = self.output_view.get_buffer()
+        buffer.insert(buffer.get_end_iter(), "".join(lines))
+        extra = buffer.get_line_count() - self.MAX_LINES
+        if extra > 0:
+            buffer.delete(buffer.get_start_iter(), buffer.get_iter_at_line(extra))
+        self.output_view.scroll_to_iter(buffer.get_end_iter(), 0, False, 0, 0)
+
+    def _show_result(self, result, error):
+        i18n = self.i18n
+        self.builder = None
+        self.close_btn.set_label(i18n._("progress.close"))
+
+        if result.get('success'):
+            self.progress_bar.set_fraction(1.0)
+            self.progress_bar.set_text("100%")
+            packages = "\n• ".join(result.get('packages', []))
+            self.stage_label.set_markup(f"<b>{i18n._('compilation.success')}</b>")
+            info = i18n._("progress.finished", time=format_duration(result.get('duration', 0)), count=len(result.get('packages', [])))
+            stage_seconds = result.get('stage_seconds') or {}
+            if 'package' in stage_seconds:
+                info += "\n" + i18n._("progress.stage_times",
+                                      compile=format_duration(stage_seconds.get('compile', 0)),
+                                      package=format_duration(stage_seconds['package']))
+            self.info_label.set_text(info)
+            self.current_label.set_text(f"• {packages}" if packages else "")
+            regression = result.get('regression')
+            if regression:
+                self.stage_label.set_markup(
+                    f"<b>{i18n._('compilation.success')}</b>\n"
+                    f"{i18n._('progress.regression', ratio=regression['ratio'], predicted=format_duration(regression['predicted']))}"
+                )
+        elif result.get('cancelled'):
+            self.stage_label.set_markup(f"<b>{i18n._('progress.cancelled')}</b>")
+        else:
+            self.stage_label.set_markup(f"<b>{i18n._('compilation.failed')}</b>")
+            first_error = result.get('first_error')
+            self.current_label.set_text(error or result.get('error')
+                                        or (first_error and first_error['text'])
+                                        or i18n._("compilation.return_code", code=result.get('returncode')))
+            if result.get('log'):
+                self.info_label.set_text(result['log'])
+                self._log_path = result['log']
+                self.log_btn.show()
+
+    def _confirm_cancel(self):
+        """Demande confirmation avant d'interrompre la compilation en cours"""
+        if not self.builder:
+            return True
+        if self.main_window.dialogs.show_question(self.i18n._("message.confirm.title"), self.i18n._("progress.confirm_cancel")):
+            if self.builder:
+                self.builder.cancel()
+            return True
+        return False
+
+    def on_close_clicked(self, widget):
+        if self.builder:
+            self._confirm_cancel()
+        else:
+            self.destroy()
+
+    def on_delete(self, widget, event):
+        # True bloque la fermeture
+        return not self._confirm_cancel()
@@ -4,10 +4,9 @@ Module de configuration du kernel
 
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
+from gi.repository import Gtk, GLib
 import subprocess
-import shutil
-from pathlib import Path
+import threading
 from utils.i18n import get_i18n
 
 
@@ -20,6 +19,10 @@ def show_config_dialog(main_window):
         main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.no_kernel_source_download"))
         return
 
+    if main_window.kernel_manager.source_tree_busy():
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.tree_busy"))
+        return
+
     dialog = Gtk.Dialog(
         title=i18n._("dialog.configure.title"),
         transient_for=main_window,
@@ -44,6 +47,22 @@ def show_config_dialog(main_window):
     file_radio = Gtk.RadioButton.new_with_label_from_widget(system_radio, i18n._("dialog.configure.file_config"))
     content.pack_start(file_radio, False, False, 0)
 
+    # Templates déclaratifs (*.conf) et configs complètes (*.config)
+    template_box = Gtk.Box(spacing=10)
+    template_radio = Gtk.RadioButton.new_with_label_from_widget(system_radio, i18n._("dialog.configure.template_config"))
+    template_box.pack_start(template_radio, False, False, 0)
+    template_combo = Gtk.ComboBoxText()
+    for entry in main_window.kernel_manager.config_templates.list_templates():
+        label = f"{entry['name']} — {entry['description']}" if entry['description'] else entry['name']
+        template_combo.append(entry['name'], label)
+    template_combo.set_active(0)
+    template_combo.set_sensitive(False)
+    template_radio.connect("toggled", lambda radio: template_combo.set_sensitive(radio.get_active()))
+    template_box.pack_start(template_combo, True, True, 0)
+    if template_combo.get_active_id() is None:
+        template_radio.set_sensitive(False)
+    content.pack_start(template_box, False, False, 0)
+
     menuconfig_check = Gtk.CheckButton(label=i18n._("dialog.configure.run_menuconfig"))
     menuconfig_check.set_active(True)
     content.pack_start(menuconfig_check, False, False, 0)
@@ -60,6 +79,8 @@ def show_config_dialog(main_window):
         
         if use_system:
             configure_from_system(main_window, run_menuconfig)
+        elif template_radio.get_active():
+            configure_from_template(main_window, template_combo.get_active_id(), run_menuconfig)
         else:
             configure_from_file(main_window, run_menuconfig)
     
@@ -69,51 +90,48 @@ def show_config_dialog(main_window):
 def configure_from_system(main_window, run_menuconfig=True):
     """Configure depuis la config système"""
     i18n = get_i18n()
-    import platform
-
-    current_kernel = platform.release()
-    config_file = Path(f"/boot/config-{current_kernel}")
 
-    if not config_file.exists():
-        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.system_config_not_found", path=str(config_file)))
-        return
-    
-    linux_dir = main_window.kernel_manager.base_dir / "linux"
-    dest_config = linux_dir / ".config"
-    
     try:
-        shutil.copy(config_file, dest_config)
-        
-        # Adaptation pour Ubuntu/Debian
-        subprocess.run(
-            ["sed", "-i", 's/CONFIG_SYSTEM_TRUSTED_KEYS=.*/CONFIG_SYSTEM_TRUSTED_KEYS=""/', str(dest_config)],
-            check=True
-        )
-        subprocess.run(
-            ["sed", "-i", 's/CONFIG_SYSTEM_REVOCATION_KEYS=.*/CONFIG_SYSTEM_REVOCATION_KEYS=""/', str(dest_config)],
-            check=True
-        )
-        
-        subprocess.run(
-            ["make", "olddefconfig"],
-            cwd=str(linux_dir),
-            check=True
-        )
+        main_window.kernel_manager.configure_from_system()
         
         if run_menuconfig:
             run_menuconfig_terminal(main_window)
         else:
             main_window.dialogs.show_info(i18n._("message.success.title"), i18n._("message.success.config_applied"))
 
+    except FileNotFoundError as e:
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.system_config_not_found", path=str(e)))
     except Exception as e:
         main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.config_failed", error=str(e)))
 
 
-def configure_from_file(main_window, run_menuconfig=True):
-    """Configure depuis un fichier"""
+def configure_from_template(main_window, name, run_menuconfig=True):
+    """Applique un template (pile résolue en une passe, un seul olddefconfig)"""
+    i18n = get_i18n()
+
+    try:
+        report = main_window.kernel_manager.apply_template(name)
+    except Exception as e:
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.template_failed", name=name, error=str(e)))
+        return
+
+    message = i18n._("message.success.template_applied", name=name, templates=len(report['stack']),
+                     options=report['options'], changed=report['changed'], seconds=report['seconds'])
+    if report['unmet']:
+        unmet = ", ".join(f"CONFIG_{symbol}" for symbol, _, _ in report['unmet'][:10])
+        message += "\n\n" + i18n._("message.success.template_unmet", count=len(report['unmet']), options=unmet)
+
+    if run_menuconfig:
+        run_menuconfig_terminal(main_window)
+    if report['unmet'] or not run_menuconfig:
+        main_window.dialogs.show_info(i18n._("message.success.title"), message)
+
+
+def choose_config_file(main_window, title):
+    """Sélection d'un .config ou d'un template déclaratif (.conf) ; retourne le chemin ou None"""
     i18n = get_i18n()
     dialog = Gtk.FileChooserDialog(
-        title=i18n._("message.error.select_config_file"),
+        title=title,
         parent=main_window,
         action=Gtk.FileChooserAction.OPEN
     )
@@ -127,33 +145,171 @@ def configure_from_file(main_window, run_menuconfig=True):
     filter_config.add_pattern("*.config")
     filter_config.add_pattern("*.conf")
     dialog.add_filter(filter_config)
-    
+
     response = dialog.run()
-    
-    if response == Gtk.ResponseType.OK:
-        config_file = Path(dialog.get_filename())
-        linux_dir = main_window.kernel_manager.base_dir / "linux"
-        dest_config = linux_dir / ".config"
-        
-        try:
-            shutil.copy(config_file, dest_config)
-            
-            subprocess.run(
-                ["make", "olddefconfig"],
-                cwd=str(linux_dir),
-                check=True
-            )
-            
-            if run_menuconfig:
-                run_menuconfig_terminal(main_window)
-            else:
-                main_window.dialogs.show_info(i18n._("message.success.title"), i18n._("message.success.config_loaded", path=str(config_file)))
+    filename = dialog.get_filename() if response == Gtk.ResponseType.OK else None
+    dialog.destroy()
+    return filename
 
-        except Exception as e:
-            main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.load_failed", error=str(e)))
 
+def configure_from_file(main_window, run_menuconfig=True):
+    """Configure depuis un fichier"""
+    i18n = get_i18n()
+    config_file = choose_config_file(main_window, i18n._("message.error.select_config_file"))
+    if not config_file:
+        return
+
+    if config_file.endswith(".conf"):
+        # Template déclaratif : appliqué, pas copié
+        configure_from_template(main_window, config_file, run_menuconfig)
+        return
+
+    try:
+        main_window.kernel_manager.import_config(config_file, check=True)
+
+        if run_menuconfig:
+            run_menuconfig_terminal(main_window)
+        else:
+            main_window.dialogs.show_info(i18n._("message.success.title"), i18n._("message.success.config_loaded", path=config_file))
+
+    except Exception as e:
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.load_failed", error=str(e)))
+
+
+def show_trim_dialog(main_window):
+    """Réduit le .config au matériel : machine locale, ou inventaires enregistrés (une config pour toute la flotte)"""
+    i18n = get_i18n()
+    linux_dir = main_window.kernel_manager.base_dir / "linux"
+
+    if not (linux_dir / ".config").exists():
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.no_config"))
+        return
+
+    if main_window.kernel_manager.source_tree_busy():
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.tree_busy"))
+        return
+
+    dialog = Gtk.Dialog(
+        title=i18n._("dialog.trim.title"),
+        transient_for=main_window,
+        flags=0
+    )
+    dialog.set_default_size(500, 200)
+
+    content = dialog.get_content_area()
+    content.set_spacing(15)
+    content.set_margin_start(20)
+    content.set_margin_end(20)
+    content.set_margin_top(10)
+    content.set_margin_bottom(10)
+
+    label = Gtk.Label()
+    label.set_markup(f"<b>{i18n._('dialog.trim.choose_source')}</b>\n<small>{i18n._('dialog.trim.allowlist')}</small>")
+    label.set_line_wrap(True)
+    content.pack_start(label, False, False, 0)
+
+    local_radio = Gtk.RadioButton.new_with_label_from_widget(None, i18n._("dialog.trim.local"))
+    content.pack_start(local_radio, False, False, 0)
+
+    file_box = Gtk.Box(spacing=10)
+    file_radio = Gtk.RadioButton.new_with_label_from_widget(local_radio, i18n._("dialog.trim.inventory"))
+    file_box.pack_start(file_radio, False, False, 0)
+    inventory_files = []
+    files_button = Gtk.Button(label=i18n._("dialog.trim.choose_inventories"))
+    files_button.set_sensitive(False)
+    file_radio.connect("toggled", lambda radio: files_button.set_sensitive(radio.get_active()))
+
+    def choose_inventories(button):
+        chooser = Gtk.FileChooserDialog(
+            title=i18n._("dialog.trim.inventory"),
+            parent=dialog,
+            action=Gtk.FileChooserAction.OPEN
+        )
+        chooser.add_buttons(
+            Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
+            Gtk.STOCK_OPEN, Gtk.ResponseType.OK
+        )
+        chooser.set_select_multiple(True)
+        filter_json = Gtk.FileFilter()
+        filter_json.set_name("JSON")
+        filter_json.add_pattern("*.json")
+        chooser.add_filter(filter_json)
+        if chooser.run() == Gtk.ResponseType.OK:
+            inventory_files[:] = chooser.get_filenames()
+            button.set_label(i18n._("dialog.trim.inventories_selected", count=len(inventory_files)))
+        chooser.destroy()
+
+    files_button.connect("clicked", choose_inventories)
+    file_box.pack_start(files_button, True, True, 0)
+    content.pack_start(file_box, False, False, 0)
+
+    profile_box = Gtk.Box(spacing=10)
+    profile_box.pack_start(Gtk.Label(label=i18n._("dialog.trim.save_profile")), False, False, 0)
+    profile_entry = Gtk.Entry()
+    profile_entry.set_placeholder_text(i18n._("dialog.trim.profile_placeholder"))
+    profile_box.pack_start(profile_entry, True, True, 0)
+    content.pack_start(profile_box, False, False, 0)
+
+    dialog.add_button(i18n._("button.cancel"), Gtk.ResponseType.CANCEL)
+    dialog.add_button(i18n._("dialog.trim.button_analyze"), Gtk.ResponseType.OK)
+
+    dialog.show_all()
+    response = dialog.run()
+    use_files = file_radio.get_active()
+    profile = profile_entry.get_text().strip() or None
     dialog.destroy()
 
+    if response != Gtk.ResponseType.OK:
+        return
+    if use_files and not inventory_files:
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.select_inventory"))
+        return
+
+    # Analyse (index Kconfig, Makefiles) hors du thread GTK
+    def analyze():
+        from core.hardware_trim import load_inventory
+        try:
+            inventories = [load_inventory(path) for path in inventory_files] if use_files else None
+            config, report = main_window.kernel_manager.plan_hardware_trim(inventories)
+        except Exception as e:
+            GLib.idle_add(main_window.dialogs.show_error, i18n._("message.error.title"),
+                          i18n._("message.error.trim_failed", error=str(e)))
+            return
+        GLib.idle_add(confirm_trim, main_window, config, report, profile)
+
+    threading.Thread(target=analyze, daemon=True).start()
+
+
+def confirm_trim(main_window, config, report, profile=None):
+    """Rapport de la réduction et application après confirmation (puis enregistrement en profil)"""
+    from gui.build_tab_compile import format_duration
+    i18n = get_i18n()
+
+    message = i18n._("message.confirm.trim", hosts=", ".join(f"{host} ({count})" for host, count in report['hosts'].items()),
+                     needed=report['modules_needed'], before=report['modules_before'],
+                     after=report['modules_after'], objects_before=report['objects_before'],
+                     objects_after=report['objects_after'],
+                     duration_before=format_duration(report['duration_before']),
+                     duration_after=format_duration(report['duration_after']))
+    if report['unresolved']:
+        message += "\n\n" + i18n._("message.confirm.trim_unresolved", count=len(report['unresolved']),
+                                     modules=", ".join(report['unresolved'][:10]))
+    if report['disabled']:
+        message += "\n\n" + i18n._("message.confirm.trim_disabled",
+                                     options=", ".join(f"CONFIG_{name}" for name in report['disabled']))
+
+    if main_window.dialogs.show_question(i18n._("message.confirm.title"), message):
+        try:
+            modules = main_window.kernel_manager.apply_hardware_trim(config)
+            if profile:
+                main_window.kernel_manager.save_profile(profile, ", ".join(report['inventories']))
+            main_window.dialogs.show_info(i18n._("message.success.title"),
+                                          i18n._("message.success.trim_applied", modules=modules))
+        except Exception as e:
+            main_window.dialogs.show_error(i18n._("message.error.title"),
+                                           i18n._("message.error.trim_failed", error=str(e)))
+    return False
+
 
 def run_menuconfig_terminal(main_window):
     """Lance menuconfig dans un terminal"""
@@ -0,0 +1,140 @@
+"""
+Dialogue des hôtes d'aide de la compilation distribuée (distcc)
+"""
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, GLib
+import threading
+from utils.i18n import get_i18n
+from core.build_farm import parse_host
+
+
+def show_farm_dialog(main_window):
+    """Liste, ajout, suppression et contrôle de santé des hôtes d'aide"""
+    i18n = get_i18n()
+    farm = main_window.kernel_manager.build_farm
+
+    dialog = Gtk.Dialog(
+        title=i18n._("farm.title"),
+        transient_for=main_window,
+        flags=0
+    )
+    dialog.set_default_size(550, 350)
+
+    content = dialog.get_content_area()
+    content.set_spacing(10)
+    content.set_margin_start(20)
+    content.set_margin_end(20)
+    content.set_margin_top(10)
+    content.set_margin_bottom(10)
+
+    info = Gtk.Label()
+    info.set_markup(f"<small>{i18n._('farm.info')}</small>")
+    info.set_line_wrap(True)
+    info.set_halign(Gtk.Align.START)
+    content.pack_start(info, False, False, 0)
+
+    # Liste des hôtes
+    store = Gtk.ListStore(bool, str, int, int, str)  # activé, hôte, port, slots, état
+    view = Gtk.TreeView(model=store)
+
+    toggle = Gtk.CellRendererToggle()
+    view.append_column(Gtk.TreeViewColumn(i18n._("farm.column_enabled"), toggle, active=0))
+    for i, title in enumerate([i18n._("farm.column_host"), i18n._("farm.column_port"), i18n._("farm.column_slots"), i18n._("farm.column_status")], start=1):
+        column = Gtk.TreeViewColumn(title, Gtk.CellRendererText(), text=i)
+        column.set_resizable(True)
+        view.append_column(column)
+
+    def refresh():
+        store.clear()
+        for host in farm.get_hosts():
+            store.append([host.get('enabled', True), host['host'], host['port'], host['slots'], ""])
+
+    def on_toggled(renderer, path):
+        row = store[path]
+        farm.set_enabled(row[1], row[2], not row[0])
+        row[0] = not row[0]
+
+    toggle.connect("toggled", on_toggled)
+
+    scrolled = Gtk.ScrolledWindow()
+    scrolled.set_vexpand(True)
+    scrolled.add(view)
+    content.pack_start(scrolled, True, True, 0)
+
+    # Ajout : hôte[:port][/slots]
+    add_box = Gtk.Box(spacing=5)
+    host_entry = Gtk.Entry()
+    host_entry.set_placeholder_text("192.168.1.20/8")
+    add_box.pack_start(host_entry, True, True, 0)
+
+    def on_add(widget):
+        text = host_entry.get_text().strip()
+        if not text:
+            return
+        try:
+            host = parse_host(text)
+        except ValueError:
+            main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("farm.invalid_host", host=text))
+            return
+        farm.add_host(host['host'], host['port'], host['slots'])
+        host_entry.set_text("")
+        refresh()
+
+    add_btn = Gtk.Button(label=i18n._("farm.button_add"))
+    add_btn.connect("clicked", on_add)
+    host_entry.connect("activate", on_add)
+    add_box.pack_start(add_btn, False, False, 0)
+
+    def on_remove(widget):
+        model, tree_iter = view.get_selection().get_selected()
+        if tree_iter:
+            farm.remove_host(model[tree_iter][1], model[tree_iter][2])
+            refresh()
+
+    remove_btn = Gtk.Button(label=i18n._("button.remove"))
+    remove_btn.connect("clicked", on_remove)
+    add_box.pack_start(remove_btn, False, False, 0)
+
+    # Contrôle de santé en arrière-plan (compilation d'essai sur chaque hôte)
+    def on_check(widget):
+        check_btn.set_sensitive(False)
+        for row in store:
+            row[4] = i18n._("farm.checking")
+
+        def worker():
+            results = farm.check_hosts()
+
+            def show():
+                for host, result in results:
+                    for row in store:
+                        if (row[1], row[2]) == (host['host'], host['port']):
+                            if result['ok']:
+                                row[4] = i18n._("farm.status_ok", latency=result['latency_ms'], seconds=result['seconds'])
+                            else:
+                                row[4] = i18n._("farm.status_failed", error=result['error'])
+                check_btn.set_sensitive(True)
+                return False
+
+            GLib.idle_add(show)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    check_btn = Gtk.Button(label=i18n._("farm.button_check"))
+    check_btn.connect("clicked", on_check)
+    add_box.pack_start(check_btn, False, False, 0)
+
+    content.pack_start(add_box, False, False, 0)
+
+    if not farm.is_available():
+        warning = Gtk.Label()
+        warning.set_markup(f"<i>{i18n._('farm.unavailable')}</i>")
+        warning.set_halign(Gtk.Align.START)
+        content.pack_start(warning, False, False, 0)
+
+    refresh()
+    dialog.add_button(i18n._("progress.close"), Gtk.ResponseType.CLOSE)
+    dialog.show_all()
+    dialog.run()
+    dialog.destroy()
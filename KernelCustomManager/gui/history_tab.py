@@ -5,8 +5,11 @@ Onglet de l'historique des compilations
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
+import os
 from datetime import datetime
 from utils.i18n import get_i18n
+from core.build_profile import BuildProfile
+from gui.log_viewer import show_log_viewer
 
 
 def create_history_tab(main_window):
@@ -25,10 +28,12 @@ def create_history_tab(main_window):
     scrolled = Gtk.ScrolledWindow()
     scrolled.set_vexpand(True)
 
-    history_store = Gtk.ListStore(str, str, str, str, str)  # date, version, suffix, durée, statut
+    history_store = Gtk.ListStore(str, str, str, str, str, str, str)  # date, version, suffix, durée, statut, cache, horodatage (masqué)
     history_view = Gtk.TreeView(model=history_store)
+    # Deux lignes sélectionnées : comparaison des profils
+    history_view.get_selection().set_mode(Gtk.SelectionMode.MULTIPLE)
 
-    for i, title in enumerate([i18n._("history.column_date"), i18n._("history.column_version"), i18n._("history.column_suffix"), i18n._("history.column_duration"), i18n._("history.column_status")]):
+    for i, title in enumerate([i18n._("history.column_date"), i18n._("history.column_version"), i18n._("history.column_suffix"), i18n._("history.column_duration"), i18n._("history.column_status"), i18n._("history.column_cache")]):
         renderer = Gtk.CellRendererText()
         column = Gtk.TreeViewColumn(title, renderer, text=i)
         column.set_resizable(True)
@@ -44,6 +49,16 @@ def create_history_tab(main_window):
     refresh_btn.connect("clicked", lambda w: refresh_history(main_window, history_store))
     btn_box.pack_start(refresh_btn, False, False, 0)
 
+    profile_btn = Gtk.Button(label=i18n._("history.button_profile"))
+    profile_btn.set_tooltip_text(i18n._("history.profile_tooltip"))
+    profile_btn.connect("clicked", lambda w: show_profile_report(main_window, history_view))
+    btn_box.pack_start(profile_btn, False, False, 0)
+
+    log_btn = Gtk.Button(label=i18n._("history.button_log"))
+    log_btn.set_tooltip_text(i18n._("history.log_tooltip"))
+    log_btn.connect("clicked", lambda w: show_selected_log(main_window, history_view))
+    btn_box.pack_start(log_btn, False, False, 0)
+
     clear_btn = Gtk.Button(label=i18n._("button.clear"))
     clear_btn.connect("clicked", lambda w: clear_history(main_window, history_store))
     btn_box.pack_start(clear_btn, False, False, 0)
@@ -64,15 +79,43 @@ def refresh_history(main_window, store):
         duration = f"{entry['duration_seconds']//60}m {entry['duration_seconds']%60}s"
         status = i18n._("history.status_success") if entry['success'] else i18n._("history.status_failed")
 
+        # Compilation anormalement lente par rapport à la prédiction
+        regression = entry.get('details', {}).get('regression')
+        if regression:
+            status += " " + i18n._("history.regression", ratio=regression['ratio'])
+
+        ccache = entry.get('details', {}).get('ccache')
+        if ccache:
+            saved = ccache.get('saved_seconds', 0)
+            cache = i18n._("history.cache_stats", rate=int(ccache['hit_rate'] * 100), hits=ccache['hits'], misses=ccache['misses'], saved=f"{saved//60}m")
+        else:
+            cache = "-"
+
         store.append([
             date,
             entry['kernel_version'],
             entry.get('suffix', ''),
             duration,
-            status
+            status,
+            cache,
+            entry['timestamp']
         ])
 
 
+def _selected_entries(main_window, view):
+    """
+    Entrées d'historique des lignes sélectionnées, retrouvées par horodatage :
+    la liste affichée peut dater d'avant des compilations terminées depuis
+    Retourne: [] si une ligne n'est plus dans l'historique
+    """
+    model, paths = view.get_selection().get_selected_rows()
+    by_timestamp = {entry['timestamp']: entry for entry in main_window.kernel_manager.get_compilation_history()}
+    timestamps = [model[path][6] for path in paths]
+    if not all(timestamp in by_timestamp for timestamp in timestamps):
+        return []
+    return [by_timestamp[timestamp] for timestamp in timestamps]
+
+
 def clear_history(main_window, store):
     """Efface l'historique"""
     i18n = get_i18n()
@@ -83,3 +126,105 @@ def clear_history(main_window, store):
         main_window.kernel_manager._save_history([])
         refresh_history(main_window, store)
         main_window.dialogs.show_info(i18n._("message.success.title"), i18n._("message.success.history_cleared"))
+
+
+def show_selected_log(main_window, view):
+    """Journal de la compilation sélectionnée, positionné sur la première erreur"""
+    i18n = get_i18n()
+    entries = _selected_entries(main_window, view)
+    log_path = None
+    if len(entries) == 1:
+        log_path = entries[0].get('details', {}).get('log')
+
+    if not log_path or not os.path.exists(log_path):
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("history.no_log"))
+        return
+    show_log_viewer(main_window, log_path)
+
+
+def _report_view(columns, rows):
+    """TreeView défilant pour un tableau de rapport"""
+    store = Gtk.ListStore(*([str] * len(columns)))
+    for row in rows:
+        store.append([str(value) for value in row])
+
+    view = Gtk.TreeView(model=store)
+    for i, title in enumerate(columns):
+        column = Gtk.TreeViewColumn(title, Gtk.CellRendererText(), text=i)
+        column.set_resizable(True)
+        view.append_column(column)
+
+    scrolled = Gtk.ScrolledWindow()
+    scrolled.set_vexpand(True)
+    scrolled.add(view)
+    return scrolled
+
+
+def show_profile_report(main_window, view, top=30):
+    """
+    Rapport de profilage de la compilation sélectionnée
+    (deux compilations sélectionnées : comparaison de la plus récente à la plus ancienne)
+    """
+    i18n = get_i18n()
+    entries = _selected_entries(main_window, view)
+    profiled = [entry for entry in entries if entry.get('details', {}).get('profile')]
+
+    if not profiled or len(profiled) != len(entries) or len(entries) > 2:
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("history.no_profile"))
+        return
+
+    def seconds(ms):
+        return f"{ms / 1000:.2f}s"
+
+    profile = BuildProfile.load(profiled[0]['details']['profile'])
+    notebook = Gtk.Notebook()
+
+    if len(profiled) == 2:
+        reference = BuildProfile.load(profiled[1]['details']['profile'])
+        diff = profile.diff(reference, top)
+        columns = [i18n._("history.profile_before"), i18n._("history.profile_after"), i18n._("history.profile_delta")]
+        notebook.append_page(
+            _report_view([i18n._("history.profile_directory")] + columns,
+                         [(name, seconds(before), seconds(after), f"{delta / 1000:+.2f}s") for name, before, after, delta in diff['directories']]),
+            Gtk.Label(label=i18n._("history.profile_tab_directories"))
+        )
+        notebook.append_page(
+            _report_view([i18n._("history.profile_object")] + columns,
+                         [(name, seconds(before), seconds(after), f"{delta / 1000:+.2f}s") for name, before, after, delta in diff['objects']]),
+            Gtk.Label(label=i18n._("history.profile_tab_objects"))
+        )
+        summary = i18n._("history.profile_diff_summary", delta=f"{diff['total_delta_ms'] / 1000:+.1f}s")
+    else:
+        notebook.append_page(
+            _report_view([i18n._("history.profile_object"), i18n._("history.profile_time"), i18n._("history.profile_rss"), i18n._("history.profile_tool")],
+                         [(name, seconds(elapsed), f"{rss // 1024} Mo", tool) for name, elapsed, rss, tool in profile.slowest(top)]),
+            Gtk.Label(label=i18n._("history.profile_tab_objects"))
+        )
+        notebook.append_page(
+            _report_view([i18n._("history.profile_directory"), i18n._("history.profile_time"), i18n._("history.profile_count")],
+                         [(name, seconds(total), count) for name, total, count in profile.by_directory()[:top]]),
+            Gtk.Label(label=i18n._("history.profile_tab_directories"))
+        )
+        summary = i18n._("history.profile_summary", count=len(profile.records), total=seconds(profile.total_ms()), rss=f"{profile.peak_rss() // 1024} Mo")
+
+    dialog = Gtk.Dialog(
+        title=i18n._("history.profile_title"),
+        transient_for=main_window,
+        flags=0
+    )
+    dialog.set_default_size(750, 500)
+    content = dialog.get_content_area()
+    content.set_spacing(10)
+    content.set_margin_start(10)
+    content.set_margin_end(10)
+    content.set_margin_top(10)
+
+    summary_label = Gtk.Label(label=summary)
+    summary_label.set_halign(Gtk.Align.START)
+    content.pack_start(summary_label, False, False, 0)
+    content.pack_start(notebook, True, True, 0)
+
+    dialog.add_button(i18n._("progress.close"), Gtk.ResponseType.CLOSE)
+    dialog.show_all()
+    dialog.run()
+    dialog.destroy()
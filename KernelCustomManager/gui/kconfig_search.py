@@ -0,0 +1,159 @@
+"""
+Recherche d'options Kconfig
+Recherche approximative dans l'index des sources, avec pour l'option
+sélectionnée ses dépendances, ce que son activation entraîne et ce qui
+l'active dans le .config actuel
+"""
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, GLib
+import threading
+from utils.i18n import get_i18n
+from core.kernel_config import KernelConfig
+
+
+# Nombre de résultats affichés
+SEARCH_LIMIT = 200
+
+
+def show_kconfig_search(main_window):
+    """Dialogue de recherche ; l'index est mis à jour en arrière-plan à l'ouverture"""
+    i18n = get_i18n()
+    kernel_manager = main_window.kernel_manager
+    linux_dir = kernel_manager.base_dir / "linux"
+
+    if not (linux_dir / "Kconfig").exists():
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.no_kernel_source_download"))
+        return
+
+    config = KernelConfig(linux_dir / ".config")
+    state = {'index': None}
+
+    dialog = Gtk.Dialog(
+        title=i18n._("kconfig.title"),
+        transient_for=main_window,
+        flags=0
+    )
+    dialog.set_default_size(900, 650)
+    content = dialog.get_content_area()
+    content.set_spacing(8)
+    content.set_margin_start(10)
+    content.set_margin_end(10)
+    content.set_margin_top(10)
+
+    search_entry = Gtk.SearchEntry()
+    search_entry.set_placeholder_text(i18n._("kconfig.placeholder"))
+    search_entry.set_sensitive(False)
+    content.pack_start(search_entry, False, False, 0)
+
+    status = Gtk.Label(halign=Gtk.Align.START)
+    status.set_markup(f"<small>{i18n._('kconfig.indexing')}</small>")
+    content.pack_start(status, False, False, 0)
+
+    paned = Gtk.Paned(orientation=Gtk.Orientation.VERTICAL)
+
+    store = Gtk.ListStore(str, str, str, str)  # option, valeur, type, prompt
+    view = Gtk.TreeView(model=store)
+    for i, title in enumerate([i18n._("kconfig.column_symbol"), i18n._("kconfig.column_value"),
+                               i18n._("kconfig.column_type"), i18n._("kconfig.column_prompt")]):
+        column = Gtk.TreeViewColumn(title, Gtk.CellRendererText(), text=i)
+        column.set_resizable(True)
+        view.append_column(column)
+    results_scrolled = Gtk.ScrolledWindow()
+    results_scrolled.add(view)
+    paned.pack1(results_scrolled, True, False)
+
+    details = Gtk.TextView()
+    details.set_editable(False)
+    details.set_wrap_mode(Gtk.WrapMode.WORD)
+    buffer = details.get_buffer()
+    details_scrolled = Gtk.ScrolledWindow()
+    details_scrolled.add(details)
+    paned.pack2(details_scrolled, True, False)
+    paned.set_position(280)
+    content.pack_start(paned, True, True, 0)
+
+    def on_search(entry):
+        index = state['index']
+        store.clear()
+        if index is None:
+            return
+        for symbol in index.search(entry.get_text(), SEARCH_LIMIT):
+            store.append([f"CONFIG_{symbol['name']}", config.get(symbol['name'], 'n'),
+                          symbol['type'] or "", symbol['prompt'] or ""])
+
+    def describe(name):
+        index = state['index']
+        symbol = index.symbol(name)
+        impact = index.impact(name, config)
+        why = index.why(name, config)
+        none = i18n._("kconfig.none")
+
+        lines = [f"CONFIG_{symbol['name']} = {config.get(symbol['name'], 'n')}  ({symbol['type'] or '?'})"]
+        if symbol['prompt']:
+            lines.append(symbol['prompt'])
+        lines.append(i18n._("kconfig.files", files=", ".join(symbol['files'])))
+        lines.append("")
+        lines.append(i18n._("kconfig.depends"))
+        lines.extend(f"  {expr}" for expr in symbol['depends'] or [none])
+        lines.append(i18n._("kconfig.selects", count=len(impact['selects'])))
+        lines.extend(f"  CONFIG_{target}" + (f"  ← {via}" if via != symbol['name'] else "")
+                     for target, via in impact['selects'])
+        if not impact['selects']:
+            lines.append(f"  {none}")
+        if impact['implies']:
+            lines.append(i18n._("kconfig.implies"))
+            lines.extend(f"  CONFIG_{target}" for target, _ in impact['implies'])
+        if impact['unmet']:
+            lines.append(i18n._("kconfig.unmet"))
+            lines.extend(f"  CONFIG_{unmet['symbol']} : {unmet['expr']}" for unmet in impact['unmet'])
+        lines.append(i18n._("kconfig.enables", count=len(impact['enables'])))
+        if impact['enables']:
+            lines.append("  " + ", ".join(impact['enables'][:40]))
+        lines.append("")
+        lines.append(i18n._("kconfig.selected_by"))
+        lines.extend("  " + " → ".join(chain) for chain in why['selected_by'] or [[none]])
+        if why['implied_by']:
+            lines.append(i18n._("kconfig.implied_by", symbols=", ".join(why['implied_by'])))
+        if symbol['help']:
+            lines.append("")
+            lines.append(symbol['help'])
+        buffer.set_text("\n".join(lines))
+
+    def on_selection_changed(selection):
+        model, tree_iter = selection.get_selected()
+        if tree_iter and state['index'] is not None:
+            describe(model[tree_iter][0])
+
+    search_entry.connect("search-changed", on_search)
+    view.get_selection().connect("changed", on_selection_changed)
+
+    # Indexation (incrémentale) hors du thread GTK
+    def worker():
+        try:
+            index = kernel_manager.get_kconfig_index()
+            error = None
+        except OSError as e:
+            index, error = None, str(e)
+
+        def ready():
+            state['index'] = index
+            if index is None:
+                status.set_markup(f"<small>{GLib.markup_escape_text(error)}</small>")
+                return False
+            status.set_markup(f"<small>{i18n._('kconfig.indexed', symbols=len(index.symbols), files=len(index.files))}</small>")
+            search_entry.set_sensitive(True)
+            search_entry.grab_focus()
+            if search_entry.get_text():
+                on_search(search_entry)
+            return False
+
+        GLib.idle_add(ready)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+    dialog.add_button(i18n._("progress.close"), Gtk.ResponseType.CLOSE)
+    dialog.show_all()
+    dialog.run()
+    dialog.destroy()
@@ -0,0 +1,112 @@
+"""
+Visionneuse des journaux de compilation
+Liste des étapes, erreurs et avertissements de l'index ; seul le contexte de
+la ligne sélectionnée est décompressé
+"""
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk
+from utils.i18n import get_i18n
+from core.log_store import BuildLog
+
+
+# Lignes affichées avant / après l'événement sélectionné
+CONTEXT_BEFORE = 10
+CONTEXT_AFTER = 30
+
+
+def show_log_viewer(parent, log_path):
+    """Ouvre un journal, positionné sur la première erreur"""
+    i18n = get_i18n()
+    log = BuildLog(log_path)
+
+    dialog = Gtk.Dialog(
+        title=i18n._("log.title"),
+        transient_for=parent,
+        flags=0
+    )
+    dialog.set_default_size(900, 600)
+    content = dialog.get_content_area()
+    content.set_spacing(8)
+    content.set_margin_start(10)
+    content.set_margin_end(10)
+    content.set_margin_top(10)
+
+    index = log.index or {}
+    summary = Gtk.Label(halign=Gtk.Align.START)
+    summary.set_text(i18n._("log.summary", path=str(log_path), lines=index.get('lines', '?'),
+                            errors=index.get('error_count', 0), warnings=index.get('warning_count', 0)))
+    summary.set_selectable(True)
+    content.pack_start(summary, False, False, 0)
+
+    paned = Gtk.Paned(orientation=Gtk.Orientation.VERTICAL)
+
+    # Événements indexés, dans l'ordre du journal
+    store = Gtk.ListStore(int, str, str)  # ligne, type, texte
+    events = ([(line, i18n._("log.kind_stage"), stage) for line, stage in log.stages()]
+              + [(line, i18n._("log.kind_error"), text) for line, text in log.errors()]
+              + [(line, i18n._("log.kind_warning"), text) for line, text in log.warnings()])
+    for line, kind, text in sorted(events, key=lambda event: event[0]):
+        store.append([line + 1, kind, text])
+
+    view = Gtk.TreeView(model=store)
+    for i, title in enumerate([i18n._("log.column_line"), i18n._("log.column_kind"), i18n._("log.column_text")]):
+        column = Gtk.TreeViewColumn(title, Gtk.CellRendererText(), text=i)
+        column.set_resizable(True)
+        view.append_column(column)
+
+    events_scrolled = Gtk.ScrolledWindow()
+    events_scrolled.add(view)
+    paned.pack1(events_scrolled, True, False)
+
+    # Contexte de la ligne sélectionnée
+    text_view = Gtk.TextView()
+    text_view.set_editable(False)
+    text_view.set_monospace(True)
+    buffer = text_view.get_buffer()
+    highlight = buffer.create_tag("highlight", background="#f8d7da", weight=700)
+    context_scrolled = Gtk.ScrolledWindow()
+    context_scrolled.add(text_view)
+    paned.pack2(context_scrolled, True, False)
+    paned.set_position(200)
+    content.pack_start(paned, True, True, 0)
+
+    def show_context(line):
+        try:
+            start, lines = log.context(line, CONTEXT_BEFORE, CONTEXT_AFTER)
+        except OSError as e:
+            buffer.set_text(str(e))
+            return
+        buffer.set_text("\n".join(f"{start + i + 1:>7}  {text}" for i, text in enumerate(lines)))
+        target = line - start
+        if 0 <= target < buffer.get_line_count():
+            line_start = buffer.get_iter_at_line(target)
+            line_end = line_start.copy()
+            line_end.forward_to_line_end()
+            buffer.apply_tag(highlight, line_start, line_end)
+
+    def on_selection_changed(selection):
+        model, tree_iter = selection.get_selected()
+        if tree_iter:
+            show_context(model[tree_iter][0] - 1)
+
+    view.get_selection().connect("changed", on_selection_changed)
+
+    # Première erreur sélectionnée d'emblée, sinon fin du journal
+    first_error = log.first_error()
+    if first_error:
+        for row in store:
+            if row[0] == first_error[0] + 1 and row[2] == first_error[1]:
+                view.get_selection().select_iter(row.iter)
+                view.scroll_to_cell(row.path, None, False, 0, 0)
+                break
+    elif index.get('lines'):
+        show_context(max(0, index['lines'] - CONTEXT_AFTER))
+    elif log.index is None:
+        show_context(0)
+
+    dialog.add_button(i18n._("progress.close"), Gtk.ResponseType.CLOSE)
+    dialog.show_all()
+    dialog.run()
+    dialog.destroy()
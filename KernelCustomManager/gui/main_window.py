@@ -82,6 +82,7 @@ class KernelManagerWindow(Gtk.Window):
         from gui.kernels_tab import create_kernels_tab
         from gui.packages_tab import create_packages_tab
         from gui.build_tab import create_build_tab
+        from gui.queue_tab import create_queue_tab
         from gui.drivers_tab import create_drivers_tab
         from gui.secureboot_tab import create_secureboot_tab
         from gui.profiles_tab import create_profiles_tab
@@ -107,6 +108,12 @@ class KernelManagerWindow(Gtk.Window):
             self.i18n._("tab.build")
         )
 
+        self.stack.add_titled(
+            create_queue_tab(self),
+            "queue",
+            self.i18n._("tab.queue")
+        )
+
         self.stack.add_titled(
             create_drivers_tab(self),
             "drivers",
@@ -53,6 +53,10 @@ def create_profiles_tab(main_window):
     load_btn.connect("clicked", lambda w: load_profile_dialog(main_window, profiles_view))
     btn_box.pack_start(load_btn, False, False, 0)
 
+    diff_btn = Gtk.Button(label=i18n._("button.compare"))
+    diff_btn.connect("clicked", lambda w: show_diff_dialog(main_window, profiles_view))
+    btn_box.pack_start(diff_btn, False, False, 0)
+
     delete_btn = Gtk.Button(label=i18n._("button.delete"))
     delete_btn.connect("clicked", lambda w: delete_profile(main_window, profiles_view, profiles_store))
     btn_box.pack_start(delete_btn, False, False, 0)
@@ -143,6 +147,10 @@ def load_profile_dialog(main_window, view):
 
     profile_name = model[treeiter][0]
 
+    if main_window.kernel_manager.source_tree_busy():
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.tree_busy"))
+        return
+
     if main_window.dialogs.show_question(
         i18n._("message.confirm.title"),
         i18n._("message.confirm.load_profile", name=profile_name)
@@ -169,13 +177,85 @@ def delete_profile(main_window, view, store):
         i18n._("message.confirm.title"),
         i18n._("message.confirm.delete_profile", name=profile_name)
     ):
-        config_path = main_window.kernel_manager.profiles_dir / f"{profile_name}.config"
-        meta_path = main_window.kernel_manager.profiles_dir / f"{profile_name}.json"
-
         try:
-            config_path.unlink(missing_ok=True)
-            meta_path.unlink(missing_ok=True)
+            main_window.kernel_manager.delete_profile(profile_name)
             main_window.dialogs.show_info(i18n._("message.success.title"), i18n._("message.success.profile_deleted", name=profile_name))
             refresh_profiles(main_window, store)
         except Exception as e:
             main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("message.error.profile_delete_failed", error=str(e)))
+
+
+def show_diff_dialog(main_window, view):
+    """Diff sémantique entre deux configurations (profil sélectionné / .config actuel par défaut)"""
+    i18n = get_i18n()
+    km = main_window.kernel_manager
+    model, treeiter = view.get_selection().get_selected()
+
+    dialog = Gtk.Dialog(
+        title=i18n._("profiles.diff.title"),
+        transient_for=main_window,
+        flags=0
+    )
+    dialog.set_default_size(800, 600)
+    content = dialog.get_content_area()
+    content.set_spacing(8)
+    content.set_margin_start(10)
+    content.set_margin_end(10)
+    content.set_margin_top(10)
+
+    # Configurations comparables : .config actuel, profils, configs complètes fournies
+    refs = [("current", i18n._("profiles.diff.current"))]
+    refs += [(profile['name'], profile['name']) for profile in km.get_profiles()]
+    refs += [(entry['name'], entry['name']) for entry in km.config_templates.list_templates()
+             if entry['path'].endswith(".config")]
+
+    def make_combo(active):
+        combo = Gtk.ComboBoxText()
+        for ref, label in refs:
+            combo.append(ref, label)
+        combo.set_active_id(active)
+        return combo
+
+    combos = [make_combo(model[treeiter][0] if treeiter else "current"), make_combo("current")]
+    selector = Gtk.Box(spacing=10)
+    selector.pack_start(combos[0], True, True, 0)
+    selector.pack_start(Gtk.Label(label="→"), False, False, 0)
+    selector.pack_start(combos[1], True, True, 0)
+    content.pack_start(selector, False, False, 0)
+
+    summary = Gtk.Label(halign=Gtk.Align.START)
+    content.pack_start(summary, False, False, 0)
+
+    store = Gtk.ListStore(str, str, str, str)  # type, option, avant, après
+    diff_view = Gtk.TreeView(model=store)
+    for i, title in enumerate(["", i18n._("kconfig.column_symbol"), i18n._("profiles.diff.before"), i18n._("profiles.diff.after")]):
+        column = Gtk.TreeViewColumn(title, Gtk.CellRendererText(), text=i)
+        column.set_resizable(True)
+        diff_view.append_column(column)
+    scrolled = Gtk.ScrolledWindow()
+    scrolled.set_vexpand(True)
+    scrolled.add(diff_view)
+    content.pack_start(scrolled, True, True, 0)
+
+    def refresh(*args):
+        store.clear()
+        old, new = combos[0].get_active_id(), combos[1].get_active_id()
+        try:
+            result = km.diff_configs(old, new)
+        except (OSError, ValueError) as e:
+            summary.set_text(str(e))
+            return
+        for kind, sign in (('enabled', "+"), ('disabled', "−"), ('changed', "~")):
+            for name, before, after in result[kind]:
+                store.append([sign, f"CONFIG_{name}", before, after])
+        summary.set_text(i18n._("profiles.diff.summary", enabled=len(result['enabled']),
+                                disabled=len(result['disabled']), changed=len(result['changed'])))
+
+    for combo in combos:
+        combo.connect("changed", refresh)
+    refresh()
+
+    dialog.add_button(i18n._("progress.close"), Gtk.ResponseType.CLOSE)
+    dialog.show_all()
+    dialog.run()
+    dialog.destroy()
@@ -0,0 +1,244 @@
+"""
+Onglet de la file de compilation des variantes
+"""
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, GLib
+import os
+from utils.i18n import get_i18n
+
+
+def create_queue_tab(main_window):
+    """Crée l'onglet de la file de compilation"""
+    i18n = get_i18n()
+    queue = main_window.kernel_manager.get_build_queue()
+
+    box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+
+    # Info
+    info = Gtk.Label()
+    info.set_markup(f"<b>{i18n._('queue.title')}</b>\n{i18n._('queue.subtitle')}")
+    info.set_halign(Gtk.Align.START)
+    box.pack_start(info, False, False, 5)
+
+    # Budget de jobs
+    limits_box = Gtk.Box(spacing=10)
+    limits_box.pack_start(Gtk.Label(label=i18n._("queue.budget")), False, False, 0)
+    budget_spin = Gtk.SpinButton.new_with_range(1, max(os.cpu_count() or 1, queue.cpu_budget) * 2, 1)
+    budget_spin.set_value(queue.cpu_budget)
+    budget_spin.set_tooltip_text(i18n._("queue.budget_info"))
+    limits_box.pack_start(budget_spin, False, False, 0)
+
+    limits_box.pack_start(Gtk.Label(label=i18n._("queue.parallel")), False, False, 0)
+    parallel_spin = Gtk.SpinButton.new_with_range(1, 8, 1)
+    parallel_spin.set_value(queue.max_parallel)
+    limits_box.pack_start(parallel_spin, False, False, 0)
+
+    def on_limits_changed(widget):
+        queue.set_limits(budget_spin.get_value_as_int(), parallel_spin.get_value_as_int())
+
+    budget_spin.connect("value-changed", on_limits_changed)
+    parallel_spin.connect("value-changed", on_limits_changed)
+    box.pack_start(limits_box, False, False, 0)
+
+    # Liste des jobs
+    scrolled = Gtk.ScrolledWindow()
+    scrolled.set_vexpand(True)
+
+    queue_store = Gtk.ListStore(str, str, str, str, str, str)  # id, version, variante, statut, étape, paquets
+    queue_view = Gtk.TreeView(model=queue_store)
+
+    for i, title in enumerate([i18n._("queue.column_version"), i18n._("queue.column_variant"), i18n._("queue.column_status"), i18n._("queue.column_stage"), i18n._("queue.column_packages")], start=1):
+        renderer = Gtk.CellRendererText()
+        column = Gtk.TreeViewColumn(title, renderer, text=i)
+        column.set_resizable(True)
+        queue_view.append_column(column)
+
+    scrolled.add(queue_view)
+    box.pack_start(scrolled, True, True, 0)
+
+    # Boutons
+    btn_box = Gtk.Box(spacing=5)
+
+    add_btn = Gtk.Button(label=i18n._("queue.button_add"))
+    add_btn.connect("clicked", lambda w: add_job_dialog(main_window, queue_store))
+    btn_box.pack_start(add_btn, False, False, 0)
+
+    start_btn = Gtk.Button()
+    btn_box.pack_start(start_btn, False, False, 0)
+
+    cancel_btn = Gtk.Button(label=i18n._("button.cancel"))
+    cancel_btn.connect("clicked", lambda w: on_selected(queue_view, queue.cancel_job))
+    btn_box.pack_start(cancel_btn, False, False, 0)
+
+    retry_btn = Gtk.Button(label=i18n._("queue.button_retry"))
+    retry_btn.connect("clicked", lambda w: on_selected(queue_view, queue.retry_job))
+    btn_box.pack_start(retry_btn, False, False, 0)
+
+    remove_btn = Gtk.Button(label=i18n._("button.remove"))
+    remove_btn.connect("clicked", lambda w: on_selected(queue_view, queue.remove_job))
+    btn_box.pack_start(remove_btn, False, False, 0)
+
+    clear_btn = Gtk.Button(label=i18n._("button.clear"))
+    clear_btn.connect("clicked", lambda w: queue.clear_finished())
+    btn_box.pack_start(clear_btn, False, False, 0)
+
+    box.pack_start(btn_box, False, False, 0)
+
+    def update_start_button():
+        start_btn.set_label(i18n._("queue.button_pause") if queue.is_active() else i18n._("queue.button_start"))
+
+    def on_start_clicked(widget):
+        if queue.is_active():
+            queue.pause()
+        else:
+            queue.start()
+        update_start_button()
+
+    start_btn.connect("clicked", on_start_clicked)
+
+    # Changements d'état signalés depuis le thread de la file (rafraîchissements regroupés)
+    pending_refresh = [False]
+    finished_jobs = []
+
+    def on_job_changed(job):
+        if job['status'] in (queue.STATUS_SUCCESS, queue.STATUS_FAILED) and not job.get('removed'):
+            finished_jobs.append(job)
+        if pending_refresh[0]:
+            return
+        pending_refresh[0] = True
+
+        def apply():
+            pending_refresh[0] = False
+            refresh_queue(main_window, queue_store)
+            update_start_button()
+            while finished_jobs:
+                done = finished_jobs.pop(0)
+                status = i18n._(f"queue.status_{done['status']}")
+                main_window.kernel_manager.send_notification(
+                    i18n._("queue.notification_title"),
+                    f"{done['version']} {done['label']} : {status}",
+                    "normal" if done['status'] == queue.STATUS_SUCCESS else "critical"
+                )
+            return False
+
+        GLib.idle_add(apply)
+
+    queue.callback = on_job_changed
+    main_window.connect("destroy", lambda w: queue.shutdown())
+
+    # Reprise après redémarrage de l'application
+    if queue.is_active():
+        queue.start()
+
+    update_start_button()
+    refresh_queue(main_window, queue_store)
+
+    return box
+
+
+def refresh_queue(main_window, store):
+    """Actualise la liste des jobs"""
+    i18n = get_i18n()
+    store.clear()
+    for job in main_window.kernel_manager.get_build_queue().get_jobs():
+        store.append([
+            job['id'],
+            job['version'],
+            job['label'],
+            i18n._(f"queue.status_{job['status']}"),
+            f"{job['stage']} ({job['percent']}%)" if job['status'] == "running" and job.get('percent') else (job.get('stage') or "-"),
+            str(len(job.get('packages') or [])) if job.get('packages') else "-"
+        ])
+
+
+def on_selected(view, action):
+    """Applique une action de la file au job sélectionné"""
+    model, tree_iter = view.get_selection().get_selected()
+    if tree_iter:
+        action(model[tree_iter][0])
+
+
+def add_job_dialog(main_window, store):
+    """Dialogue d'ajout d'une variante à la file"""
+    i18n = get_i18n()
+    km = main_window.kernel_manager
+
+    versions = sorted(
+        (path.name.replace("linux-", "") for path in km.sources_dir.glob("linux-*") if path.is_dir()),
+        reverse=True
+    )
+    if not versions:
+        main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("queue.no_sources"))
+        return
+
+    dialog = Gtk.Dialog(
+        title=i18n._("queue.dialog_title"),
+        transient_for=main_window,
+        flags=0
+    )
+    dialog.set_default_size(400, 200)
+
+    content = dialog.get_content_area()
+    content.set_spacing(10)
+    content.set_margin_start(20)
+    content.set_margin_end(20)
+    content.set_margin_top(10)
+    content.set_margin_bottom(10)
+
+    grid = Gtk.Grid(column_spacing=10, row_spacing=10)
+
+    grid.attach(Gtk.Label(label=i18n._("build.version_label"), halign=Gtk.Align.START), 0, 0, 1, 1)
+    version_combo = Gtk.ComboBoxText()
+    for version in versions:
+        version_combo.append(version, version)
+    version_combo.set_active(0)
+    grid.attach(version_combo, 1, 0, 1, 1)
+
+    grid.attach(Gtk.Label(label=i18n._("queue.profile"), halign=Gtk.Align.START), 0, 1, 1, 1)
+    profile_combo = Gtk.ComboBoxText()
+    profile_combo.append("", i18n._("queue.current_config"))
+    for profile in km.get_profiles():
+        profile_combo.append(profile['name'], profile['name'])
+    profile_combo.set_active(0)
+    grid.attach(profile_combo, 1, 1, 1, 1)
+
+    grid.attach(Gtk.Label(label=i18n._("dialog.compile.suffix"), halign=Gtk.Align.START), 0, 2, 1, 1)
+    suffix_entry = Gtk.Entry()
+    suffix_entry.set_placeholder_text("-gaming")
+    grid.attach(suffix_entry, 1, 2, 1, 1)
+
+    content.pack_start(grid, False, False, 0)
+
+    ccache_check = Gtk.CheckButton(label=i18n._("dialog.compile.use_ccache"))
+    ccache_check.set_sensitive(km.compiler_cache.is_available())
+    content.pack_start(ccache_check, False, False, 0)
+
+    fakeroot_check = Gtk.CheckButton(label=i18n._("dialog.compile.use_fakeroot"))
+    fakeroot_check.set_active(True)
+    content.pack_start(fakeroot_check, False, False, 0)
+
+    dialog.add_button(i18n._("button.cancel"), Gtk.ResponseType.CANCEL)
+    dialog.add_button(i18n._("queue.button_add"), Gtk.ResponseType.OK)
+
+    dialog.show_all()
+    response = dialog.run()
+
+    if response == Gtk.ResponseType.OK:
+        # Même règle que la compilation interactive : Debian compresse les modules
+        is_debian = main_window.secureboot_manager.get_distribution_info().get('is_debian', False)
+        try:
+            km.get_build_queue().add_job(
+                version_combo.get_active_id(),
+                profile=profile_combo.get_active_id() or None,
+                suffix=suffix_entry.get_text().strip(),
+                use_ccache=ccache_check.get_active(),
+                use_fakeroot=fakeroot_check.get_active(),
+                disable_module_compression=is_debian
+            )
+        except FileNotFoundError as e:
+            main_window.dialogs.show_error(i18n._("message.error.title"), i18n._("queue.not_found", path=str(e)))
+        refresh_queue(main_window, store)
+
+    dialog.destroy()
@@ -89,6 +89,7 @@ echo ""
 chmod +x kernelcustom_manager.py 2>/dev/null || true
 chmod +x manage_kernel_sources.sh 2>/dev/null || true
 chmod +x kernelcustom-helper 2>/dev/null || true
+chmod +x kernelcustom_cli.py 2>/dev/null || true
 
 # Rendre les scripts SecureBoot exécutables
 echo "🔐 Configuration des scripts SecureBoot..."
@@ -149,6 +150,11 @@ fi
 
 echo "   ✓ Lanceur créé avec l'icône: $INSTALL_DIR/icon.png"
 
+# Commande 'kernelcustom' (compilation sans interface graphique)
+if sudo ln -sf "$INSTALL_DIR/kernelcustom_cli.py" /usr/local/bin/kernelcustom 2>/dev/null; then
+    echo "   ✓ Commande 'kernelcustom' installée dans /usr/local/bin/"
+fi
+
 echo "✅ Lanceur installé dans : $DESKTOP_FILE"
 echo "   Redémarrez votre session si le lanceur n'apparaît pas immédiatement"
 echo ""
@@ -163,5 +169,7 @@ echo "1. Dans votre menu d'applications (cherchez 'KernelCustom')"
 echo "2. Ou en ligne de commande:"
 echo "   cd $INSTALL_DIR"
 echo "   ./kernelcustom_manager.py"
+echo "3. Sans interface graphique (SSH, CI):"
+echo "   kernelcustom --help"
 echo ""
 echo "🚀 Bon développement !"
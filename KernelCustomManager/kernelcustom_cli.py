@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+"""
+KernelCustom Manager - Ligne de commande
+Téléchargement, configuration, compilation, empaquetage et signature sans
+interface graphique ni terminal (serveurs de compilation, SSH, CI).
+Chaque événement est écrit sur la sortie standard en JSON (une ligne par événement).
+N'importe jamais gi.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from core.kernel_manager import KernelManager
+from core.packaging import COMPRESSORS, PackagingOptions
+
+
+# Codes de sortie (2 : arguments invalides, géré par argparse)
+EXIT_OK = 0
+EXIT_FAILED = 1
+
+# Flux réservé aux événements JSON ; les print() des modules partent sur stderr
+_json_out = sys.stdout
+
+
+def emit(event, **data):
+    """Écrit un événement JSON sur une ligne"""
+    data = {'event': event, 'time': datetime.now().isoformat(timespec='seconds'), **data}
+    _json_out.write(json.dumps(data, default=str) + "\n")
+    _json_out.flush()
+
+
+def write_output(text):
+    """Texte brut (delta, defconfig, inventaire) sur la vraie sortie standard, redirigeable"""
+    _json_out.write(text)
+    _json_out.flush()
+
+
+def cmd_latest(km, args):
+    """Affiche la dernière version stable"""
+    version = km.release_metadata.get_stable_version()
+    if not version:
+        emit('error', message="Version stable introuvable (kernel.org injoignable et pas de cache)")
+        return EXIT_FAILED
+    emit('latest', version=version)
+    return EXIT_OK
+
+
+def cmd_download(km, args):
+    """Télécharge et prépare les sources"""
+    version = args.version
+    if version == "stable":
+        version = km.release_metadata.get_stable_version()
+        if not version:
+            emit('error', stage='download', message="Version stable introuvable")
+            return EXIT_FAILED
+
+    last = [-1]
+
+    def progress(percent, message=None):
+        if percent != last[0] or message:
+            last[0] = percent
+            emit('progress', stage='download', percent=percent, message=message)
+
+    emit('stage', stage='download', version=version)
+    success = km.download_kernel(
+        version,
+        progress,
+        streaming=not args.no_streaming,
+        incremental=not args.full
+    )
+    emit('finished', stage='download', version=version, success=success)
+    return EXIT_OK if success else EXIT_FAILED
+
+
+def cmd_configure(km, args):
+    """Prépare le .config"""
+    emit('stage', stage='configure')
+    try:
+        if args.system:
+            source = km.configure_from_system()
+            success = True
+        elif args.file:
+            source = args.file
+            success = km.import_config(args.file)
+        elif args.template:
+            report = km.apply_template(args.template)
+            emit('template', **report)
+            source = args.template
+            success = True
+        else:
+            source = args.profile
+            success = km.load_profile(args.profile)
+    except Exception as e:
+        emit('error', stage='configure', message=str(e))
+        return EXIT_FAILED
+
+    emit('finished', stage='configure', source=source, success=success)
+    return EXIT_OK if success else EXIT_FAILED
+
+
+def cmd_build(km, args):
+    """Compile, signe (optionnel) et empaquette"""
+    from core.builder import KernelBuilder
+
+    sb_manager = None
+    signing_key = None
+    disable_compression = args.no_module_compression
+
+    if args.sign or not disable_compression:
+        from core.secureboot_manager import SecureBootManager
+        sb_manager = SecureBootManager()
+        # Même règle que l'interface : Debian compresse les modules par défaut
+        if sb_manager.get_distribution_info().get('is_debian'):
+            disable_compression = True
+
+    if args.sign:
+        signing_key = sb_manager.get_signing_key()
+        if not signing_key:
+            emit('error', stage='sign', message="Aucune clé de signature (clé .priv + certificat .der) dans " + str(sb_manager.keys_dir))
+            return EXIT_FAILED
+
+    # Hôtes d'aide locaux (distccd sur 127.0.0.1) pendant la compilation
+    helpers = None
+    extra_hosts = None
+    if args.local_helpers:
+        from core.build_farm import LocalHelpers
+        helpers = LocalHelpers(args.local_helpers)
+        try:
+            extra_hosts = helpers.start()
+        except (OSError, RuntimeError) as e:
+            emit('error', stage='distributed', message=str(e))
+            return EXIT_FAILED
+
+    builder = KernelBuilder(km, sb_manager, lambda event: emit(event.pop('event'), **event))
+    try:
+        result = builder.build(
+            jobs=args.jobs,
+            suffix=args.suffix,
+            use_fakeroot=not args.no_fakeroot,
+            use_ccache=args.ccache,
+            out_of_tree=args.out_of_tree or args.tmpfs,
+            signing_key=signing_key,
+            disable_module_compression=disable_compression,
+            profile=args.profile,
+            limit_resources=args.limit_resources,
+            tmpfs=args.tmpfs,
+            packaging=PackagingOptions(
+                compressor=args.compressor,
+                level=args.compression_level,
+                skip_debug=not args.keep_debug_package
+            ),
+            distributed=args.distcc or bool(extra_hosts),
+            extra_hosts=extra_hosts
+        )
+    except Exception as e:
+        emit('error', stage='build', message=str(e))
+        return EXIT_FAILED
+    finally:
+        if helpers:
+            helpers.stop()
+
+    return EXIT_OK if result['success'] else EXIT_FAILED
+
+
+def cmd_sign(km, args):
+    """Signe les modules (et vmlinuz) d'un kernel installé"""
+    from core.secureboot_manager import SecureBootManager
+
+    sb_manager = SecureBootManager()
+
+    def progress(current, total, name=None):
+        emit('progress', stage='sign', current=current, total=total, module=name)
+
+    emit('stage', stage='sign', kernel=args.kernel)
+    result = sb_manager.sign_kernel_complete(args.kernel, not args.modules_only, progress)
+    emit('finished', stage='sign', **result)
+    return EXIT_OK if result.get('success') else EXIT_FAILED
+
+
+def cmd_profile(km, args):
+    """Rapport de profilage d'une compilation (index dans l'historique, 0 = la plus récente)"""
+    from core.build_profile import BuildProfile
+
+    history = km.get_compilation_history()
+    profiled = [entry for entry in history if entry.get('details', {}).get('profile')]
+
+    def load(index):
+        if index >= len(profiled):
+            emit('error', stage='profile', message=f"Pas de compilation profilée n°{index}")
+            return None
+        return BuildProfile.load(profiled[index]['details']['profile'])
+
+    profile = load(args.index)
+    if profile is None:
+        return EXIT_FAILED
+
+    if args.against is not None:
+        reference = load(args.against)
+        if reference is None:
+            return EXIT_FAILED
+        diff = profile.diff(reference, args.top)
+        emit('profile_diff', total_delta_ms=diff['total_delta_ms'])
+        for name, before, after, delta in diff['directories']:
+            emit('directory_diff', directory=name, before_ms=before, after_ms=after, delta_ms=delta)
+        for name, before, after, delta in diff['objects']:
+            emit('object_diff', object=name, before_ms=before, after_ms=after, delta_ms=delta)
+        return EXIT_OK
+
+    emit('profile', objects=len(profile.records), total_ms=profile.total_ms(), peak_rss_kb=profile.peak_rss())
+    for name, total, count in profile.by_directory()[:args.top]:
+        emit('directory', directory=name, total_ms=total, objects=count)
+    for name, elapsed, rss, tool in profile.slowest(args.top):
+        emit('object', object=name, ms=elapsed, rss_kb=rss, tool=tool)
+    return EXIT_OK
+
+
+def cmd_history(km, args):
+    """Affiche l'historique des compilations"""
+    for entry in km.get_compilation_history()[:args.limit]:
+        emit('history', **entry)
+    return EXIT_OK
+
+
+def cmd_log(km, args):
+    """Première erreur (ou toutes les erreurs) du journal d'une compilation, avec contexte"""
+    from core.log_store import BuildLog
+
+    history = [entry for entry in km.get_compilation_history() if entry.get('details', {}).get('log')]
+    if args.index >= len(history):
+        emit('error', stage='log', message="Aucun journal pour cette compilation")
+        return EXIT_FAILED
+
+    log = BuildLog(history[args.index]['details']['log'])
+    index = log.index or {}
+    emit('log', path=str(log.path), lines=index.get('lines'),
+         errors=index.get('error_count', 0), warnings=index.get('warning_count', 0))
+    errors = log.errors() if args.all else [event for event in [log.first_error()] if event]
+    for line, text in errors:
+        start, lines = log.context(line, args.context, args.context)
+        emit('log_error', line=line + 1, text=text, context_start=start + 1, context=lines)
+    return EXIT_OK
+
+
+def cmd_template(km, args):
+    """Liste les templates ou affiche la pile résolue d'un template"""
+    from core.config_templates import TemplateError
+
+    templates = km.config_templates
+    if args.action == "list":
+        for entry in templates.list_templates():
+            emit('template', **entry)
+        return EXIT_OK
+
+    if not args.name:
+        emit('error', stage='template', message="Nom du template requis")
+        return EXIT_FAILED
+    try:
+        resolved = templates.resolve(args.name)
+    except TemplateError as e:
+        emit('error', stage='template', message=str(e))
+        return EXIT_FAILED
+    emit('template', name=args.name, stack=resolved['stack'], base=resolved['base'],
+         overrides=resolved['overrides'])
+    for symbol, value in resolved['options'].items():
+        emit('option', symbol=f"CONFIG_{symbol}", value=value, template=resolved['origins'][symbol])
+    return EXIT_OK
+
+
+def cmd_kconfig(km, args):
+    """Recherche d'options Kconfig, impact d'une activation et raison d'une activation"""
+    from core.kernel_config import KernelConfig
+
+    index = km.get_kconfig_index()
+    if args.action == "index":
+        emit('kconfig_index', **index.update())
+        return EXIT_OK
+
+    if not args.query:
+        emit('error', stage='kconfig', message="Option ou recherche requise")
+        return EXIT_FAILED
+    config = KernelConfig(km.base_dir / "linux" / ".config")
+
+    if args.action == "search":
+        for entry in index.search(args.query, args.limit):
+            emit('symbol', name=f"CONFIG_{entry['name']}", type=entry['type'], prompt=entry['prompt'],
+                 value=config.get(entry['name'], 'n'))
+        return EXIT_OK
+
+    entry = index.symbol(args.query)
+    if entry is None:
+        emit('error', stage='kconfig', message=f"Option inconnue : {args.query}")
+        return EXIT_FAILED
+    emit('symbol', **entry, value=config.get(entry['name'], 'n'))
+    emit('impact', **index.impact(entry['name'], config))
+    emit('why', **index.why(entry['name'], config))
+    return EXIT_OK
+
+
+def cmd_config(km, args):
+    """Diff sémantique, delta des profils et defconfig minimal"""
+    from core.config_diff import savedefconfig, format_delta
+
+    try:
+        if args.action == "diff":
+            if not args.refs:
+                emit('error', stage='config', message="Configuration(s) à comparer requise(s)")
+                return EXIT_FAILED
+            old, new = args.refs[0], args.refs[1] if len(args.refs) > 1 else "current"
+            result = km.diff_configs(old, new)
+            for kind, entries in result.items():
+                for name, before, after in entries:
+                    emit('config_change', kind=kind, symbol=f"CONFIG_{name}", old=before, new=after)
+            emit('config_diff', old=old, new=new, **{kind: len(entries) for kind, entries in result.items()})
+        elif args.action == "delta":
+            if not args.refs:
+                emit('error', stage='config', message="Profil requis")
+                return EXIT_FAILED
+            write_output(km.profile_store.delta_text(args.refs[0]))
+        elif args.action == "savedefconfig":
+            ref = args.refs[0] if args.refs else "current"
+            with tempfile.NamedTemporaryFile('w', suffix=".config") as f:
+                f.write(format_delta(km.config_values(ref)))
+                f.flush()
+                text = savedefconfig(km.base_dir / "linux", f.name)
+            if args.output:
+                Path(args.output).write_text(text)
+                emit('finished', stage='config', output=args.output, options=len(text.splitlines()))
+            else:
+                write_output(text)
+        else:
+            for name, before, after in km.profile_store.compact():
+                emit('profile_compacted', name=name, bytes_before=before, bytes_after=after)
+    except (OSError, subprocess.CalledProcessError) as e:
+        emit('error', stage='config', message=str(e))
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+def cmd_inventory(km, args):
+    """Inventaire du matériel de cette machine (pour trim --inventory sur une autre)"""
+    from core.hardware_inventory import collect_inventory, save_inventory
+
+    inventory = collect_inventory()
+    if args.output:
+        save_inventory(inventory, args.output)
+        emit('inventory', hostname=inventory['hostname'], modules=len(inventory['modules']),
+             modaliases=len(inventory['modaliases']), output=args.output)
+    else:
+        write_output(json.dumps(inventory, indent=2) + "\n")
+    return EXIT_OK
+
+
+def cmd_trim(km, args):
+    """Réduit le .config au matériel (machine locale ou inventaires enregistrés)"""
+    from core.hardware_trim import load_inventory
+
+    paths = list(args.inventory or [])
+    if args.inventory_dir:
+        paths += sorted(str(path) for path in Path(args.inventory_dir).glob("*.json"))
+    try:
+        inventories = [load_inventory(path) for path in paths]
+        config, report = km.plan_hardware_trim(inventories, args.alias_file, args.keep or ())
+    except (OSError, ValueError) as e:
+        emit('error', stage='trim', message=str(e))
+        return EXIT_FAILED
+
+    emit('trim', **report)
+    if args.dry_run:
+        return EXIT_OK
+    try:
+        modules = km.apply_hardware_trim(config)
+    except (OSError, RuntimeError, subprocess.CalledProcessError) as e:
+        emit('error', stage='trim', message=str(e))
+        return EXIT_FAILED
+    if args.profile:
+        km.save_profile(args.profile, ", ".join(report['inventories']))
+    emit('finished', stage='trim', modules=modules, profile=args.profile, success=True)
+    return EXIT_OK
+
+
+def cmd_farm(km, args):
+    """Gère les hôtes d'aide de la compilation distribuée"""
+    from core.build_farm import parse_host
+
+    farm = km.build_farm
+    if args.action in ("add", "remove", "enable", "disable"):
+        if not args.host:
+            emit('error', stage='farm', message="Hôte requis (hôte[:port][/slots])")
+            return EXIT_FAILED
+        host = parse_host(args.host)
+        if args.action == "add":
+            farm.add_host(host['host'], host['port'], host['slots'])
+        elif args.action == "remove":
+            farm.remove_host(host['host'], host['port'])
+        else:
+            farm.set_enabled(host['host'], host['port'], args.action == "enable")
+    elif args.action == "check":
+        failed = False
+        for host, result in farm.check_hosts():
+            emit('host', **host, **result)
+            failed = failed or not result['ok']
+        return EXIT_FAILED if failed else EXIT_OK
+
+    for host in farm.get_hosts():
+        emit('host', **host)
+    return EXIT_OK
+
+
+def cmd_queue(km, args):
+    """Gère la file de compilation des variantes"""
+    queue = km.get_build_queue()
+
+    if args.action == "add":
+        if not args.version:
+            emit('error', stage='queue', message="Version requise")
+            return EXIT_FAILED
+        try:
+            job_id = queue.add_job(
+                args.version,
+                profile=args.profile,
+                config_file=args.file,
+                suffix=args.suffix,
+                use_ccache=args.ccache,
+                use_fakeroot=not args.no_fakeroot,
+                disable_module_compression=args.no_module_compression
+            )
+        except FileNotFoundError as e:
+            emit('error', stage='queue', message=f"Introuvable : {e}")
+            return EXIT_FAILED
+        emit('queued', id=job_id)
+    elif args.action == "cancel":
+        if not queue.cancel_job(args.id):
+            emit('error', stage='queue', message=f"Job introuvable ou terminé : {args.id}")
+            return EXIT_FAILED
+    elif args.action == "clear":
+        emit('cleared', count=queue.clear_finished())
+    elif args.action == "run":
+        if args.budget or args.parallel:
+            queue.set_limits(args.budget or queue.cpu_budget, args.parallel or queue.max_parallel)
+        queue.start(lambda job: emit('job', **job))
+        queue.wait()
+        queue.pause()
+        failed = [job for job in queue.get_jobs() if job['status'] == queue.STATUS_FAILED]
+        return EXIT_FAILED if failed else EXIT_OK
+    else:
+        for job in queue.get_jobs():
+            emit('job', **job)
+    return EXIT_OK
+
+
+def build_parser():
+    """Construit l'analyseur d'arguments"""
+    parser = argparse.ArgumentParser(
+        prog="kernelcustom",
+        description="KernelCustom Manager en ligne de commande (sortie JSON lines)"
+    )
+    parser.add_argument("--base-dir", help="Répertoire de travail (défaut: ~/KernelCustomManager/build)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("latest", help="Dernière version stable sur kernel.org")
+    p.set_defaults(func=cmd_latest)
+
+    p = sub.add_parser("download", help="Télécharger et extraire les sources")
+    p.add_argument("version", help="Version (ex: 6.11.6) ou 'stable'")
+    p.add_argument("--no-streaming", action="store_true", help="Télécharger l'archive puis extraire")
+    p.add_argument("--full", action="store_true", help="Ne pas utiliser les patchs incrémentaux")
+    p.set_defaults(func=cmd_download)
+
+    p = sub.add_parser("configure", help="Préparer le .config")
+    source = p.add_mutually_exclusive_group(required=True)
+    source.add_argument("--system", action="store_true", help="Config du kernel en cours")
+    source.add_argument("--file", help="Fichier de config à importer")
+    source.add_argument("--profile", help="Profil enregistré")
+    source.add_argument("--template", help="Template de configuration (voir: template list)")
+    p.set_defaults(func=cmd_configure)
+
+    p = sub.add_parser("template", help="Templates de configuration déclaratifs")
+    p.add_argument("action", choices=["list", "show"])
+    p.add_argument("name", nargs="?", help="Template (show) : nom avec ou sans .conf")
+    p.set_defaults(func=cmd_template)
+
+    p = sub.add_parser("build", help="Compiler et créer les paquets .deb")
+    p.add_argument("-j", "--jobs", type=int, help="Nombre de jobs make (défaut: selon CPU et mémoire disponible)")
+    p.add_argument("--suffix", default="", help="Suffixe LOCALVERSION (ex: --suffix=-custom)")
+    p.add_argument("--no-fakeroot", action="store_true", help="Ne pas utiliser fakeroot")
+    p.add_argument("--ccache", action="store_true", help="Utiliser le cache de compilation")
+    p.add_argument("--out-of-tree", action="store_true", help="Répertoire d'objets persistant (O=)")
+    p.add_argument("--sign", action="store_true", help="Signer les modules avant bindeb-pkg")
+    p.add_argument("--profile", action="store_true", help="Mesurer durée et mémoire de chaque objet")
+    p.add_argument("--compressor", choices=COMPRESSORS, help="Compression des paquets (dpkg-deb -Z)")
+    p.add_argument("--compression-level", type=int, help="Niveau de compression (zstd: 1-19, xz/gzip: 1-9)")
+    p.add_argument("--keep-debug-package", action="store_true",
+                   help="Construire aussi le paquet linux-image-*-dbg (ignoré par défaut)")
+    p.add_argument("--distcc", action="store_true", help="Distribuer la compilation sur les hôtes d'aide (farm)")
+    p.add_argument("--local-helpers", type=int, default=0, metavar="N",
+                   help="Lancer N distccd sur 127.0.0.1 pendant la compilation (essai sur une machine)")
+    p.add_argument("--tmpfs", action="store_true",
+                   help="Objets en mémoire (/dev/shm) si elle suffit, implique --out-of-tree")
+    p.add_argument("--limit-resources", action="store_true",
+                   help="Scope systemd (CPUWeight, IOWeight, MemoryHigh) ou nice/ionice")
+    p.add_argument("--no-module-compression", action="store_true",
+                   help="Forcer CONFIG_MODULE_COMPRESS_NONE (automatique sur Debian)")
+    p.set_defaults(func=cmd_build)
+
+    p = sub.add_parser("queue", help="File de compilation de plusieurs variantes")
+    p.add_argument("action", choices=["list", "add", "run", "cancel", "clear"])
+    p.add_argument("version", nargs="?", help="Version des sources (add)")
+    p.add_argument("--id", help="Identifiant du job (cancel)")
+    p.add_argument("--profile", help="Profil de configuration (add)")
+    p.add_argument("--file", help="Fichier de config (add, défaut: .config actuel)")
+    p.add_argument("--suffix", default="", help="Suffixe LOCALVERSION (ex: --suffix=-gaming)")
+    p.add_argument("--ccache", action="store_true", help="Utiliser le cache de compilation")
+    p.add_argument("--no-fakeroot", action="store_true", help="Ne pas utiliser fakeroot")
+    p.add_argument("--no-module-compression", action="store_true",
+                   help="Forcer CONFIG_MODULE_COMPRESS_NONE")
+    p.add_argument("--budget", type=int, help="Nombre total de jobs make (run, défaut: selon CPU et mémoire)")
+    p.add_argument("--parallel", type=int, help="Variantes compilées en même temps (run)")
+    p.set_defaults(func=cmd_queue)
+
+    p = sub.add_parser("kconfig", help="Options Kconfig : recherche, dépendances, sélections")
+    p.add_argument("action", choices=["search", "show", "index"])
+    p.add_argument("query", nargs="?", help="Texte recherché (search) ou option (show)")
+    p.add_argument("--limit", type=int, default=20)
+    p.set_defaults(func=cmd_kconfig)
+
+    p = sub.add_parser("config", help="Comparer des configurations, delta des profils, defconfig minimal")
+    p.add_argument("action", choices=["diff", "delta", "savedefconfig", "compact"])
+    p.add_argument("refs", nargs="*", help="current, system, profil, template ou fichier")
+    p.add_argument("-o", "--output", help="Fichier de sortie (savedefconfig)")
+    p.set_defaults(func=cmd_config)
+
+    p = sub.add_parser("inventory", help="Inventaire du matériel (modules chargés, modalias)")
+    p.add_argument("-o", "--output", help="Fichier JSON de l'inventaire")
+    p.set_defaults(func=cmd_inventory)
+
+    p = sub.add_parser("trim", help="Désactiver les modules dont le matériel n'a pas besoin")
+    p.add_argument("--inventory", action="append", help="Inventaire enregistré (défaut: cette machine)")
+    p.add_argument("--inventory-dir", help="Tous les inventaires (*.json) d'un dossier : une config pour la flotte")
+    p.add_argument("--alias-file", action="append", help="modules.alias (défaut: kernel en cours)")
+    p.add_argument("--keep", action="append", help="Option à garder en plus de la liste de sécurité")
+    p.add_argument("--dry-run", action="store_true", help="Rapport seulement, .config inchangé")
+    p.add_argument("--profile", help="Enregistrer la config réduite sous ce profil")
+    p.set_defaults(func=cmd_trim)
+
+    p = sub.add_parser("farm", help="Hôtes d'aide de la compilation distribuée (distcc)")
+    p.add_argument("action", choices=["list", "add", "remove", "enable", "disable", "check"])
+    p.add_argument("host", nargs="?", help="hôte[:port][/slots] (ex: 192.168.1.20/8)")
+    p.set_defaults(func=cmd_farm)
+
+    p = sub.add_parser("sign", help="Signer un kernel installé (modules et vmlinuz)")
+    p.add_argument("kernel", help="Version du kernel installé (uname -r)")
+    p.add_argument("--modules-only", action="store_true", help="Ne pas signer vmlinuz")
+    p.set_defaults(func=cmd_sign)
+
+    p = sub.add_parser("profile", help="Objets les plus lents d'une compilation profilée (build --profile)")
+    p.add_argument("index", type=int, nargs="?", default=0, help="0 = dernière compilation profilée")
+    p.add_argument("--against", type=int, help="Comparer à une autre compilation profilée")
+    p.add_argument("--top", type=int, default=20)
+    p.set_defaults(func=cmd_profile)
+
+    p = sub.add_parser("log", help="Première erreur du journal d'une compilation, avec contexte")
+    p.add_argument("index", type=int, nargs="?", default=0, help="0 = dernière compilation")
+    p.add_argument("--all", action="store_true", help="Toutes les erreurs indexées")
+    p.add_argument("--context", type=int, default=5, help="Lignes de contexte avant/après")
+    p.set_defaults(func=cmd_log)
+
+    p = sub.add_parser("history", help="Historique des compilations")
+    p.add_argument("--limit", type=int, default=10)
+    p.set_defaults(func=cmd_history)
+
+    return parser
+
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande"""
+    args = build_parser().parse_args(argv)
+    sys.stdout = sys.stderr
+    km = KernelManager(args.base_dir)
+
+    try:
+        return args.func(km, args)
+    except KeyboardInterrupt:
+        emit('error', message="Interrompu")
+        return EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
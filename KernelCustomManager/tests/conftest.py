@@ -0,0 +1,10 @@
+"""
+Configuration pytest : les modules s'importent depuis la racine de l'application
+(core.*, utils.*) comme au lancement de kernelcustom_manager.py
+"""
+
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
@@ -0,0 +1,86 @@
+"""Nettoyage des répertoires d'objets : jamais ceux des compilations en cours"""
+
+import os
+import time
+
+from core.build_dirs import BuildDirManager
+from core.kernel_manager import KernelManager
+
+
+def fill(build_dir, size):
+    (build_dir / "vmlinux.o").write_bytes(b"\0" * size)
+
+
+def test_garbage_collect_skips_locked_dirs(tmp_path):
+    manager = BuildDirManager(tmp_path / "builds", max_total_size=0)
+    running = manager.get_build_dir("6.1.0", "gaming")
+    other_job = manager.get_build_dir("6.1.0", "server")
+    idle = manager.get_build_dir("6.0.0", "gaming")
+    for build_dir in (running, other_job, idle):
+        fill(build_dir, 4096)
+
+    fd = manager.lock(other_job)
+    try:
+        removed = manager.garbage_collect(keep=running)
+    finally:
+        manager.release(fd)
+
+    assert removed == [idle]
+    assert running.exists() and other_job.exists() and not idle.exists()
+    # Verrou relâché : le répertoire redevient supprimable
+    assert other_job in manager.garbage_collect(keep=running)
+
+
+def test_old_dirs_removed_unless_locked(tmp_path):
+    manager = BuildDirManager(tmp_path / "builds", max_age_days=0)
+    build_dir = manager.get_build_dir("6.1.0", "default")
+    time.sleep(0.01)
+    fd = manager.lock(build_dir)
+    assert manager.garbage_collect() == []
+    manager.release(fd)
+    assert manager.garbage_collect() == [build_dir]
+
+
+def test_lock_recreates_removed_dir(tmp_path):
+    manager = BuildDirManager(tmp_path / "builds", max_total_size=0)
+    build_dir = manager.get_build_dir("6.1.0", "default")
+    fill(build_dir, 10)
+    manager.garbage_collect()
+    fd = manager.lock(build_dir)
+    try:
+        assert (build_dir / BuildDirManager.LOCK_FILE).exists()
+        assert manager.garbage_collect() == []
+    finally:
+        manager.release(fd)
+
+
+def test_key_is_per_profile():
+    assert BuildDirManager.make_key("6.1.0", "my profile/x") == "6.1.0--my_profile_x"
+    assert BuildDirManager.make_key("6.1.0", None) == "6.1.0--default"
+
+
+def test_interrupted_build_config_is_restored(tmp_path):
+    base_dir = tmp_path / "build"
+    km = KernelManager(base_dir)
+    tree = km.sources_dir / "linux-6.1.0"
+    tree.mkdir()
+    (base_dir / "linux").symlink_to(tree)
+    # Arrêt brutal pendant deux compilations hors arbre : .config resté dans les répertoires d'objets
+    older = km.build_dirs.get_build_dir("6.1.0", "server") / BuildDirManager.SOURCE_CONFIG
+    older.write_text("CONFIG_HZ=100\n")
+    os.utime(older, (1_000_000, 1_000_000))
+    latest = km.build_dirs.get_build_dir("6.1.0", "gaming") / BuildDirManager.SOURCE_CONFIG
+    latest.write_text("CONFIG_HZ=1000\n")
+    other = km.build_dirs.get_build_dir("6.10.0", "gaming") / BuildDirManager.SOURCE_CONFIG
+    other.write_text("CONFIG_HZ=300\n")
+
+    # Jamais supprimés par le nettoyage tant que le .config n'est pas rendu
+    km.build_dirs.max_total_size = 0
+    assert km.build_dirs.garbage_collect() == []
+
+    KernelManager(base_dir)
+
+    assert (tree / ".config").read_text() == "CONFIG_HZ=1000\n"
+    assert not latest.exists() and not older.exists()
+    assert other.exists()
+    assert km.restore_source_config() is False
@@ -0,0 +1,194 @@
+"""Contrôle de santé de la ferme distcc sur la boucle locale"""
+
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from core.build_farm import BuildFarm, LocalHelpers, parse_host
+
+
+def recv_exact(conn, size):
+    data = b""
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connexion fermée")
+        data += chunk
+    return data
+
+
+def recv_token(conn, name):
+    token = recv_exact(conn, 12).decode()
+    assert token[:4] == name
+    return int(token[4:], 16)
+
+
+def send_string(conn, name, data):
+    conn.sendall(f"{name}{len(data):08x}".encode() + data)
+
+
+class FakeDistccd:
+    """
+    Serveur parlant le protocole distcc 1 sur 127.0.0.1 : compile le source
+    reçu avec le compilateur local, ou renvoie une erreur de compilation
+    """
+
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.requests = []
+        self.sock = socket.create_server(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    self._handle(conn)
+                except (OSError, ConnectionError, AssertionError):
+                    pass
+
+    def _handle(self, conn):
+        recv_token(conn, "DIST")
+        args = [recv_exact(conn, recv_token(conn, "ARGV")).decode() for _ in range(recv_token(conn, "ARGC"))]
+        source = recv_exact(conn, recv_token(conn, "DOTI"))
+        self.requests.append(args)
+
+        status, stderr, obj = 1, b"kcm_probe.i: error: compiler not found\n", b""
+        if not self.broken:
+            with tempfile.TemporaryDirectory() as work:
+                (Path(work) / "kcm_probe.i").write_bytes(source)
+                result = subprocess.run(args, cwd=work, capture_output=True)
+                status, stderr = result.returncode, result.stderr
+                if status == 0:
+                    obj = (Path(work) / "kcm_probe.o").read_bytes()
+
+        conn.sendall(b"DONE00000001")
+        conn.sendall(f"STAT{status:08x}".encode())
+        send_string(conn, "SERR", stderr)
+        send_string(conn, "SOUT", b"")
+        send_string(conn, "DOTO", obj)
+
+    def close(self):
+        self.sock.close()
+
+    @property
+    def entry(self):
+        return {'host': "127.0.0.1", 'port': self.port, 'slots': 3}
+
+
+@pytest.fixture
+def helpers():
+    started = []
+
+    def start(**kwargs):
+        helper = FakeDistccd(**kwargs)
+        started.append(helper)
+        return helper
+
+    yield start
+    for helper in started:
+        helper.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+needs_gcc = pytest.mark.skipif(shutil.which("gcc") is None, reason="gcc absent")
+
+
+def test_parse_host():
+    assert parse_host("build1") == {'host': "build1", 'port': 3632, 'slots': 4}
+    assert parse_host("10.0.0.2:3700/8") == {'host': "10.0.0.2", 'port': 3700, 'slots': 8}
+    assert parse_host("build2/2") == {'host': "build2", 'port': 3632, 'slots': 2}
+
+
+@needs_gcc
+def test_probe_compiles_on_loopback_helper(helpers):
+    helper = helpers()
+
+    result = BuildFarm.probe("127.0.0.1", helper.port)
+
+    assert result['ok'], result
+    assert result['latency_ms'] >= 0
+    assert helper.requests == [["gcc", "-c", "kcm_probe.i", "-o", "kcm_probe.o"]]
+
+
+def test_probe_reports_compile_failure(helpers):
+    helper = helpers(broken=True)
+
+    result = BuildFarm.probe("127.0.0.1", helper.port)
+
+    assert not result['ok']
+    assert "compiler not found" in result['error']
+
+
+def test_probe_unreachable_host():
+    result = BuildFarm.probe("127.0.0.1", free_port(), timeout=1)
+
+    assert not result['ok'] and result['error']
+
+
+@needs_gcc
+def test_prepare_keeps_healthy_hosts_only(helpers, tmp_path):
+    healthy = helpers()
+    broken = helpers(broken=True)
+    farm = BuildFarm(tmp_path / "build_farm.json")
+    farm.add_host("127.0.0.1", broken.port, slots=5)
+    farm.add_host("127.0.0.1", free_port(), slots=5)
+    farm.add_host("127.0.0.1", healthy.port, slots=6)
+    farm.set_enabled("127.0.0.1", healthy.port, False)
+
+    # Seul hôte activé en bon état : l'hôte d'aide local passé en plus
+    plan = farm.prepare(4, extra_hosts=[healthy.entry])
+
+    assert plan['healthy'] == [f"127.0.0.1:{healthy.port}/3"]
+    assert plan['hosts'] == f"127.0.0.1:{healthy.port}/3 localhost/4"
+    assert plan['jobs'] == 7
+    assert sorted(entry['port'] for entry in plan['unhealthy']) == sorted([broken.port, farm.hosts[1]['port']])
+    # Configuration relue depuis le fichier
+    assert BuildFarm(tmp_path / "build_farm.json").get_hosts() == farm.get_hosts()
+
+
+def test_prepare_without_healthy_host_stays_local(helpers, tmp_path):
+    broken = helpers(broken=True)
+    farm = BuildFarm(tmp_path / "build_farm.json")
+
+    assert farm.prepare(4) is None
+    assert farm.prepare(4, extra_hosts=[broken.entry]) is None
+
+
+def test_apply_distributes_cc_only():
+    plan = {'hosts': "127.0.0.1:3700/2 localhost/4"}
+
+    env = {}
+    make_vars = BuildFarm.apply(plan, env, ["CC=gcc-13", "HOSTCC=gcc-13"])
+    assert make_vars == ["HOSTCC=gcc-13", "CC=distcc gcc-13"]
+    assert env['DISTCC_HOSTS'] == plan['hosts'] and env['DISTCC_FALLBACK'] == "1"
+
+    # Avec ccache, distcc n'est appelé qu'en cas de miss
+    env = {}
+    assert BuildFarm.apply(plan, env, ["CC=ccache gcc", "HOSTCC=ccache gcc"]) == ["CC=ccache gcc", "HOSTCC=gcc"]
+    assert env['CCACHE_PREFIX'] == "distcc"
+
+
+@pytest.mark.skipif(not LocalHelpers.is_available() or shutil.which("gcc") is None,
+                    reason="distccd ou gcc absent")
+def test_local_helpers_pass_health_check():
+    port = free_port()
+    with LocalHelpers(count=1, base_port=port, slots=1) as local:
+        results = [BuildFarm.probe(entry['host'], entry['port']) for entry in local.hosts]
+    assert all(result['ok'] for result in results), results
@@ -0,0 +1,32 @@
+"""File de compilation : changements d'état signalés à l'interface"""
+
+import pytest
+
+from core.build_queue import BuildQueue
+from core.kernel_manager import KernelManager
+
+
+@pytest.fixture
+def km(tmp_path):
+    km = KernelManager(tmp_path / "build")
+    tree = km.sources_dir / "linux-6.1.0"
+    tree.mkdir()
+    (tree / ".config").write_text("CONFIG_MODULES=y\n")
+    (km.base_dir / "linux").symlink_to(tree)
+    return km
+
+
+def test_removed_jobs_are_notified(km):
+    queue = BuildQueue(km, cpu_budget=2, max_parallel=2)
+    events = []
+    queue.callback = events.append
+    first = queue.add_job("6.1.0", config_file=str(km.base_dir / "linux" / ".config"))
+    second = queue.add_job("6.1.0", config_file=str(km.base_dir / "linux" / ".config"), suffix="-rt")
+    queue.cancel_job(second)
+    events.clear()
+
+    assert queue.remove_job(first)
+    assert queue.clear_finished() == 1
+
+    assert [(event['id'], event.get('removed')) for event in events] == [(first, True), (second, True)]
+    assert queue.get_jobs() == []
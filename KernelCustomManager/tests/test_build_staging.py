@@ -0,0 +1,81 @@
+"""Compilation en mémoire : le tmpfs part des objets sur disque et les y remet"""
+
+import os
+
+import pytest
+
+from core.build_dirs import BuildDirManager
+from core.build_staging import TmpfsStaging
+
+
+@pytest.fixture
+def disk_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(TmpfsStaging, "ROOT", tmp_path / "shm")
+    manager = BuildDirManager(tmp_path / "builds")
+    build_dir = manager.get_build_dir("6.1.0", "gaming")
+    (build_dir / ".config").write_text("CONFIG_HZ=1000\n")
+    (build_dir / "kernel").mkdir()
+    (build_dir / "kernel" / "fork.o").write_bytes(b"old object")
+    os.utime(build_dir / "kernel" / "fork.o", (1_000_000, 1_000_000))
+    # Lien créé par kbuild dans le répertoire d'objets
+    (build_dir / "source").symlink_to(tmp_path)
+    (build_dir / BuildDirManager.SOURCE_CONFIG).write_text("CONFIG_HZ=250\n")
+    fd = manager.lock(build_dir)
+    yield build_dir
+    manager.release(fd)
+
+
+def test_start_seeds_tmpfs_from_disk(disk_dir):
+    staging = TmpfsStaging(disk_dir)
+    tmp_dir = staging.start()
+    try:
+        assert staging.current_dir == tmp_dir
+        assert (tmp_dir / ".config").read_text() == "CONFIG_HZ=1000\n"
+        # Dates conservées : make ne recompile pas fork.o
+        assert (tmp_dir / "kernel" / "fork.o").stat().st_mtime == 1_000_000
+        assert (tmp_dir / "source").is_symlink()
+        for name in (BuildDirManager.LOCK_FILE, BuildDirManager.META_FILE, BuildDirManager.SOURCE_CONFIG):
+            assert not (tmp_dir / name).exists()
+    finally:
+        staging.finish()
+
+
+def test_successful_build_is_written_back(disk_dir):
+    staging = TmpfsStaging(disk_dir)
+    tmp_dir = staging.start()
+    (tmp_dir / "kernel" / "fork.o").write_bytes(b"new object")
+    (tmp_dir / "vmlinux").write_bytes(b"kernel")
+
+    staging.finish(keep=True)
+
+    assert not tmp_dir.exists()
+    assert (disk_dir / "kernel" / "fork.o").read_bytes() == b"new object"
+    assert (disk_dir / "vmlinux").read_bytes() == b"kernel"
+    assert (disk_dir / "source").is_symlink()
+    assert (disk_dir / BuildDirManager.SOURCE_CONFIG).exists()
+    assert staging.summary()['synced']
+
+
+def test_failed_build_leaves_disk_untouched(disk_dir):
+    staging = TmpfsStaging(disk_dir)
+    tmp_dir = staging.start()
+    (tmp_dir / "kernel" / "fork.o").write_bytes(b"half written")
+
+    staging.finish(keep=False)
+
+    assert not tmp_dir.exists()
+    assert (disk_dir / "kernel" / "fork.o").read_bytes() == b"old object"
+    assert not staging.summary()['synced']
+
+
+def test_spill_over_existing_objects(disk_dir):
+    staging = TmpfsStaging(disk_dir)
+    tmp_dir = staging.start()
+    (tmp_dir / "kernel" / "exit.o").write_bytes(b"object")
+
+    assert staging.spill() == disk_dir
+    assert staging.current_dir == disk_dir
+    assert (disk_dir / "kernel" / "exit.o").exists()
+    assert (disk_dir / "source").is_symlink()
+    staging.finish(keep=True)
+    assert not tmp_dir.exists()
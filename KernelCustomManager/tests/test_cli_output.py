@@ -0,0 +1,79 @@
+"""
+Contrat de sortie de la ligne de commande : les événements JSON et les textes
+bruts (delta, defconfig, inventaire) sortent sur stdout, les messages sur stderr
+"""
+
+import json
+import subprocess
+import sys
+
+from conftest import APP_DIR
+
+
+CONFIG = """\
+CONFIG_64BIT=y
+CONFIG_MODULES=y
+CONFIG_EXT4_FS=m
+# CONFIG_DEBUG_INFO is not set
+"""
+
+# savedefconfig simulé : garde les options activées
+MAKEFILE = """\
+savedefconfig:
+\tgrep '^CONFIG_' $(KCONFIG_CONFIG) > defconfig
+"""
+
+
+def run_cli(base_dir, *args):
+    return subprocess.run([sys.executable, str(APP_DIR / "kernelcustom_cli.py"), "--base-dir", str(base_dir), *args],
+                          cwd=str(APP_DIR), capture_output=True, timeout=60)
+
+
+def make_tree(tmp_path):
+    linux = tmp_path / "linux"
+    linux.mkdir()
+    (linux / ".config").write_text(CONFIG)
+    (linux / "Makefile").write_text(MAKEFILE)
+    return linux
+
+
+def test_savedefconfig_goes_to_stdout(tmp_path):
+    linux = make_tree(tmp_path)
+    result = run_cli(tmp_path, "config", "savedefconfig")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout
+    assert sorted(result.stdout.decode().splitlines()) == ["CONFIG_64BIT=y", "CONFIG_EXT4_FS=m", "CONFIG_MODULES=y"]
+    # Le defconfig des sources n'est pas laissé derrière
+    assert not (linux / "defconfig").exists()
+
+
+def test_profile_delta_goes_to_stdout(tmp_path):
+    make_tree(tmp_path)
+    from core.profile_store import ProfileStore
+    ProfileStore(tmp_path / "profiles").save("base", tmp_path / "linux" / ".config")
+
+    result = run_cli(tmp_path, "config", "delta", "base")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout
+    assert "base " in result.stdout.decode()
+
+
+def test_events_are_json_lines(tmp_path):
+    make_tree(tmp_path)
+    result = run_cli(tmp_path, "config", "diff", "current", "current")
+    assert result.returncode == 0, result.stderr
+    events = [json.loads(line) for line in result.stdout.decode().splitlines()]
+    assert events[-1]['event'] == 'config_diff'
+
+
+def test_inventory_goes_to_stdout(tmp_path):
+    from core.hardware_trim import load_inventory
+
+    result = run_cli(tmp_path, "inventory")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout
+    inventory_file = tmp_path / "host.json"
+    inventory_file.write_bytes(result.stdout)
+    inventory = load_inventory(inventory_file)
+    assert isinstance(inventory['modules'], list)
+    assert 'cpu' in inventory
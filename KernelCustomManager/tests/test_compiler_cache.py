@@ -0,0 +1,48 @@
+"""Statistiques ccache par compilation (CCACHE_STATSLOG) et estimation du temps gagné"""
+
+from core.build_predictor import BuildPredictor, CCACHE_HIT_COST
+from core.compiler_cache import CompilerCache
+
+
+STATS_LOG = """\
+# /src/linux/kernel/fork.c
+direct_cache_hit
+# /src/linux/mm/slub.c
+preprocessed_cache_hit
+# /src/linux/fs/ext4/inode.c
+cache_miss
+# /src/linux/init/main.c
+direct_cache_hit
+"""
+
+
+def test_stats_log_counts_this_build_only(tmp_path):
+    log = tmp_path / "stats.log"
+    log.write_text(STATS_LOG)
+    assert CompilerCache.parse_stats_log(log) == {'hits': 3, 'misses': 1, 'hit_rate': 0.75}
+    assert CompilerCache.parse_stats_log(tmp_path / "missing.log") is None
+
+
+def test_stats_env_never_shared(tmp_path):
+    cache = CompilerCache(tmp_path / "ccache")
+    first = cache.get_env(tmp_path / "a.log")
+    second = cache.get_env(tmp_path / "b.log")
+    assert first['CCACHE_STATSLOG'] != second['CCACHE_STATSLOG']
+    assert first['CCACHE_DIR'] == second['CCACHE_DIR']
+
+
+def test_fully_cached_build_saves_time():
+    stats = {'hits': 1000, 'misses': 0}
+    # 1000 hits en 100 s : une vraie compilation coûte 100 / (1000 x CCACHE_HIT_COST) s
+    expected = int(1000 * (100 / (1000 * CCACHE_HIT_COST)) * (1 - CCACHE_HIT_COST))
+    assert CompilerCache.estimate_saved_seconds(stats, 100) == expected > 0
+    assert CompilerCache.estimate_saved_seconds({'hits': 0, 'misses': 10}, 100) == 0
+
+
+def test_saved_time_uses_history():
+    history = [{'success': True, 'duration_seconds': 600, 'details': {'objects': 1000, 'jobs': 1}}]
+    predictor = BuildPredictor(history, cpu_count=1)
+    per_object = predictor.seconds_per_object(1)
+    assert per_object == 0.6
+    assert CompilerCache.estimate_saved_seconds({'hits': 100, 'misses': 0}, 10, per_object) == int(100 * 0.6 * 0.9)
+    assert BuildPredictor([]).seconds_per_object(4) is None
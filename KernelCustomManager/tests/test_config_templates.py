@@ -0,0 +1,135 @@
+"""Résolution des templates : pile d'inclusion, dernière valeur gagnante, application en une passe"""
+
+import os
+import shutil
+
+import pytest
+
+from core.config_templates import BUNDLED_TEMPLATES_DIR, ConfigTemplates, TemplateError
+from core.kernel_config import KernelConfig
+
+
+def write(directory, name, text):
+    path = directory / name
+    path.write_text(text)
+    return path
+
+
+@pytest.fixture
+def templates(tmp_path):
+    user_dir = tmp_path / "user"
+    bundled_dir = tmp_path / "bundled"
+    user_dir.mkdir()
+    bundled_dir.mkdir()
+    write(bundled_dir, "base.config", "CONFIG_64BIT=y\nCONFIG_HZ=1000\n# CONFIG_DRM is not set\n")
+    write(bundled_dir, "common.conf", "description Commun\nbase base.config\nenable PREEMPT\nset-val HZ 300\n")
+    write(bundled_dir, "audio.conf", "include common\nmodule SND_HDA_INTEL\n")
+    write(bundled_dir, "desktop.conf",
+          "description Bureau\ninclude common\ninclude audio\nenable DRM\nset-val HZ 1000\n"
+          "set-str CONFIG_LOCALVERSION \"-desktop\"\n")
+    # Le répertoire utilisateur est prioritaire
+    write(user_dir, "audio.conf", "include common\ndisable SND\n")
+    return ConfigTemplates([user_dir, bundled_dir])
+
+
+def test_resolve_stack_and_last_value_wins(templates, tmp_path):
+    resolved = templates.resolve("desktop")
+
+    # common inclus deux fois (directement et par audio), développé une seule fois
+    assert resolved['stack'] == ["desktop.conf", "common.conf", "audio.conf"]
+    assert resolved['base'] == str((tmp_path / "bundled" / "base.config").resolve())
+    assert resolved['options'] == {
+        'PREEMPT': 'y', 'SND': 'n', 'DRM': 'y', 'HZ': '1000', 'LOCALVERSION': '"-desktop"'
+    }
+    assert list(resolved['options']) == ['PREEMPT', 'SND', 'DRM', 'HZ', 'LOCALVERSION']
+    assert resolved['origins']['HZ'] == "desktop.conf"
+    assert resolved['origins']['SND'] == "audio.conf"
+    assert resolved['overrides'] == [{
+        'symbol': 'HZ', 'value': '1000', 'replaced': '300', 'template': "common.conf", 'by': "desktop.conf"
+    }]
+
+
+def test_find_by_name_suffix_and_path(templates, tmp_path):
+    assert templates.find("audio") == (tmp_path / "user" / "audio.conf").resolve()
+    assert templates.find("base.config") == (tmp_path / "bundled" / "base.config").resolve()
+    assert templates.find(str(tmp_path / "bundled" / "audio.conf")) == (tmp_path / "bundled" / "audio.conf").resolve()
+    with pytest.raises(TemplateError):
+        templates.find("missing")
+
+
+def test_list_templates_prefers_user_dir(templates):
+    listed = {entry['name']: entry for entry in templates.list_templates()}
+
+    assert sorted(listed) == ["audio.conf", "base.config", "common.conf", "desktop.conf"]
+    assert "/user/" in listed["audio.conf"]['path']
+    assert listed["desktop.conf"]['description'] == "Bureau"
+    assert listed["base.config"]['kind'] == 'config'
+
+
+def test_errors(templates, tmp_path):
+    write(tmp_path / "user", "loop-a.conf", "include loop-b\n")
+    write(tmp_path / "user", "loop-b.conf", "include loop-a\n")
+    write(tmp_path / "user", "broken.conf", "enable\n")
+    write(tmp_path / "user", "dangling.conf", "include nowhere\n")
+
+    with pytest.raises(TemplateError, match="inclusion circulaire : loop-a.conf -> loop-b.conf -> loop-a.conf"):
+        templates.resolve("loop-a")
+    with pytest.raises(TemplateError, match="broken.conf:1"):
+        templates.resolve("broken")
+    with pytest.raises(TemplateError, match="nowhere"):
+        templates.resolve("dangling")
+
+
+def test_load_reparses_changed_file(templates, tmp_path):
+    path = tmp_path / "user" / "audio.conf"
+    assert templates.load(path)['steps'][-1] == ('SND', 'n')
+
+    path.write_text("module SND\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert templates.load(path)['steps'] == [('SND', 'm')]
+
+
+def test_apply_single_pass_from_base(templates, tmp_path):
+    source_dir = tmp_path / "linux"
+    source_dir.mkdir()
+    (source_dir / ".config").write_text("CONFIG_UNRELATED=y\n")
+
+    report = templates.apply("desktop", source_dir, olddefconfig=False)
+
+    config = KernelConfig(source_dir / ".config")
+    # Base reprise, .config existant remplacé
+    assert "UNRELATED" not in config
+    assert config.get("64BIT") == 'y'
+    assert config.get("DRM") == 'y'
+    assert config.get("SND") == 'n'
+    assert config.get_int("HZ") == 1000
+    assert config.get_str("LOCALVERSION") == "-desktop"
+    # HZ=1000 et 64BIT=y déjà présents dans la base
+    assert report['changed'] == 4
+    assert report['options'] == 5
+    assert report['olddefconfig_seconds'] is None
+
+
+@pytest.mark.skipif(shutil.which("make") is None, reason="make absent")
+def test_apply_reports_unmet_options(templates, tmp_path):
+    source_dir = tmp_path / "linux"
+    source_dir.mkdir()
+    # olddefconfig simulé : Kconfig refuse PREEMPT
+    (source_dir / "Makefile").write_text(
+        "olddefconfig:\n\tsed -i -e 's/^CONFIG_PREEMPT=y/# CONFIG_PREEMPT is not set/' .config\n")
+
+    report = templates.apply("desktop", source_dir)
+
+    assert report['unmet'] == [('PREEMPT', 'y', 'n')]
+    assert report['olddefconfig_seconds'] is not None
+
+
+def test_bundled_templates_resolve():
+    templates = ConfigTemplates([BUNDLED_TEMPLATES_DIR])
+    names = [entry['name'] for entry in templates.list_templates() if entry['kind'] == 'template']
+
+    assert names
+    for name in names:
+        assert templates.resolve(name)['stack'][0] == name
@@ -0,0 +1,180 @@
+"""
+Reprise des téléchargements contre un serveur http.server local qui coupe
+les connexions : RangedDownloader et le chemin par défaut (streaming) de
+download_kernel
+"""
+
+import io
+import os
+import tarfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import core.kernel_manager as kernel_manager
+from core.downloader import RangedDownloader
+from core.kernel_manager import KernelManager
+
+
+CHUNK = 16 * 1024
+
+
+class SmallChunks(RangedDownloader):
+    def __init__(self, **kwargs):
+        super().__init__(chunk_size=CHUNK, max_workers=2, timeout=5, retries=2, **kwargs)
+
+
+def make_archive(version):
+    """linux-<version>.tar.xz peu compressible (plusieurs morceaux)"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:xz') as tar:
+        for name, data in ((f"linux-{version}/Makefile", b"VERSION = 9\n"),
+                           (f"linux-{version}/blob", os.urandom(100 * 1024))):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class Server:
+    """Sert des fichiers avec Range ; cut coupe les GET complets, fail_starts coupe ces plages"""
+
+    def __init__(self, files):
+        self.files = files
+        self.cut = None
+        self.fail_starts = set()
+        self.requests = []   # (plage ou None, octets envoyés)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                data = server.files.get(self.path)
+                if data is None:
+                    self.send_error(404)
+                    return
+                header = self.headers.get('Range')
+                if header:
+                    start, end = (int(x) for x in header.split('=')[1].split('-'))
+                    end = min(end, len(data) - 1)
+                    body = data[start:end + 1]
+                    self.send_response(206)
+                    self.send_header('Content-Range', f"bytes {start}-{end}/{len(data)}")
+                    sent = len(body) // 2 if start in server.fail_starts else len(body)
+                else:
+                    start, body = None, data
+                    self.send_response(200)
+                    sent = server.cut if server.cut is not None else len(body)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', '"test"')
+                self.end_headers()
+                self.wfile.write(body[:sent])
+                server.requests.append((header, sent))
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def range_bytes(self):
+        return sum(sent for header, sent in self.requests if header and header != "bytes=0-0")
+
+
+@pytest.fixture
+def server():
+    server = Server({})
+    yield server
+    server.httpd.shutdown()
+
+
+def test_ranged_download_resumes_missing_chunks(tmp_path, server):
+    data = os.urandom(5 * CHUNK + 100)
+    server.files["/file"] = data
+    dest = tmp_path / "file"
+
+    server.fail_starts = {2 * CHUNK}
+    with pytest.raises(Exception):
+        SmallChunks().download(f"{server.url}/file", dest)
+    assert RangedDownloader.has_partial(dest)
+    assert not dest.exists()
+
+    server.fail_starts = set()
+    server.requests.clear()
+    SmallChunks().download(f"{server.url}/file", dest)
+    assert dest.read_bytes() == data
+    assert not RangedDownloader.has_partial(dest)
+    # Seul le morceau manquant est redemandé
+    assert [header for header, _ in server.requests if header != "bytes=0-0"] == \
+        [f"bytes={2 * CHUNK}-{3 * CHUNK - 1}"]
+
+
+def test_ranged_download_reuses_prefix(tmp_path, server):
+    data = os.urandom(4 * CHUNK)
+    server.files["/file"] = data
+    prefix = tmp_path / "file.stream"
+    prefix.write_bytes(data[:2 * CHUNK + 10])
+
+    SmallChunks().download(f"{server.url}/file", tmp_path / "file", prefix=prefix)
+    assert (tmp_path / "file").read_bytes() == data
+    assert not prefix.exists()
+    assert server.range_bytes() == 2 * CHUNK
+
+
+def test_ranged_download_ignores_wrong_size_partial(tmp_path, server):
+    """Fichier partiel écrasé (tronqué) sous un journal valide : on repart de zéro"""
+    data = os.urandom(3 * CHUNK)
+    server.files["/file"] = data
+    dest = tmp_path / "file"
+    server.fail_starts = {CHUNK}
+    with pytest.raises(Exception):
+        SmallChunks().download(f"{server.url}/file", dest)
+    (tmp_path / "file.part").write_bytes(b"garbage")
+
+    server.fail_starts = set()
+    SmallChunks().download(f"{server.url}/file", dest)
+    assert dest.read_bytes() == data
+
+
+@pytest.fixture
+def manager(tmp_path, server, monkeypatch):
+    monkeypatch.setattr(kernel_manager, "KERNEL_ORG_URL", server.url)
+    monkeypatch.setattr(kernel_manager, "RangedDownloader", SmallChunks)
+    km = KernelManager(tmp_path / "build")
+    # Pas d'outils kconfig ni d'index sur ces sources factices
+    km.prebuild_kconfig = lambda *args: None
+    km.get_kconfig_index = lambda *args: None
+    return km
+
+
+def test_streaming_download_resumes_after_interruption(manager, server):
+    archive = make_archive("9.9.9")
+    server.files["/v9.x/linux-9.9.9.tar.xz"] = archive
+    server.cut = len(archive) // 2
+
+    assert manager.download_kernel("9.9.9")
+    tree = manager.sources_dir / "linux-9.9.9"
+    assert (tree / "Makefile").read_text() == "VERSION = 9\n"
+    assert manager.source_cache.lookup("linux-9.9.9.tar.xz").read_bytes() == archive
+    # Seule la fin de l'archive est récupérée par plages
+    assert server.range_bytes() <= len(archive) - server.cut + CHUNK
+    downloads = manager.cache_dir / "downloads"
+    assert not list(downloads.iterdir())
+
+
+def test_streaming_download_resumes_ranged_partial(manager, server):
+    """Un téléchargement par plages interrompu est repris, sans relancer le flux"""
+    archive = make_archive("9.9.8")
+    server.files["/v9.x/linux-9.9.8.tar.xz"] = archive
+    server.fail_starts = {CHUNK}
+    assert not manager.download_kernel("9.9.8", streaming=False)
+    dest = manager.cache_dir / "downloads" / "linux-9.9.8.tar.xz"
+    assert RangedDownloader.has_partial(dest)
+
+    server.fail_starts = set()
+    server.requests.clear()
+    assert manager.download_kernel("9.9.8")
+    assert (manager.sources_dir / "linux-9.9.8" / "Makefile").exists()
+    assert all(header for header, _ in server.requests)
+    assert server.range_bytes() == CHUNK
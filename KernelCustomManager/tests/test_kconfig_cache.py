@@ -0,0 +1,59 @@
+"""Empreinte des Kconfig d'un arbre : mémorisée, invalidée par (mtime_ns, taille)"""
+
+import os
+
+from core.kconfig_cache import OlddefconfigCache
+
+
+def make_tree(root):
+    (root / "drivers" / "net").mkdir(parents=True)
+    (root / "Makefile").write_text("VERSION = 6\n")
+    (root / "Kconfig").write_text('source "drivers/Kconfig"\n')
+    (root / "drivers" / "Kconfig").write_text("config NET\n\tbool\n")
+    (root / "drivers" / "net" / "main.c").write_text("")
+    return root
+
+
+def bump(path, text):
+    """Réécrit un fichier en garantissant une date différente"""
+    stat = path.stat()
+    path.write_text(text)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_hash_memoized_and_invalidated(tmp_path, monkeypatch):
+    tree = make_tree(tmp_path / "linux")
+    cache = OlddefconfigCache(tmp_path / "cache")
+    first = cache.tree_hash(tree)
+
+    scans = []
+    original = OlddefconfigCache._scan_tree
+    monkeypatch.setattr(OlddefconfigCache, "_scan_tree",
+                        staticmethod(lambda *args: scans.append(args) or original(*args)))
+
+    assert cache.tree_hash(tree) == first
+    # Mémoire perdue (nouveau processus) : l'empreinte est relue sur disque
+    assert OlddefconfigCache(tmp_path / "cache").tree_hash(tree) == first
+    assert scans == []
+
+    # Fichier non Kconfig : le répertoire change, l'empreinte non
+    (tree / "drivers" / "net" / "extra.c").write_text("")
+    os.utime(tree / "drivers" / "net", ns=(0, 1))
+    assert cache.tree_hash(tree) == first
+    assert len(scans) == 1
+
+    bump(tree / "drivers" / "Kconfig", "config NET\n\ttristate\n")
+    edited = cache.tree_hash(tree)
+    assert edited != first
+
+    (tree / "drivers" / "net" / "Kconfig").write_text("config E1000\n\ttristate\n")
+    os.utime(tree / "drivers" / "net", ns=(0, 2))
+    assert cache.tree_hash(tree) not in (first, edited)
+
+
+def test_hash_independent_of_dates(tmp_path):
+    one = make_tree(tmp_path / "a")
+    other = make_tree(tmp_path / "b")
+    os.utime(other / "Kconfig", ns=(0, 12345))
+    assert OlddefconfigCache(tmp_path / "cache").tree_hash(one) == \
+        OlddefconfigCache(tmp_path / "cache2").tree_hash(other)
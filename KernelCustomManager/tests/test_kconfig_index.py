@@ -0,0 +1,118 @@
+"""Analyse des Kconfig, évaluation des expressions et requêtes du graphe"""
+
+from core.kconfig_index import KconfigIndex, evaluate, expression_symbols, parse_kconfig
+from core.kernel_config import KernelConfig
+
+
+KCONFIG = """\
+menu "Networking"
+	depends on NET
+
+config E1000
+	tristate "Intel PRO/1000"
+	depends on PCI && HAS_IOMEM # commentaire
+	select MII
+	imply PTP_CLOCK if X86
+	help
+	  Pilote de la carte Intel.
+
+	  Deuxième paragraphe.
+
+if X86
+config MII
+	tristate
+endif
+
+endmenu
+
+source "drivers/Kconfig"
+"""
+
+
+def values(**options):
+    return lambda name: options.get(name)
+
+
+def test_evaluate_tristate_logic():
+    assert evaluate("A && B", values(A='y', B='m')) == 1
+    assert evaluate("A || B", values(A='n', B='m')) == 1
+    assert evaluate("!A", values(A='m')) == 1
+    assert evaluate("!(A || B)", values()) == 2
+    assert evaluate("A && (B || !C)", values(A='y', C='y')) == 0
+
+
+def test_evaluate_comparisons_and_constants():
+    assert evaluate('NR_CPUS >= 64', values(NR_CPUS='128')) == 2
+    assert evaluate('NR_CPUS < 0x10', values(NR_CPUS='8')) == 2
+    assert evaluate('CC_VERSION_TEXT = "gcc"', values(CC_VERSION_TEXT='"gcc"')) == 2
+    assert evaluate('ARCH != "x86"', values(ARCH='"x86"')) == 0
+    assert evaluate("y", values()) == 2
+    assert evaluate("$(cc-option,-mfoo)", values()) == 2
+    # Illisible : considérée satisfaite
+    assert evaluate("A && (B", values(A='n')) == 2
+
+
+def test_expression_symbols():
+    assert expression_symbols('PCI && !FOO || BAR = "x" && $(success,true)') == ['PCI', 'FOO', 'BAR']
+
+
+def test_parse_kconfig():
+    result = parse_kconfig(KCONFIG)
+    e1000, mii = result['symbols']
+    assert e1000['name'] == 'E1000' and e1000['type'] == 'tristate'
+    assert e1000['prompt'] == "Intel PRO/1000"
+    assert e1000['context'] == ['NET']
+    assert e1000['depends'] == ['PCI && HAS_IOMEM']
+    assert e1000['selects'] == [['MII', '']]
+    assert e1000['implies'] == [['PTP_CLOCK', 'X86']]
+    assert e1000['help'] == "Pilote de la carte Intel. Deuxième paragraphe."
+    assert mii['context'] == ['NET', 'X86'] and mii['prompt'] is None
+    assert result['sources'] == [['source', 'drivers/Kconfig', []]]
+
+
+def make_index(tmp_path, text):
+    tree = tmp_path / "linux"
+    tree.mkdir()
+    (tree / "Kconfig").write_text(text)
+    index = KconfigIndex(tree, tmp_path / "index.json.gz", arch="x86")
+    index.update()
+    return index
+
+
+def test_impact_lists_each_target_once(tmp_path):
+    index = make_index(tmp_path, """\
+config ROOT
+	bool "root"
+	select A
+	select B
+	imply SHARED
+	imply BOTH
+
+config A
+	bool
+	imply SHARED
+
+config B
+	bool
+	imply SHARED
+	select BOTH
+
+config SHARED
+	bool "shared"
+
+config BOTH
+	bool
+	depends on MISSING
+""")
+    impact = index.impact("ROOT", KernelConfig(text="CONFIG_ROOT=y\n"))
+    assert sorted(target for target, _ in impact['selects']) == ['A', 'B', 'BOTH']
+    # SHARED impliquée trois fois, BOTH impliquée mais aussi sélectionnée
+    assert impact['implies'] == [('SHARED', 'ROOT')]
+    assert impact['unmet'] == [{'symbol': 'BOTH', 'expr': 'MISSING'}]
+
+
+def test_update_rereads_only_changed_files(tmp_path):
+    index = make_index(tmp_path, 'config A\n\tbool "a"\n')
+    assert index.update()['parsed'] == 0
+    assert KconfigIndex(index.source_dir, tmp_path / "index.json.gz", arch="x86").update()['parsed'] == 0
+    assert index.symbol("a")['name'] == 'A'
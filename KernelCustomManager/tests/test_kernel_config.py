@@ -0,0 +1,123 @@
+"""KernelConfig : relecture fidèle et modifications en diff minimal"""
+
+import os
+
+from core.kernel_config import KernelConfig, read_symbols, read_values
+
+SAMPLE = """#
+# Automatically generated file; DO NOT EDIT.
+# Linux/x86 6.1.0 Kernel Configuration
+#
+CONFIG_CC_VERSION_TEXT="gcc (GCC) 13.2.0"
+CONFIG_64BIT=y
+CONFIG_LOCALVERSION="-custom \\"rt\\""
+# CONFIG_DEBUG_INFO is not set
+CONFIG_EXT4_FS=m
+CONFIG_HZ=1000
+CONFIG_PHYSICAL_START=0x1000000
+
+#
+# General setup
+#
+"""
+
+
+def test_roundtrip_preserves_text(tmp_path):
+    path = tmp_path / ".config"
+    path.write_text(SAMPLE)
+
+    config = KernelConfig(path)
+
+    assert config.text() == SAMPLE
+    assert not config.modified
+    assert config.save() is False
+    # Même contenu écrit ailleurs sans modification : octet pour octet
+    copy = tmp_path / "copy.config"
+    assert config.save(copy) is True
+    assert copy.read_text() == SAMPLE
+
+
+def test_typed_reads():
+    config = KernelConfig(text=SAMPLE)
+
+    assert len(config) == 7
+    assert "CONFIG_64BIT" in config and "64BIT" in config
+    assert config.get_tristate("EXT4_FS") == 'm'
+    assert config.get_tristate("DEBUG_INFO") == 'n'
+    assert config.get_tristate("MISSING") == 'n'
+    assert config.get("DEBUG_INFO") == 'n'
+    assert config.get("MISSING", 'absent') == 'absent'
+    assert config.get_int("HZ") == 1000
+    assert config.get_int("PHYSICAL_START") == 0x1000000
+    assert config.get_int("LOCALVERSION", -1) == -1
+    assert config.get_str("LOCALVERSION") == '-custom "rt"'
+    assert config.symbols() == {"CONFIG_64BIT": 'y', "CONFIG_EXT4_FS": 'm'}
+    assert [name for name, _ in config.items()][:3] == ["CC_VERSION_TEXT", "64BIT", "LOCALVERSION"]
+
+
+def test_set_unset_remove_touch_only_their_lines(tmp_path):
+    path = tmp_path / ".config"
+    path.write_text(SAMPLE)
+    config = KernelConfig(path)
+
+    assert config.set("CONFIG_64BIT", True) is False
+    assert not config.modified
+    assert config.set("DEBUG_INFO", True) is True
+    assert config.set("EXT4_FS", False) is True
+    assert config.set("HZ", 250) is True
+    assert config.set_str("LOCALVERSION", "-gaming") is True
+    assert config.set_raw("PHYSICAL_START", "0x200000") is True
+    assert config.set("BTRFS_FS", 'm') is True
+    assert config.remove("CC_VERSION_TEXT") is True
+    assert config.remove("CC_VERSION_TEXT") is False
+    assert config.unset("BTRFS_FS") is True
+    assert config.save() is True
+
+    expected = (SAMPLE
+                .replace('CONFIG_CC_VERSION_TEXT="gcc (GCC) 13.2.0"\n', '')
+                .replace("# CONFIG_DEBUG_INFO is not set", "CONFIG_DEBUG_INFO=y")
+                .replace("CONFIG_EXT4_FS=m", "# CONFIG_EXT4_FS is not set")
+                .replace("CONFIG_HZ=1000", "CONFIG_HZ=250")
+                .replace('CONFIG_LOCALVERSION="-custom \\"rt\\""', 'CONFIG_LOCALVERSION="-gaming"')
+                .replace("CONFIG_PHYSICAL_START=0x1000000", "CONFIG_PHYSICAL_START=0x200000")
+                + "# CONFIG_BTRFS_FS is not set\n")
+    assert path.read_text() == expected
+
+    reread = KernelConfig(path)
+    assert reread.text() == expected
+    assert reread.get_tristate("DEBUG_INFO") == 'y'
+    assert reread.get_int("HZ") == 250
+    assert "CC_VERSION_TEXT" not in reread
+
+
+def test_save_keeps_file_mode(tmp_path):
+    path = tmp_path / ".config"
+    path.write_text(SAMPLE)
+    os.chmod(path, 0o600)
+
+    config = KernelConfig(path)
+    config.set("HZ", 300)
+    config.save()
+
+    assert path.stat().st_mode & 0o777 == 0o600
+    assert not list(tmp_path.glob(".config.*"))
+
+
+def test_read_values_follows_file_changes(tmp_path):
+    path = tmp_path / ".config"
+    path.write_text(SAMPLE)
+
+    values = read_values(path)
+    assert values["HZ"] == "1000" and values["DEBUG_INFO"] == 'n'
+    values["HZ"] = "1"
+    # Copie renvoyée : le cache n'est pas modifié par l'appelant
+    assert read_values(path)["HZ"] == "1000"
+
+    config = KernelConfig(path)
+    config.set("HZ", 100)
+    config.set("BTRFS_FS", 'y')
+    config.save()
+
+    assert read_values(path)["HZ"] == "100"
+    assert read_symbols(path)["CONFIG_BTRFS_FS"] == 'y'
+    assert read_values(tmp_path / "missing") == {}
@@ -0,0 +1,66 @@
+"""Déduplication des arbres de sources : reflink uniquement, jamais de lien physique"""
+
+import errno
+import os
+
+import pytest
+
+from core import source_cache
+from core.source_cache import SourceCache
+
+
+def make_trees(tmp_path):
+    reference = tmp_path / "linux-6.1"
+    tree = tmp_path / "linux-6.1-rt"
+    for root in (reference, tree):
+        (root / "kernel").mkdir(parents=True)
+        (root / "kernel" / "fork.c").write_text("int fork;\n")
+        (root / "Makefile").write_text("all:\n")
+    os.utime(tree / "kernel" / "fork.c", (1_000_000, 1_000_000))
+    return tree, reference
+
+
+def test_dedup_without_reflink_leaves_tree_untouched(tmp_path, monkeypatch):
+    tree, reference = make_trees(tmp_path)
+
+    def no_reflink(src, dst, fallback='copy'):
+        assert fallback is None
+        raise OSError(errno.EOPNOTSUPP, "reflink non supporté")
+
+    monkeypatch.setattr(source_cache, "clone_file", no_reflink)
+
+    assert SourceCache.dedup_tree(tree, reference) == (0, 0)
+    for rel in ("kernel/fork.c", "Makefile"):
+        assert (tree / rel).stat().st_ino != (reference / rel).stat().st_ino
+        assert (tree / rel).stat().st_nlink == 1
+    assert not list(tree.rglob(".*.dedup"))
+
+
+def test_dedup_keeps_tree_timestamps(tmp_path, monkeypatch):
+    tree, reference = make_trees(tmp_path)
+
+    def fake_reflink(src, dst, fallback='copy'):
+        # Reflink simulé par une copie : inode propre, contenu identique
+        dst.write_bytes(src.read_bytes())
+        return 'reflink'
+
+    monkeypatch.setattr(source_cache, "clone_file", fake_reflink)
+
+    count, saved = SourceCache.dedup_tree(tree, reference)
+
+    assert count == 2 and saved == len("int fork;\n") + len("all:\n")
+    fork = (tree / "kernel" / "fork.c").stat()
+    assert fork.st_mtime == 1_000_000
+    assert fork.st_ino != (reference / "kernel" / "fork.c").stat().st_ino
+
+
+def test_clone_file_never_hardlinks(tmp_path):
+    src = tmp_path / "src"
+    src.write_text("data")
+    dst = tmp_path / "dst"
+    try:
+        mode = source_cache.clone_file(src, dst, fallback=None)
+    except OSError:
+        pytest.skip("reflink non supporté sur ce système de fichiers")
+    assert mode == 'reflink'
+    assert dst.stat().st_ino != src.stat().st_ino
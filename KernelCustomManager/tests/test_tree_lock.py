@@ -0,0 +1,106 @@
+"""Verrou des arbres de sources partagé entre la file, l'interface et la ligne de commande"""
+
+import subprocess
+import sys
+
+import pytest
+
+from conftest import APP_DIR
+from core.build_queue import BuildQueue
+from core.builder import KernelBuilder
+from core.kernel_manager import KernelManager
+from core.tree_lock import SourceTreeBusy, SourceTreeLock
+
+
+@pytest.fixture
+def km(tmp_path):
+    km = KernelManager(tmp_path / "build")
+    tree = km.sources_dir / "linux-6.1.0"
+    tree.mkdir()
+    (tree / ".config").write_text("CONFIG_MODULES=y\n")
+    (km.base_dir / "linux").symlink_to(tree)
+    return km
+
+
+def test_shared_and_exclusive(tmp_path):
+    tree = tmp_path / "linux-6.1.0"
+    tree.mkdir()
+    first, second = SourceTreeLock(tmp_path / "locks", tree), SourceTreeLock(tmp_path / "locks", tree)
+    with first.hold():
+        second.acquire()
+        second.release()
+        with pytest.raises(SourceTreeBusy):
+            second.acquire(exclusive=True)
+    with second.hold(exclusive=True):
+        assert first.is_busy()
+    assert not first.is_busy(exclusive=True)
+
+
+def test_lock_is_seen_by_other_processes(km):
+    holder = subprocess.Popen(
+        [sys.executable, "-c",
+         "import sys; from core.tree_lock import SourceTreeLock; "
+         "lock = SourceTreeLock(sys.argv[1], sys.argv[2]); lock.acquire(exclusive=True); "
+         "print('locked', flush=True); sys.stdin.read()",
+         str(km.locks_dir), str(km.base_dir / "linux")],
+        cwd=str(APP_DIR), stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        assert km.source_tree_busy()
+        with pytest.raises(SourceTreeBusy):
+            km.import_config(str(km.base_dir / "linux" / ".config"))
+    finally:
+        holder.stdin.close()
+        holder.wait()
+    assert not km.source_tree_busy()
+
+
+def test_queue_leaves_busy_tree_untouched(km):
+    queue = BuildQueue(km, cpu_budget=2, max_parallel=2)
+    tree = km.sources_dir / "linux-6.1.0"
+    with km.source_tree_lock().hold(exclusive=True):
+        with pytest.raises(SourceTreeBusy):
+            queue._acquire_tree(tree)
+    assert (tree / ".config").exists()
+    assert not (tree / BuildQueue.STASH_NAME).exists()
+    assert tree not in queue._tree_users
+
+
+def test_queue_blocks_in_tree_edits(km):
+    queue = BuildQueue(km, cpu_budget=2, max_parallel=2)
+    tree = km.sources_dir / "linux-6.1.0"
+    queue._acquire_tree(tree)
+    try:
+        # .config mis de côté pour les compilations O= : personne d'autre n'y touche
+        assert (tree / BuildQueue.STASH_NAME).exists()
+        assert km.source_tree_busy()
+        assert not km.load_profile("absent")
+        with pytest.raises(SourceTreeBusy):
+            km.import_config(str(tree / BuildQueue.STASH_NAME))
+    finally:
+        queue._release_tree(tree)
+    assert (tree / ".config").exists()
+    assert not km.source_tree_busy()
+
+
+def test_in_tree_build_refused_while_busy(km):
+    events = []
+    builder = KernelBuilder(km, event_callback=events.append)
+    with km.source_tree_lock().hold():
+        result = builder.build(jobs=1)
+    assert not result['success'] and result['stage'] == 'prepare'
+    assert events[-1]['event'] == 'error'
+
+
+def test_prebuild_kconfig_skips_busy_tree(km, monkeypatch):
+    calls = []
+    monkeypatch.setattr(km.kconfig_cache, "prebuild", lambda source_dir, seed: calls.append(km.source_tree_busy()))
+    tree = km.sources_dir / "linux-6.1.0"
+
+    with km.source_tree_lock(tree).hold():
+        assert km.prebuild_kconfig(tree) is None
+    assert calls == []
+
+    km.prebuild_kconfig(tree)
+    # make olddefconfig lancé sous le verrou exclusif de l'arbre
+    assert calls == [True]